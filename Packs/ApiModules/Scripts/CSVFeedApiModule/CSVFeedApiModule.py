@@ -3,16 +3,24 @@ from CommonServerPython import *
 from CommonServerUserPython import *
 
 ''' IMPORTS '''
+import codecs
 import csv
-import gzip
+import itertools
 import urllib3
-from typing import Optional, Pattern, Dict, Any, Tuple, Union, List
+import zlib
+from typing import Optional, Pattern, Dict, Any, Tuple, Union, List, Iterator, Iterable
 
 # disable insecure warnings
 urllib3.disable_warnings()
 
 # Globals
 DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# The size of the chunks the feed content is read by, in bytes
+FEED_CHUNK_SIZE = 1024 * 1024
+# The number of indicators to create by a single createIndicators call
+CREATE_INDICATORS_BATCH_SIZE = 2000
+# The number of values to detect the indicator types of by a single auto_detect_indicator_types call
+DETECT_INDICATOR_TYPES_BATCH_SIZE = 2000
 
 
 class Client(BaseClient):
@@ -116,7 +124,16 @@ class Client(BaseClient):
         return r.prepare()
 
     def build_iterator(self, **kwargs):
-        results = []
+        return [{url: {'result': csvreader, 'no_update': no_update}}
+                for url, csvreader, no_update in self.iter_readers(**kwargs)]
+
+    def iter_readers(self, **kwargs):
+        """
+        Requests the feed of each url lazily - the request of a url is sent only when its reader is about to be
+        consumed, and its response is closed once the reader is exhausted.
+        Yields:
+            The url, the csv reader of its feed and whether the feed was not modified (the value for noUpdate).
+        """
         urls = self._base_url
         if not isinstance(urls, list):
             urls = [urls]
@@ -209,26 +226,54 @@ class Client(BaseClient):
             if skip_first_line:
                 next(csvreader)
             no_update = get_no_update_value(r, url) if is_demisto_version_ge('6.5.0') else True
-            results.append({url: {'result': csvreader, 'no_update': no_update}})
-
-        return results
+            yield url, csvreader, no_update
 
     def get_feed_content_divided_to_lines(self, url, raw_response):
-        """Fetch feed data and divides its content to lines
+        """Fetch feed data and divides its content to lines.
+        The content is read, unzipped and decoded chunk by chunk, so the whole feed is never held in memory.
 
         Args:
             url: Current feed's url.
             raw_response: The raw response from the feed's url.
 
         Returns:
-            List. List of lines from the feed content.
+            Iterator. The lines of the feed content. The response is closed once they are exhausted.
         """
+        content_chunks = raw_response.iter_content(chunk_size=FEED_CHUNK_SIZE)
         if self.feed_url_to_config and self.feed_url_to_config.get(url).get('is_zipped_file'):  # type: ignore
-            response_content = gzip.decompress(raw_response.content)
-        else:
-            response_content = raw_response.content
+            content_chunks = iter_gunzipped_chunks(content_chunks)
+
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        last_line = ''
+        try:
+            for chunk in content_chunks:
+                lines = (last_line + decoder.decode(chunk)).split('\n')
+                last_line = lines.pop()
+                yield from lines
+            yield last_line + decoder.decode(b'', final=True)
+        finally:
+            # release the connection as soon as the content was read
+            raw_response.close()
+
 
-        return response_content.decode(self.encoding).split('\n')
+def iter_gunzipped_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Unzips gzip content chunk by chunk.
+    Args:
+        chunks: The chunks of the gzip content, which may consist of several gzip members (as gzip.decompress allows).
+    Returns:
+        The chunks of the unzipped content.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)  # 16 + MAX_WBITS means gzip format
+    for chunk in chunks:
+        while chunk:
+            yield decompressor.decompress(chunk)
+            # the data after the end of a gzip member is the beginning of the next member
+            chunk = decompressor.unused_data
+            if chunk:
+                yield decompressor.flush()
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    yield decompressor.flush()
 
 
 def get_no_update_value(response: requests.models.Response, url: str) -> bool:
@@ -283,6 +328,44 @@ def determine_indicator_type(indicator_type, default_indicator_type, auto_detect
     return indicator_type
 
 
+def determine_indicator_types(indicator_type, default_indicator_type, auto_detect, values):
+    """
+    Detect the indicator types of a batch of values, the same as determine_indicator_type detects each of them.
+    Args:
+        indicator_type: (str) Indicator type given in the config.
+        default_indicator_type: Indicator type which was inserted as a param of the integration by user.
+        auto_detect: (bool) True whether auto detection of the indicator type is wanted.
+        values: (list) The values which we'd like to get the indicator types of.
+    Returns:
+        List of the indicator types after detection, by the order of the values.
+    """
+    if auto_detect and values:
+        indicator_types = auto_detect_indicator_types(values)
+    else:
+        indicator_types = [indicator_type] * len(values)
+    return [indicator_type or default_indicator_type for indicator_type in indicator_types]
+
+
+def iter_with_indicator_types(items: Iterable[Tuple[Any, str]], indicator_type, default_indicator_type,
+                              auto_detect) -> Iterator[Tuple[Any, str, str]]:
+    """
+    Detects the indicator types of the values lazily, in batches of DETECT_INDICATOR_TYPES_BATCH_SIZE values.
+    Args:
+        items: The (item, value) pairs to detect the indicator types of their values.
+        indicator_type: (str) Indicator type given in the config.
+        default_indicator_type: Indicator type which was inserted as a param of the integration by user.
+        auto_detect: (bool) True whether auto detection of the indicator type is wanted.
+    Returns:
+        Iterator of the (item, value, indicator type) of the items, by their order.
+    """
+    items = iter(items)
+    for items_batch in iter(lambda: list(itertools.islice(items, DETECT_INDICATOR_TYPES_BATCH_SIZE)), []):
+        indicator_types = determine_indicator_types(indicator_type, default_indicator_type, auto_detect,
+                                                    [value for _, value in items_batch])
+        for (item, value), item_indicator_type in zip(items_batch, indicator_types):
+            yield item, value, item_indicator_type
+
+
 def module_test_command(client: Client, args):
     client.build_iterator()
     return 'ok', {}, {}
@@ -338,60 +421,103 @@ def create_fields_mapping(raw_json: Dict[str, Any], mapping: Dict[str, Union[Tup
 
 def fetch_indicators_command(client: Client, default_indicator_type: str, auto_detect: bool, limit: int = 0,
                              create_relationships: bool = False, **kwargs):
-    iterator = client.build_iterator(**kwargs)
-    relationships_of_indicator = []
-    indicators = []
+    indicators, no_update = iter_indicators(client, default_indicator_type, auto_detect, limit, create_relationships,
+                                            **kwargs)
+    return list(indicators), no_update
+
+
+def iter_indicators(client: Client, default_indicator_type: str, auto_detect: bool, limit: int = 0,
+                    create_relationships: bool = False, **kwargs) -> Tuple[Iterator[dict], bool]:
+    """
+    Fetches the indicators of the feeds lazily - the indicators are parsed as the feed content arrives.
+    Returns:
+        The iterator of the indicators, and the value of the noUpdate argument of createIndicators.
+    """
+    readers = client.iter_readers(**kwargs)
     config = client.feed_url_to_config or {}
 
     # set noUpdate flag in createIndicators command True only when all the results from all the urls are True.
-    no_update = all([next(iter(item.values())).get('no_update', False) for item in iterator])
-
-    for url_to_reader in iterator:
-        for url, reader in url_to_reader.items():
+    # The urls are requested only until one of them was modified, the rest are requested when their indicators are
+    # read, so their connections are not left idle. noUpdate is not used before 6.5.0, so no url is requested early.
+    opened_readers = []
+    no_update = True
+    if is_demisto_version_ge('6.5.0'):
+        for url, reader, url_no_update in readers:
+            opened_readers.append((url, reader))
+            if not url_no_update:
+                no_update = False
+                break
+    url_to_reader = itertools.chain(opened_readers, ((url, reader) for url, reader, _ in readers))
+
+    def iter_values(reader, mapping):
+        for item in reader:
+            raw_json = dict(item)
+            fields_mapping = create_fields_mapping(raw_json, mapping) if mapping else {}
+            value = item.get(client.value_field) or fields_mapping.get('Value')
+            if not value and len(item) > 1:
+                value = next(iter(item.values()))
+            if value:
+                yield (raw_json, fields_mapping), value
+
+    def indicators_generator():
+        relationships_of_indicator = []
+        count = 0
+        for url, reader in url_to_reader:
             mapping = config.get(url, {}).get('mapping', {})
-            for item in reader.get('result', []):
-                raw_json = dict(item)
-                fields_mapping = create_fields_mapping(raw_json, mapping) if mapping else {}
-                value = item.get(client.value_field) or fields_mapping.get('Value')
-                if not value and len(item) > 1:
-                    value = next(iter(item.values()))
-                if value:
-                    raw_json['value'] = value
-                    conf_indicator_type = config.get(url, {}).get('indicator_type')
-                    indicator_type = determine_indicator_type(conf_indicator_type, default_indicator_type, auto_detect,
-                                                              value)
-                    raw_json['type'] = indicator_type
-                    # if relationships param is True and also the url returns relationships
-                    if create_relationships and config.get(url, {}).get('relationship_name'):
-                        if fields_mapping.get('relationship_entity_b'):
-                            relationships_lst = EntityRelationship(
-                                name=config.get(url, {}).get('relationship_name'),
-                                entity_a=value,
-                                entity_a_type=indicator_type,
-                                entity_b=fields_mapping.get('relationship_entity_b'),
-                                entity_b_type=FeedIndicatorType.indicator_type_by_server_version(
-                                    config.get(url, {}).get('relationship_entity_b_type')),
-                            )
-                            relationships_of_indicator = [relationships_lst.to_indicator()]
-
-                    indicator = {
-                        'value': value,
-                        'type': indicator_type,
-                        'rawJSON': raw_json,
-                        'fields': fields_mapping,
-                        'relationships': relationships_of_indicator,
-                    }
-                    indicator['fields']['tags'] = client.tags
-
-                    if client.tlp_color:
-                        indicator['fields']['trafficlightprotocol'] = client.tlp_color
-
-                    indicators.append(indicator)
-                    # exit the loop if we have more indicators than the limit
-                    if limit and len(indicators) >= limit:
-                        return indicators, no_update
-
-    return indicators, no_update
+            conf_indicator_type = config.get(url, {}).get('indicator_type')
+            for (raw_json, fields_mapping), value, indicator_type in iter_with_indicator_types(
+                    iter_values(reader, mapping), conf_indicator_type, default_indicator_type, auto_detect):
+                raw_json['value'] = value
+                raw_json['type'] = indicator_type
+                # if relationships param is True and also the url returns relationships
+                if create_relationships and config.get(url, {}).get('relationship_name'):
+                    if fields_mapping.get('relationship_entity_b'):
+                        relationships_lst = EntityRelationship(
+                            name=config.get(url, {}).get('relationship_name'),
+                            entity_a=value,
+                            entity_a_type=indicator_type,
+                            entity_b=fields_mapping.get('relationship_entity_b'),
+                            entity_b_type=FeedIndicatorType.indicator_type_by_server_version(
+                                config.get(url, {}).get('relationship_entity_b_type')),
+                        )
+                        relationships_of_indicator = [relationships_lst.to_indicator()]
+
+                indicator = {
+                    'value': value,
+                    'type': indicator_type,
+                    'rawJSON': raw_json,
+                    'fields': fields_mapping,
+                    'relationships': relationships_of_indicator,
+                }
+                indicator['fields']['tags'] = client.tags
+
+                if client.tlp_color:
+                    indicator['fields']['trafficlightprotocol'] = client.tlp_color
+
+                yield indicator
+                count += 1
+                # exit the loop if we have more indicators than the limit
+                if limit and count >= limit:
+                    return
+
+    return indicators_generator(), no_update
+
+
+def create_indicators_in_batches(indicators: Iterable[dict], no_update: bool):
+    """
+    Creates the indicators in batches, as they arrive, so all the indicators of the feed are never held in memory.
+    Args:
+        indicators: The indicators to create.
+        no_update: The value of the noUpdate argument of createIndicators.
+    """
+    # check if the version is higher than 6.5.0 so we can use noUpdate parameter
+    create_indicators_kwargs = {'noUpdate': no_update} if is_demisto_version_ge('6.5.0') else {}
+    indicators = iter(indicators)
+    indicators_batch = list(itertools.islice(indicators, CREATE_INDICATORS_BATCH_SIZE))
+    # createIndicators is called also if there are no indicators
+    demisto.createIndicators(indicators_batch, **create_indicators_kwargs)  # type: ignore
+    for indicators_batch in iter(lambda: list(itertools.islice(indicators, CREATE_INDICATORS_BATCH_SIZE)), []):
+        demisto.createIndicators(indicators_batch, **create_indicators_kwargs)  # type: ignore
 
 
 def get_indicators_command(client, args: dict, tags: Optional[List[str]] = None):
@@ -427,29 +553,14 @@ def feed_main(feed_name, params=None, prefix=''):   # pragma: no cover
     }
     try:
         if command == 'fetch-indicators':
-            indicators, no_update = fetch_indicators_command(
+            indicators, no_update = iter_indicators(
                 client,
                 params.get('indicator_type'),
                 params.get('auto_detect_type'),
                 params.get('limit'),
                 params.get('create_relationships')
             )
-
-            # check if the version is higher than 6.5.0 so we can use noUpdate parameter
-            if is_demisto_version_ge('6.5.0'):
-                if not indicators:
-                    demisto.createIndicators(indicators, noUpdate=no_update)  # type: ignore
-                else:
-                    # we submit the indicators in batches
-                    for b in batch(indicators, batch_size=2000):
-                        demisto.createIndicators(b, noUpdate=no_update)  # type: ignore
-            else:
-                # call createIndicators without noUpdate arg
-                if not indicators:
-                    demisto.createIndicators(indicators)  # type: ignore
-                else:
-                    for b in batch(indicators, batch_size=2000):  # type: ignore
-                        demisto.createIndicators(b)
+            create_indicators_in_batches(indicators, no_update)
 
         else:
             args = demisto.args()
@@ -148,7 +148,171 @@ def test_get_feed_content():
             m.get(url, content=feed_url_to_config.get(url).get('content'))
             raw_response = requests.get(url)
 
-            assert client.get_feed_content_divided_to_lines(url, raw_response) == expected_output
+            assert list(client.get_feed_content_divided_to_lines(url, raw_response)) == expected_output
+
+
+@pytest.mark.parametrize('is_zipped_file', [False, True])
+def test_get_feed_content_chunks(mocker, is_zipped_file):
+    """
+    Given
+    - A feed content (zipped or not, where the zipped content consists of 2 gzip members), which is read in small
+      chunks that split the lines and a multi-byte character
+    When
+    - Dividing the feed content to lines
+    Then
+    - Ensure the lines are the same as the lines of the whole content
+    """
+    import gzip
+    content = 'value,name\n1.1.1.1,café\n2.2.2.2,naïve\n\n3.3.3.3,x\n'
+    raw_content = content.encode('utf8')
+    if is_zipped_file:
+        raw_content = gzip.compress(content[:20].encode('utf8')) + gzip.compress(content[20:].encode('utf8'))
+    mocker.patch('CSVFeedApiModule.FEED_CHUNK_SIZE', 3)
+    url = 'https://ipstack.com'
+    client = Client(url=url, feed_url_to_config={url: {'is_zipped_file': is_zipped_file}}, encoding='utf8')
+
+    with requests_mock.Mocker() as m:
+        m.get(url, content=raw_content)
+        raw_response = requests.get(url, stream=True)
+
+        assert list(client.get_feed_content_divided_to_lines(url, raw_response)) == content.split('\n')
+
+
+def test_create_indicators_in_batches(mocker):
+    """
+    Given
+    - 4500 indicators, fetched lazily
+    When
+    - Creating the indicators
+    Then
+    - Ensure the indicators are created in batches of 2000, with the noUpdate argument
+    """
+    mocker.patch('CommonServerPython.get_demisto_version', return_value={"version": "6.5.0"})
+    create_indicators_mock = mocker.patch.object(demisto, 'createIndicators')
+    indicators = ({'value': str(i), 'type': 'IP'} for i in range(4500))
+
+    create_indicators_in_batches(indicators, no_update=True)
+
+    assert [len(call[0][0]) for call in create_indicators_mock.call_args_list] == [2000, 2000, 500]
+    assert all(call[1] == {'noUpdate': True} for call in create_indicators_mock.call_args_list)
+
+
+def test_create_indicators_in_batches_no_indicators(mocker):
+    """
+    Given
+    - No indicators
+    When
+    - Creating the indicators
+    Then
+    - Ensure createIndicators is called once with an empty list
+    """
+    mocker.patch('CommonServerPython.get_demisto_version', return_value={"version": "6.2.0"})
+    create_indicators_mock = mocker.patch.object(demisto, 'createIndicators')
+
+    create_indicators_in_batches(iter([]), no_update=False)
+
+    create_indicators_mock.assert_called_once_with([])
+
+
+def test_iter_indicators_requests_urls_lazily(mocker):
+    """
+    Given
+    - 2 feed urls, the first one was modified
+    When
+    - Fetching the indicators lazily
+    Then
+    - Ensure noUpdate is False, and only the first url is requested before its indicators are read
+    - Ensure the second url is requested only when its indicators are read
+    - Ensure each response is closed once its content was read
+    """
+    mocker.patch('CommonServerPython.get_demisto_version', return_value={"version": "6.5.0"})
+    mocker.patch.object(demisto, 'getLastRun', return_value={})
+    mocker.patch.object(demisto, 'setLastRun')
+    close_mock = mocker.patch.object(requests.Response, 'close')
+    with requests_mock.Mocker() as m:
+        m.get('https://test.com/1', content=b'1.1.1.1\n2.2.2.2')
+        m.get('https://test.com/2', content=b'3.3.3.3')
+        client = Client(url=['https://test.com/1', 'https://test.com/2'], fieldnames='value', escapechar='\\')
+
+        indicators, no_update = iter_indicators(client, default_indicator_type='IP', auto_detect=False)
+        assert no_update is False
+        assert m.call_count == 1
+
+        assert [next(indicators)['value'] for _ in range(2)] == ['1.1.1.1', '2.2.2.2']
+        assert m.call_count == 1
+        assert close_mock.call_count == 1
+
+        assert next(indicators)['value'] == '3.3.3.3'
+        assert m.call_count == 2
+        assert close_mock.call_count == 2
+
+        assert list(indicators) == []
+
+
+def test_iter_indicators_not_modified_urls(mocker):
+    """
+    Given
+    - 2 feed urls, both were not modified
+    When
+    - Fetching the indicators lazily
+    Then
+    - Ensure both urls are requested to determine that noUpdate is True
+    """
+    mocker.patch('CommonServerPython.get_demisto_version', return_value={"version": "6.5.0"})
+    mocker.patch.object(demisto, 'getLastRun', return_value={})
+    mocker.patch.object(demisto, 'setLastRun')
+    with requests_mock.Mocker() as m:
+        m.get('https://test.com/1', status_code=304)
+        m.get('https://test.com/2', status_code=304)
+        client = Client(url=['https://test.com/1', 'https://test.com/2'], fieldnames='value', escapechar='\\')
+
+        indicators, no_update = iter_indicators(client, default_indicator_type='IP', auto_detect=False)
+        assert no_update is True
+        assert m.call_count == 2
+        assert list(indicators) == []
+
+
+def test_iter_with_indicator_types(mocker):
+    """
+    Given
+    - 5 values of different indicator types, with auto detection of the indicator type
+    When
+    - Detecting the indicator types of the values lazily
+    Then
+    - Ensure the values are detected in batches of DETECT_INDICATOR_TYPES_BATCH_SIZE values
+    - Ensure the types are the same as detecting each of the values, and the default type is used for unknown values
+    """
+    import CSVFeedApiModule
+    mocker.patch.object(CSVFeedApiModule, 'DETECT_INDICATOR_TYPES_BATCH_SIZE', 2)
+    detect_mock = mocker.patch.object(CSVFeedApiModule, 'auto_detect_indicator_types',
+                                      wraps=auto_detect_indicator_types)
+    values = ['1.1.1.1', 'test.com', '1.1.1.0/24', 'not an indicator', '8.8.8.8']
+    items = ((i, value) for i, value in enumerate(values))
+
+    results = list(iter_with_indicator_types(items, None, 'Default', True))
+
+    assert results == [(i, value, determine_indicator_type(None, 'Default', True, value))
+                       for i, value in enumerate(values)]
+    assert [result[2] for result in results] == ['IP', 'Domain', 'CIDR', 'Default', 'IP']
+    assert [call[0][0] for call in detect_mock.call_args_list] == [values[:2], values[2:4], values[4:]]
+
+
+def test_iter_with_indicator_types_no_auto_detect(mocker):
+    """
+    Given
+    - Values, without auto detection of the indicator type
+    When
+    - Detecting the indicator types of the values lazily
+    Then
+    - Ensure the configured indicator type is used, and the values are not detected
+    """
+    import CSVFeedApiModule
+    detect_mock = mocker.patch.object(CSVFeedApiModule, 'auto_detect_indicator_types')
+
+    results = list(iter_with_indicator_types([(0, '1.1.1.1'), (1, 'test.com')], 'URL', 'Default', False))
+
+    assert results == [(0, '1.1.1.1', 'URL'), (1, 'test.com', 'URL')]
+    detect_mock.assert_not_called()
 
 
 @pytest.mark.parametrize('date_string,expected_result', [
@@ -0,0 +1,81 @@
+from CommonServerPython import *
+from CommonServerUserPython import *
+
+import bisect
+import hashlib
+import ipaddress
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple, Union
+
+# The number of compiled range lists to keep, for scripts running in a reused process.
+MAX_CACHED_CIDR_RANGES_INDEXES = 32
+
+_CIDR_RANGES_INDEXES: 'OrderedDict[str, CidrRangesIndex]' = OrderedDict()
+
+
+class CidrRangesIndex:
+    """
+    A compiled list of CIDR ranges, for checking whether IP addresses are in any of the ranges.
+    The ranges are kept as sorted and merged integer intervals per IP version, so an IP is looked up with a binary
+    search instead of being compared with each of the ranges.
+    """
+
+    def __init__(self, cidr_ranges: Iterable[str]):
+        intervals: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for cidr in cidr_ranges:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+            intervals[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version, version_intervals in intervals.items():
+            merged: List[List[int]] = []
+            for start, end in sorted(version_intervals):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    def __contains__(self, ip_address: str) -> bool:
+        address = ipaddress.ip_address(ip_address.strip())
+        address_value = int(address)
+        position = bisect.bisect_right(self._starts[address.version], address_value) - 1
+        return position >= 0 and address_value <= self._ends[address.version][position]
+
+    def contains_all(self, ip_addresses: Iterable[str]) -> List[bool]:
+        """
+        Checks whether each of the IP addresses is in any of the ranges.
+
+        :type ip_addresses: ``Iterable[str]``
+        :param ip_addresses: The IP addresses to check.
+
+        :return: Whether each of the IP addresses is in the ranges, in the order of the addresses.
+        :rtype: ``List[bool]``
+        """
+        return [ip_address in self for ip_address in ip_addresses]
+
+
+def get_cidr_ranges_index(cidr_ranges: Union[str, List[str]]) -> CidrRangesIndex:
+    """
+    Returns the compiled index of the CIDR ranges. The index is cached by the content of the ranges list, so a script
+    that checks many IPs against the same ranges compiles them once.
+
+    :type cidr_ranges: ``Union[str, List[str]]``
+    :param cidr_ranges: A comma-separated string or a list of CIDR ranges.
+
+    :return: The index of the ranges.
+    :rtype: ``CidrRangesIndex``
+    """
+    cidr_ranges = [cidr.strip() for cidr in argToList(cidr_ranges)]
+    cache_key = hashlib.sha256('\n'.join(cidr_ranges).encode()).hexdigest()
+    index = _CIDR_RANGES_INDEXES.get(cache_key)
+    if index is None:
+        index = CidrRangesIndex(cidr_ranges)
+        _CIDR_RANGES_INDEXES[cache_key] = index
+        if len(_CIDR_RANGES_INDEXES) > MAX_CACHED_CIDR_RANGES_INDEXES:
+            _CIDR_RANGES_INDEXES.popitem(last=False)
+    else:
+        _CIDR_RANGES_INDEXES.move_to_end(cache_key)
+    return index
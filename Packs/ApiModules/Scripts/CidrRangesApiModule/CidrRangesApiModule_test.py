@@ -0,0 +1,77 @@
+import pytest
+
+from CidrRangesApiModule import CidrRangesIndex, get_cidr_ranges_index
+
+
+@pytest.mark.parametrize('ip_address, expected', [
+    ('10.5.5.5', True),
+    ('172.16.0.1', False),
+    ('192.168.255.255', True),
+    ('192.169.0.0', False),
+    ('1.2.3.4', True),
+    ('1.2.3.5', False),
+    ('2001:db8::1', True),
+    ('2001:db9::1', False),
+    (' 10.0.0.1 ', True),
+])
+def test_cidr_ranges_index(ip_address, expected):
+    """
+    Given:
+        - IPv4 and IPv6 CIDR ranges, nested, adjacent and single address ranges.
+    When:
+        - Checking whether an IP address is in the ranges.
+    Then:
+        - Ensure the IP address is found only if it is in one of the ranges.
+    """
+    index = CidrRangesIndex(['10.0.0.0/8', '10.1.0.0/16', '192.168.0.0/17', '192.168.128.0/17', '1.2.3.4',
+                             '2001:db8::/32'])
+    assert (ip_address in index) is expected
+
+
+def test_cidr_ranges_index_same_as_networks():
+    """
+    Given:
+        - Random CIDR ranges.
+    When:
+        - Checking random IP addresses against the index.
+    Then:
+        - Ensure the results are the same as checking each of the ranges.
+    """
+    import ipaddress
+    import random
+
+    random.seed(0)
+    networks = [ipaddress.ip_network((random.getrandbits(32), random.randint(8, 32)), strict=False)
+                for _ in range(300)]
+    index = CidrRangesIndex([str(network) for network in networks])
+    ip_addresses = [str(ipaddress.ip_address(random.getrandbits(32))) for _ in range(1000)]
+    ip_addresses += [str(network.network_address + 1) for network in networks]
+    assert index.contains_all(ip_addresses) == [
+        any(ipaddress.ip_address(ip_address) in network for network in networks) for ip_address in ip_addresses]
+
+
+def test_invalid_cidr_range():
+    """
+    Given:
+        - An invalid CIDR range.
+    When:
+        - Compiling the ranges.
+    Then:
+        - Ensure an error is raised.
+    """
+    with pytest.raises(ValueError):
+        CidrRangesIndex(['10.0.0.0/33'])
+
+
+def test_get_cidr_ranges_index():
+    """
+    Given:
+        - The same CIDR ranges, as a string and as a list.
+    When:
+        - Getting the index of the ranges.
+    Then:
+        - Ensure the ranges are compiled once.
+    """
+    index = get_cidr_ranges_index('10.0.0.0/8, 192.168.0.0/16')
+    assert get_cidr_ranges_index(['10.0.0.0/8', '192.168.0.0/16']) is index
+    assert get_cidr_ranges_index('10.0.0.0/8') is not index
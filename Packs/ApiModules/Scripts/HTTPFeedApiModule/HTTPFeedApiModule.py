@@ -422,6 +422,7 @@ def fetch_indicators_command(client, feed_tags, tlp_color, itype, auto_detect, c
 
     for iterator in iterators:
         for url, lines in iterator.items():
+            url_attributes = []
             for line in lines.get('result', []):
                 attributes, value = get_indicator_fields(line, url, feed_tags, tlp_color, client)
                 if value:
@@ -430,31 +431,36 @@ def fetch_indicators_command(client, feed_tags, tlp_color, itype, auto_detect, c
 
                     if 'firstseenbysource' in attributes.keys():
                         attributes['firstseenbysource'] = datestring_to_server_format(attributes['firstseenbysource'])
-                    indicator_type = determine_indicator_type(
-                        client.feed_url_to_config.get(url, {}).get('indicator_type'), itype, auto_detect, value)
-                    indicator_data = {
-                        "value": value,
-                        "type": indicator_type,
-                        "rawJSON": attributes,
-                    }
-                    if create_relationships and client.feed_url_to_config.get(url, {}).get('relationship_name'):
-                        if attributes.get('relationship_entity_b'):
-                            relationships_lst = EntityRelationship(
-                                name=client.feed_url_to_config.get(url, {}).get('relationship_name'),
-                                entity_a=value,
-                                entity_a_type=indicator_type,
-                                entity_b=attributes.get('relationship_entity_b'),
-                                entity_b_type=FeedIndicatorType.indicator_type_by_server_version(
-                                    client.feed_url_to_config.get(url, {}).get('relationship_entity_b_type')),
-                            )
-                            relationships_of_indicator = [relationships_lst.to_indicator()]
-                            indicator_data['relationships'] = relationships_of_indicator
-
-                    if len(client.custom_fields_mapping.keys()) > 0 or TAGS in attributes.keys():
-                        custom_fields = client.custom_fields_creator(attributes)
-                        indicator_data["fields"] = custom_fields
-
-                    indicators.append(indicator_data)
+                    url_attributes.append((attributes, value))
+
+            # the types of all the indicators of the url are detected at once
+            indicator_types = determine_indicator_types(
+                client.feed_url_to_config.get(url, {}).get('indicator_type'), itype, auto_detect,
+                [value for _, value in url_attributes])
+            for (attributes, value), indicator_type in zip(url_attributes, indicator_types):
+                indicator_data = {
+                    "value": value,
+                    "type": indicator_type,
+                    "rawJSON": attributes,
+                }
+                if create_relationships and client.feed_url_to_config.get(url, {}).get('relationship_name'):
+                    if attributes.get('relationship_entity_b'):
+                        relationships_lst = EntityRelationship(
+                            name=client.feed_url_to_config.get(url, {}).get('relationship_name'),
+                            entity_a=value,
+                            entity_a_type=indicator_type,
+                            entity_b=attributes.get('relationship_entity_b'),
+                            entity_b_type=FeedIndicatorType.indicator_type_by_server_version(
+                                client.feed_url_to_config.get(url, {}).get('relationship_entity_b_type')),
+                        )
+                        relationships_of_indicator = [relationships_lst.to_indicator()]
+                        indicator_data['relationships'] = relationships_of_indicator
+
+                if len(client.custom_fields_mapping.keys()) > 0 or TAGS in attributes.keys():
+                    custom_fields = client.custom_fields_creator(attributes)
+                    indicator_data["fields"] = custom_fields
+
+                indicators.append(indicator_data)
     return indicators, no_update
 
 
@@ -476,6 +482,24 @@ def determine_indicator_type(indicator_type, default_indicator_type, auto_detect
     return indicator_type
 
 
+def determine_indicator_types(indicator_type, default_indicator_type, auto_detect, values):
+    """
+    Detect the indicator types of a batch of values, the same as determine_indicator_type detects each of them.
+    Args:
+        indicator_type: (str) Indicator type given in the config.
+        default_indicator_type: Indicator type which was inserted as a param of the integration by user.
+        auto_detect: (bool) True whether auto detection of the indicator type is wanted.
+        values: (list) The values which we'd like to get the indicator types of.
+    Returns:
+        List of the indicator types after detection, by the order of the values.
+    """
+    if auto_detect and values:
+        indicator_types = auto_detect_indicator_types(values)
+    else:
+        indicator_types = [indicator_type] * len(values)
+    return [indicator_type or default_indicator_type for indicator_type in indicator_types]
+
+
 def get_indicators_command(client: Client, args):
     itype = args.get('indicator_type', client.indicator_type)
     limit = int(args.get('limit'))
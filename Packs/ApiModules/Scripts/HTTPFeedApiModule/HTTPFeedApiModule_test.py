@@ -443,6 +443,30 @@ def test_get_indicators_without_relations():
         assert indicators == expected_res
 
 
+def test_get_indicators_auto_detect(mocker):
+    """
+    Given:
+    - A feed of indicators of different types
+    When:
+    - Fetching indicators with auto detection of the indicator type
+    Then:
+    - Validate the types of all the indicators of the url are detected in a single batch.
+    - Validate the default indicator type is used for values of unknown types.
+    """
+    import HTTPFeedApiModule
+    detect_mock = mocker.patch.object(HTTPFeedApiModule, 'auto_detect_indicator_types',
+                                      wraps=HTTPFeedApiModule.auto_detect_indicator_types)
+    feed_content = '1.1.1.1\ntest.com\n1.1.1.0/24\nnot_an_indicator\n8.8.8.8'
+    with requests_mock.Mocker() as m:
+        m.get('https://test.com/feed.txt', content=feed_content.encode('utf-8'))
+        client = Client(url='https://test.com/feed.txt', source_name='test')
+        indicators, _ = fetch_indicators_command(client, feed_tags=[], tlp_color=None, itype='IP', auto_detect=True)
+
+    assert [(indicator['value'], indicator['type']) for indicator in indicators] == [
+        ('1.1.1.1', 'IP'), ('test.com', 'Domain'), ('1.1.1.0/24', 'CIDR'), ('not_an_indicator', 'IP'), ('8.8.8.8', 'IP')]
+    detect_mock.assert_called_once_with(['1.1.1.1', 'test.com', '1.1.1.0/24', 'not_an_indicator', '8.8.8.8'])
+
+
 def test_get_no_update_value(mocker):
     """
     Given
@@ -1,13 +1,17 @@
 from CommonServerPython import *
 
 ''' IMPORTS '''
+import itertools
 import urllib3
 import jmespath
-from typing import List, Dict, Union, Optional, Callable, Tuple
+from typing import List, Dict, Union, Optional, Callable, Tuple, Iterable, Iterator
 
 # disable insecure warnings
 urllib3.disable_warnings()
 
+# The number of values to detect the indicator types of by a single auto_detect_indicator_types call
+DETECT_INDICATOR_TYPES_BATCH_SIZE = 2000
+
 
 class Client:
     def __init__(self, url: str = '', credentials: dict = None,
@@ -238,13 +242,13 @@ def fetch_indicators_command(client: Client, indicator_type: str, feedTags: list
         handle_indicator_function = feed_config.get('handle_indicator_function', handle_indicator)
         create_relationships_function = feed_config.get('create_relations_function')
 
-        for item in items:
-            if isinstance(item, str):
-                item = {indicator_field: item}
-
+        items = ({indicator_field: item} if isinstance(item, str) else item for item in items)
+        # the indicator types are detected in batches, so the handler gets the detected type of each item
+        for item, item_indicator_type in iter_with_indicator_types(items, indicator_field, indicator_type,
+                                                                   auto_detect):
             indicators.extend(
-                handle_indicator_function(client, item, feed_config, service_name, indicator_type, indicator_field,
-                                          use_prefix_flat, feedTags, auto_detect, mapping_function,
+                handle_indicator_function(client, item, feed_config, service_name, item_indicator_type,
+                                          indicator_field, use_prefix_flat, feedTags, False, mapping_function,
                                           create_relationships, create_relationships_function))
 
             if limit and len(indicators) >= limit:  # We have a limitation only when get-indicators command is
@@ -333,6 +337,40 @@ def determine_indicator_type(indicator_type, auto_detect, value):
     return indicator_type
 
 
+def determine_indicator_types(indicator_type, auto_detect, values):
+    """
+    Detect the indicator types of a batch of values, the same as determine_indicator_type detects each of them.
+    Args:
+        indicator_type: (str) Given indicator type.
+        auto_detect: (bool) True whether auto detection of the indicator type is wanted.
+        values: (list) The values which we'd like to get the indicator types of.
+    Returns:
+        List of the indicator types after detection, by the order of the values.
+    """
+    if auto_detect and values:
+        return auto_detect_indicator_types(values)
+    return [indicator_type] * len(values)
+
+
+def iter_with_indicator_types(items: Iterable[Dict], indicator_field: str, indicator_type: str,
+                              auto_detect: bool) -> Iterator[Tuple[Dict, str]]:
+    """
+    Detects the indicator types of the items values lazily, in batches of DETECT_INDICATOR_TYPES_BATCH_SIZE items.
+    Args:
+        items: The items of the feed.
+        indicator_field: The field of the items holding the indicator value.
+        indicator_type: (str) Given indicator type.
+        auto_detect: (bool) True whether auto detection of the indicator type is wanted.
+    Returns:
+        Iterator of the (item, indicator type) of the items, by their order.
+    """
+    items = iter(items)
+    for items_batch in iter(lambda: list(itertools.islice(items, DETECT_INDICATOR_TYPES_BATCH_SIZE)), []):
+        indicator_types = determine_indicator_types(indicator_type, auto_detect,
+                                                    [item.get(indicator_field) for item in items_batch])
+        yield from zip(items_batch, indicator_types)
+
+
 def extract_all_fields_from_indicator(indicator: Dict, indicator_key: str, flat_with_prefix: bool = False) -> Dict:
     """Flattens the JSON object to create one dictionary of values
     Args:
@@ -125,6 +125,40 @@ def test_list_of_indicators_with_no_json_object():
         assert indicators[1].get('rawJSON') == {'indicator': '2.2.2.2'}
 
 
+def test_fetch_indicators_auto_detect_in_batches(mocker):
+    """
+    Given:
+    - A feed of indicators of different types, with auto detection of the indicator type
+    When:
+    - Fetching the indicators
+    Then:
+    - Validate the indicator types are detected in batches of DETECT_INDICATOR_TYPES_BATCH_SIZE values
+    - Validate the items whose type is unknown are skipped
+    """
+    import JSONFeedApiModule
+    mocker.patch.object(JSONFeedApiModule, 'DETECT_INDICATOR_TYPES_BATCH_SIZE', 2)
+    detect_mock = mocker.patch.object(JSONFeedApiModule, 'auto_detect_indicator_types',
+                                      wraps=JSONFeedApiModule.auto_detect_indicator_types)
+    values = ['1.1.1.1', 'test.com', 'not_an_indicator', '1.1.1.0/24', '8.8.8.8']
+    feed_name_to_config = {
+        'Github': {
+            'url': 'https://api.github.com/meta',
+            'extractor': "hooks",
+            'indicator': None
+        }
+    }
+
+    with requests_mock.Mocker() as m:
+        m.get('https://api.github.com/meta', json={'hooks': values})
+        client = Client(url='https://api.github.com/meta', feed_name_to_config=feed_name_to_config)
+        indicators, _ = fetch_indicators_command(client=client, indicator_type=None, feedTags=['test'],
+                                                 auto_detect=True)
+
+    assert [(indicator['value'], indicator['type']) for indicator in indicators] == [
+        ('1.1.1.1', 'IP'), ('test.com', 'Domain'), ('1.1.1.0/24', 'CIDR'), ('8.8.8.8', 'IP')]
+    assert [call[0][0] for call in detect_mock.call_args_list] == [values[:2], values[2:4], values[4:]]
+
+
 def test_post_of_indicators_with_no_json_object():
     feed_name_to_config = {
         'Github': {
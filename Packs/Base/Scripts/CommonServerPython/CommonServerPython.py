@@ -18,7 +18,6 @@ import time
 import traceback
 import types
 import urllib
-import gzip
 from random import randint
 import xml.etree.cElementTree as ET
 from collections import OrderedDict
@@ -37,9 +36,9 @@ def __line__():
     return cf.f_back.f_lineno
 
 
-# 42 - The line offset from the beggining of the file.
+# 41 - The line offset from the beggining of the file.
 _MODULES_LINE_MAPPING = {
-    'CommonServerPython': {'start': __line__() - 42, 'end': float('inf')},
+    'CommonServerPython': {'start': __line__() - 41, 'end': float('inf')},
 }
 
 
@@ -654,63 +653,59 @@ def get_schedule_metadata(context):
     return schedule_metadata
 
 
-def auto_detect_indicator_type(indicator_value):
-    """
-      Infer the type of the indicator.
+# The max number of values to keep the TLD suffix of, for detecting the types of indicators
+TLD_SUFFIX_CACHE_SIZE = 100000
+# The function that extracts the TLD suffix of a value, created once per run (see _get_tld_suffix_extractor)
+_TLD_SUFFIX_EXTRACTOR = None
 
-      :type indicator_value: ``str``
-      :param indicator_value: The indicator whose type we want to check. (required)
 
-      :return: The type of the indicator.
-      :rtype: ``str``
+def _get_tld_suffix_extractor():
     """
-    try:
-        import tldextract
-    except Exception:
-        raise Exception("Missing tldextract module, In order to use the auto detect function please use a docker"
-                        " image with it installed such as: demisto/jmespath")
+      Returns a function that extracts the TLD suffix of a value, using the suffix list bundled with tldextract.
+      Creating the extractor loads the whole suffix list, so it is created only once, and the suffixes of the
+      recently extracted values are cached (in Python 3).
 
-    if re.match(ipv4cidrRegex, indicator_value):
-        return FeedIndicatorType.CIDR
-
-    if re.match(ipv6cidrRegex, indicator_value):
-        return FeedIndicatorType.IPv6CIDR
+      :return: The function that extracts the TLD suffix of a value.
+      :rtype: ``Callable[[str], str]``
+    """
+    global _TLD_SUFFIX_EXTRACTOR
+    if _TLD_SUFFIX_EXTRACTOR is None:
+        import tldextract
 
-    if re.match(ipv4Regex, indicator_value):
-        return FeedIndicatorType.IP
+        tldextract_version = tldextract.__version__
+        if LooseVersion(tldextract_version) < '3.0.0':
+            no_cache_extract = tldextract.TLDExtract(cache_file=False, suffix_list_urls=None)
+        else:
+            no_cache_extract = tldextract.TLDExtract(cache_dir=False, suffix_list_urls=None)
 
-    if re.match(ipv6Regex, indicator_value):
-        return FeedIndicatorType.IPv6
+        def extract_suffix(indicator_value):
+            return no_cache_extract(indicator_value).suffix
 
-    if re.match(sha256Regex, indicator_value):
-        return FeedIndicatorType.File
+        if IS_PY3:
+            from functools import lru_cache
+            extract_suffix = lru_cache(maxsize=TLD_SUFFIX_CACHE_SIZE)(extract_suffix)
 
-    if re.match(urlRegex, indicator_value):
-        return FeedIndicatorType.URL
+        _TLD_SUFFIX_EXTRACTOR = extract_suffix
 
-    if re.match(md5Regex, indicator_value):
-        return FeedIndicatorType.File
+    return _TLD_SUFFIX_EXTRACTOR
 
-    if re.match(sha1Regex, indicator_value):
-        return FeedIndicatorType.File
 
-    if re.match(emailRegex, indicator_value):
-        return FeedIndicatorType.Email
+def _detect_indicator_type(indicator_value):
+    """
+      Infer the type of the indicator, assuming tldextract is installed.
 
-    if re.match(cveRegex, indicator_value):
-        return FeedIndicatorType.CVE
+      :type indicator_value: ``str``
+      :param indicator_value: The indicator whose type we want to check. (required)
 
-    if re.match(sha512Regex, indicator_value):
-        return FeedIndicatorType.File
+      :return: The type of the indicator.
+      :rtype: ``str``
+    """
+    for pattern, indicator_type in INDICATOR_TYPE_PATTERNS:
+        if pattern.match(indicator_value):
+            return indicator_type
 
     try:
-        tldextract_version = tldextract.__version__
-        if LooseVersion(tldextract_version) < '3.0.0':
-            no_cache_extract = tldextract.TLDExtract(cache_file=False, suffix_list_urls=None)
-        else:
-            no_cache_extract = tldextract.TLDExtract(cache_dir=False, suffix_list_urls=None)
-
-        if no_cache_extract(indicator_value).suffix:
+        if _get_tld_suffix_extractor()(indicator_value):
             if '*' in indicator_value:
                 return FeedIndicatorType.DomainGlob
             return FeedIndicatorType.Domain
@@ -722,6 +717,51 @@ def auto_detect_indicator_type(indicator_value):
     return None
 
 
+def auto_detect_indicator_type(indicator_value):
+    """
+      Infer the type of the indicator.
+
+      :type indicator_value: ``str``
+      :param indicator_value: The indicator whose type we want to check. (required)
+
+      :return: The type of the indicator.
+      :rtype: ``str``
+    """
+    try:
+        import tldextract  # noqa: F401
+    except Exception:
+        raise Exception("Missing tldextract module, In order to use the auto detect function please use a docker"
+                        " image with it installed such as: demisto/jmespath")
+
+    return _detect_indicator_type(indicator_value)
+
+
+def auto_detect_indicator_types(indicator_values):
+    """
+      Infer the types of a batch of indicators, e.g. all the indicators of a feed.
+      Each distinct value is checked only once.
+
+      :type indicator_values: ``list``
+      :param indicator_values: The indicators whose types we want to check. (required)
+
+      :return: The types of the indicators, by the order of the indicators.
+      :rtype: ``list``
+    """
+    try:
+        import tldextract  # noqa: F401
+    except Exception:
+        raise Exception("Missing tldextract module, In order to use the auto detect function please use a docker"
+                        " image with it installed such as: demisto/jmespath")
+
+    types_by_value = {}  # type: Dict[str, Optional[str]]
+    indicator_types = []
+    for indicator_value in indicator_values:
+        if indicator_value not in types_by_value:
+            types_by_value[indicator_value] = _detect_indicator_type(indicator_value)
+        indicator_types.append(types_by_value[indicator_value])
+    return indicator_types
+
+
 def add_http_prefix_if_missing(address=''):
     """
         This function adds `http://` prefix to the proxy address in case it is missing.
@@ -2058,7 +2098,7 @@ class JsonTransformer:
 
 
 def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None, url_keys=None,
-                    date_fields=None, json_transform_mapping=None, is_auto_json_transform=False):
+                    date_fields=None, json_transform_mapping=None, is_auto_json_transform=False, max_rows=None):
     """
        Converts a demisto table in JSON form to a Markdown table
 
@@ -2093,6 +2133,10 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
         :type is_auto_json_transform: ``bool``
         :param is_auto_json_transform: Boolean to try to auto transform complex json
 
+       :type max_rows: ``int``
+       :param max_rows: The max number of rows to present. The rest of the rows are truncated, and their number
+            is written after the table. Default will present all the rows.
+
        :return: A string representation of the markdown table
        :rtype: ``str``
     """
@@ -2100,16 +2144,16 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
     if url_keys:
         t = url_to_clickable_markdown(t, url_keys)
 
-    mdResult = ''
+    md_lines = []
     if name:
-        mdResult = '### ' + name + '\n'
+        md_lines.append('### ' + name + '\n')
 
     if metadata:
-        mdResult += metadata + '\n'
+        md_lines.append(metadata + '\n')
 
     if not t or len(t) == 0:
-        mdResult += '**No entries.**\n'
-        return mdResult
+        md_lines.append('**No entries.**\n')
+        return ''.join(md_lines)
 
     if not headers and isinstance(t, dict) and len(t.keys()) == 1:
         # in case of a single key, create a column table where each element is in a different row.
@@ -2122,6 +2166,11 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
     if headers and isinstance(headers, STRING_TYPES):
         headers = [headers]
 
+    truncated_rows = 0
+    if max_rows and len(t) > max_rows:
+        truncated_rows = len(t) - max_rows
+        t = t[:max_rows]
+
     if not isinstance(t[0], dict):
         # the table contains only simple objects (strings, numbers)
         # should be only one header
@@ -2137,15 +2186,27 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
         headers.sort()
 
     if removeNull:
-        headers_aux = headers[:]
-        for header in headers:
-            if all(obj.get(header) in ('', None, [], {}) for obj in t):
-                headers_aux.remove(header)
-        headers = headers_aux
-
+        # a single pass on the rows, which stops as soon as a value was found for all the headers
+        null_headers = set(headers)
+        for obj in t:
+            for header in list(null_headers):
+                if obj.get(header) not in ('', None, [], {}):
+                    null_headers.remove(header)
+            if not null_headers:
+                break
+        headers = [header for header in headers if header not in null_headers]
+
+    # the transformers are created once per table (and not per header), as they hold no state of the cells
     if not json_transform_mapping:
-        json_transform_mapping = {header: JsonTransformer(flatten=not is_auto_json_transform) for header in
-                                  headers}
+        default_json_transform = JsonTransformer(flatten=not is_auto_json_transform)
+        json_transforms = [default_json_transform] * len(headers)
+    else:
+        # the default transformer of formatCell
+        default_json_transform = JsonTransformer(flatten=True)
+        json_transforms = [json_transform_mapping.get(h) or default_json_transform for h in headers]
+    # the transformers without a custom function return the strings as-is, and the ints as their json dump
+    columns = [(h, json_transform, not json_transform.func, json_transform.flatten and not json_transform.func)
+               for h, json_transform in zip(headers, json_transforms)]
 
     if t and len(headers) > 0:
         newHeaders = []
@@ -2153,40 +2214,47 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
             def headerTransform(s): return stringEscapeMD(s, True, True)  # noqa
         for header in headers:
             newHeaders.append(headerTransform(header))
-        mdResult += '|'
-        if len(newHeaders) == 1:
-            mdResult += newHeaders[0]
-        else:
-            mdResult += '|'.join(newHeaders)
-        mdResult += '|\n'
-        sep = '---'
-        mdResult += '|' + '|'.join([sep] * len(headers)) + '|\n'
+        md_lines.append('|' + '|'.join(newHeaders) + '|\n')
+        md_lines.append('|' + '|'.join(['---'] * len(headers)) + '|\n')
         for entry in t:
-            entry_copy = entry.copy()
             if date_fields:
+                entry = entry.copy()
                 for field in date_fields:
                     try:
-                        entry_copy[field] = datetime.fromtimestamp(int(entry_copy[field]) / 1000).strftime('%Y-%m-%d %H:%M:%S')
+                        entry[field] = datetime.fromtimestamp(int(entry[field]) / 1000).strftime('%Y-%m-%d %H:%M:%S')
                     except Exception:
                         pass
 
-            vals = [stringEscapeMD((formatCell(entry_copy.get(h, ''), False,
-                                               json_transform_mapping.get(h)) if entry_copy.get(h) is not None else ''),
-                                   True, True) for h in headers]
+            vals = []
+            for h, json_transform, keeps_str, flattens_int in columns:
+                val = entry.get(h)
+                if val is None:
+                    vals.append('')
+                    continue
+                val_type = type(val)
+                if val_type is str and keeps_str:
+                    pass
+                elif val_type is int and flattens_int:
+                    val = str(val)
+                else:
+                    val = formatCell(val, False, json_transform)
+                # escaping is the same as stringEscapeMD(val, True, True), which is called only when needed
+                vals.append(stringEscapeMD(val, True, True) if MARKDOWN_TABLE_ESCAPE_REGEX.search(val) else val)
 
             # this pipe is optional
-            mdResult += '| '
             try:
-                mdResult += ' | '.join(vals)
+                md_lines.append('| ' + ' | '.join(vals) + ' |\n')
             except UnicodeDecodeError:
                 vals = [str(v) for v in vals]
-                mdResult += ' | '.join(vals)
-            mdResult += ' |\n'
+                md_lines.append('| ' + ' | '.join(vals) + ' |\n')
+
+        if truncated_rows:
+            md_lines.append('\n**{} more rows were truncated.**\n'.format(truncated_rows))
 
     else:
-        mdResult += '**No entries.**\n'
+        md_lines.append('**No entries.**\n')
 
-    return mdResult
+    return ''.join(md_lines)
 
 
 tblToMd = tableToMarkdown
@@ -2370,6 +2438,8 @@ def flattenTable(tableDict):
 
 
 MARKDOWN_CHARS = r"\`*_{}[]()#+-!|"
+# The chars escaped by stringEscapeMD with minimal escaping of a multiline string (e.g. a markdown table cell)
+MARKDOWN_TABLE_ESCAPE_REGEX = re.compile(r'[\r\n|`]')
 
 
 def stringEscapeMD(st, minimal_escaping=False, escape_multiline=False):
@@ -6770,6 +6840,21 @@ sha512Regex = re.compile(r'\b[0-9a-fA-F]{128}\b', regexFlags)
 
 pascalRegex = re.compile('([A-Z]?[a-z]+)')
 
+# The patterns auto_detect_indicator_type checks, by their order, with the indicator type each of them detects
+INDICATOR_TYPE_PATTERNS = [
+    (re.compile(ipv4cidrRegex), FeedIndicatorType.CIDR),
+    (re.compile(ipv6cidrRegex), FeedIndicatorType.IPv6CIDR),
+    (re.compile(ipv4Regex), FeedIndicatorType.IP),
+    (re.compile(ipv6Regex), FeedIndicatorType.IPv6),
+    (sha256Regex, FeedIndicatorType.File),
+    (re.compile(urlRegex), FeedIndicatorType.URL),
+    (md5Regex, FeedIndicatorType.File),
+    (sha1Regex, FeedIndicatorType.File),
+    (re.compile(emailRegex), FeedIndicatorType.Email),
+    (re.compile(cveRegex), FeedIndicatorType.CVE),
+    (sha512Regex, FeedIndicatorType.File),
+]
+
 
 # ############################## REGEX FORMATTING end ###############################
 
@@ -7499,6 +7584,17 @@ if 'requests' in sys.modules:
             The request authorization, for example: (username, password).
             Can be None.
 
+        :type pool_connections: ``int``
+        :param pool_connections:
+            The number of hosts to keep connection pools for, per protocol.
+            Can be None, which will use the requests default (10).
+
+        :type pool_maxsize: ``int``
+        :param pool_maxsize:
+            The maximal number of keep-alive connections to keep open for each host.
+            Should be raised for clients that send concurrent requests to the same host.
+            Can be None, which will use the requests default (10).
+
         :return: No data returned
         :rtype: ``None``
         """
@@ -7514,6 +7610,8 @@ if 'requests' in sys.modules:
             headers=None,
             auth=None,
             timeout=REQUESTS_TIMEOUT,
+            pool_connections=None,
+            pool_maxsize=None,
         ):
             self._base_url = base_url
             self._verify = verify
@@ -7522,12 +7620,22 @@ if 'requests' in sys.modules:
             self._auth = auth
             self._session = requests.Session()
 
+            # the adapters are mounted once, so the connections they keep alive are reused by all the requests of
+            # the client, also when the request retries are changed.
+            self._pool_kwargs = {
+                'pool_connections': pool_connections or requests.adapters.DEFAULT_POOLSIZE,
+                'pool_maxsize': pool_maxsize or requests.adapters.DEFAULT_POOLSIZE,
+            }
+            self._session.mount('http://', HTTPAdapter(**self._pool_kwargs))
+
             # the following condition was added to overcome the security hardening happened in Python 3.10.
             # https://github.com/python/cpython/pull/25778
             # https://bugs.python.org/issue43998
 
             if IS_PY3 and PY_VER_MINOR >= 10 and not verify:
-                self._session.mount('https://', SSLAdapter())
+                self._session.mount('https://', SSLAdapter(**self._pool_kwargs))
+            else:
+                self._session.mount('https://', HTTPAdapter(**self._pool_kwargs))
 
             if proxy:
                 ensure_proxy_has_http_prefix()
@@ -7609,24 +7717,40 @@ if 'requests' in sys.modules:
                     raise_on_redirect=raise_on_redirect,
                     **whitelist_kawargs
                 )
-                http_adapter = HTTPAdapter(max_retries=retry)
-
-                # the following condition was added to overcome the security hardening happened in Python 3.10.
-                # https://github.com/python/cpython/pull/25778
-                # https://bugs.python.org/issue43998
-
-                if self._verify:
-                    https_adapter = http_adapter
-                elif IS_PY3 and PY_VER_MINOR >= 10:
-                    https_adapter = SSLAdapter(max_retries=retry)
-                else:
-                    https_adapter = http_adapter
-
-                self._session.mount('https://', https_adapter)
+                # the retry is set on the mounted adapter rather than mounting a new one, so the connection pool
+                # of the adapter (and the connections it keeps alive) is not dropped on each request.
+                self._session.adapters['https://'].max_retries = retry
 
             except NameError:
                 pass
 
+        def get_connection_stats(self):
+            """
+            Returns the statistics of the connection pools of the client, per host.
+            Useful to verify that the connections to a host are reused, i.e. that the number of requests
+            is much larger than the number of connections.
+
+            :return: A dict of the host URL (e.g. https://example.com:443) to the number of connections opened
+                to the host (num_connections) and the number of requests sent to the host (num_requests).
+            :rtype: ``dict``
+            """
+            stats = {}  # type: Dict[str, Dict[str, int]]
+            for adapter in self._session.adapters.values():
+                pool_managers = [getattr(adapter, 'poolmanager', None)]
+                pool_managers.extend(getattr(adapter, 'proxy_manager', {}).values())
+                for pool_manager in pool_managers:
+                    if pool_manager is None:
+                        continue
+                    for pool_key in list(pool_manager.pools.keys()):
+                        pool = pool_manager.pools.get(pool_key)
+                        if pool is None:
+                            continue
+                        host_url = '{}://{}:{}'.format(pool.scheme, pool.host, pool.port)
+                        host_stats = stats.setdefault(host_url, {'num_connections': 0, 'num_requests': 0})
+                        host_stats['num_connections'] += pool.num_connections
+                        host_stats['num_requests'] += pool.num_requests
+            return stats
+
         def _http_request(self, method, url_suffix='', full_url=None, headers=None, auth=None, json_data=None,
                           params=None, data=None, files=None, timeout=None, resp_type='json', ok_codes=None,
                           return_empty_response=False, retries=0, status_list_to_retry=None,
@@ -7842,6 +7966,90 @@ if 'requests' in sys.modules:
                 return response.status_code in status_codes
             return response.ok
 
+    if IS_PY3:
+        class AsyncBaseClient(BaseClient):
+            """Client to use in integrations that send many independent requests, e.g. an enrichment command for a list
+            of indicators. The requests are sent concurrently over the pooled connections of the client, with the same
+            retry, error handler, ok_codes and resp_type semantics as ``BaseClient._http_request``.
+
+            The requests are sent by a bounded pool of workers and are wrapped as asyncio futures, so they can be
+            awaited by integrations that run an event loop, or sent all at once with ``gather``.
+
+            For example:
+                client = AsyncBaseClient(base_url, verify=verify, proxy=proxy, max_concurrency=20)
+                results = client.gather([{'method': 'GET', 'url_suffix': 'ip/{}'.format(ip)} for ip in ips])
+
+            :type max_concurrency: ``int``
+            :param max_concurrency: The maximal number of requests to send concurrently. Default is 10.
+
+            All the other arguments are the same as ``BaseClient``.
+
+            :return: No data returned
+            :rtype: ``None``
+            """
+
+            DEFAULT_MAX_CONCURRENCY = 10
+
+            def __init__(self, base_url, max_concurrency=DEFAULT_MAX_CONCURRENCY, **kwargs):
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._max_concurrency = max_concurrency
+                # a connection is kept alive per concurrent request, so the pool should fit all of them
+                kwargs.setdefault('pool_maxsize', max_concurrency)
+                super(AsyncBaseClient, self).__init__(base_url, **kwargs)
+                # the requests and their error handlers, which may call the server, run in the workers of the executor
+                if not hasattr(demisto, 'lock'):
+                    support_multithreading()
+                self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+            def __del__(self):
+                try:
+                    self._executor.shutdown(wait=False)
+                except AttributeError:
+                    pass
+                super(AsyncBaseClient, self).__del__()
+
+            def _async_http_request(self, *args, **kwargs):
+                """Sends the request concurrently with the other requests of the client.
+                Gets the same arguments as ``_http_request``.
+
+                Should be awaited from a running event loop, e.g.
+                    results = await asyncio.gather(*[client._async_http_request('GET', url_suffix) for ...])
+
+                :return: A future of the return value of ``_http_request``, bound to the running event loop.
+                :rtype: ``asyncio.Future``
+                """
+                import asyncio
+                import functools
+
+                loop = asyncio.get_running_loop()
+                return loop.run_in_executor(self._executor, functools.partial(self._http_request, *args, **kwargs))
+
+            def gather(self, requests_kwargs, return_exceptions=False):
+                """Sends the requests concurrently (up to ``max_concurrency`` at a time) and waits for all of them.
+
+                :type requests_kwargs: ``list``
+                :param requests_kwargs: The arguments of ``_http_request`` of each request, as a list of dicts.
+
+                :type return_exceptions: ``bool``
+                :param return_exceptions:
+                    Whether to return the exception of a failed request in its place in the results.
+                    If False, the exception of the first failed request is raised.
+
+                :return: The return values of ``_http_request`` of the requests, in the order of the requests.
+                :rtype: ``list``
+                """
+                import asyncio
+                import functools
+
+                loop = asyncio.new_event_loop()
+                try:
+                    futures = [loop.run_in_executor(self._executor, functools.partial(self._http_request, **request_kwargs))
+                               for request_kwargs in requests_kwargs]
+                    return loop.run_until_complete(asyncio.gather(*futures, return_exceptions=return_exceptions))
+                finally:
+                    loop.close()
+
 
 def batch(iterable, batch_size=1):
     """Gets an iterable and yields slices of it.
@@ -8545,10 +8753,21 @@ class IndicatorsSearcher:
     :type limit: ``Optional[int]``
     :param limit: the current upper limit of the search (can be updated after init)
 
+    :type prefetch: ``bool``
+    :param prefetch: whether to search the next pages on a background thread while the current page is processed.
+        The pages are returned in the same order and up to the same limit as without prefetching.
+        The calls to the server are locked with support_multithreading, so they do not run concurrently.
+        Use the searcher as a context manager, or call close(), to stop the prefetching when not iterating it to
+        its end.
+
+    :type prefetch_queue_size: ``int``
+    :param prefetch_queue_size: the maximal number of pages searched ahead of the current page when prefetching.
+
     :return: No data returned
     :rtype: ``None``
     """
     SEARCH_AFTER_TITLE = 'searchAfter'
+    _PREFETCH_DONE = object()
 
     def __init__(self,
                  page=0,
@@ -8558,7 +8777,9 @@ class IndicatorsSearcher:
                  size=100,
                  to_date=None,
                  value='',
-                 limit=None):
+                 limit=None,
+                 prefetch=False,
+                 prefetch_queue_size=2):
         # searchAfter is available in searchIndicators from version 6.1.0
         self._can_use_search_after = is_demisto_version_ge('6.1.0')
         # populateFields merged in https://github.com/demisto/server/pull/18398
@@ -8574,24 +8795,49 @@ class IndicatorsSearcher:
         self._value = value
         self._limit = limit
         self._total_iocs_fetched = 0
+        self._prefetch = prefetch
+        self._prefetch_queue_size = prefetch_queue_size
+        self._prefetch_queue = None
+        self._stop_prefetch = None
+        self._prefetch_thread = None
 
     def __iter__(self):
         return self
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Stops the prefetching of the next pages, if any. The searcher can still be iterated after it was closed.
+
+        :return: No data returned
+        :rtype: ``None``
+        """
+        self._stop_prefetching()
+
     # python2
     def next(self):
         return self.__next__()
 
     def __next__(self):
         if self.is_search_done():
+            self._stop_prefetching()
             raise StopIteration
-        res = self.search_indicators_by_version(from_date=self._from_date,
-                                                query=self._query,
-                                                size=self._size,
-                                                to_date=self._to_date,
-                                                value=self._value)
+        if self._prefetch:
+            res = self._get_prefetched_page()
+        else:
+            res = self.search_indicators_by_version(from_date=self._from_date,
+                                                    query=self._query,
+                                                    size=self._size,
+                                                    to_date=self._to_date,
+                                                    value=self._value)
         fetched_len = len(res.get('iocs') or [])
         if fetched_len == 0:
+            self._stop_prefetching()
             raise StopIteration
         self._total_iocs_fetched += fetched_len
         return res
@@ -8658,23 +8904,139 @@ class IndicatorsSearcher:
         :return: object contains the search results
         :rtype: ``dict``
         """
-        search_args = assign_params(
+        res = demisto.searchIndicators(**self._get_search_args(from_date, query, size, to_date, value,
+                                                               self._search_after_param, self.page))
+        self._update_search_position(res)
+        return res
+
+    def _get_search_args(self, from_date, query, size, to_date, value, search_after, page):
+        return assign_params(
             fromDate=from_date,
             toDate=to_date,
             query=query,
             size=size,
             value=value,
-            searchAfter=self._search_after_param if self._can_use_search_after else None,
+            searchAfter=search_after if self._can_use_search_after else None,
             populateFields=self._filter_fields if self._can_use_filter_fields else None,
             # use paging as fallback when cannot use search_after
-            page=self.page if not self._can_use_search_after else None
+            page=page if not self._can_use_search_after else None
         )
-        res = demisto.searchIndicators(**search_args)
+
+    def _update_search_position(self, res):
         if isinstance(self._page, int):
             self._page += 1  # advance pages
         self._search_after_param = res.get(self.SEARCH_AFTER_TITLE)
         self._total = res.get('total')
-        return res
+
+    def _get_prefetched_page(self):
+        """
+        Returns the next page searched by the prefetching thread, and advances the search position by it.
+        A new prefetching thread is started from the current position when there is none, e.g. when the limit was
+        raised after the previous thread had stopped.
+
+        :return: object contains the search results
+        :rtype: ``dict``
+        """
+        while True:
+            if self._prefetch_queue is None:
+                self._start_prefetching()
+            res = self._prefetch_queue.get()  # type: ignore[attr-defined]
+            if res is self._PREFETCH_DONE:
+                self._prefetch_queue = None
+                continue
+            if isinstance(res, Exception):
+                self._stop_prefetching()
+                raise res
+            self._update_search_position(res)
+            return res
+
+    def _start_prefetching(self):
+        import threading
+        try:
+            import queue
+        except ImportError:  # python2
+            import Queue as queue  # type: ignore[no-redef]
+
+        # the calls of the prefetching thread to the server must not run concurrently with the calls of the caller
+        if not hasattr(demisto, 'lock'):
+            support_multithreading()
+
+        self._prefetch_queue = queue.Queue(maxsize=self._prefetch_queue_size)
+        self._stop_prefetch = threading.Event()
+        self._prefetch_thread = threading.Thread(target=self._prefetch_pages,
+                                                 args=(self._prefetch_queue, self._stop_prefetch))
+        self._prefetch_thread.daemon = True
+        self._prefetch_thread.start()
+
+    def _stop_prefetching(self):
+        """
+        Stops the prefetching thread, and drains its queue so it is not blocked on adding a page to it.
+        The thread exits once its current search, if any, returns.
+        """
+        try:
+            from queue import Empty
+        except ImportError:  # python2
+            from Queue import Empty  # type: ignore[no-redef]
+
+        if self._stop_prefetch is not None:
+            self._stop_prefetch.set()
+        if self._prefetch_queue is not None:
+            try:
+                while True:
+                    self._prefetch_queue.get_nowait()
+            except Empty:
+                pass
+        self._prefetch_queue = None
+        self._stop_prefetch = None
+        self._prefetch_thread = None
+
+    def _prefetch_pages(self, prefetch_queue, stop_prefetch):
+        """
+        Searches the pages following the current search position into the prefetch queue, until the search is done
+        by the same conditions as is_search_done, or until the prefetching is stopped.
+        Runs on the prefetching thread.
+        """
+        try:
+            from queue import Full
+        except ImportError:  # python2
+            from Queue import Full  # type: ignore[no-redef]
+
+        search_after = self._search_after_param
+        page = self.page
+        total_iocs_fetched = self._total_iocs_fetched
+
+        def put(item):
+            while not stop_prefetch.is_set():
+                try:
+                    prefetch_queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        try:
+            while not stop_prefetch.is_set():
+                res = demisto.searchIndicators(**self._get_search_args(self._from_date, self._query, self._size,
+                                                                       self._to_date, self._value, search_after, page))
+                if not put(res):
+                    return
+                fetched_len = len(res.get('iocs') or [])
+                total_iocs_fetched += fetched_len
+                if isinstance(page, int):
+                    page += 1
+                search_after = res.get(self.SEARCH_AFTER_TITLE)
+                total = res.get('total')
+                if fetched_len == 0 or (self.limit is not None and self.limit <= total_iocs_fetched):
+                    break
+                if total is not None:
+                    no_more_indicators = (total and search_after is None) if self._can_use_search_after \
+                        else total <= page * self._size
+                    if no_more_indicators:
+                        break
+        except Exception as e:
+            put(e)
+            return
+        put(self._PREFETCH_DONE)
 
 
 class AutoFocusKeyRetriever:
@@ -9838,9 +10200,79 @@ class YMLMetadataCollector:
         return command_wrapper
 
 
-def send_events_to_xsiam(events, vendor, product, data_format=None):
+# The target size of the (uncompressed) data of a single request to XSIAM, in bytes
+XSIAM_EVENT_CHUNK_SIZE = 2 ** 20  # 1 Mib
+# The max size of the data of a single request, that is accepted by XSIAM
+XSIAM_EVENT_CHUNK_SIZE_LIMIT = 9 * (10 ** 6)  # 9 MB
+
+
+def split_data_to_chunks(data, target_chunk_size, max_events_per_chunk=None):
+    """
+    Splits the events into chunks of about the target size, so each chunk can be sent in a single request.
+    The events are split lazily, so the whole data is not copied at once.
+
+    :type data: ``Union[str, Iterable]``
+    :param data: An iterable of events (strings), or a string of events separated by a new line.
+
+    :type target_chunk_size: ``int``
+    :param target_chunk_size: The max size of a chunk, in bytes. A single event larger than the size is
+        yielded in a chunk of its own.
+
+    :type max_events_per_chunk: ``int``
+    :param max_events_per_chunk: The max number of events in a chunk. Unlimited if not given.
+
+    :return: The chunks, each is a list of the utf-8 encoded events of the chunk.
+    :rtype: ``Iterator[list]``
+    """
+    if isinstance(data, bytes):
+        data = data.split(b'\n')
+    elif isinstance(data, STRING_TYPES):
+        data = data.split('\n')
+    chunk = []  # type: List[bytes]
+    chunk_size = 0
+    for event in data:
+        if not isinstance(event, bytes):
+            event = event.encode('utf-8')
+        if chunk and (chunk_size + len(event) > target_chunk_size
+                      or (max_events_per_chunk and len(chunk) >= max_events_per_chunk)):
+            yield chunk
+            chunk = []
+            chunk_size = 0
+        chunk.append(event)
+        # the size of the new line separating the events is included
+        chunk_size += len(event) + 1
+    if chunk:
+        yield chunk
+
+
+def compress_events(events):
+    """
+    Compresses the events, separated by a new line, in gzip format.
+    The events are compressed one by one, so they are never joined into a single string.
+
+    :type events: ``list``
+    :param events: The utf-8 encoded events to compress.
+
+    :return: The compressed events.
+    :rtype: ``bytes``
+    """
+    import zlib
+
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16 + MAX_WBITS means gzip format
+    compressed_parts = []
+    for i, event in enumerate(events):
+        if i:
+            compressed_parts.append(compressor.compress(b'\n'))
+        compressed_parts.append(compressor.compress(event))
+    compressed_parts.append(compressor.flush())
+    return b''.join(compressed_parts)
+
+
+def send_events_to_xsiam(events, vendor, product, data_format=None, chunk_size=XSIAM_EVENT_CHUNK_SIZE,
+                         max_events_per_chunk=None, num_of_workers=1):
     """
     Send the fetched events into the XDR data-collector private api.
+    The events are sent in chunks, so a large amount of events does not result in a single huge request.
 
     :type events: ``Union[str, list]``
     :param events: The events to send to send to XSIAM server. Should be of the following:
@@ -9857,31 +10289,41 @@ def send_events_to_xsiam(events, vendor, product, data_format=None):
     :param data_format: Should only be filled in case the 'events' parameter contains a string of raw
         events in the format of 'leef' or 'cef'. In other cases the data_format will be set automatically.
 
+    :type chunk_size: ``int``
+    :param chunk_size: The max size of the (uncompressed) events of a single request, in bytes.
+        Default is 1 Mib, and can not be larger than 9 MB.
+
+    :type max_events_per_chunk: ``int``
+    :param max_events_per_chunk: The max number of events in a single request. Unlimited if not given.
+
+    :type num_of_workers: ``int``
+    :param num_of_workers: The number of requests to send concurrently. Default is 1 (sequential requests).
+
     :return: None
     :rtype: ``None``
     """
-    data = events
-    amount_of_events = 0
+    import itertools
+
+    if not events:
+        demisto.debug('send_events_to_xsiam function received no events, skipping the API call')
+        return
+
     # Correspond to case 1: List of strings or dicts where each string or dict represents an event.
     if isinstance(events, list):
-        amount_of_events = len(events)
         # In case we have list of dicts we set the data_format to json and parse each dict to a stringify each dict.
         if isinstance(events[0], dict):
-            events = [json.dumps(event) for event in events]
+            events = (json.dumps(event) for event in events)
             data_format = 'json'
-        # Separating each event with a new line
-        data = '\n'.join(events)
-
-    elif isinstance(events, str):
-        amount_of_events = len(events.split('\n'))
 
-    else:
+    elif not isinstance(events, str):
         raise DemistoException(('Unsupported type: {type_events} for the "events" parameter. Should be a string or '
                                 'dict.').format(type_events=type(events)))
 
     if not data_format:
         data_format = 'text'
 
+    chunk_size = min(chunk_size, XSIAM_EVENT_CHUNK_SIZE_LIMIT)
+
     xsiam_api_token = demisto.getLicenseCustomField('Http_Connector.token')
     xsiam_domain = demisto.getLicenseCustomField('Http_Connector.url')
     xsiam_url = 'https://api-{xsiam_domain}'.format(xsiam_domain=xsiam_domain)
@@ -9895,12 +10337,12 @@ def send_events_to_xsiam(events, vendor, product, data_format=None):
 
     header_msg = 'Error sending new events into XSIAM. \n'
 
-    def events_error_handler(response):
+    def events_error_handler(res):
         """
         Internal function to parse the XSIAM API errors
         """
         try:
-            response = response.json()
+            response = res.json()
             error = res.reason
             if response.get('error').lower() == 'false':
                 xsiam_server_err_msg = response.get('error')
@@ -9919,15 +10361,35 @@ def send_events_to_xsiam(events, vendor, product, data_format=None):
         demisto.error(header_msg + api_call_info)
         raise DemistoException(header_msg + error, DemistoException)
 
-    zipped_data = gzip.compress(data.encode('utf-8'))   # type: ignore[AttributeError,attr-defined]
-    client = BaseClient(base_url=xsiam_url)
-    res = client._http_request(method='POST', full_url=urljoin(xsiam_url, '/logs/v1/xsiam'), data=zipped_data,
-                               headers=headers,
-                               error_handler=events_error_handler)
-    if res.get('error').lower() != 'false':
-        raise DemistoException(header_msg + res.get('error'))
+    def get_request_kwargs(chunk):
+        return {
+            'method': 'POST',
+            'full_url': urljoin(xsiam_url, '/logs/v1/xsiam'),
+            'data': compress_events(chunk),
+            'headers': headers,
+            'error_handler': events_error_handler,
+        }
 
-    demisto.updateModuleHealth({'eventsPulled': amount_of_events})
+    def handle_response(res, chunk):
+        if res.get('error').lower() != 'false':
+            raise DemistoException(header_msg + res.get('error'))
+        demisto.updateModuleHealth({'eventsPulled': len(chunk)})
+
+    # a single client is used for all the chunks, so their requests are sent over the same connections
+    chunks = split_data_to_chunks(events, chunk_size, max_events_per_chunk)
+    if num_of_workers > 1 and IS_PY3:
+        client = AsyncBaseClient(base_url=xsiam_url, max_concurrency=num_of_workers)
+        # the chunks are compressed and sent a batch at a time, so only a batch is held in memory
+        chunks_batch = list(itertools.islice(chunks, num_of_workers))
+        while chunks_batch:
+            responses = client.gather([get_request_kwargs(chunk) for chunk in chunks_batch])
+            for res, chunk in zip(responses, chunks_batch):
+                handle_response(res, chunk)
+            chunks_batch = list(itertools.islice(chunks, num_of_workers))
+    else:
+        client = BaseClient(base_url=xsiam_url)
+        for chunk in chunks:
+            handle_response(client._http_request(**get_request_kwargs(chunk)), chunk)
 
 
 ###########################################
@@ -880,6 +880,102 @@ class TestTableToMarkdown:
 """
         assert expected_table == table
 
+    @staticmethod
+    def test_max_rows():
+        """
+        Given:
+          - list of objects.
+        When:
+          - calling tableToMarkdown with max_rows smaller than the number of objects.
+        Then:
+          - return a table of the first max_rows objects, and the number of the truncated rows.
+        """
+        table = tableToMarkdown('tableToMarkdown test', DATA, max_rows=2)
+        expected_table = (
+            '### tableToMarkdown test\n'
+            '|header_1|header_2|header_3|\n'
+            '|---|---|---|\n'
+            '| a1 | b1 | c1 |\n'
+            '| a2 | b2 | c2 |\n'
+            '\n**1 more rows were truncated.**\n'
+        )
+        assert table == expected_table
+        assert tableToMarkdown('tableToMarkdown test', DATA, max_rows=3) == tableToMarkdown('tableToMarkdown test', DATA)
+
+    @staticmethod
+    def legacy_table_to_markdown(name, t, headers, removeNull=False, date_fields=None, json_transform_mapping=None,
+                                 is_auto_json_transform=False):
+        """
+        A frozen copy of the table rendering of tableToMarkdown before it was optimized for large tables, for a list
+        of objects with the given headers.
+        """
+        from CommonServerPython import formatCell, stringEscapeMD
+        mdResult = '### ' + name + '\n'
+
+        if removeNull:
+            headers_aux = headers[:]
+            for header in headers:
+                if all(obj.get(header) in ('', None, [], {}) for obj in t):
+                    headers_aux.remove(header)
+            headers = headers_aux
+
+        if not json_transform_mapping:
+            json_transform_mapping = {header: JsonTransformer(flatten=not is_auto_json_transform) for header in
+                                      headers}
+
+        mdResult += '|' + '|'.join(stringEscapeMD(header, True, True) for header in headers) + '|\n'
+        mdResult += '|' + '|'.join(['---'] * len(headers)) + '|\n'
+        for entry in t:
+            entry_copy = entry.copy()
+            if date_fields:
+                for field in date_fields:
+                    try:
+                        entry_copy[field] = datetime.fromtimestamp(int(entry_copy[field]) / 1000).strftime(
+                            '%Y-%m-%d %H:%M:%S')
+                    except Exception:
+                        pass
+
+            vals = [stringEscapeMD((formatCell(entry_copy.get(h, ''), False,
+                                               json_transform_mapping.get(h)) if entry_copy.get(h) is not None else ''),
+                                   True, True) for h in headers]
+            mdResult += '| ' + ' | '.join(vals) + ' |\n'
+
+        return mdResult
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'removeNull': True},
+        {'is_auto_json_transform': True},
+        {'date_fields': ['time']},
+        {'json_transform_mapping': {'meta': JsonTransformer(keys=('k',))}},
+        {'json_transform_mapping': {'tags': JsonTransformer(func=lambda tags: '|'.join(tags))}},
+    ])
+    def test_large_table(self, kwargs):
+        """
+        Given:
+          - a large list of objects with different types of values.
+        When:
+          - calling tableToMarkdown.
+        Then:
+          - return the same table as tableToMarkdown before it was optimized for large tables.
+        """
+        values = ['host|{}\nname', 'a `b` c\r\nd', 'a `b`', 'c\rd', 'plain', u'\u05e9\u05dc\u05d5\u05dd {}', '', 0, -5,
+                  2 ** 70, 1.5, True, False, [], {}, ['x', 'y|z'], [{'a': 1}, {'a': 'b|c'}],
+                  {'nested': {'k': ['1', '2']}}, None]
+        data = []
+        for i in range(1000):
+            value = values[i % len(values)]
+            data.append({'id': i, 'name': value.format(i) if isinstance(value, str) else value,
+                         'tags': ['a', str(i)], 'meta': {'k': i, 'v': values[(i * 7) % len(values)]},
+                         'enabled': i % 2 == 0, 'score': i / 3, 'empty': None if i % 500 else '',
+                         'time': 1600000000000 + i if i % 3 else 'not a time', 'mixed': values[(i * 3) % len(values)]})
+        headers = ['id', 'name', 'tags', 'meta', 'enabled', 'score', 'empty', 'time', 'mixed', 'missing']
+
+        table = tableToMarkdown('tableToMarkdown test', data, headers=headers, **kwargs)
+
+        assert len(table.splitlines()) == 3 + len(data)
+        assert table == self.legacy_table_to_markdown('tableToMarkdown test', data, headers, **kwargs)
+
 
 @pytest.mark.parametrize('data, expected_data', COMPLEX_DATA_WITH_URLS)
 def test_url_to_clickable_markdown(data, expected_data):
@@ -2710,6 +2806,99 @@ class TestBaseClient:
             assert m.last_request.verify is False
             assert m.called is True
 
+    def test_http_request_pool_size(self):
+        """
+            Given
+            - A base client configured with a connection pool size
+
+            When
+            - Creating the client
+
+            Then
+            - Ensure the http and https adapters are mounted with the configured pool size
+        """
+        from CommonServerPython import BaseClient
+
+        client = BaseClient('https://example.com/api/v2/', pool_connections=2, pool_maxsize=20)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client._session.adapters[prefix]
+            assert adapter._pool_connections == 2
+            assert adapter._pool_maxsize == 20
+
+    @pytest.mark.parametrize('verify', [True, False])
+    def test_http_request_retries_reuse_adapter(self, requests_mock, verify):
+        """
+            Given
+            - A base client
+
+            When
+            - Making several http request calls with retries configured
+
+            Then
+            - Ensure the retries are set on the mounted https adapter, and no new adapter (with a new connection pool)
+              is mounted per request
+        """
+        from CommonServerPython import BaseClient
+
+        client = BaseClient('https://example.com/api/v2/', verify=verify)
+        https_adapter = client._session.adapters['https://']
+        requests_mock.get('https://example.com/api/v2/event', json=self.text)
+
+        for _ in range(3):
+            assert client._http_request('get', 'event', retries=2, status_list_to_retry=[429]) == self.text
+
+        assert client._session.adapters['https://'] is https_adapter
+        assert https_adapter.max_retries.total == 2
+        assert 429 in https_adapter.max_retries.status_forcelist
+
+    def test_get_connection_stats(self):
+        """
+            Given
+            - A base client of a local keep-alive http server
+
+            When
+            - Making several http request calls
+
+            Then
+            - Ensure the connection stats show all the requests were sent over a single connection
+        """
+        from CommonServerPython import BaseClient
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import threading
+
+        class KeepAliveHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = json.dumps(TestBaseClient.text).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        try:
+            port = server.server_address[1]
+            client = BaseClient('http://127.0.0.1:{}/'.format(port))
+            for _ in range(5):
+                assert client._http_request('get', 'event') == self.text
+
+            assert client.get_connection_stats() == {
+                'http://127.0.0.1:{}'.format(port): {'num_connections': 1, 'num_requests': 5}
+            }
+            client._session.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
     def test_http_request_not_ok(self, requests_mock):
         from CommonServerPython import DemistoException
         requests_mock.get('http://example.com/api/v2/event', status_code=500)
@@ -2902,6 +3091,140 @@ class TestBaseClient:
         assert not self.client._is_status_code_valid(response)
 
 
+class TestAsyncBaseClient:
+    @pytest.fixture(autouse=True)
+    def mock_support_multithreading(self, mocker):
+        return mocker.patch('CommonServerPython.support_multithreading')
+
+    def test_init_locks_server_calls(self, mock_support_multithreading):
+        """
+            Given
+            - No lock on the calls to the server
+
+            When
+            - Creating an async base client
+
+            Then
+            - Ensure the calls to the server are locked with support_multithreading, as they are sent from the workers
+        """
+        from CommonServerPython import AsyncBaseClient
+
+        AsyncBaseClient('http://example.com/api/v2/')
+
+        mock_support_multithreading.assert_called_once()
+
+    def test_gather(self, requests_mock):
+        """
+            Given
+            - An async base client
+
+            When
+            - Sending several requests with gather
+
+            Then
+            - Ensure the results are returned in the order of the requests, according to their resp_type
+        """
+        from CommonServerPython import AsyncBaseClient
+
+        client = AsyncBaseClient('http://example.com/api/v2/', max_concurrency=3)
+        for i in range(10):
+            requests_mock.get('http://example.com/api/v2/ip/{}'.format(i), json={'ip': i})
+        requests_mock.get('http://example.com/api/v2/text', text='ok')
+
+        results = client.gather([{'method': 'GET', 'url_suffix': 'ip/{}'.format(i)} for i in range(10)]
+                                + [{'method': 'GET', 'url_suffix': 'text', 'resp_type': 'text'}])
+
+        assert results == [{'ip': i} for i in range(10)] + ['ok']
+        assert requests_mock.call_count == 11
+
+    def test_gather_bounded_concurrency(self, mocker):
+        """
+            Given
+            - An async base client with max_concurrency of 2
+
+            When
+            - Sending several slow requests with gather
+
+            Then
+            - Ensure no more than 2 requests are sent concurrently
+        """
+        from CommonServerPython import AsyncBaseClient
+        import threading
+        import time
+
+        lock = threading.Lock()
+        concurrency = {'current': 0, 'max': 0}
+
+        def slow_http_request(method, url_suffix):
+            with lock:
+                concurrency['current'] += 1
+                concurrency['max'] = max(concurrency['max'], concurrency['current'])
+            time.sleep(0.05)
+            with lock:
+                concurrency['current'] -= 1
+            return url_suffix
+
+        client = AsyncBaseClient('http://example.com/api/v2/', max_concurrency=2)
+        mocker.patch.object(client, '_http_request', side_effect=slow_http_request)
+
+        results = client.gather([{'method': 'GET', 'url_suffix': 'event/{}'.format(i)} for i in range(6)])
+
+        assert results == ['event/{}'.format(i) for i in range(6)]
+        assert concurrency['max'] == 2
+        assert client._session.adapters['http://']._pool_maxsize == 2
+
+    def test_gather_errors(self, requests_mock):
+        """
+            Given
+            - An async base client
+
+            When
+            - Sending requests with gather, where one of them fails
+
+            Then
+            - Ensure the error of the failed request is raised, or returned in its place with return_exceptions
+            - Ensure the ok_codes of the request are applied
+        """
+        from CommonServerPython import AsyncBaseClient, DemistoException
+
+        client = AsyncBaseClient('http://example.com/api/v2/')
+        requests_mock.get('http://example.com/api/v2/ok', json={})
+        requests_mock.get('http://example.com/api/v2/error', status_code=500, json={'error': 'failed'})
+        requests_kwargs = [{'method': 'GET', 'url_suffix': 'ok'}, {'method': 'GET', 'url_suffix': 'error'}]
+
+        with raises(DemistoException, match='Error in API call \\[500\\]'):
+            client.gather(requests_kwargs)
+
+        results = client.gather(requests_kwargs, return_exceptions=True)
+        assert results[0] == {}
+        assert isinstance(results[1], DemistoException)
+
+        requests_kwargs[1]['ok_codes'] = (500,)
+        assert client.gather(requests_kwargs) == [{}, {'error': 'failed'}]
+
+    def test_async_http_request(self, requests_mock):
+        """
+            Given
+            - An async base client, used from a running event loop
+
+            When
+            - Awaiting the futures of several requests
+
+            Then
+            - Ensure the results of the requests are returned
+        """
+        import asyncio
+        from CommonServerPython import AsyncBaseClient
+
+        client = AsyncBaseClient('http://example.com/api/v2/')
+        requests_mock.get('http://example.com/api/v2/event', json={'status': 'ok'})
+
+        async def send_requests():
+            return await asyncio.gather(*[client._async_http_request('GET', 'event') for _ in range(3)])
+
+        assert asyncio.run(send_requests()) == [{'status': 'ok'}] * 3
+
+
 def test_parse_date_string():
     # test unconverted data remains: Z
     assert parse_date_string('2019-09-17T06:16:39Z') == datetime(2019, 9, 17, 6, 16, 39)
@@ -3450,6 +3773,7 @@ def test_auto_detect_indicator_type_tldextract(mocker):
         tlde.__version__ = '2.2.7'
 
         mocker.patch.object(tlde, 'TLDExtract')
+        mocker.patch.object(CommonServerPython, '_TLD_SUFFIX_EXTRACTOR', None)
 
         auto_detect_indicator_type('8')
 
@@ -3457,6 +3781,45 @@ def test_auto_detect_indicator_type_tldextract(mocker):
         assert 'cache_file' in res[1].keys()
 
 
+def test_auto_detect_indicator_types():
+    """
+        Given
+            A batch of indicator values, with duplicates
+
+        When
+            Trying to detect the types of the indicators in one call.
+
+        Then
+            Run the auto_detect_indicator_types and validate that the types are the same as detecting each value
+            separately, by the order of the values.
+    """
+    from CommonServerPython import auto_detect_indicator_types
+    indicator_values = [value for value, _ in INDICATOR_VALUE_AND_TYPE] * 2
+
+    assert auto_detect_indicator_types(indicator_values) == \
+        [auto_detect_indicator_type(value) for value in indicator_values]
+
+
+def test_auto_detect_indicator_type_tldextract_once(mocker):
+    """
+        Given
+            Several domain indicators
+
+        When
+            Trying to detect the types of the indicators.
+
+        Then
+            Validate that the tldextract extractor (which loads the whole suffix list) is created only once.
+    """
+    import tldextract as tlde
+    mocker.patch.object(CommonServerPython, '_TLD_SUFFIX_EXTRACTOR', None)
+    tld_extract_mock = mocker.patch.object(tlde, 'TLDExtract', return_value=lambda value: mocker.Mock(suffix='com'))
+
+    assert [auto_detect_indicator_type(value) for value in ('a.com', 'b.com', '*.c.com')] == \
+        ['Domain', 'Domain', 'DomainGlob']
+    assert tld_extract_mock.call_count == 1
+
+
 VALID_URL_INDICATORS = [
     '3.21.32.65/path',
     '19.117.63.253:28/other/path',
@@ -5846,6 +6209,152 @@ class TestIndicatorsSearcher:
             results.append(res)
         assert len(results) == 1
 
+    @pytest.mark.parametrize('can_use_search_after, searcher_kwargs', [
+        (True, {'limit': 10}),
+        (True, {'limit': 2}),
+        (False, {'page': 1, 'size': 1}),
+        (False, {'page': 18}),
+    ])
+    def test_iterator__prefetch(self, mocker, can_use_search_after, searcher_kwargs):
+        """
+        Given:
+          - Searching indicators with and without prefetching the pages
+        When:
+          - Searching indicators using iterator
+        Then:
+          - The same pages are returned in the same order, and the searchers end at the same position
+        """
+        from CommonServerPython import IndicatorsSearcher
+        mocker.patch('CommonServerPython.support_multithreading')
+        side_effect = self.mock_search_indicators_search_after if can_use_search_after else self.mock_search_after_output
+        mocker.patch.object(demisto, 'searchIndicators', side_effect=side_effect)
+        searchers = []
+        results = []
+        for prefetch in (False, True):
+            search_indicators = IndicatorsSearcher(prefetch=prefetch, **searcher_kwargs)
+            search_indicators._can_use_search_after = can_use_search_after
+            results.append(list(search_indicators))
+            searchers.append(search_indicators)
+
+        assert results[0] == results[1]
+        assert searchers[0].page == searchers[1].page
+        assert searchers[0]._search_after_param == searchers[1]._search_after_param
+
+    def test_iterator__prefetch_research_flow(self, mocker):
+        """
+        Given:
+          - Searching indicators with prefetching up to a limit
+        When:
+          - Raising the limit after the search is done, and searching again
+        Then:
+          - The search continues from where it stopped
+        """
+        from CommonServerPython import IndicatorsSearcher
+        mocker.patch('CommonServerPython.support_multithreading')
+        mocker.patch.object(demisto, 'searchIndicators', side_effect=self.mock_search_indicators_search_after)
+        search_indicators = IndicatorsSearcher(limit=2, prefetch=True)
+        search_indicators._can_use_search_after = True
+        assert [res['iocs'][0]['value'] for res in search_indicators] == ['mock0', 'mock1']
+        search_indicators.limit += 2
+        assert [res['iocs'][0]['value'] for res in search_indicators] == ['mock2', 'mock3']
+
+    def test_iterator__prefetch_overlaps_processing(self, mocker):
+        """
+        Given:
+          - Searching indicators with prefetching
+        When:
+          - Processing the first page
+        Then:
+          - The next page is searched while the first page is processed
+        """
+        import threading
+        from CommonServerPython import IndicatorsSearcher
+        mocker.patch('CommonServerPython.support_multithreading')
+        second_search = threading.Event()
+        search_calls = []
+
+        def search_indicators(**kwargs):
+            search_calls.append(kwargs)
+            if len(search_calls) == 2:
+                second_search.set()
+            return self.mock_search_indicators_search_after(**kwargs)
+
+        mocker.patch.object(demisto, 'searchIndicators', side_effect=search_indicators)
+        search_indicators_obj = IndicatorsSearcher(limit=10, prefetch=True)
+        search_indicators_obj._can_use_search_after = True
+        next(search_indicators_obj)
+        assert second_search.wait(timeout=5)
+        assert len(list(search_indicators_obj)) == 3
+
+    def test_iterator__prefetch_error(self, mocker):
+        """
+        Given:
+          - Searching indicators with prefetching
+        When:
+          - The search fails on the prefetching thread
+        Then:
+          - The error is raised to the caller
+        """
+        from CommonServerPython import IndicatorsSearcher
+        mocker.patch('CommonServerPython.support_multithreading')
+        mocker.patch.object(demisto, 'searchIndicators', side_effect=ValueError('search failed'))
+        search_indicators = IndicatorsSearcher(prefetch=True)
+        with pytest.raises(ValueError, match='search failed'):
+            next(search_indicators)
+
+    def test_iterator__prefetch_locks_server_calls(self, mocker):
+        """
+        Given:
+          - Searching indicators with prefetching
+        When:
+          - The prefetching thread is started
+        Then:
+          - The calls to the server are locked with support_multithreading, once
+        """
+        from CommonServerPython import IndicatorsSearcher
+        support_multithreading_mock = mocker.patch('CommonServerPython.support_multithreading',
+                                                   side_effect=lambda: setattr(demisto, 'lock', None))
+        mocker.patch.object(demisto, 'searchIndicators', side_effect=self.mock_search_indicators_search_after)
+        try:
+            for _ in range(2):
+                search_indicators = IndicatorsSearcher(limit=10, prefetch=True)
+                search_indicators._can_use_search_after = True
+                assert len(list(search_indicators)) == 4
+        finally:
+            del demisto.lock
+        support_multithreading_mock.assert_called_once()
+
+    def test_iterator__prefetch_stopped_early(self, mocker):
+        """
+        Given:
+          - Searching indicators with prefetching, with more pages than the prefetch queue holds
+        When:
+          - Breaking out of the iteration after the first page, and exiting the searcher context
+        Then:
+          - The prefetching thread stops, and no more pages are searched
+        """
+        import threading
+        from CommonServerPython import IndicatorsSearcher
+        mocker.patch('CommonServerPython.support_multithreading')
+        queue_full = threading.Event()
+
+        def search_indicators(**kwargs):
+            if search_indicators_mock.call_count > 3:
+                queue_full.set()
+            return {'iocs': [{'value': 'mock'}], 'total': 100, 'searchAfter': search_indicators_mock.call_count}
+
+        search_indicators_mock = mocker.patch.object(demisto, 'searchIndicators', side_effect=search_indicators)
+        with IndicatorsSearcher(prefetch=True, prefetch_queue_size=2) as search_indicators_obj:
+            search_indicators_obj._can_use_search_after = True
+            for _ in search_indicators_obj:
+                prefetch_thread = search_indicators_obj._prefetch_thread
+                assert queue_full.wait(timeout=5)
+                break
+
+        prefetch_thread.join(timeout=5)
+        assert not prefetch_thread.is_alive()
+        assert search_indicators_mock.call_count == 4
+
 
 class TestAutoFocusKeyRetriever:
     def test_instantiate_class_with_param_key(self, mocker, clear_version_cache):
@@ -7223,3 +7732,96 @@ class TestSendEventsToXSIAMTest:
 
         assert arguments_called['headers']['format'] == expected_format
         assert decompressed_data == expected_data
+
+    @pytest.mark.parametrize('num_of_workers', [1, 3])
+    def test_send_events_to_xsiam_chunks(self, mocker, num_of_workers):
+        """
+        Given:
+            - 100 events of 10 bytes each.
+        When:
+            - Calling the send_events_to_xsiam function with a chunk size of 100 bytes, sequentially and concurrently.
+        Then:
+            - Ensure the events are sent in 12 chunks (of up to 9 events, including the new line separators), in order.
+            - Ensure the amount of events of each chunk is reported to the module health.
+        """
+        if not IS_PY3:
+            return
+
+        from CommonServerPython import BaseClient
+        mocker.patch('CommonServerPython.support_multithreading')
+        mocker.patch.object(demisto, 'getLicenseCustomField', side_effect=self.get_license_custom_field_mock)
+        update_module_health_mock = mocker.patch.object(demisto, 'updateModuleHealth')
+        _http_request_mock = mocker.patch.object(BaseClient, '_http_request', return_value={'error': 'false'})
+        events = ['event {:04d}'.format(i) for i in range(100)]
+
+        send_events_to_xsiam(events=events, vendor='some vendor', product='some product', chunk_size=100,
+                             num_of_workers=num_of_workers)
+
+        sent_events = []
+        for call in _http_request_mock.call_args_list:
+            chunk = gzip.decompress(call[1]['data']).decode('utf-8').split('\n')
+            assert len(chunk) <= 9
+            sent_events.extend(chunk)
+        assert _http_request_mock.call_count == 12
+        assert sent_events == events
+        assert [call[0][0]['eventsPulled'] for call in update_module_health_mock.call_args_list] == [9] * 11 + [1]
+
+    def test_send_events_to_xsiam_max_events_per_chunk(self, mocker):
+        """
+        Given:
+            - A string of 5 events separated by a new line.
+        When:
+            - Calling the send_events_to_xsiam function with max_events_per_chunk of 2.
+        Then:
+            - Ensure the events are sent in 3 chunks.
+        """
+        if not IS_PY3:
+            return
+
+        from CommonServerPython import BaseClient
+        mocker.patch.object(demisto, 'getLicenseCustomField', side_effect=self.get_license_custom_field_mock)
+        mocker.patch.object(demisto, 'updateModuleHealth')
+        _http_request_mock = mocker.patch.object(BaseClient, '_http_request', return_value={'error': 'false'})
+
+        send_events_to_xsiam(events='1\n2\n3\n4\n5', vendor='some vendor', product='some product',
+                             max_events_per_chunk=2)
+
+        assert [gzip.decompress(call[1]['data']).decode('utf-8') for call in _http_request_mock.call_args_list] == \
+            ['1\n2', '3\n4', '5']
+
+    def test_send_events_to_xsiam_no_events(self, mocker):
+        """
+        Given:
+            - An empty list of events.
+        When:
+            - Calling the send_events_to_xsiam function.
+        Then:
+            - Ensure no request is sent.
+        """
+        from CommonServerPython import BaseClient
+        _http_request_mock = mocker.patch.object(BaseClient, '_http_request')
+
+        send_events_to_xsiam(events=[], vendor='some vendor', product='some product')
+
+        assert not _http_request_mock.called
+
+    def test_send_events_to_xsiam_error(self, mocker):
+        """
+        Given:
+            - XSIAM that returns an error for the request.
+        When:
+            - Calling the send_events_to_xsiam function.
+        Then:
+            - Ensure the error is raised and no events are reported to the module health.
+        """
+        if not IS_PY3:
+            return
+
+        from CommonServerPython import BaseClient
+        mocker.patch.object(demisto, 'getLicenseCustomField', side_effect=self.get_license_custom_field_mock)
+        update_module_health_mock = mocker.patch.object(demisto, 'updateModuleHealth')
+        mocker.patch.object(BaseClient, '_http_request', return_value={'error': 'bad request'})
+
+        with pytest.raises(DemistoException, match='bad request'):
+            send_events_to_xsiam(events=['event'], vendor='some vendor', product='some product')
+        assert not update_module_health_mock.called
@@ -7,9 +7,14 @@ import re
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.base import BaseEstimator, TransformerMixin
 import json
+import base64
+import pickle
+import zlib
+from collections import Counter
 import pandas as pd
+from scipy import sparse
 from scipy.spatial.distance import cdist
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional, Tuple
 
 warnings.simplefilter("ignore")
 
@@ -58,6 +63,10 @@ REGEX_IP = re.compile(
     r'(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])')
 REPLACE_COMMAND_LINE = {"=": " = ", "\\": "/", "[": "", "]": "", '"': "", "'": "", }
 
+INDEX_CANDIDATES_FIELDS = ['id', 'created', 'modified']
+INDEX_UPDATE_BATCH_SIZE = 100
+MAX_INDEX_SIZE = 20000
+
 
 def keep_high_level_field(incidents_field: List[str]) -> List[str]:
     """
@@ -325,19 +334,21 @@ class Transformer():
     Class for Transformer
     """
 
-    def __init__(self, p_transformer_type, field, p_incidents_df, p_incident_to_match, p_params):
+    def __init__(self, p_transformer_type, field, p_incidents_df, p_incident_to_match, p_params, p_index=None):
         """
         :param p_transformer_type: One of the key value of TRANSFORMATION dict
         :param field: incident field used in this transformation
         :param p_incidents_df: DataFrame of incident (should contains one columns which same name than incident_field)
         :param p_incident_to_match: DataFrame of the current incident
         :param p_params: Dictionary of all the transformation - TRANSFORMATION
+        :param p_index: SimilarityIndex of the incidents, used instead of fitting the TFIDF transformer if given
         """
         self.transformer_type = p_transformer_type
         self.field = field
         self.incident_to_match = p_incident_to_match
         self.incidents_df = p_incidents_df
         self.params = p_params
+        self.index = p_index
 
     def fit_transform(self):
         """
@@ -356,19 +367,25 @@ class Transformer():
         """
         :return: Add one columns 'similarity %s' % self.field to self.incidents_df Dataframe with the score
         """
-        scoring_function = self.params[self.transformer_type]['scoring_function']
-        X_vect, incident_vect = self.fit_transform()
-        dist = scoring_function(X_vect, incident_vect)
+        if self.index is not None and self.index.has_field(self.field, self.transformer_type):
+            dist = self.index.get_similarity(self.field, self.transformer_type, self.incidents_df.index,
+                                             self.incident_to_match)
+        else:
+            scoring_function = self.params[self.transformer_type]['scoring_function']
+            X_vect, incident_vect = self.fit_transform()
+            dist = scoring_function(X_vect, incident_vect)
         self.incidents_df['similarity %s' % self.field] = np.round(dist, 2)
         return self.incidents_df
 
 
 class Model:
-    def __init__(self, p_transformation):
+    def __init__(self, p_transformation, p_index=None):
         """
         :param p_transformation: Dict with the transformers parameters - TRANSFORMATION
+        :param p_index: SimilarityIndex of the incidents, if the incidents were loaded from an index
         """
         self.transformation = p_transformation
+        self.index = p_index
 
     def init_prediction(self, p_incident_to_match, p_incidents_df, p_field_for_command_line=[],
                         p_field_for_potential_exact_match=[], p_field_for_display_fields_incidents=[],
@@ -436,13 +453,16 @@ class Model:
         :return:
         """
         for field in self.field_for_command_line:
-            t = Transformer('commandline', field, self.incidents_df, self.incident_to_match, self.transformation)
+            t = Transformer('commandline', field, self.incidents_df, self.incident_to_match, self.transformation,
+                            self.index)
             t.get_score()
         for field in self.field_for_potential_exact_match:
-            t = Transformer('potentialMatch', field, self.incidents_df, self.incident_to_match, self.transformation)
+            t = Transformer('potentialMatch', field, self.incidents_df, self.incident_to_match, self.transformation,
+                            self.index)
             t.get_score()
         for field in self.field_for_json:
-            t = Transformer('json', field, self.incidents_df, self.incident_to_match, self.transformation)
+            t = Transformer('json', field, self.incidents_df, self.incident_to_match, self.transformation,
+                            self.index)
             t.get_score()
 
     def compute_final_score(self):
@@ -465,6 +485,240 @@ class Model:
         return df_sorted
 
 
+class SimilarityIndex:
+    """
+    Stored index of the incidents used to find similarity, updated incrementally with the incidents that are new or
+    were modified since they were indexed.
+    The text and JSON fields are stored as sparse n-gram counts, from which the TFIDF vectors of the incidents are
+    computed with sparse matrix products, instead of fetching and vectorizing all the incidents on each run.
+    """
+
+    def __init__(self, fields_signature: str, tfidf_fields: List[Tuple[str, str]]):
+        """
+        :param fields_signature: signature of the arguments fields the index was built for
+        :param tfidf_fields: List of (incident field, key of TRANSFORMATION dict) to store the n-gram counts of
+        """
+        self.fields_signature = fields_signature
+        self.tfidf_fields = tfidf_fields
+        self.records: Dict[str, Dict] = {}
+        self.modified: Dict[str, str] = {}
+        self.rows: Dict[str, int] = {}
+        self.n_rows = 0
+        self.vocabularies: Dict[Tuple[str, str], Dict[str, int]] = {key: {} for key in tfidf_fields}
+        self.counts: Dict[Tuple[str, str], sparse.csr_matrix] = {
+            key: sparse.csr_matrix((0, 0), dtype=np.int32) for key in tfidf_fields}
+
+    def has_field(self, field: str, transformer_type: str) -> bool:
+        return (field, transformer_type) in self.counts
+
+    def update(self, incidents_df: pd.DataFrame, modified: Dict[str, str]):
+        """
+        Add incidents to the index, replacing their previous version if they were already indexed
+        :param incidents_df: DataFrame of the incidents to add, indexed by incident id
+        :param modified: modified time of the incidents by incident id
+        :return:
+        """
+        for key in self.tfidf_fields:
+            field, transformer_type = key
+            transformation = TRANSFORMATION[transformer_type]
+            analyzer = TfidfVectorizer(**transformation['params']).build_analyzer()
+            vocabulary = self.vocabularies[key]
+            values = incidents_df[field] if field in incidents_df.columns else pd.Series([None] * len(incidents_df))
+            data, indices, indptr = [], [], [0]  # type: ignore
+            for value in values.apply(transformation['normalize']):
+                for ngram, count in Counter(analyzer(value)).items():
+                    indices.append(vocabulary.setdefault(ngram, len(vocabulary)))
+                    data.append(count)
+                indptr.append(len(indices))
+            new_counts = sparse.csr_matrix((data, indices, indptr), shape=(len(incidents_df), len(vocabulary)),
+                                           dtype=np.int32)
+            counts = self.counts[key]
+            counts.resize((counts.shape[0], len(vocabulary)))
+            self.counts[key] = sparse.vstack([counts, new_counts], format='csr')
+
+        for row, (incident_id, record) in enumerate(zip(incidents_df.index, incidents_df.to_dict(orient='records'))):
+            record = {k: v for k, v in record.items() if not (isinstance(v, float) and np.isnan(v))}
+            self.records[incident_id] = record
+            self.modified[incident_id] = modified.get(incident_id)  # type: ignore
+            self.rows[incident_id] = self.n_rows + row
+        self.n_rows += len(incidents_df)
+
+        if len(self.records) > MAX_INDEX_SIZE:
+            oldest_ids = sorted(self.records, key=lambda x: str(self.records[x].get(COLUMN_TIME)))
+            for incident_id in oldest_ids[:len(self.records) - MAX_INDEX_SIZE]:
+                del self.records[incident_id], self.modified[incident_id], self.rows[incident_id]
+        if self.n_rows > 2 * len(self.rows):
+            self.compact()
+
+    def compact(self):
+        """
+        Remove the counts of incidents that were replaced or removed from the index, and the n-grams none of the
+        remaining incidents contain
+        :return:
+        """
+        incident_ids = list(self.rows)
+        rows = [self.rows[incident_id] for incident_id in incident_ids]
+        for key, counts in self.counts.items():
+            counts = counts[rows]
+            used_columns = np.unique(counts.indices)
+            new_columns = {column: i for i, column in enumerate(used_columns)}
+            self.vocabularies[key] = {ngram: new_columns[column] for ngram, column in self.vocabularies[key].items()
+                                      if column in new_columns}
+            self.counts[key] = counts[:, used_columns]
+        self.rows = {incident_id: i for i, incident_id in enumerate(incident_ids)}
+        self.n_rows = len(incident_ids)
+
+    def get_incidents_df(self, incident_ids: List[str]) -> pd.DataFrame:
+        """
+        Return DataFrame of the indexed incidents
+        :param incident_ids: ids of the incidents
+        :return: DataFrame of the incidents, indexed by incident id
+        """
+        incidents_df = pd.DataFrame([self.records[incident_id] for incident_id in incident_ids])
+        incidents_df.index = incidents_df.id
+        return incidents_df
+
+    def get_similarity(self, field: str, transformer_type: str, incident_ids, incident_to_match: pd.DataFrame) \
+            -> np.ndarray:
+        """
+        Return the similarity of the incidents to the current incident for the field, equal to the similarity of the
+        Tfidf transformer: vocabulary of the current incident, IDF over the incidents and euclidian_similarity_capped
+        :param field: incident field
+        :param transformer_type: One of the key value of TRANSFORMATION dict
+        :param incident_ids: ids of the indexed incidents to score
+        :param incident_to_match: DataFrame of the current incident
+        :return: np.array of the similarity of each incident
+        """
+        key = (field, transformer_type)
+        transformation = TRANSFORMATION[transformer_type]
+        current_value = incident_to_match[field].apply(transformation['normalize'])
+        vocabulary = TfidfVectorizer(**transformation['params'], use_idf=False).fit(current_value).vocabulary_
+        current_counts = TfidfVectorizer(**transformation['params'], vocabulary=vocabulary, use_idf=False,
+                                         norm=None).fit_transform(current_value).toarray()[0]
+
+        index_vocabulary = self.vocabularies[key]
+        present_terms = [(column, index_vocabulary[term]) for term, column in vocabulary.items()
+                         if term in index_vocabulary]
+        columns = [column for column, _ in present_terms]
+        index_columns = [index_column for _, index_column in present_terms]
+        counts = self.counts[key][[self.rows[incident_id] for incident_id in incident_ids]][:, index_columns]
+
+        # smooth IDF over the incidents, as the TFIDF transformer fitted on the incidents
+        document_frequency = np.zeros(len(vocabulary))
+        document_frequency[columns] = counts.getnnz(axis=0)
+        idf = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+
+        incidents_vectors = sparse.csr_matrix(counts.multiply(idf[columns]), dtype=float)
+        current_vector = current_counts * idf
+        current_vector /= np.linalg.norm(current_vector)
+
+        # distance between the L2 normalized vectors, incidents without any of the n-grams have a zero vector
+        norms = np.sqrt(np.asarray(incidents_vectors.multiply(incidents_vectors).sum(axis=1)).ravel())
+        non_zero = norms > 0
+        dot_products = np.zeros(len(norms))
+        dot_products[non_zero] = (incidents_vectors @ current_vector[columns])[non_zero] / norms[non_zero]
+        distance = np.sqrt(np.maximum(non_zero + 1 - 2 * dot_products, 0))
+        return np.maximum(1 - distance, 0)
+
+
+def load_similarity_index(index_name: str, fields_signature: str) -> Optional[SimilarityIndex]:
+    """
+    Load the similarity index stored in demisto
+    :param index_name: name of the index
+    :param fields_signature: signature of the arguments fields
+    :return: The index, or None if it does not exist or was built for other fields
+    """
+    res = demisto.executeCommand('getMLModel', {'modelName': index_name})[0]
+    if is_error(res):
+        return None
+    index_data = res['Contents']['modelData']
+    index = pickle.loads(zlib.decompress(base64.b64decode(index_data)))  # guardrails-disable-line
+    if not isinstance(index, SimilarityIndex) or index.fields_signature != fields_signature:
+        return None
+    return index
+
+
+def store_similarity_index(index: SimilarityIndex, index_name: str):
+    """
+    Store the similarity index in demisto
+    :param index: SimilarityIndex
+    :param index_name: name of the index
+    :return:
+    """
+    index_data = base64.b64encode(zlib.compress(pickle.dumps(index))).decode('utf-8')  # guardrails-disable-line
+    res = demisto.executeCommand('createMLModel', {'modelData': index_data,
+                                                   'modelName': index_name,
+                                                   'modelOverride': 'true',
+                                                   'modelHidden': True})
+    if is_error(res):
+        return_error(get_error(res))
+
+
+def get_incidents_by_ids(incident_ids: List[str], populate_fields: List[str], from_date: str, to_date: str) \
+        -> List[Dict]:
+    """
+    Get incidents according to their ids
+    :param incident_ids: ids of the incidents
+    :param populate_fields: List of field to populate
+    :param from_date: from_date
+    :param to_date: to_date
+    :return: List of incidents
+    """
+    incidents = []  # type: ignore
+    for i in range(0, len(incident_ids), INDEX_UPDATE_BATCH_SIZE):
+        ids_batch = incident_ids[i:i + INDEX_UPDATE_BATCH_SIZE]
+        res = demisto.executeCommand('GetIncidentsByQuery', {
+            'query': "id:(%s)" % ' '.join(ids_batch),
+            'populateFields': ' , '.join(populate_fields),
+            'fromDate': from_date,
+            'toDate': to_date,
+            'limit': len(ids_batch)
+        })
+        if is_error(res):
+            return_error(res)
+        incidents += json.loads(res[0]['Contents'])
+    return incidents
+
+
+def load_incidents_from_index(index_name: str, incidents: List[Dict], populate_fields: List[str],
+                              similar_text_field: List[str], similar_json_field: List[str],
+                              similar_categorical_field: List[str], from_date: str, to_date: str):
+    """
+    Update the similarity index with the incidents that are new or were modified since they were indexed, and return
+    the incidents from the index
+    :param index_name: name of the index
+    :param incidents: List of incidents with their id, created and modified fields
+    :param populate_fields: List of field to populate
+    :param similar_text_field: similar_text_field
+    :param similar_json_field: similar_json_field
+    :param similar_categorical_field: similar_categorical_field
+    :param from_date: from_date
+    :param to_date: to_date
+    :return: DataFrame of the incidents, SimilarityIndex
+    """
+    fields_signature = json.dumps([sorted(populate_fields), similar_text_field, similar_json_field,
+                                   similar_categorical_field])
+    index = load_similarity_index(index_name, fields_signature)
+    if index is None:
+        index = SimilarityIndex(fields_signature, [(field, 'commandline') for field in similar_text_field]
+                                + [(field, 'json') for field in similar_json_field])
+
+    modified = {incident['id']: incident.get('modified') for incident in incidents}
+    ids_to_index = [incident_id for incident_id in modified
+                    if incident_id not in index.rows or index.modified[incident_id] != modified[incident_id]]
+    if ids_to_index:
+        new_incidents = get_incidents_by_ids(ids_to_index, populate_fields, from_date, to_date)
+        if new_incidents:
+            new_incidents_df = pd.DataFrame(new_incidents)
+            new_incidents_df.index = new_incidents_df.id
+            new_incidents_df = fill_nested_fields(new_incidents_df, new_incidents, similar_text_field,
+                                                  similar_categorical_field)
+            index.update(new_incidents_df, modified)
+            store_similarity_index(index, index_name)
+
+    return index.get_incidents_df([incident_id for incident_id in modified if incident_id in index.rows]), index
+
+
 def return_clean_date(timestamp: str) -> str:
     """
     Return YYYY-MM-DD
@@ -632,10 +886,11 @@ def get_args():  # type: ignore
     show_actual_incident = demisto.args().get('showCurrentIncident')
     incident_id = demisto.args().get('incidentId')
     include_indicators_similarity = demisto.args().get('includeIndicatorsSimilarity')
+    index_name = demisto.args().get('indexName')
 
     return similar_text_field, similar_json_field, similar_categorical_field, exact_match_fields, display_fields, \
         from_date, to_date, show_similarity, confidence, max_incidents, query, aggregate, limit, \
-        show_actual_incident, incident_id, include_indicators_similarity
+        show_actual_incident, incident_id, include_indicators_similarity, index_name
 
 
 def load_current_incident(incident_id: str, populate_fields: List[str], from_date: str, to_date: str):
@@ -878,7 +1133,7 @@ def prepare_current_incident(incident_df: pd.DataFrame, display_fields: List[str
 def main():
     similar_text_field, similar_json_field, similar_categorical_field, exact_match_fields, display_fields, from_date, \
         to_date, show_distance, confidence, max_incidents, query, aggregate, limit, show_actual_incident, \
-        incident_id, include_indicators_similarity = get_args()
+        incident_id, include_indicators_similarity, index_name = get_args()
 
     global_msg = ""
 
@@ -893,7 +1148,9 @@ def main():
 
     # load the related incidents
     populate_fields.remove('id')
-    incidents, msg = get_all_incidents_for_time_window_and_exact_match(exact_match_fields, populate_high_level_fields,
+    incidents, msg = get_all_incidents_for_time_window_and_exact_match(exact_match_fields,
+                                                                       INDEX_CANDIDATES_FIELDS if index_name
+                                                                       else populate_high_level_fields,
                                                                        incident,
                                                                        from_date, to_date, query, limit)
     global_msg += "%s \n" % msg
@@ -904,10 +1161,16 @@ def main():
         return None, global_msg
     number_incident_fetched = len(incidents)
 
-    incidents_df = pd.DataFrame(incidents)
-    incidents_df.index = incidents_df.id
+    if index_name:
+        incidents_df, similarity_index = load_incidents_from_index(index_name, incidents, populate_high_level_fields,
+                                                                   similar_text_field, similar_json_field,
+                                                                   similar_categorical_field, from_date, to_date)
+    else:
+        similarity_index = None
+        incidents_df = pd.DataFrame(incidents)
+        incidents_df.index = incidents_df.id
 
-    incidents_df = fill_nested_fields(incidents_df, incidents, similar_text_field, similar_categorical_field)
+        incidents_df = fill_nested_fields(incidents_df, incidents, similar_text_field, similar_categorical_field)
 
     # Find given fields that does not exist in the incident
     global_msg, incorrect_fields = find_incorrect_fields(populate_fields, incidents_df, global_msg)
@@ -922,7 +1185,7 @@ def main():
     incident_df = fill_nested_fields(incident_df, incident, similar_text_field, similar_categorical_field)
 
     # Model prediction
-    model = Model(p_transformation=TRANSFORMATION)
+    model = Model(p_transformation=TRANSFORMATION, p_index=similarity_index)
     model.init_prediction(incident_df, incidents_df, similar_text_field,
                           similar_categorical_field, display_fields, similar_json_field)
     similar_incidents, fields_used = model.predict()
@@ -4,7 +4,7 @@ from DBotFindSimilarIncidents import normalize_command_line, main, demisto, keep
     preprocess_incidents_field, PREFIXES_TO_REMOVE, check_list_of_dict, REGEX_IP, match_one_regex, \
     SIMILARITY_COLUNM_NAME_INDICATOR, SIMILARITY_COLUNM_NAME, euclidian_similarity_capped, find_incorrect_fields, \
     MESSAGE_NO_INCIDENT_FETCHED, MESSAGE_INCORRECT_FIELD, MESSAGE_WARNING_TRUNCATED, COLUMN_ID, COLUMN_TIME, \
-    TAG_SCRIPT_INDICATORS
+    TAG_SCRIPT_INDICATORS, SimilarityIndex, Transformer, TRANSFORMATION, entryTypes
 
 import json
 import numpy as np
@@ -331,3 +331,170 @@ def test_main_incident_nested(mocker):
     df, msg = main()
     assert not df.empty
     assert (df['similarity %s' % nested_field] == [1.0, 1.0, 1.0]).all()
+
+
+INDEX_ARGS = {
+    'incidentId': 12345,
+    'similarTextField': 'incident.commandline, commandline, command, '
+                        'empty_current_incident_field, empty_fetched_incident_field',
+    'similarCategoricalField': 'signature, filehash, incident.commandline',
+    'similarJsonField': 'CustomFields',
+    'limit': 10000,
+    'fieldExactMatch': '',
+    'fieldsToDisplay': 'filehash, destinationip, closeNotes, sourceip, alertdescription',
+    'showIncidentSimilarityForAllFields': 'True',
+    'minimunIncidentSimilarity': 0,
+    'maxIncidentsToDisplay': 100,
+    'query': '',
+    'aggreagateIncidentsDifferentDate': 'False',
+    'includeIndicatorsSimilarity': 'False'
+}
+
+
+@pytest.mark.filterwarnings("ignore::pandas.core.common.SettingWithCopyWarning")
+def test_main_with_index(mocker):
+    """
+    Given:
+      - Incidents to find similarity with
+    When:
+      - Running the automation with an index name, twice
+    Then:
+      - The similarity is the same as without the index
+      - The index is stored in the first run, and the incidents are loaded from it in the second run
+    """
+    global SIMILAR_INDICATORS, FETCHED_INCIDENT, CURRENT_INCIDENT
+    FETCHED_INCIDENT = FETCHED_INCIDENT_NOT_EMPTY
+    CURRENT_INCIDENT = CURRENT_INCIDENT_NOT_EMPTY
+    SIMILAR_INDICATORS = SIMILAR_INDICATORS_EMPTY
+    stored_models = {}
+    executed_commands = []
+
+    def execute_command_with_index(command, args):
+        executed_commands.append((command, args))
+        if command == 'getMLModel':
+            if args['modelName'] not in stored_models:
+                return [{'Type': entryTypes['error'], 'Contents': 'Model not found'}]
+            return [{'Type': entryTypes['note'], 'Contents': {'modelData': stored_models[args['modelName']]}}]
+        if command == 'createMLModel':
+            stored_models[args['modelName']] = args['modelData']
+            return [{'Type': entryTypes['note'], 'Contents': 'done'}]
+        return executeCommand(command, args)
+
+    mocker.patch.object(demisto, 'dt', return_value=None)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_with_index)
+    mocker.patch.object(demisto, 'args', return_value=INDEX_ARGS)
+    res, _ = main()
+
+    mocker.patch.object(demisto, 'args', return_value=dict(INDEX_ARGS, indexName='similarity_index'))
+    executed_commands.clear()
+    res_first_run, _ = main()
+    assert ('GetIncidentsByQuery', 'id:(1 2 3)') in [(command, args.get('query')) for command, args in executed_commands]
+    assert 'similarity_index' in stored_models
+
+    executed_commands.clear()
+    res_second_run, _ = main()
+    assert ('GetIncidentsByQuery', 'id:(1 2 3)') not in [(command, args.get('query'))
+                                                         for command, args in executed_commands]
+    assert not any(command == 'createMLModel' for command, _ in executed_commands)
+
+    for res_with_index in (res_first_run, res_second_run):
+        assert res_with_index.columns.tolist() == res.columns.tolist()
+        assert res_with_index.index.tolist() == res.index.tolist()
+        for column in res.columns:
+            if column.startswith('similarity'):
+                np.testing.assert_array_equal(res_with_index[column].to_numpy(), res[column].to_numpy())
+
+
+def test_similarity_index_get_similarity():
+    """
+    Given:
+      - Incidents with text and JSON fields indexed in a SimilarityIndex
+    When:
+      - Getting the similarity of the incidents to the current incident from the index
+    Then:
+      - The similarity is the same as the similarity of the fitted transformer
+    """
+    commands = ['powershell -enc abc', 'cmd.exe /c whoami', 'powershell IP=1.1.1.1 -nop', 'net user admin /add',
+                '', 'powershell.exe -ExecutionPolicy bypass -File script.ps1']
+    incidents_df = pd.DataFrame({
+        'id': [str(i) for i in range(len(commands))],
+        'created': ['2021-01-30'] * len(commands),
+        'commandline': commands,
+        'CustomFields': [json.dumps({'field': command, 'other': i}) for i, command in enumerate(commands)],
+    })
+    incidents_df.index = incidents_df.id
+    incident_to_match = pd.DataFrame([{'id': '100', 'commandline': 'powershell -nop -enc IP=2.2.2.2',
+                                       'CustomFields': json.dumps({'field': 'powershell', 'other': 1})}])
+    index = SimilarityIndex('signature', [('commandline', 'commandline'), ('CustomFields', 'json')])
+    index.update(incidents_df.iloc[:3], {})
+    index.update(incidents_df.iloc[3:], {})
+
+    for field, transformer_type in index.tfidf_fields:
+        expected = Transformer(transformer_type, field, incidents_df.copy(), incident_to_match, TRANSFORMATION)
+        expected = expected.get_score()['similarity %s' % field]
+        similarity = Transformer(transformer_type, field, incidents_df.copy(), incident_to_match, TRANSFORMATION,
+                                 index).get_score()['similarity %s' % field]
+        assert similarity.tolist() == expected.tolist()
+
+
+def test_similarity_index_update_modified_incident():
+    """
+    Given:
+      - A SimilarityIndex with indexed incidents
+    When:
+      - Updating the index with a modified version of an incident, until the index is compacted
+    Then:
+      - The index keeps the last version of the incident only, and drops the n-grams of the previous versions
+    """
+    incidents_df = pd.DataFrame({'id': ['1', '2'], 'created': ['2021-01-30'] * 2,
+                                 'commandline': ['powershell -enc abc', 'cmd.exe /c whoami']})
+    incidents_df.index = incidents_df.id
+    index = SimilarityIndex('signature', [('commandline', 'commandline')])
+    index.update(incidents_df, {'1': 'modified_1', '2': 'modified_2'})
+    for version in range(3):
+        modified_df = pd.DataFrame({'id': ['1'], 'created': ['2021-01-30'], 'commandline': ['net user %s' % version]})
+        modified_df.index = modified_df.id
+        index.update(modified_df, {'1': 'modified_%s' % version})
+
+    assert index.n_rows == 2
+    assert index.modified == {'1': 'modified_2', '2': 'modified_2'}
+    assert index.get_incidents_df(['1', '2'])['commandline'].tolist() == ['net user 2', 'cmd.exe /c whoami']
+    assert 'powershell' not in index.vocabularies[('commandline', 'commandline')]
+    incident_to_match = pd.DataFrame([{'id': '3', 'commandline': 'net user 2'}])
+    assert index.get_similarity('commandline', 'commandline', ['1', '2'], incident_to_match)[0] == pytest.approx(1)
+
+
+@pytest.mark.filterwarnings("ignore::pandas.core.common.SettingWithCopyWarning")
+def test_main_with_index_displays_json_values(mocker):
+    """
+    Given:
+      - Incidents with a JSON field to find similarity with, and to display
+    When:
+      - Running the automation with an index name, twice
+    Then:
+      - The JSON field of the similar incidents keeps its original values in the displayed results
+    """
+    global SIMILAR_INDICATORS, FETCHED_INCIDENT, CURRENT_INCIDENT
+    FETCHED_INCIDENT = FETCHED_INCIDENT_NOT_EMPTY
+    CURRENT_INCIDENT = CURRENT_INCIDENT_NOT_EMPTY
+    SIMILAR_INDICATORS = SIMILAR_INDICATORS_EMPTY
+    stored_models = {}
+
+    def execute_command_with_index(command, args):
+        if command == 'getMLModel':
+            if args['modelName'] not in stored_models:
+                return [{'Type': entryTypes['error'], 'Contents': 'Model not found'}]
+            return [{'Type': entryTypes['note'], 'Contents': {'modelData': stored_models[args['modelName']]}}]
+        if command == 'createMLModel':
+            stored_models[args['modelName']] = args['modelData']
+            return [{'Type': entryTypes['note'], 'Contents': 'done'}]
+        return executeCommand(command, args)
+
+    mocker.patch.object(demisto, 'dt', return_value=None)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_with_index)
+    mocker.patch.object(demisto, 'args', return_value=dict(INDEX_ARGS, indexName='similarity_index',
+                                                           fieldsToDisplay='CustomFields'))
+    expected = {incident['id']: incident['CustomFields'] for incident in FETCHED_INCIDENT_NOT_EMPTY}
+    for _ in range(2):
+        res, _ = main()
+        assert res['CustomFields'].tolist() == [expected[incident_id] for incident_id in res['id']]
@@ -5,6 +5,7 @@ from CommonServerUserPython import *
 from sklearn.base import BaseEstimator, TransformerMixin
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from collections import Counter
 import re
 import math
@@ -55,6 +56,8 @@ def flatten_list(my_list: List[List]) -> List:
 class FrequencyIndicators(BaseEstimator, TransformerMixin):
     """
     FrequencyIndicators class for indicator frequencies computation
+    Only the indicators of the current incident are scored, so the incidents are represented by a sparse matrix of
+    their occurrences of these indicators.
     """
 
     def __init__(self, incident_field, normalize_function, current_incident):
@@ -66,29 +69,40 @@ class FrequencyIndicators(BaseEstimator, TransformerMixin):
         else:
             current_incident = current_incident[self.incident_field]
         self.vocabulary = current_incident.iloc[0].split(' ')
+        self.vocabulary_counts = Counter(self.vocabulary)
+        self.columns = {word: i for i, word in enumerate(self.vocabulary_counts)}
+        self.weights = np.zeros(len(self.columns))
 
-    def fit(self, x):
+    def get_occurrences_matrix(self, x) -> sparse.csr_matrix:
+        """
+        :param x: DataFrame of incidents
+        :return: sparse matrix of the occurrences of the current incident indicators in each incident
+        """
         if self.normalize_function:
             x = x[self.incident_field].apply(self.normalize_function)
         else:
             x = x[self.incident_field]
+        data, indices, indptr = [], [], [0]  # type: ignore
+        for indicators_values_string in x.values:
+            for word, count in Counter(indicators_values_string.split(' ')).items():
+                if word in self.columns:
+                    indices.append(self.columns[word])
+                    data.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(x), len(self.columns)))
+
+    def fit(self, x):
         size = len(x) + 1
-        frequencies = Counter(flatten_list([t.split(' ') for t in x.values]))
-        frequencies.update(Counter(self.vocabulary))
-        self.frequency = {k: math.log(1 + size / v) for k, v in frequencies.items()}
+        occurrences = np.asarray(self.get_occurrences_matrix(x).sum(axis=0)).ravel()
+        self.frequency = {word: math.log(1 + size / (occurrences[i] + self.vocabulary_counts[word]))
+                          for word, i in self.columns.items()}
+        self.weights = np.array([self.frequency[word] * self.vocabulary_counts[word] for word in self.columns])
         return self
 
     def transform(self, x):
-        if self.normalize_function:
-            x = x[self.incident_field].apply(self.normalize_function)
-        else:
-            x = x[self.incident_field]
-        return x.apply(self.compute_term_score)
-
-    def compute_term_score(self, indicators_values_string: str) -> float:
-        x = indicators_values_string.split(' ')
-        return sum([1 * self.frequency[word] for word in self.vocabulary if word in x]) / sum(
-            [self.frequency[word] for word in self.vocabulary])
+        occurrences = self.get_occurrences_matrix(x)
+        occurrences.data[:] = 1
+        return pd.Series(occurrences @ self.weights / self.weights.sum(), index=x.index)
 
 
 TRANSFORMATION = {
@@ -172,7 +186,7 @@ class Model:
             t.get_score()
 
     def prepare_for_display(self):
-        vocabulary = self.incident_to_match['indicators'].iloc[0].split(' ')
+        vocabulary = set(self.incident_to_match['indicators'].iloc[0].split(' '))
         self.incidents_df['Identical indicators'] = self.incidents_df['indicators'].apply(
             lambda x: ','.join([id for id in x.split(' ') if id in vocabulary]))
 
@@ -202,27 +216,6 @@ def get_number_of_invs_for_indicators(indicator: Dict) -> int:
     return len(invs)
 
 
-def get_indicators_from_incident_ids(ids: List[str]) -> List[Dict]:
-    """
-    Get indicators for list of incidents ids
-    :param ids: List of incident ids
-    :return: List of indicators for each id
-    """
-    ids_string = []
-    for id_ in ids:
-        ids_string.append('incident.id: "%s"' % id_)
-    query = " OR ".join(ids_string)
-    res = demisto.executeCommand('findIndicators', {
-        'query': query
-    })
-    if is_error(res):
-        get_error(res)
-    if not res[0]['Contents']:
-        return []
-    indicators = res[0]['Contents']
-    return indicators
-
-
 def match_indicators_incident(indicators: List[Dict], incident_ids: List[str]) -> Dict[str, List]:
     """
     :param indicators: list of dict representing indicators
@@ -234,8 +227,8 @@ def match_indicators_incident(indicators: List[Dict], incident_ids: List[str]) -
         inv_ids = indicator.get('investigationIDs', None)
         if inv_ids:
             for inv_id in inv_ids:
-                if inv_id in d.keys():
-                    d[inv_id] = d[inv_id] + [indicator['id']]
+                if inv_id in d:
+                    d[inv_id].append(indicator['id'])
     return d
 
 
@@ -467,7 +460,7 @@ def get_incidents_ids_related_to_indicators(indicators, query):
                     indicator.get('investigationIDs', None)]
     incident_ids = flatten_list(incident_ids)
     p = re.compile(PLAYGROUND_PATTERN)
-    incident_ids = [x for x in incident_ids if not p.match(x)]
+    incident_ids = list(dict.fromkeys(x for x in incident_ids if not p.match(x)))
     incident_ids = get_incidents_filtered_from_query(incident_ids, query)
     if not incident_ids:
         return_no_mututal_indicators_found_entry()
@@ -496,25 +489,18 @@ def get_incidents_filtered_from_query(incident_ids, query):
     return filtered_incidents
 
 
-def get_related_incidents_with_indicators(incident_ids: List[str], indicators_types: List[str],
+def get_related_incidents_with_indicators(incident_ids: List[str], indicators: List[Dict],
                                           incident_id: str) -> pd.DataFrame:
     """
     Create dataframe of incident with indicators from incidents ids list
+    The similarity only depends on the indicators of the current incident, so the incidents are matched with them
+    through their investigationIDs, instead of searching all the indicators of the related incidents.
     :param incident_ids: List if incident id
-    :param indicators_types: List of indicators type
+    :param indicators: List of the current incident indicators
     :param incident_id: current incident (in order to remove it)
     :return: dataframe of incident with indicators
     """
-    indicators_related = get_indicators_from_incident_ids(incident_ids)
-    if not indicators_related:
-        return_no_similar_incident_found_entry()
-        return pd.DataFrame(), True
-    if indicators_types:
-        indicators_related = [x for x in indicators_related if x.get(FIELD_INDICATOR_TYPE) in indicators_types]
-        if not indicators_related:
-            return_no_similar_incident_found_entry()
-            return pd.DataFrame(), True
-    incidents_with_indicators = match_indicators_incident(indicators_related, incident_ids)
+    incidents_with_indicators = match_indicators_incident(indicators, incident_ids)
     incidents_with_indicators_join = {k: join(v) for k, v in incidents_with_indicators.items()}
     incidents_with_indicators_join.pop(incident_id, None)
     if not bool(incidents_with_indicators_join):
@@ -590,7 +576,7 @@ def main():
     _ = return_indicator_entry(incident_ids, indicators_types, indicators)
 
     # Get related incidents with indicators
-    incidents_df, early_exit = get_related_incidents_with_indicators(incident_ids, indicators_types, incident_id)
+    incidents_df, early_exit = get_related_incidents_with_indicators(incident_ids, indicators, incident_id)
     if early_exit:
         return
 
@@ -1,9 +1,11 @@
 import pandas as pd
 # from CommonServerPython import *
-# import pytest
+import pytest
+import math
+import demistomock as demisto
 from DBotFindSimilarIncidentsByIndicators import identity_score, match_indicators_incident, get_indicators_map, \
     FrequencyIndicators, \
-    get_number_of_invs_for_indicators
+    get_number_of_invs_for_indicators, get_related_incidents_with_indicators
 
 TRANSFORMATION = {
     'indicators': {'transformer': FrequencyIndicators,
@@ -92,3 +94,44 @@ def test_score(mocker):
     scores = res.values.tolist()
     assert (all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1)))
     assert (all(scores[i] >= 0 for i in range(len(scores) - 1)))
+
+
+def test_score_values():
+    """
+    Given:
+      - The current incident indicators and incidents sharing some of them
+    When:
+      - Scoring the incidents with FrequencyIndicators
+    Then:
+      - Each score is the sum of the frequency weights of the shared indicators over the sum of all the weights
+    """
+    incident = pd.DataFrame({'indicators': ['a b c d']})
+    incidents = pd.DataFrame({'indicators': ['a b', 'a e', 'c d f', '', 'a a']}, index=['1', '2', '3', '4', '5'])
+    tfidf = FrequencyIndicators('indicators', None, incident)
+    res = tfidf.fit(incidents).transform(incidents)
+
+    size = len(incidents) + 1
+    frequency = {'a': math.log(1 + size / 5), 'b': math.log(1 + size / 2), 'c': math.log(1 + size / 2),
+                 'd': math.log(1 + size / 2)}
+    total = sum(frequency.values())
+    expected = [(frequency['a'] + frequency['b']) / total, frequency['a'] / total,
+                (frequency['c'] + frequency['d']) / total, 0, frequency['a'] / total]
+    assert res.index.tolist() == ['1', '2', '3', '4', '5']
+    assert res.values.tolist() == pytest.approx(expected)
+
+
+def test_get_related_incidents_with_indicators(mocker):
+    """
+    Given:
+      - The current incident indicators and the incidents related to them
+    When:
+      - Creating the DataFrame of the related incidents
+    Then:
+      - The incidents are matched with the current incident indicators, without searching more indicators
+      - The current incident is removed
+    """
+    execute_command = mocker.patch.object(demisto, 'executeCommand')
+    incidents_df, early_exit = get_related_incidents_with_indicators(['1', '2', '10'], indicator, '10')
+    assert not early_exit
+    assert incidents_df['indicators'].to_dict() == {'1': 'a', '2': 'a b'}
+    execute_command.assert_not_called()
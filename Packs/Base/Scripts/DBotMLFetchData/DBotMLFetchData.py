@@ -15,6 +15,7 @@ from bs4 import BeautifulSoup
 from collections import Counter
 import pandas as pd
 import signal
+import multiprocessing
 import zlib
 from base64 import b64encode
 from nltk import ngrams
@@ -38,6 +39,8 @@ EXECUTION_JSON_FIELD = 'last_execution'
 VERSION_JSON_FIELD = 'script_version'
 
 MAX_ALLOWED_EXCEPTIONS = 20
+INCIDENT_TIMEOUT = 5
+DEFAULT_CHUNK_SIZE = 10
 
 NO_FETCH_EXTRACT = tldextract.TLDExtract(suffix_list_urls=None, cache_dir=False)
 NON_POSITIVE_VALIDATION_VALUES = set(['none', 'fail', 'softfail'])
@@ -707,7 +710,7 @@ def extract_features_from_all_incidents(incidents_df, label_fields):
     short_text_indices = set()
     durations = []
     for index, row in incidents_df.iterrows():
-        signal.alarm(5)
+        signal.alarm(INCIDENT_TIMEOUT)
         try:
             start = time.time()
             X_i = extract_features_from_incident(row, label_fields)
@@ -728,7 +731,82 @@ def extract_features_from_all_incidents(incidents_df, label_fields):
     return X, Counter(exceptions_log).most_common(), short_text_indices, exception_indices, timeout_indices, durations
 
 
-def extract_data_from_incidents(incidents, input_label_field=None):
+def extract_features_from_indexed_incident(indexed_row, label_fields):
+    """
+    Extracts the features of a single incident in a worker process.
+    Exceptions are returned rather than raised, so a failing incident does not fail the chunk it was sent in.
+    """
+    index, row = indexed_row
+    start = time.time()
+    try:
+        return index, extract_features_from_incident(row, label_fields), time.time() - start, None
+    except ShortTextException:
+        return index, None, None, ShortTextException.__name__
+    except Exception:
+        return index, None, None, traceback.format_exc()
+
+
+def extract_features_from_incidents_chunk(chunk, label_fields):
+    return [extract_features_from_indexed_incident(indexed_row, label_fields) for indexed_row in chunk]
+
+
+def extract_features_from_all_incidents_in_parallel(incidents_df, label_fields, workers, chunk_size):
+    """
+    Extracts the features of the incidents with a pool of worker processes, which are sent the incidents in chunks.
+    Each worker loads the external resources once when it starts.
+    Instead of an alarm per incident, each chunk has INCIDENT_TIMEOUT seconds per incident to be done. When a chunk
+    times out, the pool is terminated, which also kills the worker that is stuck, and the chunks that were not done
+    are sent to a new pool. The incidents of the chunk that timed out are sent one by one, so only the incident that
+    is stuck is counted as timed out.
+    """
+    features_by_index = {}
+    durations_by_index = {}
+    exceptions_log = []
+    exception_indices = set()
+    short_text_indices = set()
+    timeout_indices = set()
+    indexed_rows = list(incidents_df.iterrows())
+    pending_chunks = [indexed_rows[i:i + chunk_size] for i in range(0, len(indexed_rows), chunk_size)]
+    context = multiprocessing.get_context('fork')
+    while pending_chunks and len(exception_indices) < MAX_ALLOWED_EXCEPTIONS:
+        chunks, pending_chunks = pending_chunks, []
+        with context.Pool(workers, initializer=load_external_resources) as pool:
+            async_results = [pool.apply_async(extract_features_from_incidents_chunk, (chunk, label_fields))
+                             for chunk in chunks]
+            timed_out = False
+            for chunk, async_result in zip(chunks, async_results):
+                if timed_out and not async_result.ready():
+                    pending_chunks.append(chunk)
+                    continue
+                try:
+                    chunk_results = async_result.get(timeout=INCIDENT_TIMEOUT * len(chunk))
+                except multiprocessing.TimeoutError:
+                    timed_out = True
+                    if len(chunk) == 1:
+                        timeout_indices.add(chunk[0][0])
+                    else:
+                        pending_chunks.extend([indexed_row] for indexed_row in chunk)
+                    continue
+                for index, X_i, duration, error in chunk_results:
+                    if error is None:
+                        features_by_index[index] = X_i
+                        durations_by_index[index] = duration
+                    elif error == ShortTextException.__name__:
+                        short_text_indices.add(index)
+                    else:
+                        exception_indices.add(index)
+                        exceptions_log.append(error)
+                        if len(exception_indices) == MAX_ALLOWED_EXCEPTIONS:
+                            break
+                if len(exception_indices) == MAX_ALLOWED_EXCEPTIONS:
+                    break
+    extracted_indices = [index for index in incidents_df.index if index in features_by_index]
+    X = [features_by_index[index] for index in extracted_indices]
+    durations = [durations_by_index[index] for index in extracted_indices]
+    return X, Counter(exceptions_log).most_common(), short_text_indices, exception_indices, timeout_indices, durations
+
+
+def extract_data_from_incidents(incidents, input_label_field=None, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
     incidents_df = pd.DataFrame(incidents)
     if 'created' in incidents_df:
         incidents_df['created'] = incidents_df['created'].apply(lambda x: dateutil.parser.parse(x))  # type: ignore
@@ -777,6 +855,9 @@ def extract_data_from_incidents(incidents, input_label_field=None):
         exception_indices = []
         timeout_indices = []
         durations = []
+    elif workers > 1:
+        X, exceptions_log, short_text_indices, exception_indices, timeout_indices, durations \
+            = extract_features_from_all_incidents_in_parallel(incidents_df, label_fields, workers, chunk_size)
     else:
         load_external_resources()
         X, exceptions_log, short_text_indices, exception_indices, timeout_indices, durations \
@@ -878,7 +959,9 @@ def main():
         demisto.results('No results were found')
     else:
         tag_field = demisto.args().get('tagField', None)
-        data = extract_data_from_incidents(incidents, tag_field)
+        workers = int(demisto.args().get('workers', 1))
+        chunk_size = int(demisto.args().get('chunkSize', DEFAULT_CHUNK_SIZE))
+        data = extract_data_from_incidents(incidents, tag_field, workers, chunk_size)
         data_str = json.dumps(data)
         compress = demisto.args().get('compress', 'True') == 'True'
         if compress:
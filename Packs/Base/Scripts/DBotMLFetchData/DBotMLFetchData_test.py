@@ -435,6 +435,77 @@ def test_whole_preprocessing_incdient_without_label(mocker):
     assert Counter(x['closeReason'] for x in data['X']) == Counter([inc['closeReason'] for inc in incidents])
 
 
+def test_whole_preprocessing_in_parallel(mocker):
+    """
+    Given: incidents to extract features from
+    When: extracting the features with a pool of workers
+    Then: the same features are extracted, in the same order, as when extracting them in the script process
+    """
+    mocker.patch('signal.alarm', side_effect=signal_alarm_patch)
+    mocker.patch('DBotMLFetchData.open', mock_read_func)
+    data_file_path = 'test_data/30_incidents.p'
+    with open(data_file_path, 'rb') as file:
+        incidents = pickle.load(file)
+    data = extract_data_from_incidents(incidents=incidents)
+    parallel_data = extract_data_from_incidents(incidents=incidents, workers=2, chunk_size=4)
+    assert len(parallel_data['log']['exceptions']) == 0
+    assert parallel_data['log']['n_timout'] == 0
+    assert len(parallel_data['log']['durations']) == len(incidents)
+    assert [x['id'] for x in parallel_data['X']] == [x['id'] for x in data['X']]
+    assert [x['closeReason'] for x in parallel_data['X']] == [x['closeReason'] for x in data['X']]
+
+
+def extract_features_with_errors_patch(row, label_fields):
+    if row['emailbody'] == 'stuck':
+        time.sleep(10)
+    if row['emailbody'] == 'error':
+        raise ValueError('error')
+    if row['emailbody'] == 'short':
+        raise ShortTextException()
+    return {'id': row['id']}
+
+
+def test_extract_features_in_parallel_with_errors(mocker):
+    """
+    Given: incidents of which one has a short text, one fails and one takes longer than the timeout
+    When: extracting the features with a pool of workers
+    Then: the other incidents are extracted, and each failing incident is counted by the reason it failed
+    """
+    mocker.patch('DBotMLFetchData.load_external_resources')
+    mocker.patch('DBotMLFetchData.extract_features_from_incident', side_effect=extract_features_with_errors_patch)
+    mocker.patch('DBotMLFetchData.INCIDENT_TIMEOUT', 1)
+    incidents_df = pd.DataFrame([{'id': str(i), 'emailbody': body} for i, body in
+                                 enumerate(['ok', 'short', 'ok', 'error', 'stuck', 'ok'])])
+    X, exceptions_log, short_text_indices, exception_indices, timeout_indices, durations = \
+        extract_features_from_all_incidents_in_parallel(incidents_df, [], workers=2, chunk_size=1)
+    assert [x['id'] for x in X] == ['0', '2', '5']
+    assert len(durations) == 3
+    assert short_text_indices == {1}
+    assert exception_indices == {3}
+    assert len(exceptions_log) == 1
+    assert timeout_indices == {4}
+
+
+def test_extract_features_in_parallel_stuck_incidents(mocker):
+    """
+    Given: incidents in chunks of three, of which two in different chunks take longer than the timeout
+    When: extracting the features with a pool of workers
+    Then: only the stuck incidents are counted as timed out, and the durations are kept in the order of the features
+    """
+    mocker.patch('DBotMLFetchData.load_external_resources')
+    mocker.patch('DBotMLFetchData.extract_features_from_incident', side_effect=extract_features_with_errors_patch)
+    mocker.patch('DBotMLFetchData.INCIDENT_TIMEOUT', 1)
+    incidents_df = pd.DataFrame([{'id': str(i), 'emailbody': body} for i, body in
+                                 enumerate(['ok', 'stuck', 'ok', 'ok', 'stuck', 'ok'])])
+    X, exceptions_log, short_text_indices, exception_indices, timeout_indices, durations = \
+        extract_features_from_all_incidents_in_parallel(incidents_df, [], workers=2, chunk_size=3)
+    assert [x['id'] for x in X] == ['0', '2', '3', '5']
+    assert len(durations) == 4
+    assert not short_text_indices
+    assert not exception_indices
+    assert timeout_indices == {1, 4}
+
+
 def test_find_forwarded_features():
     assert find_forwarded_features('RE- Are you free to discuss?', '')['response']
     assert not find_forwarded_features('Are you free to discuss?', '')['response']
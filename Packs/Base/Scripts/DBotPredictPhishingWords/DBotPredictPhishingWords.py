@@ -2,12 +2,18 @@
 
 from CommonServerPython import *
 from string import punctuation
+from collections import Counter
 import demisto_ml
 import numpy as np
 
 FASTTEXT_MODEL_TYPE = 'FASTTEXT_MODEL_TYPE'
 TORCH_TYPE = 'torch'
 UNKNOWN_MODEL_TYPE = 'UNKNOWN_MODEL_TYPE'
+BATCH_SIZE = 500
+INCIDENTS_QUERY_FIELDS = ['id', 'emailsubject', 'emailbody', 'emailbodyhtml']
+BATCH_RESULTS_FILE_NAME = 'DBotPredictPhishingWords_results.json'
+DBOT_PROCESSED_TEXT_FIELD = 'dbot_processed_text'
+DBOT_WORDS_TO_TOKENS_FIELD = 'dbot_words_to_tokens'
 
 
 def OrderedSet(iterable):
@@ -45,7 +51,7 @@ def handle_error(message, is_return_error):
         sys.exit(0)
 
 
-def preprocess_text(text, model_type, is_return_error):
+def get_preprocess_args(input_, input_type, model_type):
     if model_type in [FASTTEXT_MODEL_TYPE, UNKNOWN_MODEL_TYPE]:
         preprocess_type = 'nlp'
         hash_seed = demisto.args().get('hashSeed')
@@ -54,15 +60,9 @@ def preprocess_text(text, model_type, is_return_error):
         preprocess_type = 'none'
         hash_seed = None
         clean_html = 'false'
-    if isinstance(text, str):
-        input_type = 'string'
-        input_ = text
-    elif isinstance(text, list):
-        input_type = 'json_string'
-        input_ = json.dumps(text)
     language = demisto.args().get('language', 'English')
     tokenization = demisto.args().get('tokenizationMethod', 'tokenizer')
-    args = {'input': input_,
+    return {'input': input_,
             'hashSeed': hash_seed,
             'language': language,
             'tokenizationMethod': tokenization,
@@ -73,6 +73,16 @@ def preprocess_text(text, model_type, is_return_error):
             'textFields': 'text',
             'removeShortTextThreshold': '-1',
             'cleanHTML': clean_html}
+
+
+def preprocess_text(text, model_type, is_return_error):
+    if isinstance(text, str):
+        input_type = 'string'
+        input_ = text
+    elif isinstance(text, list):
+        input_type = 'json_string'
+        input_ = json.dumps(text)
+    args = get_preprocess_args(input_, input_type, model_type)
     res = demisto.executeCommand('DBotPreProcessTextData', args)
     if is_error(res):
         handle_error(res[0]['Contents'], is_return_error)
@@ -90,6 +100,24 @@ def preprocess_text(text, model_type, is_return_error):
         return input_text, words_to_token_maps
 
 
+def preprocess_text_batch(texts, model_type, is_return_error):
+    """
+    Pre-processes a list of texts with a single execution of DBotPreProcessTextData.
+    Returns for each text a tuple of its pre-processed text and its words to tokens map, or None if the text was
+    dropped by the pre-processing (e.g. a text in a foreign language).
+    """
+    data = [{'index': i, 'text': text} for i, text in enumerate(texts)]
+    args = get_preprocess_args(json.dumps(data), 'json_string', model_type)
+    args['outputWordsToTokens'] = 'true'
+    res = demisto.executeCommand('DBotPreProcessTextData', args)
+    if is_error(res):
+        handle_error(res[0]['Contents'], is_return_error)
+    preprocessed_texts = [None] * len(texts)  # type: ignore
+    for x in json.loads(res[0]['Contents']):
+        preprocessed_texts[x['index']] = (x[DBOT_PROCESSED_TEXT_FIELD], x[DBOT_WORDS_TO_TOKENS_FIELD])
+    return preprocessed_texts
+
+
 def predict_phishing_words(model_name, model_store_type, email_subject, email_body, min_text_length, label_threshold,
                            word_threshold, top_word_limit, is_return_error, set_incidents_fields=False):
     model_data, model_type = get_model_data(model_name, model_store_type, is_return_error)
@@ -159,20 +187,8 @@ def predict_single_incident_full_output(email_subject, email_body, is_return_err
         handle_error("Label probability is {:.2f} and it's below the input confidence threshold".format(
             predicted_prob), is_return_error)
 
-    positive_tokens = OrderedSet(explain_result['PositiveWords'])
-    negative_tokens = OrderedSet(explain_result['NegativeWords'])
-    positive_words = find_words_contain_tokens(positive_tokens, words_to_token_maps)
-    negative_words = find_words_contain_tokens(negative_tokens, words_to_token_maps)
-    positive_words = list(OrderedSet([s.strip(punctuation) for s in positive_words]))
-    negative_words = list(OrderedSet([s.strip(punctuation) for s in negative_words]))
-    positive_words = [w for w in positive_words if w.isalnum()]
-    negative_words = [w for w in negative_words if w.isalnum()]
-    highlighted_text_markdown = text.strip()
-    for word in positive_words:
-        for cased_word in [word.lower(), word.title(), word.upper()]:
-            highlighted_text_markdown = re.sub(r'(?<!\w)({})(?!\w)'.format(cased_word), '**{}**'.format(cased_word),
-                                               highlighted_text_markdown)
-    highlighted_text_markdown = re.sub(r'\n+', '\n', highlighted_text_markdown)
+    positive_words, negative_words, highlighted_text_markdown = highlight_words(text, explain_result,
+                                                                                words_to_token_maps)
     explain_result['PositiveWords'] = [w.lower() for w in positive_words]
     explain_result['NegativeWords'] = [w.lower() for w in negative_words]
     explain_result['OriginalText'] = text.strip()
@@ -205,6 +221,102 @@ def predict_single_incident_full_output(email_subject, email_body, is_return_err
     }
 
 
+def highlight_words(text, explain_result, words_to_token_maps):
+    """
+    Finds the words of the text that contain the positive and negative tokens of the model decision, and returns them
+    with the text in markdown, where the positive words are highlighted.
+    """
+    positive_tokens = OrderedSet(explain_result['PositiveWords'])
+    negative_tokens = OrderedSet(explain_result['NegativeWords'])
+    positive_words = find_words_contain_tokens(positive_tokens, words_to_token_maps)
+    negative_words = find_words_contain_tokens(negative_tokens, words_to_token_maps)
+    positive_words = list(OrderedSet([s.strip(punctuation) for s in positive_words]))
+    negative_words = list(OrderedSet([s.strip(punctuation) for s in negative_words]))
+    positive_words = [w for w in positive_words if w.isalnum()]
+    negative_words = [w for w in negative_words if w.isalnum()]
+    highlighted_text_markdown = text.strip()
+    for word in positive_words:
+        for cased_word in [word.lower(), word.title(), word.upper()]:
+            highlighted_text_markdown = re.sub(r'(?<!\w)({})(?!\w)'.format(cased_word), '**{}**'.format(cased_word),
+                                               highlighted_text_markdown)
+    highlighted_text_markdown = re.sub(r'\n+', '\n', highlighted_text_markdown)
+    return positive_words, negative_words, highlighted_text_markdown
+
+
+def predict_batch_full_output(items, model_name, model_store_type, min_text_length, label_threshold, word_threshold,
+                              top_word_limit, is_return_error, batch_size=BATCH_SIZE):
+    """
+    Predicts the labels of a list of texts with a single load of the model, and returns the predictions as a json
+    file entry. The texts are pre-processed in batches of batch_size texts, with an execution of DBotPreProcessTextData
+    per batch instead of an execution per text.
+    :param items: list of dicts, each with the 'text' to predict and optionally the 'id' of its incident
+    """
+    model_data, model_type = get_model_data(model_name, model_store_type, is_return_error)
+    if model_type.strip() == '' or model_type.strip() == 'Phishing':
+        model_type = FASTTEXT_MODEL_TYPE
+    if model_type not in [FASTTEXT_MODEL_TYPE, TORCH_TYPE, UNKNOWN_MODEL_TYPE]:
+        model_type = UNKNOWN_MODEL_TYPE
+    phishing_model = demisto_ml.phishing_model_loads_handler(model_data, model_type)
+    predictions = []
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        preprocessed_texts = preprocess_text_batch([item['text'] for item in batch], model_type, is_return_error)
+        for i, (item, preprocessed_text) in enumerate(zip(batch, preprocessed_texts), start):
+            item_res = {'Index': i, 'Label': -1, 'Probability': -1, 'PositiveWords': [], 'NegativeWords': [],
+                        'TextTokensHighlighted': '', 'Error': ''}
+            if 'id' in item:
+                item_res['IncidentID'] = item['id']
+            if preprocessed_text is None:
+                item_res['Error'] = "The text was dropped by the pre-processing"
+            else:
+                item_res.update(predict_batch_text(item['text'], preprocessed_text, phishing_model, min_text_length,
+                                                   label_threshold, word_threshold, top_word_limit))
+            predictions.append(item_res)
+
+    labels_counter = Counter(x['Label'] for x in predictions if not x['Error'])
+    human_readable = tableToMarkdown('DBot Predict Phishing Words - applied predictions on {} texts'
+                                     .format(len(predictions)),
+                                     [{'Label': label, 'Count': count} for label, count in labels_counter.most_common()]
+                                     + [{'Label': 'Errors', 'Count': sum(1 for x in predictions if x['Error'])}],
+                                     headers=['Label', 'Count'])
+    entry = fileResult(BATCH_RESULTS_FILE_NAME, json.dumps(predictions))
+    entry['HumanReadable'] = human_readable
+    entry['EntryContext'] = {
+        'DBotPredictPhishingWordsBatch': {
+            'Filename': BATCH_RESULTS_FILE_NAME,
+            'FileFormat': 'json',
+            'Count': len(predictions),
+        }
+    }
+    return entry
+
+
+def predict_batch_text(text, preprocessed_text, phishing_model, min_text_length, label_threshold, word_threshold,
+                       top_word_limit):
+    """
+    Returns the prediction of a single pre-processed text of a batch. Errors are returned in the result instead of
+    stopping the script, so the rest of the batch is still predicted.
+    """
+    input_text, words_to_token_maps = preprocessed_text
+    filtered_text, filtered_text_number_of_words = phishing_model.filter_model_words(input_text)
+    if filtered_text_number_of_words == 0:
+        return {'Error': "The model does not contain any of the input text words"}
+    if filtered_text_number_of_words < min_text_length:
+        return {'Error': "The model contains fewer than %d words" % min_text_length}
+    explain_result = phishing_model.explain_model_words(input_text, 0, word_threshold, top_word_limit)
+    predicted_prob = float(explain_result['Probability'])
+    if predicted_prob < label_threshold:
+        return {'Error': "Label probability is {:.2f} and it's below the input confidence threshold".format(
+            predicted_prob)}
+    positive_words, negative_words, highlighted_text_markdown = highlight_words(text, explain_result,
+                                                                                words_to_token_maps)
+    return {'Label': explain_result['Label'],
+            'Probability': predicted_prob,
+            'PositiveWords': [w.lower() for w in positive_words],
+            'NegativeWords': [w.lower() for w in negative_words],
+            'TextTokensHighlighted': highlighted_text_markdown}
+
+
 def find_words_contain_tokens(positive_tokens, words_to_token_maps):
     positive_words = []
     for word, word_in_tokens_list in words_to_token_maps.items():
@@ -221,10 +333,43 @@ def try_get_incident_field(field):
     return value
 
 
+def get_batch_items(texts, incidents_query, incidents_limit):
+    """
+    Returns the items to predict in batch mode - either the input texts, or the email subject and body of the incidents
+    matching the query, with their incident ids.
+    """
+    if texts:
+        return [{'text': text} for text in argToList(texts)]
+    res = demisto.executeCommand('GetIncidentsByQuery', {
+        'query': incidents_query,
+        'limit': str(incidents_limit),
+        'populateFields': ','.join(INCIDENTS_QUERY_FIELDS)
+    })
+    if is_error(res):
+        return_error(get_error(res))
+    incidents = json.loads(res[0]['Contents'])
+    return [{'id': inc['id'],
+             'text': "%s \n%s" % (inc.get('emailsubject') or '', inc.get('emailbody') or inc.get('emailbodyhtml') or '')}
+            for inc in incidents]
+
+
 def main():
     confidence_threshold = 0
     confidence_threshold = float(demisto.args().get("labelProbabilityThreshold", confidence_threshold))
     confidence_threshold = float(demisto.args().get("confidenceThreshold", confidence_threshold))
+    texts = demisto.args().get('texts')
+    incidents_query = demisto.args().get('incidentsQuery')
+    if texts or incidents_query:
+        items = get_batch_items(texts, incidents_query, int(demisto.args().get('incidentsLimit', 1000)))
+        return predict_batch_full_output(items,
+                                         demisto.args()['modelName'],
+                                         demisto.args()['modelStoreType'],
+                                         int(demisto.args()['minTextLength']),
+                                         confidence_threshold,
+                                         float(demisto.args().get('wordThreshold', 0)),
+                                         int(demisto.args()['topWordsLimit']),
+                                         demisto.args()['returnError'] == 'true',
+                                         int(demisto.args().get('batchSize', BATCH_SIZE)))
     email_subject = demisto.args().get('emailSubject', '')
     email_body = demisto.args().get('emailBody', '') or demisto.args().get('emailBodyHTML', '')
     if email_subject == '':
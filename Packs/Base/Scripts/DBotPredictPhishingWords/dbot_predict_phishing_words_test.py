@@ -3,7 +3,7 @@ from collections import defaultdict
 import pytest
 
 from CommonServerPython import *
-from DBotPredictPhishingWords import get_model_data, predict_phishing_words, main
+from DBotPredictPhishingWords import get_model_data, predict_phishing_words, main, predict_batch_full_output
 
 TOKENIZATION_RESULT = None
 
@@ -316,3 +316,44 @@ def test_no_positive_words(mocker):
 
     res = main()
     assert res['Contents']['TextTokensHighlighted'] == TOKENIZATION_RESULT['originalText']
+
+
+def test_predict_batch_full_output(mocker):
+    preprocess_calls = []
+
+    def execute_command_batch(command, args=None):
+        if command == 'DBotPreProcessTextData':
+            data = json.loads(args['input'])
+            preprocess_calls.append(len(data))
+            # the text in a foreign language is dropped by the pre-processing
+            res = [dict(x, dbot_processed_text=x['text'], dbot_words_to_tokens={w: [w] for w in x['text'].split()})
+                   for x in data if x['text'] != 'foreign']
+            return [{'Contents': json.dumps(res), 'Type': 'note'}]
+        return executeCommand(command, args)
+
+    def explain_model_words(text, a, b, c):
+        return {'Label': 'Malicious', 'Probability': 0.9, 'PositiveWords': [text.split()[0]], 'NegativeWords': []}
+
+    phishing_mock = PhishingModelMock()
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_batch)
+    mocker.patch.object(demisto, 'args', return_value={})
+    loads_handler = mocker.patch('demisto_ml.phishing_model_loads_handler', return_value=phishing_mock, create=True)
+    mocker.patch.object(phishing_mock, 'filter_model_words', side_effect=lambda text: (text, len(text.split())),
+                        create=True)
+    mocker.patch.object(phishing_mock, 'explain_model_words', side_effect=explain_model_words, create=True)
+    file_result = mocker.patch('DBotPredictPhishingWords.fileResult', return_value={})
+
+    items = [{'text': 'click here now'}, {'text': 'foreign'}, {'text': 'short'}, {'id': '7', 'text': 'verify account'}]
+    entry = predict_batch_full_output(items, "modelName", "list", 2, 0, 0, 10, False, batch_size=3)
+    assert loads_handler.call_count == 1
+    assert preprocess_calls == [3, 1]
+    predictions = json.loads(file_result.call_args[0][1])
+    assert [x['Index'] for x in predictions] == [0, 1, 2, 3]
+    assert predictions[0]['Label'] == 'Malicious'
+    assert predictions[0]['PositiveWords'] == ['click']
+    assert predictions[0]['TextTokensHighlighted'] == '**click** here now'
+    assert predictions[1]['Error'] == 'The text was dropped by the pre-processing'
+    assert predictions[2]['Error'] == 'The model contains fewer than 2 words'
+    assert predictions[3]['IncidentID'] == '7'
+    assert predictions[3]['Probability'] == 0.9
+    assert entry['EntryContext']['DBotPredictPhishingWordsBatch']['Count'] == 4
@@ -3,6 +3,7 @@ from collections import Counter
 from CommonServerUserPython import *
 from CommonServerPython import *
 from sklearn.feature_extraction.text import TfidfVectorizer
+import builtins
 import pickle
 import uuid
 import spacy
@@ -16,6 +17,10 @@ from langdetect.lang_detect_exception import LangDetectException
 
 ANY_LANGUAGE = 'Any'
 OTHER_LANGUAGE = 'Other'
+SPACY_MODEL_NAME = 'en_core_web_sm'
+SPACY_DISABLED_COMPONENTS = ['parser', 'ner', 'textcat']
+SPACY_BATCH_SIZE = 1000
+DEDUP_CHUNK_SIZE = 1000
 
 
 def hash_word(word, hash_seed):
@@ -58,6 +63,20 @@ def create_text_result(original_text, tokenized_text, original_words_to_tokens,
     return text_result
 
 
+# The script is executed again for each run in the same docker container, so the loaded spaCy models are kept on the
+# builtins module, which is not executed again
+SPACY_MODELS = getattr(builtins, 'DBOT_PREPROCESS_TEXT_DATA_SPACY_MODELS', None)
+if SPACY_MODELS is None:
+    SPACY_MODELS = builtins.DBOT_PREPROCESS_TEXT_DATA_SPACY_MODELS = {}  # type: ignore
+
+
+def load_spacy_model(model_name, disabled_components, reload=False):
+    model_key = (model_name, tuple(disabled_components))
+    if reload or model_key not in SPACY_MODELS:
+        SPACY_MODELS[model_key] = spacy.load(model_name, disable=disabled_components)
+    return SPACY_MODELS[model_key]
+
+
 def clean_html_from_text(text):
     cleaned = text
     for pattern in html_patterns:
@@ -69,7 +88,7 @@ class Tokenizer:
     def __init__(self, clean_html=True, remove_new_lines=True, hash_seed=None, remove_non_english=True,
                  remove_stop_words=True, remove_punct=True, remove_non_alpha=True, replace_emails=True,
                  replace_numbers=True, lemma=True, replace_urls=True, language=ANY_LANGUAGE,
-                 tokenization_method='tokenizer'):
+                 tokenization_method='tokenizer', batch_size=SPACY_BATCH_SIZE, n_process=1):
         self.number_pattern = "NUMBER_PATTERN"
         self.url_pattern = "URL_PATTERN"
         self.email_pattern = "EMAIL_PATTERN"
@@ -87,6 +106,8 @@ class Tokenizer:
         self.lemma = lemma
         self.language = language
         self.tokenization_method = tokenization_method
+        self.batch_size = batch_size
+        self.n_process = n_process
         self.max_text_length = 10 ** 5
 
         self.nlp = None
@@ -119,12 +140,15 @@ class Tokenizer:
         return re.sub(r"\s+", " ", text).strip()
 
     def handle_tokenizaion_method(self, text):
+        return self.handle_tokenizaion_method_batch([text])[0]
+
+    def handle_tokenizaion_method_batch(self, texts):
         if self.tokenization_method == 'tokenizer':
-            tokens_list, original_words_to_tokens = self.tokenize_text_spacy(text)
+            tokenized_texts = self.tokenize_texts_spacy(texts)
         else:
-            tokens_list, original_words_to_tokens = self.tokenize_text_other(text)
-        tokenized_text = ' '.join(tokens_list).strip()
-        return tokenized_text, original_words_to_tokens
+            tokenized_texts = (self.tokenize_text_other(text) for text in texts)
+        return [(' '.join(tokens_list).strip(), original_words_to_tokens)
+                for tokens_list, original_words_to_tokens in tokenized_texts]
 
     def tokenize_text_other(self, text):
         tokens_list = []
@@ -145,10 +169,26 @@ class Tokenizer:
         return tokens_list, original_words_to_tokens
 
     def tokenize_text_spacy(self, text):
-        if self.nlp is None or self.spacy_count % self.spacy_reset_count == 0:
-            self.init_spacy_model()
-        doc = self.nlp(text)  # type: ignore
-        self.spacy_count += 1
+        return next(self.tokenize_texts_spacy([text]))
+
+    def tokenize_texts_spacy(self, texts):
+        """
+        Yields the tokens of the texts, which spaCy parses in batches.
+        The model is reloaded every spacy_reset_count texts, as its vocabulary grows with each parsed text.
+        """
+        pipe_kwargs = {'batch_size': self.batch_size}
+        if self.n_process > 1:
+            pipe_kwargs['n_process'] = self.n_process
+        while texts:
+            if self.nlp is None or self.spacy_count % self.spacy_reset_count == 0:
+                self.init_spacy_model()
+            chunk_size = self.spacy_reset_count - self.spacy_count % self.spacy_reset_count
+            chunk, texts = texts[:chunk_size], texts[chunk_size:]
+            for text, doc in zip(chunk, self.nlp.pipe(chunk, **pipe_kwargs)):  # type: ignore
+                self.spacy_count += 1
+                yield self.tokenize_doc_spacy(text, doc)
+
+    def tokenize_doc_spacy(self, text, doc):
         original_text_indices_to_words = self.map_indices_to_words(text)
         tokens_list = []
         original_words_to_tokens = {}  # type: ignore
@@ -182,35 +222,47 @@ class Tokenizer:
         return tokens_list, original_words_to_tokens
 
     def init_spacy_model(self):
-        self.nlp = spacy.load('en_core_web_sm', disable=['parser', 'ner', 'textcat'])
+        # the model is reloaded when it was already used by this tokenizer, to reset its vocabulary
+        self.nlp = load_spacy_model(SPACY_MODEL_NAME, SPACY_DISABLED_COMPONENTS, reload=self.nlp is not None)
 
     def word_tokenize(self, text):
         if not isinstance(text, list):
             text = [text]
-        result = []
-        for t in text:
+        result = self.word_tokenize_batch(text)
+        if len(result) == 1:
+            result = result[0]  # type: ignore
+        return result
+
+    def word_tokenize_batch(self, texts):
+        original_texts = []
+        cleaned_texts = []
+        for t in texts:
             original_text = t
             if self.remove_new_lines:
                 t = self.remove_line_breaks(t)
             if self.clean_html:
                 t = clean_html_from_text(t)
                 original_text = t
-            t = self.remove_multiple_whitespaces(t)
+            original_texts.append(original_text)
+            cleaned_texts.append(self.remove_multiple_whitespaces(t))
+        tokenized_texts = iter(self.handle_tokenizaion_method_batch(
+            [t for t in cleaned_texts if len(t) < self.max_text_length]))
+        result = []
+        for original_text, t in zip(original_texts, cleaned_texts):
             if len(t) < self.max_text_length:
-                tokenized_text, original_words_to_tokens = self.handle_tokenizaion_method(t)
+                tokenized_text, original_words_to_tokens = next(tokenized_texts)
             else:
                 tokenized_text, original_words_to_tokens = self.handle_long_text()
             text_result = create_text_result(original_text, tokenized_text, original_words_to_tokens,
                                              hash_seed=self.hash_seed)
             result.append(text_result)
-        if len(result) == 1:
-            result = result[0]  # type: ignore
         return result
 
 
 # define global parsers
 DBOT_TEXT_FIELD = 'dbot_text'
 DBOT_PROCESSED_TEXT_FIELD = 'dbot_processed_text'
+DBOT_WORDS_TO_TOKENS_FIELD = 'dbot_words_to_tokens'
 CONTEXT_KEY = 'DBotPreProcessTextData'
 HTML_PATTERNS = [
     re.compile(r"(?is)<(script|style).*?>.*?(</\1>)"),
@@ -288,17 +340,22 @@ def clean_text_of_incidents_list(data, source_text_field, remove_html_tags):
     return data
 
 
-def pre_process_batch(data, source_text_field, target_text_field, pre_process_type, hash_seed):
+def pre_process_batch(data, source_text_field, target_text_field, pre_process_type, hash_seed,
+                      words_to_tokens_field=None):
     raw_text_data = [x[source_text_field] for x in data]
-    tokenized_text_data = []
-    for raw_text in raw_text_data:
-        tokenized_text = pre_process_single_text(raw_text, hash_seed, pre_process_type)
+    if pre_process_type == 'nlp':
+        tokenized_texts = get_tokenizer(hash_seed).word_tokenize_batch(raw_text_data)
+    else:
+        tokenized_texts = [pre_process_single_text(raw_text, hash_seed, pre_process_type) for raw_text in raw_text_data]
+    for d, tokenized_text in zip(data, tokenized_texts):
         if hash_seed is None:
-            tokenized_text_data.append(tokenized_text['tokenizedText'])
+            d[target_text_field] = tokenized_text['tokenizedText']
+            words_to_tokens = tokenized_text['originalWordsToTokens']
         else:
-            tokenized_text_data.append(tokenized_text['hashedTokenizedText'])
-    for d, tokenized_text in zip(data, tokenized_text_data):
-        d[target_text_field] = tokenized_text
+            d[target_text_field] = tokenized_text['hashedTokenizedText']
+            words_to_tokens = tokenized_text['wordsToHashedTokens']
+        if words_to_tokens_field:
+            d[words_to_tokens_field] = words_to_tokens
     return data
 
 
@@ -308,12 +365,18 @@ def pre_process_single_text(raw_text, hash_seed, pre_process_type):
     return tokenized_text
 
 
-def pre_process_tokenizer(text, seed):
+def get_tokenizer(seed):
     global tokenizer
     if tokenizer is None:
         tokenizer = Tokenizer(tokenization_method=demisto.args()['tokenizationMethod'],
-                              language=demisto.args()['language'], hash_seed=seed)
-    processed_text = tokenizer.word_tokenize(text)
+                              language=demisto.args()['language'], hash_seed=seed,
+                              batch_size=int(demisto.args().get('batchSize', SPACY_BATCH_SIZE)),
+                              n_process=int(demisto.args().get('numberOfWorkers', 1)))
+    return tokenizer
+
+
+def pre_process_tokenizer(text, seed):
+    processed_text = get_tokenizer(seed).word_tokenize(text)
     return processed_text
 
 
@@ -375,20 +438,21 @@ def is_text_in_input_language(text, input_language):
     return is_correct_lang, actual_language
 
 
-def get_tf_idf_similarity_arr(documents):
-    tfidf = TfidfVectorizer(stop_words="english", min_df=1).fit_transform(documents)
-    pairwise_similarity = tfidf * tfidf.T
-    return pairwise_similarity.toarray()
-
-
-def find_duplicate_indices(texts, dedup_threshold):
-    similarity_arr = get_tf_idf_similarity_arr(texts)
-    indices_to_remove = []
-    for i in range(similarity_arr.shape[0]):
-        for j in range(similarity_arr.shape[1]):
-            if j > i and similarity_arr[i][j] > dedup_threshold:
-                indices_to_remove.append(j)
-    return set(indices_to_remove)
+def find_duplicate_indices(texts, dedup_threshold, chunk_size=DEDUP_CHUNK_SIZE):
+    """
+    Finds the indices of the texts that are duplicate to a previous text, i.e. the indices j for which there is an
+    index i < j with a tf-idf cosine similarity above the threshold.
+    The similarities are computed as a sparse product for a chunk of rows at a time, so only the pairs that share
+    terms are held in memory, instead of the full dense pairwise matrix.
+    """
+    tfidf = TfidfVectorizer(stop_words="english", min_df=1).fit_transform(texts).tocsr()
+    tfidf_transposed = tfidf.T.tocsc()
+    indices_to_remove = set()
+    for start in range(0, tfidf.shape[0], chunk_size):
+        similarities = (tfidf[start:start + chunk_size] * tfidf_transposed).tocoo()
+        is_duplicate = (similarities.data > dedup_threshold) & (similarities.col > similarities.row + start)
+        indices_to_remove.update(similarities.col[is_duplicate].tolist())
+    return indices_to_remove
 
 
 def remove_duplicate_by_indices(data, duplicate_indices):
@@ -432,6 +496,8 @@ def main():
                                       hash_seed=hash_seed, pre_process_type=pre_process_type)
         return res
     output_original_text_fields = demisto.args().get('outputOriginalTextFields', 'false') == 'true'
+    words_to_tokens_field = DBOT_WORDS_TO_TOKENS_FIELD if demisto.args().get('outputWordsToTokens',
+                                                                             'false') == 'true' else None
     description = ""
     # read data
     data = read_file(input, input_type)
@@ -451,7 +517,7 @@ def main():
 
     # apply tokenizer
     data = pre_process_batch(data, DBOT_TEXT_FIELD, DBOT_PROCESSED_TEXT_FIELD, pre_process_type,
-                             hash_seed)
+                             hash_seed, words_to_tokens_field)
 
     # remove short emails
     data, desc = remove_short_text(data, DBOT_TEXT_FIELD, DBOT_PROCESSED_TEXT_FIELD, remove_short_threshold)
@@ -471,6 +537,8 @@ def main():
             whitelist_fields += [x.strip() for x in field.split('|')]
     if whitelist_fields and len(whitelist_fields) > 0:
         whitelist_fields.append(DBOT_PROCESSED_TEXT_FIELD)
+        if words_to_tokens_field:
+            whitelist_fields.append(words_to_tokens_field)
         data = whitelist_dict_fields(data, whitelist_fields)
 
     description += "Done processing: %d samples" % len(data) + "\n"
@@ -492,6 +560,7 @@ def main():
             'FileFormat': output_format,
             'TextField': DBOT_TEXT_FIELD,
             'TextFieldProcessed': DBOT_PROCESSED_TEXT_FIELD,
+            'WordsToTokensField': words_to_tokens_field,
         }
     }
     return entry
@@ -0,0 +1,57 @@
+"""
+Benchmarks the DBotPreprocessTextData tokenizer in docs/sec, tokenizing one text at a time as before, and in nlp.pipe
+batches. A blank English spaCy pipeline replaces the model, so no model needs to be installed.
+
+Run from the script folder, with the script folder, CommonServerPython and demistomock in the PYTHONPATH:
+    python TestData/benchmark_tokenizer.py --texts 5000 --batch-size 1000
+"""
+import argparse
+import time
+
+import spacy
+
+import DBotPreprocessTextData
+from DBotPreprocessTextData import Tokenizer
+
+SAMPLE_TEXTS = [
+    'Your mailbox is almost full, click http://example.com/verify to keep receiving emails',
+    'Hi, please find the attached invoice 4421 for the services of last month. Regards, accounting@example.com',
+    'We detected an unusual sign in to your account from a new device. If this was not you, reset your password',
+    '<html><body><p>Dear customer,</p><p>Your package could not be delivered, confirm your address</p></body></html>',
+]
+
+
+def tokenize_one_at_a_time(texts, batch_size):
+    tokenizer = Tokenizer(lemma=False, batch_size=batch_size)
+    return [tokenizer.word_tokenize(text) for text in texts]
+
+
+def tokenize_in_batches(texts, batch_size):
+    tokenizer = Tokenizer(lemma=False, batch_size=batch_size)
+    return tokenizer.word_tokenize_batch(texts)
+
+
+def docs_per_second(tokenize, texts, batch_size):
+    start = time.time()
+    tokenize(texts, batch_size)
+    return len(texts) / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the DBotPreprocessTextData tokenizer.')
+    parser.add_argument('--texts', type=int, default=5000, help='The number of texts to tokenize.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='The nlp.pipe batch size.')
+    options = parser.parse_args()
+
+    nlp = spacy.blank('en')
+    DBotPreprocessTextData.load_spacy_model = lambda model_name, disabled_components, reload=False: nlp
+    texts = [f'{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} {i}' for i in range(options.texts)]
+
+    assert tokenize_one_at_a_time(texts, options.batch_size) == tokenize_in_batches(texts, options.batch_size)
+    print(f'One text at a time: {docs_per_second(tokenize_one_at_a_time, texts, options.batch_size):.0f} docs/sec')
+    print(f'Batches of {options.batch_size}: '
+          f'{docs_per_second(tokenize_in_batches, texts, options.batch_size):.0f} docs/sec')
+
+
+if __name__ == '__main__':
+    main()
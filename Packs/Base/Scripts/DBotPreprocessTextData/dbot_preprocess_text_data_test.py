@@ -3,7 +3,8 @@ import unittest
 from CommonServerPython import *
 from DBotPreprocessTextData import clean_html_from_text, remove_line_breaks, hash_word, \
     concat_text_fields, whitelist_dict_fields, remove_short_text, remove_duplicate_by_indices, pre_process_batch, main, \
-    read_file, Tokenizer, clean_text_of_incidents_list, remove_foreign_language, is_text_in_input_language
+    read_file, Tokenizer, clean_text_of_incidents_list, remove_foreign_language, is_text_in_input_language, \
+    find_duplicate_indices
 import string
 
 from copy import deepcopy
@@ -124,6 +125,24 @@ def test_remove_dups():
     assert len(data) == 2
 
 
+def test_find_duplicate_indices():
+    """
+    Given: texts where some are near duplicates of previous texts
+    When: finding the duplicate indices with rows chunks smaller than the number of texts
+    Then: the same indices are found as by comparing every pair of the dense similarity matrix
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    texts = ['phishing email from the bank', 'urgent phishing email from the bank', 'hello world',
+             'phishing email from the bank', 'hello world malware', 'completely different content',
+             'hello world', 'urgent phishing email from the bank invoice']
+    tfidf = TfidfVectorizer(stop_words="english", min_df=1).fit_transform(texts)
+    similarity_arr = (tfidf * tfidf.T).toarray()
+    for threshold in [0.5, 0.8, 0.99]:
+        expected = {j for i in range(len(texts)) for j in range(i + 1, len(texts)) if similarity_arr[i][j] > threshold}
+        assert find_duplicate_indices(texts, threshold, chunk_size=3) == expected
+    assert find_duplicate_indices(texts, 0.99) == {3, 6}
+
+
 def test_pre_process():
     data = [
         {
@@ -142,6 +161,8 @@ def test_pre_process():
     assert data2 == [
         {'body': 'TestBody1 TestBody2 TestBody3 TestBody4', 'processed': '148060132 148060133 148060134 148060135'},
         {'body': 'TestBody1 TestBody2 html', 'processed': '148060132 148060133 2090341082'}]
+    data3 = pre_process_batch(data, "body", "processed", "none", None, "words_to_tokens")
+    assert data3[1]['words_to_tokens'] == {'TestBody1': 'TestBody1', 'TestBody2': 'TestBody2', 'html': 'html'}
 
 
 def test_main(mocker):
@@ -399,6 +420,18 @@ I have 3 dogs
         res1 = t1.word_tokenize(list_text)
         assert all(res1[i]['tokenizedText'] == '' for i in range(len(list_text)))
 
+    def test_word_tokenize_batch(self):
+        texts = ['I have 3 dogs', 'My email is test@demisto.com', 'example sentence', 'visit http://google.com']
+        args = deepcopy(negative_initialization)
+        args['replace_numbers'] = True
+        args['replace_emails'] = True
+        args['batch_size'] = 2
+        t1 = Tokenizer(**args)
+        t1.spacy_reset_count = 3
+        t2 = Tokenizer(**args)
+        assert t1.word_tokenize_batch(texts) == [t2.word_tokenize(text) for text in texts]
+        assert t1.spacy_count == len(texts)
+
     def test_tokenization_methold(self):
         tokenization_method = 'byWords'
         language = 'fake language'
@@ -453,3 +486,21 @@ def test_read_file(mocker):
         b64_input = base64.b64encode(f.read().encode('utf-8'))
         obj = read_file(b64_input, 'json_b64_string')
         assert len(obj) >= 1
+
+
+def test_load_spacy_model_after_executing_the_script_again(mocker):
+    """
+    Given: a spaCy model that was loaded by the script
+    When: the script is executed again in the same docker container
+    Then: the loaded model is used, instead of loading it again
+    """
+    import importlib
+    import DBotPreprocessTextData
+    spacy_load = mocker.patch('spacy.load', side_effect=lambda model_name, disable: object())
+    model = DBotPreprocessTextData.load_spacy_model('test_model', ['ner'])
+    try:
+        importlib.reload(DBotPreprocessTextData)
+        assert DBotPreprocessTextData.load_spacy_model('test_model', ['ner']) is model
+        assert spacy_load.call_count == 1
+    finally:
+        DBotPreprocessTextData.SPACY_MODELS.pop(('test_model', ('ner',)))
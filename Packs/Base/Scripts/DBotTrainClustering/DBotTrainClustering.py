@@ -11,9 +11,10 @@ from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn import cluster
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.manifold import TSNE
 import hdbscan
+from scipy.sparse import issparse
 from datetime import datetime
 from typing import Type, Tuple, Dict, List, Union
 import math
@@ -43,6 +44,14 @@ HDBSCAN_PARAMS = {
     'n_jobs': -1,
     'prediction_data': True
 }
+MINIBATCH_KMEANS_PARAMS = {
+    'n_clusters': 20,
+    'batch_size': 1024,
+    'random_state': 0
+}
+HDBSCAN_ALGORITHM = 'hdbscan'
+MINIBATCH_KMEANS_ALGORITHM = 'minibatch_kmeans'
+TSNE_PERPLEXITY = 30
 FAMILY_COLUMN_NAME = 'label'
 UNKNOWN_MODEL_TYPE = 'UNKNOWN_MODEL_TYPE'
 MESSAGE_ERROR_MESSAGE = 'Model cannot be loaded'
@@ -96,6 +105,10 @@ class Clustering(object):
     def dbscan(cls, params):
         return cls(params, 'DBSCAN')
 
+    @classmethod
+    def minibatch_kmeans(cls, params):
+        return cls(params, 'MiniBatchKMeans')
+
     def create_model(self, parameters={}):
         """ Create a new model.
         This function takes in parameter a dictionnary.
@@ -106,6 +119,8 @@ class Clustering(object):
             self.model = cluster.DBSCAN()
         elif self.model_name == "KMeans":
             self.model = cluster.KMeans()
+        elif self.model_name == "MiniBatchKMeans":
+            self.model = cluster.MiniBatchKMeans()
         elif self.model_name == "hdbscan":
             self.model_glo = hdbscan
             self.model = self.model_glo.HDBSCAN()
@@ -117,13 +132,18 @@ class Clustering(object):
     def get_data(self, X: np.ndarray, y: pd.DataFrame):
         """
         Load vector of feature X and label y
-        :param X: vector of feature - np.ndarray
+        :param X: vector of feature - np.ndarray or sparse matrix
         :param y: vector of label - pd.DataFrame
         :return:
         """
-        X = pd.DataFrame(X, index=y.index)
-        self.raw_data = pd.DataFrame(X).join(y, how='right')
-        self.data = X
+        if issparse(X):
+            # keep the features sparse, only the labels are needed in raw_data
+            self.raw_data = pd.DataFrame(index=y.index).join(y, how='right')
+            self.data = X.tocsr()
+        else:
+            X = pd.DataFrame(X, index=y.index)
+            self.raw_data = pd.DataFrame(X).join(y, how='right')
+            self.data = X
         self.label = y
 
     def fit(self, X: np.ndarray, y: pd.DataFrame = None):
@@ -135,6 +155,8 @@ class Clustering(object):
         :return:
         """
         self.get_data(X, y)
+        if issparse(X) and self.model_name == 'hdbscan':
+            X = X.toarray()
         if hasattr(self.model, 'fit_predict'):
             self.results = self.model.fit_predict(X)  # type: ignore
         else:
@@ -146,6 +168,22 @@ class Clustering(object):
         self.number_clusters = len(set(self.results[self.results >= 0]))
         return
 
+    def partial_fit(self, X: np.ndarray, y: pd.DataFrame = None):
+        """
+        Update the fitted model with the self.data set, starting from the current clusters rather than from scratch.
+        Only available for models with partial_fit, like MiniBatchKMeans.
+        :param X: vector of feature - np.ndarray or sparse matrix
+        :param y: vector of label - pd.DataFrame
+        :return:
+        """
+        self.get_data(X, y)
+        self.model.partial_fit(X)  # type: ignore
+        self.results = self.model.labels_  # type: ignore
+        self.number_clusters = len(set(self.results[self.results >= 0]))
+        self.TSNE_ = False
+        self.centers = {}
+        self.centers_2d = {}
+
     def reduce_dimension(self, dimension=2):
         """
         Use TSNE technique to reduce dimension
@@ -153,7 +191,8 @@ class Clustering(object):
         :return:
         """
         if not self.TSNE_:
-            tsne = TSNE(n_jobs=-1, n_components=dimension, learning_rate=1000)
+            perplexity = min(TSNE_PERPLEXITY, len(self.centers) - 1)
+            tsne = TSNE(n_jobs=-1, n_components=dimension, learning_rate=1000, perplexity=perplexity)
             self.data_2d = tsne.fit_transform(pd.DataFrame(self.centers).T)
             for coordinates, center in zip(self.data_2d, pd.DataFrame(self.centers).T.index):
                 self.centers_2d[center] = coordinates
@@ -165,7 +204,10 @@ class Clustering(object):
         :return: None
         """
         for cluster_ in range(self.number_clusters):  # type: ignore
-            center = np.mean(self.data[self.model.labels_ == cluster_], axis=0)  # type: ignore
+            if issparse(self.data):
+                center = pd.Series(np.asarray(self.data[self.model.labels_ == cluster_].mean(axis=0)).ravel())
+            else:
+                center = np.mean(self.data[self.model.labels_ == cluster_], axis=0)  # type: ignore
             if center.isnull().values.any():  # type: ignore
                 self.centers[cluster_] = center.fillna(0)  # type: ignore
             else:
@@ -204,8 +246,8 @@ class PostProcessing(object):
         self.stats['General'] = {}
         self.stats['General']['Nb sample'] = self.clustering.raw_data.shape[0]  # type: ignore
         self.stats['General']['Nb cluster'] = self.clustering.number_clusters
-        self.stats['General']['min_samples'] = self.clustering.model.min_samples  # type: ignore
-        self.stats['General']['min_cluster_size'] = self.clustering.model.min_cluster_size  # type: ignore
+        self.stats['General']['min_samples'] = getattr(self.clustering.model, 'min_samples', None)
+        self.stats['General']['min_cluster_size'] = getattr(self.clustering.model, 'min_cluster_size', None)
         for number_cluster in range(-1, self.clustering.number_clusters):  # type: ignore
             self.stats[number_cluster] = {}
             self.stats[number_cluster]['number_samples'] = sum(
@@ -319,11 +361,13 @@ def get_args():  # type: ignore
     force_retrain = demisto.args().get('forceRetrain', 'False') == 'True'
     model_expiration = float(demisto.args().get('modelExpiration'))
     model_hidden = demisto.args().get('model_hidden', 'False') == 'True'
+    algorithm = demisto.args().get('algorithm', HDBSCAN_ALGORITHM)
+    number_of_clusters = int(demisto.args().get('numberOfClusters', MINIBATCH_KMEANS_PARAMS['n_clusters']))
 
     return fields_for_clustering, field_for_cluster_name, display_fields, from_date, to_date, limit, query, \
         incident_type, min_number_of_incident_in_cluster, model_name, store_model, min_homogeneity_cluster, \
         model_override, max_percentage_of_missing_value, debug, force_retrain, model_expiration, model_hidden, \
-        number_feature_per_field, analyzer
+        number_feature_per_field, analyzer, algorithm, number_of_clusters
 
 
 def get_all_incidents_for_time_window_and_type(populate_fields: List[str], from_date: str, to_date: str,
@@ -515,6 +559,41 @@ class Tfidf(BaseEstimator, TransformerMixin):
         return self.vec.transform(x).toarray()
 
 
+class Hashing(BaseEstimator, TransformerMixin):
+    """
+    Hashing transformer, the sparse and stateless counterpart of the TFIDF transformer
+    """
+
+    def __init__(self, normalize_function):
+        """
+        :param normalize_function: Normalize function to apply on each sample of the corpus before the vectorization
+        """
+        self.normalize_function = normalize_function
+        self.vec = HashingVectorizer(n_features=TFIDF_PARAMS['max_features'], ngram_range=TFIDF_PARAMS['ngram_range'],
+                                     analyzer=TFIDF_PARAMS.get('analyzer', 'word'), alternate_sign=False)
+
+    def fit(self, x, y=None):
+        """
+        Nothing to fit, the features are hashed, so the transformer is the same for every set of incidents
+        :param x: incident on which we want to fit the transfomer
+        :return: self
+        """
+        return self
+
+    def transform(self, x):
+        """
+        Transform x into sparse hashed features
+        :param x: DataFrame or np.array
+        :return: sparse matrix
+        """
+        feature_name = x.columns[0]
+        if self.normalize_function:
+            x = x[feature_name].apply(self.normalize_function)
+        else:
+            x = x[feature_name]
+        return self.vec.transform(x)
+
+
 def store_model_in_demisto(model: Type[PostProcessing], model_name: str, model_override: bool,
                            model_hidden: bool) -> None:
     model_data = base64.b64encode(pickle.dumps(model)).decode('utf-8')  # guardrails-disable-line
@@ -854,10 +933,27 @@ def calculate_range(data):
            [int(math.ceil(min(all_y))), int(math.ceil(max(all_y)))]
 
 
+def is_model_updatable(model_processed, fields_for_clustering: List[str]) -> bool:
+    """
+    Return boolean if the expired model can be updated with the incidents instead of being trained from scratch -
+    only mini-batch models, whose hashed features are the same for the given fields
+    :param model_processed: PostProcessing model
+    :param fields_for_clustering: List of field to use for the clustering
+    :return: Boolean
+    """
+    if model_processed is None or model_processed.clustering.model_name != 'MiniBatchKMeans':
+        return False
+    model = model_processed.clustering.model
+    n_features = len(fields_for_clustering) * TFIDF_PARAMS['max_features']
+    return model_processed.summary.get('Fields used for training') == ' , '.join(fields_for_clustering) and \
+        model.cluster_centers_.shape[1] == n_features and model.n_clusters == MINIBATCH_KMEANS_PARAMS['n_clusters']
+
+
 def main():
     builtins.Clustering = Clustering  # type: ignore
     builtins.PostProcessing = PostProcessing  # type: ignore
     builtins.Tfidf = Tfidf  # type: ignore
+    builtins.Hashing = Hashing  # type: ignore
 
     global_msg = ""
     generic_cluster_name = False
@@ -866,16 +962,18 @@ def main():
     fields_for_clustering, field_for_cluster_name, display_fields, from_date, to_date, limit, query, incident_type, \
         min_number_of_incident_in_cluster, model_name, store_model, min_homogeneity_cluster, model_override, \
         max_percentage_of_missing_value, debug, force_retrain, model_expiration, model_hidden, \
-        number_feature_per_field, analyzer = get_args()
+        number_feature_per_field, analyzer, algorithm, number_of_clusters = get_args()
 
     HDBSCAN_PARAMS.update({'min_cluster_size': min_number_of_incident_in_cluster,
                            'min_samples': min_number_of_incident_in_cluster})
 
     TFIDF_PARAMS.update({'max_features': number_feature_per_field})
     TFIDF_PARAMS.update({'analyzer': analyzer})
+    MINIBATCH_KMEANS_PARAMS.update({'n_clusters': number_of_clusters})
 
     # Check if need to retrain
-    model_processed, retrain = is_model_needs_retrain(force_retrain, model_expiration, model_name)
+    previous_model_processed, retrain = is_model_needs_retrain(force_retrain, model_expiration, model_name)
+    model_processed = previous_model_processed
 
     if not retrain:
         if debug:
@@ -944,32 +1042,47 @@ def main():
         # Create data for training
         labels = prepare_data_for_training(generic_cluster_name, incidents_df, field_for_cluster_name)
 
-        # TFIDF pipeline
-        tfidf_pipe = Pipeline(steps=[
-            ('tfidf', Tfidf(normalize_function=normalize_global))
-        ])
+        if algorithm == MINIBATCH_KMEANS_ALGORITHM:
+            # Hashing pipeline - sparse features, clustered by mini-batches
+            vectorizer_pipe = Pipeline(steps=[
+                ('hashing', Hashing(normalize_function=normalize_global))
+            ])
+            clustering_model = Clustering.minibatch_kmeans(dict(
+                MINIBATCH_KMEANS_PARAMS, n_clusters=min(MINIBATCH_KMEANS_PARAMS['n_clusters'], len(incidents_df))))
+        else:
+            # TFIDF pipeline
+            vectorizer_pipe = Pipeline(steps=[
+                ('tfidf', Tfidf(normalize_function=normalize_global))
+            ])
+            clustering_model = Clustering.hdbscan(HDBSCAN_PARAMS)
 
         # preprocessor
-        transformers_list = [('tfidf' + field, tfidf_pipe, [field]) for field in fields_for_clustering]
+        transformers_list = [('tfidf' + field, vectorizer_pipe, [field]) for field in fields_for_clustering]
         preprocessor = ColumnTransformer(
-            transformers=transformers_list)
+            transformers=transformers_list, sparse_threshold=1)
 
-        # Model pipeline
-        model = Pipeline(steps=[(PREPROCESSOR_STEP_PIPELINE, preprocessor),
-                                (CLUSTERING_STEP_PIPELINE, Clustering(HDBSCAN_PARAMS))
-                                ])
-        # Fit of the model on incidents_df and labels
-        model.fit(incidents_df, labels)
+        if algorithm == MINIBATCH_KMEANS_ALGORITHM and is_model_updatable(previous_model_processed,
+                                                                          fields_for_clustering):
+            # Update the expired model with the incidents, starting from its clusters
+            clustering_model = previous_model_processed.clustering
+            clustering_model.partial_fit(preprocessor.fit_transform(incidents_df, labels), labels)
+        else:
+            # Model pipeline
+            model = Pipeline(steps=[(PREPROCESSOR_STEP_PIPELINE, preprocessor),
+                                    (CLUSTERING_STEP_PIPELINE, clustering_model)
+                                    ])
+            # Fit of the model on incidents_df and labels
+            model.fit(incidents_df, labels)
 
         # Check is clustering is valid
-        if not is_clustering_valid(model.named_steps[CLUSTERING_STEP_PIPELINE]):
+        if not is_clustering_valid(clustering_model):
             global_msg += "%s \n" % MESSAGE_CLUSTERING_NOT_VALID
             return None, {}, global_msg
 
         # Reduce dimension
-        model.named_steps[CLUSTERING_STEP_PIPELINE].compute_centers()
-        model.named_steps[CLUSTERING_STEP_PIPELINE].reduce_dimension()
-        model_processed = PostProcessing(model.named_steps[CLUSTERING_STEP_PIPELINE], min_homogeneity_cluster,
+        clustering_model.compute_centers()
+        clustering_model.reduce_dimension()
+        model_processed = PostProcessing(clustering_model, min_homogeneity_cluster,  # type: ignore
                                          generic_cluster_name)
 
         # Create summary of the training and assign it the the summary attribute of the model
@@ -2,7 +2,7 @@ import json
 
 from DBotTrainClustering import demisto, main, MESSAGE_INCORRECT_FIELD, MESSAGE_INVALID_FIELD, \
     preprocess_incidents_field, PREFIXES_TO_REMOVE, MESSAGE_CLUSTERING_NOT_VALID, check_list_of_dict, \
-    base64, datetime, MESSAGE_NO_FIELD_NAME_OR_CLUSTERING
+    base64, datetime, MESSAGE_NO_FIELD_NAME_OR_CLUSTERING, Clustering
 import dill as pickle
 
 PARAMETERS_DICT = {
@@ -327,3 +327,48 @@ def test_same_cluster_name(mocker):
     clusters_name = [x['clusterName'] for x in model.selected_clusters.values()]
     assert 'nmap' in clusters_name
     assert 'nmap_0' in clusters_name
+
+
+# Test training with sparse features and mini-batch clustering
+def test_main_minibatch_kmeans(mocker):
+    global FETCHED_INCIDENT
+    FETCHED_INCIDENT = FETCHED_INCIDENT_NOT_EMPTY
+    parameters = dict(PARAMETERS_DICT, fieldsForClustering='field_1, field_2', fieldForClusterName='entityname',
+                      forceRetrain='True', algorithm='minibatch_kmeans', numberOfClusters='2')
+    mocker.patch.object(demisto, 'args', return_value=parameters)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=executeCommand)
+    model, output_clustering_json, msg = main()
+    assert model.clustering.model_name == 'MiniBatchKMeans'
+    assert model.clustering.data.shape == (4, 2 * PARAMETERS_DICT['numberOfFeaturesPerField'])
+    output_json = json.loads(output_clustering_json)
+    clusters = sorted(sorted(cluster['incidents_ids']) for cluster in output_json['data'])
+    assert clusters == [['1', '3'], ['2', '4']]
+
+
+# Test that an expired mini-batch model is updated rather than trained from scratch
+def test_minibatch_kmeans_model_updated(mocker):
+    global FETCHED_INCIDENT
+    FETCHED_INCIDENT = FETCHED_INCIDENT_NOT_EMPTY
+    parameters = dict(PARAMETERS_DICT, fieldsForClustering='field_1, field_2', fieldForClusterName='entityname',
+                      forceRetrain='True', algorithm='minibatch_kmeans', numberOfClusters='2', storeModel='True')
+    stored_models = []
+
+    def execute_command(command, args):
+        if command == 'createMLModel':
+            stored_models.append(args['modelData'])
+            return [{'Contents': '', 'Type': 'note'}]
+        if command == 'getMLModel':
+            return [{'Contents': {'modelData': stored_models[-1], 'model': {'type': {'type': ''}}}, 'Type': 'note'}]
+        return executeCommand(command, args)
+
+    mocker.patch.object(demisto, 'args', return_value=parameters)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command)
+    main()
+    fit = mocker.spy(Clustering, 'fit')
+    partial_fit = mocker.spy(Clustering, 'partial_fit')
+    parameters.update({'forceRetrain': 'False', 'modelExpiration': '1e-20'})
+    model, output_clustering_json, msg = main()
+    assert fit.call_count == 0
+    assert partial_fit.call_count == 1
+    clusters = sorted(sorted(cluster['incidents_ids']) for cluster in json.loads(output_clustering_json)['data'])
+    assert clusters == [['1', '3'], ['2', '4']]
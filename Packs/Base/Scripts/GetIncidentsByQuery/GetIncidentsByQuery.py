@@ -100,7 +100,7 @@ def get_fields_to_populate_arg(fields_to_populate):
     return ",".join(incidents_fields_to_populate)
 
 
-def get_incidents_by_page(args, page, fields_to_populate, include_context):
+def get_incidents_by_page(args, page, fields_to_populate, include_context, use_search_after=False):
     args['page'] = page
     if is_demisto_version_ge('6.2.0') and len(fields_to_populate) > 0:
         args['populateFields'] = get_fields_to_populate_arg(fields_to_populate)
@@ -108,6 +108,9 @@ def get_incidents_by_page(args, page, fields_to_populate, include_context):
     if is_error(res):
         error_message = get_error(res)
         raise Exception("Failed to get incidents by query args: %s error: %s" % (args, error_message))
+    if use_search_after and res[0]['Contents'].get('searchAfter'):
+        # the next page continues from the cursor of this page
+        args['searchAfter'] = res[0]['Contents']['searchAfter']
     if res[0]['Contents'].get('data') is None:
         return []
     incidents = res[0]['Contents'].get('data') or []
@@ -140,7 +143,8 @@ def get_demisto_datetme_format(date_string):
             return None
 
 
-def get_incidents(query, time_field, size, from_date, to_date, fields_to_populate, include_context):
+def get_incidents(query, time_field, size, from_date, to_date, fields_to_populate, include_context,
+                  use_search_after=False):
     query_size = min(PAGE_SIZE, size)
     args = {"query": query, "size": query_size, "sort": "%s.%s" % (time_field, "desc")}
     # apply only when created time field
@@ -162,7 +166,7 @@ def get_incidents(query, time_field, size, from_date, to_date, fields_to_populat
     incident_list = []  # type: ignore
     page = 0
     while len(incident_list) < size:
-        incidents = get_incidents_by_page(args, page, fields_to_populate, include_context)
+        incidents = get_incidents_by_page(args, page, fields_to_populate, include_context, use_search_after)
         if not incidents:
             break
         incident_list += incidents
@@ -170,6 +174,17 @@ def get_incidents(query, time_field, size, from_date, to_date, fields_to_populat
     return incident_list[:size]
 
 
+def jsonl_file_result(filename, incidents):
+    """
+    Creates a file with an incident per line, writing the incidents one by one instead of dumping all of them to a
+    single string.
+    """
+    with open(filename, 'w') as f:
+        for inc in incidents:
+            f.write(json.dumps(inc) + '\n')
+    return file_result_existing_file(filename)
+
+
 def get_comma_sep_list(value):
     value = value.replace('|', ',')
     return map(lambda x: x.strip(), value.split(","))
@@ -211,20 +226,24 @@ def main():
                                   d_args.get('fromDate'),
                                   d_args.get('toDate'),
                                   fields_to_populate,
-                                  include_context)
+                                  include_context,
+                                  argToBoolean(d_args.get('useSearchAfter', 'false')))
 
         # output
         file_name = str(uuid.uuid4())
         output_format = d_args['outputFormat']
         if output_format == 'pickle':
-            data_encoded = pickle.dumps(incidents, protocol=2)
+            entry = fileResult(file_name, pickle.dumps(incidents, protocol=2))
         elif output_format == 'json':
-            data_encoded = json.dumps(incidents)  # type: ignore
+            entry = fileResult(file_name, json.dumps(incidents))
+        elif output_format == 'jsonl':
+            entry = jsonl_file_result(file_name, incidents)
         else:
             raise Exception("Invalid output format: %s" % output_format)
 
-        entry = fileResult(file_name, data_encoded)
-        entry['Contents'] = incidents
+        if output_format != 'jsonl':
+            # the incidents are read from the contents by the scripts using the json and pickle formats
+            entry['Contents'] = incidents
         entry['HumanReadable'] = "Fetched %d incidents successfully by the query: %s" % (len(incidents), query)
         entry['EntryContext'] = {
             'GetIncidentsByQuery': {
@@ -1,5 +1,6 @@
 from GetIncidentsByQuery import build_incidents_query, get_incidents, parse_relative_time, main, \
-    preprocess_incidents_fields_list, get_demisto_datetme_format, get_fields_to_populate_arg, PYTHON_MAGIC
+    preprocess_incidents_fields_list, get_demisto_datetme_format, get_fields_to_populate_arg, PYTHON_MAGIC, \
+    jsonl_file_result
 
 from CommonServerPython import *
 
@@ -134,8 +135,9 @@ def execute_command_get_incidents_with_magic(command, args):
     return res
 
 
-def test_main(mocker):
+def test_main(mocker, tmp_path):
     args = dict(get_args())
+    mocker.patch.object(demisto, 'investigation', return_value={'id': str(tmp_path / 'inv')})
     mocker.patch.object(demisto, 'args', return_value=args)
     mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_get_incidents)
 
@@ -159,8 +161,9 @@ def test_main(mocker):
     assert set(entry['Contents'][0].keys()) == set(['testField', 'status', 'severity', 'id', 'context'])
 
 
-def test_skip_python_magic(mocker):
+def test_skip_python_magic(mocker, tmp_path):
     args = dict(get_args())
+    mocker.patch.object(demisto, 'investigation', return_value={'id': str(tmp_path / 'inv')})
     mocker.patch.object(demisto, 'args', return_value=args)
     mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_get_incidents_with_magic)
 
@@ -169,6 +172,80 @@ def test_skip_python_magic(mocker):
     assert len(entry['Contents']) == 1
 
 
+def execute_command_get_incidents_search_after(requested_cursors):
+    def execute_command(command, args):
+        requested_cursors.append(args.get('searchAfter'))
+        page = len(requested_cursors) - 1
+        data = [{'id': page}] if page < 3 else []
+        return [{'Type': entryTypes['note'], 'Contents': {'data': data, 'total': 3, 'searchAfter': [page]}}]
+    return execute_command
+
+
+def test_get_incidents_search_after(mocker):
+    """
+    Given: a server that returns a searchAfter cursor with each page
+    When: getting the incidents with useSearchAfter
+    Then: each page is requested with the cursor of the previous page
+    """
+    requested_cursors = []  # type: ignore
+    mocker.patch.object(demisto, 'executeCommand',
+                        side_effect=execute_command_get_incidents_search_after(requested_cursors))
+    mocker.patch('GetIncidentsByQuery.PAGE_SIZE', 1)
+    incidents = get_incidents('query', 'created', 10, None, None, [], False, use_search_after=True)
+    assert [inc['id'] for inc in incidents] == [0, 1, 2]
+    assert requested_cursors == [None, [0], [1], [2]]
+
+
+def test_get_incidents_without_search_after(mocker):
+    """
+    Given: a server that returns a searchAfter cursor with each page
+    When: getting the incidents without useSearchAfter
+    Then: the pages are requested without a cursor
+    """
+    requested_cursors = []  # type: ignore
+    mocker.patch.object(demisto, 'executeCommand',
+                        side_effect=execute_command_get_incidents_search_after(requested_cursors))
+    mocker.patch('GetIncidentsByQuery.PAGE_SIZE', 1)
+    incidents = get_incidents('query', 'created', 10, None, None, [], False)
+    assert [inc['id'] for inc in incidents] == [0, 1, 2]
+    assert requested_cursors == [None, None, None, None]
+
+
+def test_jsonl_file_result(mocker, tmp_path, monkeypatch):
+    """
+    Given: incidents to write to a file
+    When: creating a jsonl file result
+    Then: the file has an incident per line
+    """
+    monkeypatch.chdir(tmp_path)
+    mocker.patch.object(demisto, 'uniqueFile', return_value='file_id')
+    mocker.patch.object(demisto, 'investigation', return_value={'id': 'inv'})
+    entry = jsonl_file_result('incidents', [incident1, incident2])
+    assert entry['FileID'] == 'file_id'
+    assert entry['File'] == 'incidents'
+    with open(str(tmp_path / 'inv_file_id')) as f:
+        assert [json.loads(line)['id'] for line in f] == [1, 2]
+
+
+def test_main_jsonl(mocker, tmp_path, monkeypatch):
+    """
+    Given: the jsonl output format
+    When: getting the incidents
+    Then: the incidents are written to the file only, and not to the entry contents
+    """
+    monkeypatch.chdir(tmp_path)
+    args = dict(get_args())
+    args['outputFormat'] = 'jsonl'
+    mocker.patch.object(demisto, 'args', return_value=args)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_get_incidents)
+    entry = main()
+    assert entry['Contents'] == ''
+    assert "Fetched 2 incidents successfully" in entry['HumanReadable']
+    assert entry['EntryContext']['GetIncidentsByQuery']['FileFormat'] == 'jsonl'
+    with open(str(tmp_path / ('1_' + entry['FileID']))) as f:
+        assert len(f.readlines()) == 2
+
+
 def test_preprocess_incidents_fields_list():
     incidents_fields = ['incident.emailbody', ' incident.emailsbuject']
     assert preprocess_incidents_fields_list(incidents_fields) == ['emailbody', 'emailsbuject']
@@ -1,5 +1,6 @@
 import spacy
 import string
+import __builtin__
 from HTMLParser import HTMLParser
 from re import compile as _Re
 
@@ -29,6 +30,7 @@ REPLACE_URLS = demisto.args()['replaceUrls'] == 'yes'
 REPLACE_NUMBERS = demisto.args()['replaceNumbers'] == 'yes'
 LEMMATIZER = demisto.args()['useLemmatization'] == 'yes'
 VALUE_IS_JSON = demisto.args()['isValueJson'] == 'yes'
+BATCH_SIZE = int(demisto.args().get('batchSize', 1000))
 
 HTML_PATTERNS = [
     re.compile(r"(?is)<(script|style).*?>.*?(</\1>)"),
@@ -50,7 +52,11 @@ LANGUAGES_TO_MODEL_NAMES = {'English': 'en_core_web_sm',
                             }
 
 _unicode_chr_splitter = _Re('(?s)((?:[\ud800-\udbff][\udc00-\udfff])|.)').split
-nlp = None
+# spaCy models by language. A reused docker container executes this source again on each run, but keeps the imported
+# __builtin__ module, so the models are stored on it
+nlp_models = getattr(__builtin__, 'WORD_TOKENIZER_SPACY_MODELS', None)
+if nlp_models is None:
+    nlp_models = __builtin__.WORD_TOKENIZER_SPACY_MODELS = {}  # type: ignore
 
 
 def clean_html(text):
@@ -77,14 +83,25 @@ def hash_word(word):
     return str(hash_djb2(word, int(HASH_SEED)))
 
 
-def tokenize_text(text):
+def to_unicode(text):
     try:
-        unicode_text = unicode(text)
+        return unicode(text)
     except Exception:
-        unicode_text = text
+        return text
+
+
+def get_spacy_model(language):
+    if language not in nlp_models:
+        nlp_models[language] = spacy.load(LANGUAGES_TO_MODEL_NAMES[language],
+                                          disable=['tagger', 'parser', 'ner', 'textcat'])
+    return nlp_models[language]
+
+
+def tokenize_text(text, doc=None):
+    unicode_text = to_unicode(text)
     language = demisto.args()['language']
     if language in LANGUAGES_TO_MODEL_NAMES:
-        original_words_to_tokens, tokens_list = tokenize_text_spacy(unicode_text, language)
+        original_words_to_tokens, tokens_list = tokenize_text_spacy(unicode_text, language, doc)
     else:
         original_words_to_tokens, tokens_list = tokenize_text_other(unicode_text)
     hashed_tokens_list = []
@@ -119,11 +136,10 @@ def tokenize_text_other(unicode_text):
     return original_words_to_tokens, tokens_list
 
 
-def tokenize_text_spacy(unicode_text, language):
-    global nlp
-    if nlp is None:
-        nlp = spacy.load(LANGUAGES_TO_MODEL_NAMES[language], disable=['tagger', 'parser', 'ner', 'textcat'])
-    doc = nlp(unicode(unicode_text))
+def tokenize_text_spacy(unicode_text, language, doc=None):
+    nlp = get_spacy_model(language)
+    if doc is None:
+        doc = nlp(unicode(unicode_text))
     original_text_indices_to_words = map_indices_to_words(unicode_text)
     tokens_list = []
     original_words_to_tokens = {}  # type: ignore
@@ -179,6 +195,17 @@ def handle_long_text(t, input_length):
         return '', '', {}, {}
 
 
+def iter_spacy_docs(texts):
+    """
+    Yields the spaCy doc of each text, parsed in batches of BATCH_SIZE texts, or None for each text when the language
+    is not tokenized by spaCy
+    """
+    language = demisto.args()['language']
+    if language not in LANGUAGES_TO_MODEL_NAMES:
+        return iter([None] * len(texts))
+    return iter(get_spacy_model(language).pipe((unicode(to_unicode(t)) for t in texts), batch_size=BATCH_SIZE))
+
+
 def word_tokenize(text):
     if VALUE_IS_JSON:
         try:
@@ -189,14 +216,14 @@ def word_tokenize(text):
     if not isinstance(text, list):
         text = [text]
 
+    cleaned_texts = [remove_multiple_whitespaces(clean_html(remove_line_breaks(t))) for t in text]
+    docs = iter_spacy_docs([t for t in cleaned_texts if len(t) < MAX_TEXT_LENGTH])
+
     result = []
-    for t in text:
-        original_text = t
-        t = remove_line_breaks(t)
-        t = clean_html(t)
-        t = remove_multiple_whitespaces(t)
+    for original_text, t in zip(text, cleaned_texts):
         if len(t) < MAX_TEXT_LENGTH:
-            tokenized_text, hash_tokenized_text, original_words_to_tokens, words_to_hashed_tokens = tokenize_text(t)
+            tokenized_text, hash_tokenized_text, original_words_to_tokens, words_to_hashed_tokens = \
+                tokenize_text(t, next(docs))
         else:
             tokenized_text, hash_tokenized_text, original_words_to_tokens, words_to_hashed_tokens =\
                 handle_long_text(t, input_length=len(text))
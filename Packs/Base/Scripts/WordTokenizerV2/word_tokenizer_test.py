@@ -45,6 +45,12 @@ def test_word_tokenize():
         'hashedTokenizedText']
 
 
+def test_word_tokenize_list():
+    texts = ["test@demisto.com is 100 going to http://google.com bla bla", "I have 3 dogs", "example sentence"]
+    entry = word_tokenize(texts)
+    assert [res['tokenizedText'] for res in entry['Contents']] == [tokenize_text(text)[0] for text in texts]
+
+
 def test_word_tokenize_words_to_tokens():
     words = ["let\'s", "gonna", "ain't", "we'll", "shouldn't", "will\\won't"]
     words_to_tokens = {w: tokenize_text(w)[0].split() for w in words}
@@ -89,3 +95,17 @@ def test_multi_lang_tokenization_basic_tokeniztion(mocker):
     res = word_tokenize(input_chinese_sentence)
     tokenized_res = res['Contents']['tokenizedText']
     assert len(tokenized_res) > 0
+
+
+def test_get_spacy_model_after_executing_the_script_again(mocker):
+    """
+    Given: a spaCy model that was loaded by the script
+    When: the script is executed again in the same docker container
+    Then: the loaded model is used, instead of loading it again
+    """
+    import WordTokenizerV2
+    model = WordTokenizerV2.get_spacy_model('English')
+    spacy_load = mocker.patch('spacy.load')
+    reload(WordTokenizerV2)
+    assert WordTokenizerV2.get_spacy_model('English') is model
+    assert spacy_load.call_count == 0
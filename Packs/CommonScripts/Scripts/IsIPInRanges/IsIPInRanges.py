@@ -0,0 +1,76 @@
+import demistomock as demisto
+from CommonServerPython import *
+
+PRIVATE_SUBNETS = [
+    '172.16.0.0/12',
+    '10.0.0.0/8',
+    '198.18.0.0/15',
+    '192.168.0.0/16',
+    '100.64.0.0/10',
+    '127.0.0.0/8',
+    '169.254.0.0/16',
+    '192.0.0.0/24',
+    '0.0.0.0/8',
+    '224.0.0.0/4',
+    '240.0.0.0/4',
+    '255.255.255.255/32'
+]
+
+
+def is_ip_in_index(ip_address: str, cidr_ranges_index: 'CidrRangesIndex') -> bool:
+    """
+    Checks whether the IP address is in the ranges of the index. An IP address that is not valid is not in any range.
+
+    :type ip_address: ``str``
+    :param ip_address: The IP address to check.
+
+    :type cidr_ranges_index: ``CidrRangesIndex``
+    :param cidr_ranges_index: The index of the CIDR ranges to check the IP address in.
+
+    :return: Whether the IP address is in the ranges.
+    :rtype: ``bool``
+    """
+    try:
+        return ip_address in cidr_ranges_index
+    except ValueError:
+        return False
+
+
+def is_ip_in_ranges(ip_addresses: List[str], ip_ranges: List[str]) -> dict:
+    """
+    Checks whether each of the IP addresses is in the ranges.
+
+    :type ip_addresses: ``List[str]``
+    :param ip_addresses: The IP addresses to check.
+
+    :type ip_ranges: ``List[str]``
+    :param ip_ranges: The CIDR ranges to check the IP addresses in, the private subnets if empty.
+
+    :return: An entry which is "yes" if any of the IP addresses is in the ranges, with the IP addresses in the context.
+    :rtype: ``dict``
+    """
+    cidr_ranges_index = get_cidr_ranges_index(ip_ranges or PRIVATE_SUBNETS)
+    ip_objects = [{'Address': ip_address, 'InRange': 'yes' if is_ip_in_index(ip_address, cidr_ranges_index) else 'no'}
+                  for ip_address in ip_addresses]
+    is_in_range = any(ip_object['InRange'] == 'yes' for ip_object in ip_objects)
+
+    return {
+        'Type': entryTypes['note'],
+        'Contents': 'yes' if is_in_range else 'no',
+        'ContentsFormat': formats['text'],
+        'EntryContext': {'IP(val.Address == obj.Address)': ip_objects[0] if len(ip_objects) == 1 else ip_objects}
+    }
+
+
+def main():
+    args = demisto.args()
+    try:
+        demisto.results(is_ip_in_ranges(argToList(args.get('ip')), argToList(args.get('ipRanges'))))
+    except Exception as e:
+        return_error(f'Failed to execute IsIPInRanges. Error: {str(e)}')
+
+
+from CidrRangesApiModule import *  # noqa: E402
+
+if __name__ in ('__main__', '__builtin__', 'builtins'):
+    main()
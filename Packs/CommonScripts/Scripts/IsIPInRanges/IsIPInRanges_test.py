@@ -0,0 +1,37 @@
+import demistomock as demisto
+import pytest
+
+from IsIPInRanges import main
+
+
+@pytest.mark.parametrize('args, contents, context', [
+    ({'ip': '10.5.5.5'}, 'yes', {'Address': '10.5.5.5', 'InRange': 'yes'}),
+    ({'ip': '8.8.8.8'}, 'no', {'Address': '8.8.8.8', 'InRange': 'no'}),
+    ({'ip': '8.8.8.8', 'ipRanges': '8.8.0.0/16, 1.1.1.1/32'}, 'yes', {'Address': '8.8.8.8', 'InRange': 'yes'}),
+    ({'ip': '10.5.5.5,8.8.8.8', 'ipRanges': '8.8.0.0/16'}, 'yes', [{'Address': '10.5.5.5', 'InRange': 'no'},
+                                                                   {'Address': '8.8.8.8', 'InRange': 'yes'}]),
+    ({'ip': 'not_an_ip,10.5.5.5'}, 'yes', [{'Address': 'not_an_ip', 'InRange': 'no'},
+                                           {'Address': '10.5.5.5', 'InRange': 'yes'}]),
+    ({'ip': '10.5.5.5.5'}, 'no', {'Address': '10.5.5.5.5', 'InRange': 'no'}),
+])
+def test_main(mocker, args, contents, context):
+    """
+    Given:
+        - An IP address in the private subnets.
+        - An IP address not in the private subnets.
+        - An IP address and ranges it is in.
+        - A list of IP addresses, one of them in the ranges.
+        - A list of IP addresses, one of them not valid.
+        - An IP address that is not valid.
+    When:
+        - Checking whether the IP addresses are in the ranges.
+    Then:
+        - Ensure the result is "yes" if any of the IP addresses is in the ranges, and "no" otherwise.
+        - Ensure each of the IP addresses is set in the context with whether it is in the ranges.
+    """
+    mocker.patch.object(demisto, 'args', return_value=args)
+    mocker.patch.object(demisto, 'results')
+    main()
+    result = demisto.results.call_args[0][0]
+    assert result['Contents'] == contents
+    assert result['EntryContext'] == {'IP(val.Address == obj.Address)': context}
@@ -7,9 +7,9 @@ from CommonServerUserPython import *
 import re
 
 from base64 import b64decode
-from flask import Flask, Response, request
-from netaddr import IPSet, IPNetwork
-from typing import Any, Dict, cast, Iterable, Callable, IO
+from flask import Flask, Response, request, stream_with_context
+from netaddr import IPSet, IPNetwork, IPAddress
+from typing import Any, Dict, Tuple, cast, Iterable, Iterator, Callable, IO
 from math import ceil
 import tldextract
 import urllib3
@@ -17,6 +17,9 @@ import dateparser
 import hashlib
 import json
 import ipaddress
+import os
+import itertools
+from array import array
 
 # Disable insecure warnings
 urllib3.disable_warnings()
@@ -41,6 +44,10 @@ EDL_NO_URLS_IN_PROXYSG_FORMAT = 'ProxySG format only outputs URLs - no URLs foun
 EDL_ON_DEMAND_KEY: str = 'UpdateEDL'
 EDL_ON_DEMAND_CACHE_PATH: str = ''
 EDL_SEARCH_LOOP_LIMIT: int = 10
+EDL_STREAM_CHUNK_SIZE: int = 64 * 1024
+EDL_ON_DEMAND_STATE_SUFFIX: str = '.state'
+EDL_FULL_REBUILD_INTERVAL: timedelta = timedelta(hours=24)
+EDL_MODIFIED_TIME_FORMAT: str = '%Y-%m-%dT%H:%M:%SZ'
 
 ''' REFORMATTING REGEXES '''
 _PROTOCOL_REMOVAL = re.compile('^(?:[a-z]+:)*//')
@@ -48,6 +55,7 @@ _PORT_REMOVAL = re.compile(r'^((?:[a-z]+:)*//([a-z0-9\-\.]+)|([a-z0-9\-\.]+))(?:
 _URL_WITHOUT_PORT = r'\g<1>'
 _INVALID_TOKEN_REMOVAL = re.compile(r'(?:[^\./+=\?&]+\*[^\./+=\?&]*)|(?:[^\./+=\?&]*\*[^\./+=\?&]+)')
 _BROAD_PATTERN = re.compile(r'^(?:\*\.)+[a-zA-Z]+(?::[0-9]+)?$')
+_CANONICAL_IPV4 = re.compile(r'\.'.join([r'(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'] * 4))
 
 DONT_COLLAPSE = "Don't Collapse"
 COLLAPSE_TO_CIDR = "To CIDRS"
@@ -236,6 +244,14 @@ def iterable_to_str(iterable: Iterable, delimiter: str = '\n') -> str:
     return str_res
 
 
+def iter_file_chunks(file: IO) -> Iterator[str]:
+    """
+    Reads a file in fixed size chunks, so it is never held in memory as a whole
+    """
+    while chunk := file.read(EDL_STREAM_CHUNK_SIZE):
+        yield chunk
+
+
 def create_new_edl(request_args: RequestArguments) -> str:
     """
     Gets indicators from XSOAR server using IndicatorsSearcher and formats them
@@ -245,34 +261,38 @@ def create_new_edl(request_args: RequestArguments) -> str:
 
     Returns: Formatted indicators to display in EDL
     """
-    limit = request_args.offset + request_args.limit
+    return ''.join(create_edl_stream(request_args))
+
+
+def create_edl_stream(request_args: RequestArguments) -> Iterator[str]:
+    """
+    Gets indicators from XSOAR server using IndicatorsSearcher and yields them formatted page by page, so that the
+    list is never held in memory as a whole.
+
+    Parameters:
+        request_args: Request arguments
+
+    Returns: Chunks of the formatted indicators to display in EDL
+    """
     indicator_searcher = IndicatorsSearcher(
         filter_fields=request_args.fields_to_present,
         query=request_args.query,
         size=PAGE_SIZE,
-        limit=limit
+        limit=get_search_limit(request_args)
     )
-    formatted_indicators = ''
-    if request_args.out_format == FORMAT_TEXT:
-        if request_args.drop_invalids or request_args.collapse_ips != "Don't Collapse":
-            # Because there may be illegal indicators or they may turn into cider, the limit is increased
-            indicator_searcher.limit = int(limit * INCREASE_LIMIT)
-        new_iocs_file = get_indicators_to_format(indicator_searcher, request_args)
-        # we collect first all indicators because we ned all ips to collapse_ips
-        new_iocs_file = create_text_out_format(new_iocs_file, request_args)
-        new_iocs_file.seek(0)
-        for count, line in enumerate(new_iocs_file):
-            # continue searching iocs if 1) iocs was truncated or 2) got all available iocs
-            if count + 1 > limit:
-                break
-            else:
-                formatted_indicators += line
-    else:
-        new_iocs_file = get_indicators_to_format(indicator_searcher, request_args)
-        new_iocs_file.seek(0)
-        formatted_indicators = new_iocs_file.read()
-    new_iocs_file.close()
-    return formatted_indicators
+    yield from get_out_format_writer(request_args).format(iter_indicators(indicator_searcher))
+
+
+def get_search_limit(request_args: RequestArguments) -> int:
+    """
+    Returns the number of indicators to search for the list
+    """
+    limit = request_args.offset + request_args.limit
+    if request_args.out_format == FORMAT_TEXT and \
+            (request_args.drop_invalids or request_args.collapse_ips != DONT_COLLAPSE):
+        # Because there may be illegal indicators or they may turn into cider, the limit is increased
+        return int(limit * INCREASE_LIMIT)
+    return limit
 
 
 def replace_field_name_to_output_format(fields: str):
@@ -290,56 +310,22 @@ def replace_field_name_to_output_format(fields: str):
     return new_list
 
 
-def get_indicators_to_format(indicator_searcher: IndicatorsSearcher, request_args: RequestArguments) ->\
-        Union[IO, IO[str]]:
+def iter_indicators(indicator_searcher: IndicatorsSearcher) -> Iterator[dict]:
     """
-    Finds indicators using demisto.searchIndicators, and returns the indicators in file written in the requested format
+    Flattens the pages returned by the IndicatorsSearcher into single indicators, stopping at the searcher limit.
     Parameters:
         indicator_searcher (IndicatorsSearcher): The indicator searcher used to look for indicators
-        request_args (RequestArguments):  all the request arguments.
     Returns:
-        (IO): indicators in file writen in requested format
+        (Iterator): the found indicators, one by one
     """
-    f = tempfile.TemporaryFile(mode='w+t')
-    list_fields = replace_field_name_to_output_format(request_args.fields_to_present)
-    headers_was_writen = False
-    files_by_category = {}  # type:Dict
     ioc_counter = 0
-    try:
-        for ioc_res in indicator_searcher:
-            fetched_iocs = ioc_res.get('iocs') or []
-            for ioc in fetched_iocs:
-                ioc_counter += 1
-                if request_args.out_format == FORMAT_PROXYSG:
-                    files_by_category = create_proxysg_out_format(ioc, files_by_category, request_args)
-
-                elif request_args.out_format == FORMAT_MWG:
-                    f.write(create_mwg_out_format(ioc, request_args, headers_was_writen))
-                    headers_was_writen = True
-
-                elif request_args.out_format == FORMAT_JSON:
-                    f.write(create_json_out_format(list_fields, ioc, request_args, headers_was_writen))
-                    headers_was_writen = True
-
-                elif request_args.out_format == FORMAT_TEXT:
-                    # save only the value and type of each indicator
-                    f.write(str(json.dumps({"value": ioc.get("value"),
-                                            "indicator_type": ioc.get("indicator_type")})) + "\n")
-
-                elif request_args.out_format == FORMAT_CSV:
-                    f.write(create_csv_out_format(headers_was_writen, list_fields, ioc, request_args))
-                    headers_was_writen = True
-                if ioc_counter >= indicator_searcher.limit:
-                    break
-
-    except Exception as e:
-        demisto.error(f'Error parsing the following indicator: {ioc.get("value")}\n{e}')
-
-    if request_args.out_format == FORMAT_JSON:
-        f.write(']')
-    elif request_args.out_format == FORMAT_PROXYSG:
-        f = create_proxysg_all_category_out_format(f, files_by_category)
-    return f
+    for ioc_res in indicator_searcher:
+        fetched_iocs = ioc_res.get('iocs') or []
+        for ioc in fetched_iocs:
+            ioc_counter += 1
+            yield ioc
+            if ioc_counter >= indicator_searcher.limit:
+                return
 
 
 def create_json_out_format(list_fields: List, indicator: Dict, request_args: RequestArguments, not_first_call=True) -> str:
@@ -398,27 +384,24 @@ def create_mwg_out_format(indicator: dict, request_args: RequestArguments, heade
     return '\n' + value + " " + sources_string
 
 
-def create_proxysg_all_category_out_format(indicators_file: IO, files_by_category: dict):
-    """write all indicators to file in proxysg format.
+def iter_proxysg_all_category_out_format(files_by_category: dict) -> Iterator[str]:
+    """yields all indicators in proxysg format, category by category.
 
     Args:
-        indicators_file (IO): the fields to return.
         files_by_category (dict): all indicators by category
 
     Returns:
-        a file in proxysg format.
+        chunks of the indicators in proxysg format.
     """
     # the first time "define category" will be writen without a new line
     new_line = ''
     for category, category_file in files_by_category.items():
-        indicators_file.write(f"{new_line}define category {category}\n")
+        yield f"{new_line}define category {category}\n"
         new_line = '\n'
         category_file.seek(0)
-        indicators_file.write(category_file.read())
+        yield from iter_file_chunks(category_file)
         category_file.close()
-        indicators_file.write("end")
-
-    return indicators_file
+        yield "end"
 
 
 def create_proxysg_out_format(indicator: dict, files_by_category: dict, request_args: RequestArguments) -> dict:
@@ -567,6 +550,126 @@ def ips_to_ranges(ips: Iterable, collapse_ips: str):
     return collapsed_list
 
 
+def parse_ip_or_cidr(ip_or_cidr: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Parses an IP or a CIDR to its IP version, the first and last addresses it covers and its address, as integers.
+
+    Args:
+        ip_or_cidr (str): an IP or a CIDR string.
+
+    Returns:
+        Tuple. the IP version, the first address, the last address and the address (which differs from the first
+        address for CIDRs with host bits, e.g. 1.1.1.1/24), or None if the value is not a valid IP or CIDR.
+    """
+    if ipv4_match := _CANONICAL_IPV4.fullmatch(ip_or_cidr):
+        # fast path for the common case of a plain IPv4 address
+        first, second, third, fourth = ipv4_match.groups()
+        address = int(first) << 24 | int(second) << 16 | int(third) << 8 | int(fourth)
+        return 4, address, address, address
+    try:
+        if '/' in ip_or_cidr:
+            interface = ipaddress.ip_interface(ip_or_cidr)
+            network = interface.network
+            return network.version, int(network.network_address), int(network.broadcast_address), int(interface)
+        ip = ipaddress.ip_address(ip_or_cidr)
+        return ip.version, int(ip), int(ip), int(ip)
+    except ValueError:
+        return None
+
+
+def merge_ip_intervals(packed_intervals: Iterable[int], bits: int) -> Iterator[Tuple[int, int, int]]:
+    """Merges overlapping and adjacent address intervals.
+
+    Args:
+        packed_intervals (Iterable): intervals packed to a single integer each - the first address in the high bits
+            and the last address in the low bits, so sorting the packed integers sorts the intervals.
+        bits (int): the number of bits in an address of the IP version.
+
+    Returns:
+        Iterator. the sorted, disjoint and non adjacent (first address, last address, merged intervals count) intervals.
+    """
+    mask = (1 << bits) - 1
+    current_start = current_end = -2
+    count = 0
+    for packed in sorted(packed_intervals):
+        start, end = packed >> bits, packed & mask
+        if start <= current_end + 1:
+            current_end = max(current_end, end)
+            count += 1
+            continue
+        if count:
+            yield current_start, current_end, count
+        current_start, current_end, count = start, end, 1
+    if count:
+        yield current_start, current_end, count
+
+
+def ip_interval_to_cidrs(start: int, end: int, bits: int) -> Iterator[Tuple[int, int]]:
+    """Splits an address interval to the minimal list of CIDRs covering it.
+
+    Args:
+        start (int): the first address in the interval.
+        end (int): the last address in the interval.
+        bits (int): the number of bits in an address of the IP version.
+
+    Returns:
+        Iterator. the (network address, prefix length) of the CIDRs.
+    """
+    while start <= end:
+        # the largest block which starts at the current address and does not exceed the interval
+        host_bits = min((start & -start).bit_length() - 1 if start else bits, (end - start + 1).bit_length() - 1)
+        yield start, bits - host_bits
+        start += 1 << host_bits
+
+
+def collapse_ips_to_ranges(ips: Iterable, collapse_ips: str):
+    """Collapse IPs to Ranges or CIDRs, returns the same result as ips_to_ranges.
+    Instead of building a netaddr object per IP, the IPs are parsed to integer intervals which are packed to arrays,
+    sorted and merged in bulk, so only the collapsed Ranges or CIDRs are formatted back to strings.
+
+    Args:
+        ips (Iterable): a group of IP strings.
+        collapse_ips (str): Whether to collapse to Ranges or CIDRs.
+
+    Returns:
+        Set. a list to Ranges or CIDRs.
+    """
+    collapsed_list = set()
+    # IPv4 intervals fit in 64 bits, IPv6 intervals need arbitrary precision integers
+    packed_intervals: Dict[int, Any] = {4: array('Q'), 6: []}
+    # same as netaddr, a CIDR with host bits which is not merged with other IPs keeps its address
+    host_addresses: Dict[Tuple[int, int, int], int] = {}
+    for ip_or_cidr in ips:
+        parsed = parse_ip_or_cidr(ip_or_cidr)
+        if parsed is None:
+            collapsed_list.add(ip_or_cidr)
+            continue
+        version, start, end, address = parsed
+        packed_intervals[version].append(start << (32 if version == 4 else 128) | end)
+        if address != start:
+            host_addresses[(version, start, end)] = address
+
+    for version, bits in ((4, 32), (6, 128)):
+        for start, end, count in merge_ip_intervals(packed_intervals[version], bits):
+            if collapse_ips == COLLAPSE_TO_RANGES:
+                if start == end:
+                    collapsed_list.add(str(IPAddress(start, version)))
+                else:
+                    collapsed_list.add(f'{IPAddress(start, version)}-{IPAddress(end, version)}')
+            elif count == 1 and (version, start, end) in host_addresses:
+                collapsed_list.add(f'{IPAddress(host_addresses[(version, start, end)], version)}/'
+                                   f'{bits - (end - start).bit_length()}')
+            else:
+                for network, prefix_len in ip_interval_to_cidrs(start, end, bits):
+                    if prefix_len == bits:
+                        # CIDR with a single IP appears with "/32" suffix so handle them differently
+                        collapsed_list.add(str(IPAddress(network, version)))
+                    else:
+                        collapsed_list.add(f'{IPAddress(network, version)}/{prefix_len}')
+
+    return collapsed_list
+
+
 def is_valid_ip(ip: str) -> bool:
     """
     Args:
@@ -624,87 +727,6 @@ def list_to_str(inp_list: list, delimiter: str = ',', map_func: Callable = str)
     return str_res
 
 
-def create_text_out_format(iocs: IO, request_args: RequestArguments) -> Union[IO, IO[str]]:
-    """
-    Create a list in new file of formatted_indicators
-     * IP / CIDR:
-         1) if collapse_ips, collapse IPs/CIDRs
-     * URL:
-        1) if drop_invalids, drop invalids (length > 254 or has invalid chars)
-        2) if port_stripping, strip ports
-        3) if protocol_stripping, strip protocols
-        4) if url_truncate, truncate urls
-    * Other indicator types:
-        1) if drop_invalids, drop invalids (has invalid chars)
-        2) if port_stripping, strip ports
-    """
-    ipv4_formatted_indicators = set()
-    ipv6_formatted_indicators = set()
-    iocs.seek(0)
-    formatted_indicators = tempfile.TemporaryFile(mode='w+t')
-    new_line = ''  # For the first time he will not add a new line
-    for str_ioc in iocs:
-        ioc = json.loads(str_ioc.rstrip())
-        indicator = ioc.get('value')
-        if not indicator:
-            continue
-        ioc_type = ioc.get('indicator_type')
-
-        if ioc_type not in [FeedIndicatorType.IP, FeedIndicatorType.IPv6,
-                            FeedIndicatorType.CIDR, FeedIndicatorType.IPv6CIDR]:
-
-            indicator = url_handler(indicator, request_args.url_protocol_stripping,
-                                    request_args.url_port_stripping, request_args.url_truncate)
-
-            if request_args.drop_invalids:
-                if indicator != _PORT_REMOVAL.sub(_URL_WITHOUT_PORT, indicator) or\
-                        indicator != _INVALID_TOKEN_REMOVAL.sub('*', indicator):
-                    # check if the indicator held invalid tokens or port
-                    continue
-
-                if ioc_type == FeedIndicatorType.URL and len(indicator) >= PAN_OS_MAX_URL_LEN:
-                    # URL indicator exceeds allowed length - ignore the indicator
-                    continue
-
-            # for PAN-OS *.domain.com does not match domain.com
-            # we should provide both
-            # this could generate more than num entries according to PAGE_SIZE
-            if indicator.startswith('*.'):
-                domain = str(indicator.lstrip('*.'))
-                # if we should ignore TLDs and the domain is a TLD
-                if request_args.no_wildcard_tld and tldextract.extract(domain).suffix == domain:
-                    continue
-                formatted_indicators.write(new_line + domain)
-                new_line = '\n'
-
-        if ioc_type == FeedIndicatorType.CIDR and is_large_cidr(indicator, request_args.maximum_cidr_size):
-            continue
-
-        if request_args.collapse_ips != DONT_COLLAPSE and ioc_type in (FeedIndicatorType.IP, FeedIndicatorType.CIDR):
-            ipv4_formatted_indicators.add(indicator)
-
-        elif request_args.collapse_ips != DONT_COLLAPSE and ioc_type == FeedIndicatorType.IPv6:
-            ipv6_formatted_indicators.add(indicator)
-
-        else:
-            formatted_indicators.write(new_line + str(indicator))
-            new_line = '\n'
-    iocs.close()
-    if len(ipv4_formatted_indicators) > 0:
-        ipv4_formatted_indicators = ips_to_ranges(ipv4_formatted_indicators, request_args.collapse_ips)
-        for ip in ipv4_formatted_indicators:
-            formatted_indicators.write(new_line + str(ip))
-            new_line = '\n'
-
-    if len(ipv6_formatted_indicators) > 0:
-        ipv6_formatted_indicators = ips_to_ranges(ipv6_formatted_indicators, request_args.collapse_ips)
-        for ip in ipv6_formatted_indicators:
-            formatted_indicators.write(new_line + str(ip))
-            new_line = '\n'
-
-    return formatted_indicators
-
-
 def url_handler(indicator: str, url_protocol_stripping: bool, url_port_stripping: bool, url_truncate: bool) -> str:
     """
      * URL:
@@ -727,6 +749,194 @@ def url_handler(indicator: str, url_protocol_stripping: bool, url_port_stripping
     return indicator
 
 
+''' OUTBOUND FORMAT WRITERS '''
+
+
+class OutFormatWriter:
+    """
+    Formats indicators to an outbound format, chunk by chunk. The writer of a request is resolved once by
+    get_out_format_writer, so the format is not dispatched again for each indicator.
+    """
+
+    def __init__(self, request_args: RequestArguments):
+        self.request_args = request_args
+        self.list_fields = replace_field_name_to_output_format(request_args.fields_to_present)
+
+    def format(self, iocs: Iterable[dict]) -> Iterator[str]:
+        """
+        Yields the indicators written in the outbound format as they arrive, e.g. as each page of indicators arrives
+        from the server.
+        Parameters:
+            iocs (Iterable): The indicators to format
+        Returns:
+            (Iterator): chunks of the indicators written in the outbound format
+        """
+        is_first = True
+        ioc = {}  # type:Dict
+        try:
+            for ioc in iocs:
+                formatted_indicator = self.format_indicator(ioc, is_first)
+                is_first = False
+                if formatted_indicator:
+                    yield formatted_indicator
+        except Exception as e:
+            demisto.error(f'Error parsing the following indicator: {ioc.get("value")}\n{e}')
+        yield from self.finalize()
+
+    def format_indicator(self, ioc: dict, is_first: bool) -> str:
+        """
+        Returns the indicator written in the outbound format, including the separator from the previous indicator
+        """
+        return ''
+
+    def finalize(self) -> Iterator[str]:
+        """
+        Yields what is left to write after all the indicators were formatted
+        """
+        yield from ()
+
+
+class CSVWriter(OutFormatWriter):
+    def format_indicator(self, ioc: dict, is_first: bool) -> str:
+        return create_csv_out_format(not is_first, self.list_fields, ioc, self.request_args)
+
+
+class JSONWriter(OutFormatWriter):
+    def format_indicator(self, ioc: dict, is_first: bool) -> str:
+        return create_json_out_format(self.list_fields, ioc, self.request_args, not is_first)
+
+    def finalize(self) -> Iterator[str]:
+        yield ']'
+
+
+class MWGWriter(OutFormatWriter):
+    def format_indicator(self, ioc: dict, is_first: bool) -> str:
+        return create_mwg_out_format(ioc, self.request_args, not is_first)
+
+
+class ProxySGWriter(OutFormatWriter):
+    """
+    The ProxySG format groups the indicators by category, so they are kept in a temporary file per category
+    until all the indicators were formatted.
+    """
+
+    def __init__(self, request_args: RequestArguments):
+        super().__init__(request_args)
+        self.files_by_category = {}  # type:Dict
+
+    def format_indicator(self, ioc: dict, is_first: bool) -> str:
+        self.files_by_category = create_proxysg_out_format(ioc, self.files_by_category, self.request_args)
+        return ''
+
+    def finalize(self) -> Iterator[str]:
+        yield from iter_proxysg_all_category_out_format(self.files_by_category)
+
+
+class TextWriter(OutFormatWriter):
+    """
+    The text format writes a value per line. As formatting an indicator may add or drop lines, the list is truncated
+    to the requested limit by lines.
+    """
+
+    def format(self, iocs: Iterable[dict]) -> Iterator[str]:
+        limit = self.request_args.offset + self.request_args.limit
+        new_line = ''  # For the first time he will not add a new line
+        for count, indicator in enumerate(self.iter_values(iocs)):
+            if count + 1 > limit:
+                # a truncated list ends with a new line
+                yield '\n'
+                break
+            yield new_line + indicator
+            new_line = '\n'
+
+    def iter_values(self, iocs: Iterable[dict]) -> Iterator[str]:
+        """
+        Yields the formatted_indicators one by one
+         * IP / CIDR:
+             1) if collapse_ips, collapse IPs/CIDRs
+         * URL:
+            1) if drop_invalids, drop invalids (length > 254 or has invalid chars)
+            2) if port_stripping, strip ports
+            3) if protocol_stripping, strip protocols
+            4) if url_truncate, truncate urls
+        * Other indicator types:
+            1) if drop_invalids, drop invalids (has invalid chars)
+            2) if port_stripping, strip ports
+
+        Collapsed IPs are yielded only after all other indicators, as all the IPs are needed to collapse them.
+        """
+        request_args = self.request_args
+        ipv4_formatted_indicators = set()
+        ipv6_formatted_indicators = set()
+        for ioc in iocs:
+            indicator = ioc.get('value')
+            if not indicator:
+                continue
+            ioc_type = ioc.get('indicator_type')
+
+            if ioc_type not in [FeedIndicatorType.IP, FeedIndicatorType.IPv6,
+                                FeedIndicatorType.CIDR, FeedIndicatorType.IPv6CIDR]:
+
+                indicator = url_handler(indicator, request_args.url_protocol_stripping,
+                                        request_args.url_port_stripping, request_args.url_truncate)
+
+                if request_args.drop_invalids:
+                    if indicator != _PORT_REMOVAL.sub(_URL_WITHOUT_PORT, indicator) or\
+                            indicator != _INVALID_TOKEN_REMOVAL.sub('*', indicator):
+                        # check if the indicator held invalid tokens or port
+                        continue
+
+                    if ioc_type == FeedIndicatorType.URL and len(indicator) >= PAN_OS_MAX_URL_LEN:
+                        # URL indicator exceeds allowed length - ignore the indicator
+                        continue
+
+                # for PAN-OS *.domain.com does not match domain.com
+                # we should provide both
+                # this could generate more than num entries according to PAGE_SIZE
+                if indicator.startswith('*.'):
+                    domain = str(indicator.lstrip('*.'))
+                    # if we should ignore TLDs and the domain is a TLD
+                    if request_args.no_wildcard_tld and tldextract.extract(domain).suffix == domain:
+                        continue
+                    yield domain
+
+            if ioc_type == FeedIndicatorType.CIDR and is_large_cidr(indicator, request_args.maximum_cidr_size):
+                continue
+
+            if request_args.collapse_ips != DONT_COLLAPSE and ioc_type in (FeedIndicatorType.IP, FeedIndicatorType.CIDR):
+                ipv4_formatted_indicators.add(indicator)
+
+            elif request_args.collapse_ips != DONT_COLLAPSE and ioc_type == FeedIndicatorType.IPv6:
+                ipv6_formatted_indicators.add(indicator)
+
+            else:
+                yield str(indicator)
+
+        if len(ipv4_formatted_indicators) > 0:
+            ipv4_formatted_indicators = collapse_ips_to_ranges(ipv4_formatted_indicators, request_args.collapse_ips)
+            for ip in ipv4_formatted_indicators:
+                yield str(ip)
+
+        if len(ipv6_formatted_indicators) > 0:
+            ipv6_formatted_indicators = collapse_ips_to_ranges(ipv6_formatted_indicators, request_args.collapse_ips)
+            for ip in ipv6_formatted_indicators:
+                yield str(ip)
+
+
+OUT_FORMAT_WRITERS: Dict[str, Callable[[RequestArguments], OutFormatWriter]] = {
+    FORMAT_TEXT: TextWriter,
+    FORMAT_CSV: CSVWriter,
+    FORMAT_JSON: JSONWriter,
+    FORMAT_MWG: MWGWriter,
+    FORMAT_PROXYSG: ProxySGWriter,
+}
+
+
+def get_out_format_writer(request_args: RequestArguments) -> OutFormatWriter:
+    """Returns the writer of the requested outbound format"""
+    return OUT_FORMAT_WRITERS.get(request_args.out_format, OutFormatWriter)(request_args)
+
+
 def get_outbound_mimetype(request_args: RequestArguments) -> str:
     """Returns the mimetype of the export_iocs"""
     if request_args.out_format == FORMAT_JSON:
@@ -739,23 +949,141 @@ def get_outbound_mimetype(request_args: RequestArguments) -> str:
         return MIMETYPE_TEXT
 
 
-def get_edl_on_demand():
+def get_edl_on_demand(incremental: bool = False):
+    """
+    Use the local file system to store the on-demand result, see refresh_edl_on_demand_cache.
+    """
+    refresh_edl_on_demand_cache(incremental)
+    with open(EDL_ON_DEMAND_CACHE_PATH, 'r') as file:
+        edl = file.read()
+    return edl
+
+
+def write_file_atomically(path: str, chunks: Iterable[str]):
+    """
+    Writes the chunks to a temporary file which then replaces the file in the given path, so readers of the
+    file never see a partially written file.
+    """
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as file:
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def search_modified_indicators(query: str, filter_fields: str, from_date: str, to_date: str) -> Iterator[dict]:
+    """
+    Searches the indicators matching the query which were modified in the given time range
+    """
+    modified_query = f'modified:>={from_date} and modified:<{to_date}'
+    indicator_searcher = IndicatorsSearcher(
+        filter_fields=filter_fields,
+        query=f'{modified_query} and ({query})' if query else modified_query,
+        size=PAGE_SIZE,
+    )
+    for ioc_res in indicator_searcher:
+        yield from ioc_res.get('iocs') or []
+
+
+def load_edl_on_demand_state(request_args: RequestArguments) -> Tuple[dict, Dict[str, dict]]:
+    """
+    Loads the state of the last on-demand build - its metadata and its indicators by value.
+    The state is only reusable if it was built with the same request arguments and its last full build is recent
+    enough, otherwise an empty state is returned.
+    """
+    state_path = EDL_ON_DEMAND_CACHE_PATH + EDL_ON_DEMAND_STATE_SUFFIX
+    if not os.path.exists(state_path):
+        return {}, {}
+    with open(state_path, 'r') as file:
+        metadata = json.loads(file.readline() or '{}')
+        last_full_build = dateparser.parse(metadata.get('full_build') or '')
+        if metadata.get('request_args') != request_args.to_context_json() or not last_full_build or \
+                datetime.now(timezone.utc) - last_full_build > EDL_FULL_REBUILD_INTERVAL:
+            return {}, {}
+        iocs = {}
+        for line in file:
+            ioc = json.loads(line)
+            iocs[ioc.get('value')] = ioc
+    return metadata, iocs
+
+
+def save_edl_on_demand_state(metadata: dict, iocs: Dict[str, dict]):
+    """
+    Saves the state of the on-demand build - a metadata line followed by an indicator per line
+    """
+    write_file_atomically(
+        EDL_ON_DEMAND_CACHE_PATH + EDL_ON_DEMAND_STATE_SUFFIX,
+        itertools.chain([json.dumps(metadata) + '\n'], (json.dumps(ioc) + '\n' for ioc in iocs.values()))
+    )
+
+
+def update_edl_on_demand_state(request_args: RequestArguments) -> Dict[str, dict]:
+    """
+    Brings the indicators of the last on-demand build up to date, by applying only the indicators which were modified
+    since the last build (the "modified" watermark) to it:
+     * modified indicators which match the query are added or updated.
+     * modified indicators which no longer match the query (e.g. expired indicators) are removed.
+    Deleted indicators can not be searched for, they are removed by a full rebuild which is done when there is no
+    reusable state, see load_edl_on_demand_state.
+
+    Parameters:
+        request_args: Request arguments
+
+    Returns: The up to date indicators by value
+    """
+    now = datetime.now(timezone.utc)
+    to_date = now.strftime(EDL_MODIFIED_TIME_FORMAT)
+    metadata, iocs = load_edl_on_demand_state(request_args)
+    limit = get_search_limit(request_args)
+    if not metadata:
+        demisto.debug('Building the on-demand EDL state from scratch')
+        indicator_searcher = IndicatorsSearcher(
+            filter_fields=request_args.fields_to_present,
+            query=request_args.query,
+            size=PAGE_SIZE,
+            limit=limit
+        )
+        iocs = {ioc.get('value'): ioc for ioc in iter_indicators(indicator_searcher)}
+        metadata = {'request_args': request_args.to_context_json(), 'full_build': now.isoformat()}
+    else:
+        from_date = metadata.get('modified')
+        matching_values = set()
+        for ioc in search_modified_indicators(request_args.query, request_args.fields_to_present, from_date, to_date):
+            value = ioc.get('value')
+            matching_values.add(value)
+            if value in iocs or len(iocs) < limit:
+                iocs[value] = ioc
+        removed = 0
+        for ioc in search_modified_indicators('', 'name', from_date, to_date):
+            value = ioc.get('value')
+            if value not in matching_values and iocs.pop(value, None) is not None:
+                removed += 1
+        demisto.debug(f'Updated the on-demand EDL state with indicators modified since {from_date}: '
+                      f'{len(matching_values)} added or updated, {removed} removed')
+    metadata['modified'] = to_date
+    save_edl_on_demand_state(metadata, iocs)
+    return iocs
+
+
+def refresh_edl_on_demand_cache(incremental: bool = False):
     """
-    Use the local file system to store the on-demand result, using a lock to
-    limit access to the file from multiple threads.
+    Rebuilds the on-demand cache file chunk by chunk when a refresh was requested by update_edl_command.
+    The list is written to a temporary file which then replaces the cache file, so lists which are currently
+    streamed from the cache file are not affected.
+
+    Parameters:
+        incremental: Whether to update the indicators of the last build instead of searching all of them again
     """
     ctx = get_integration_context()
     if EDL_ON_DEMAND_KEY in ctx:
         ctx.pop(EDL_ON_DEMAND_KEY, None)
         request_args = RequestArguments.from_context_json(ctx)
-        edl = create_new_edl(request_args)
-        with open(EDL_ON_DEMAND_CACHE_PATH, 'w') as file:
-            file.write(edl)
+        if incremental:
+            edl_chunks = get_out_format_writer(request_args).format(update_edl_on_demand_state(request_args).values())
+        else:
+            edl_chunks = create_edl_stream(request_args)
+        write_file_atomically(EDL_ON_DEMAND_CACHE_PATH, edl_chunks)
         set_integration_context(ctx)
-    else:
-        with open(EDL_ON_DEMAND_CACHE_PATH, 'r') as file:
-            edl = file.read()
-    return edl
 
 
 def validate_basic_authentication(headers: dict, username: str, password: str) -> bool:
@@ -785,6 +1113,124 @@ def get_bool_arg_or_param(args: dict, params: dict, key: str):
     return val.lower() == 'true' if isinstance(val, str) else params.get(key, False)
 
 
+class EDLStreamStats:
+    """Computes the ETag and size of a list incrementally, chunk by chunk, as it is streamed"""
+
+    def __init__(self):
+        self._sha1 = hashlib.sha1()  # nosec
+        self._new_lines = 0
+        self._has_content = False
+
+    def update(self, chunk: str):
+        self._sha1.update(chunk.encode())
+        self._new_lines += chunk.count('\n')
+        self._has_content = self._has_content or bool(chunk.strip())
+
+    @property
+    def etag(self) -> str:
+        return f'"{self._sha1.hexdigest()}"'
+
+    @property
+    def size(self) -> int:
+        # add 1 as last line doesn't have a \n
+        return self._new_lines + 1 if self._has_content else 0
+
+
+def iter_edl_on_demand_cache(file: IO) -> Iterator[str]:
+    """
+    Streams the opened on-demand cache file in chunks, and closes it once it was streamed
+    """
+    with file:
+        yield from iter_file_chunks(file)
+
+
+def get_prepend_and_append_strings(request_args: RequestArguments, params: dict) -> Tuple[str, str]:
+    """
+    Returns the strings to add to the beginning and to the end of the EDL, these are only added to text lists.
+    """
+    if request_args.out_format != FORMAT_TEXT:
+        return '', ''
+    prepend_str = (params.get("prepend_string") or '').replace("\\n", "\n")
+    append_str = (params.get("append_string") or '').replace("\\n", "\n")
+    return prepend_str, append_str
+
+
+def stream_edl_response_body(edl_chunks: Iterable[str], request_args: RequestArguments, params: dict,
+                             stats: EDLStreamStats, created: datetime) -> Iterator[str]:
+    """
+    Yields the body of a streamed EDL response. Same as route_edl, an empty list is replaced with a comment and
+    the prepend/append strings are added to text lists.
+
+    Parameters:
+        edl_chunks: Chunks of the formatted indicators
+        request_args: Request arguments
+        params: Integration configuration parameters
+        stats: The stats of the list, updated as the chunks go by
+        created: The time the request was received
+
+    Returns: Chunks of the response body
+    """
+    edl_chunks = iter(edl_chunks)
+    # read ahead until it is known whether the list is empty (a JSON list is empty if it is only the closing bracket)
+    head = ''
+    for chunk in edl_chunks:
+        stats.update(chunk)
+        head += chunk
+        if head and head != ']':
+            break
+
+    if (not head or head == ']') and request_args.add_comment_if_empty:
+        yield '# Empty List'
+    else:
+        prepend_str, append_str = get_prepend_and_append_strings(request_args, params)
+        if prepend_str:
+            yield f'{prepend_str}\n'
+        yield head
+        for chunk in edl_chunks:
+            stats.update(chunk)
+            yield chunk
+        if append_str:
+            yield append_str
+    query_time = (datetime.now(timezone.utc) - created).total_seconds()
+    demisto.debug(f'Finished streaming edl of size: [{stats.size}], created: [{created}], '
+                  f'query time seconds: [{query_time}], etag: [{stats.etag}]')
+
+
+def create_edl_stream_response(request_args: RequestArguments, params: dict, created: datetime) -> Response:
+    """
+    Creates a response which streams the EDL while it is being formatted, instead of building it in memory first.
+    When the list is served from the on-demand cache its ETag and size are computed from the cache file in advance,
+    otherwise they are only known once the list was streamed, so they are logged instead of sent as headers.
+
+    Parameters:
+        request_args: Request arguments
+        params: Integration configuration parameters
+        created: The time the request was received
+
+    Returns: A streamed response
+    """
+    headers = [('X-EDL-Created', created.isoformat())]
+    if params.get('on_demand'):
+        refresh_edl_on_demand_cache(argToBoolean(params.get('on_demand_incremental') or False))
+        # the cache is replaced atomically when refreshed, so the opened file keeps the list the stats were computed of
+        cache_file = open(EDL_ON_DEMAND_CACHE_PATH, 'r')
+        try:
+            cache_stats = EDLStreamStats()
+            for chunk in iter_file_chunks(cache_file):
+                cache_stats.update(chunk)
+            cache_file.seek(0)
+        except Exception:
+            cache_file.close()
+            raise
+        headers += [('X-EDL-Size', str(cache_stats.size)), ('ETag', cache_stats.etag)]
+        edl_chunks = iter_edl_on_demand_cache(cache_file)
+    else:
+        edl_chunks = create_edl_stream(request_args)
+    body = stream_edl_response_body(edl_chunks, request_args, params, EDLStreamStats(), created)
+    return Response(stream_with_context(body), status=200, mimetype=get_outbound_mimetype(request_args),
+                    headers=headers)
+
+
 ''' ROUTE FUNCTIONS '''
 
 
@@ -811,34 +1257,38 @@ def route_edl() -> Response:
     request_args = get_request_args(request.args, params)
     on_demand = params.get('on_demand')
     created = datetime.now(timezone.utc)
-    edl = get_edl_on_demand() if on_demand else create_new_edl(request_args)
-    etag = f'"{hashlib.sha1(edl.encode()).hexdigest()}"'    # nosec
-    query_time = (datetime.now(timezone.utc) - created).total_seconds()
-    edl_size = 0
-    if edl.strip():
-        edl_size = edl.count('\n') + 1  # add 1 as last line doesn't have a \n
-    if len(edl) == 0 and request_args.add_comment_if_empty or edl == ']' and request_args.add_comment_if_empty:
-        edl = '# Empty List'
-    # if the case there are strings to add to the EDL, add them if the output type is text
-    elif request_args.out_format == FORMAT_TEXT:
-        append_str = params.get("append_string")
-        prepend_str = params.get("prepend_string")
-        if append_str:
-            append_str = append_str.replace("\\n", "\n")
-            edl = f"{edl}{append_str}"
-        if prepend_str:
-            prepend_str = prepend_str.replace("\\n", "\n")
-            edl = f"{prepend_str}\n{edl}"
-    mimetype = get_outbound_mimetype(request_args)
     max_age = ceil((datetime.now() - dateparser.parse(cache_refresh_rate)).total_seconds())  # type: ignore[operator]
-    demisto.debug(f'Returning edl of size: [{edl_size}], created: [{created}], query time seconds: [{query_time}],'
-                  f' max age: [{max_age}], etag: [{etag}]')
-    resp = Response(edl, status=200, mimetype=mimetype, headers=[
-        ('X-EDL-Created', created.isoformat()),
-        ('X-EDL-Query-Time-Secs', "{:.3f}".format(query_time)),
-        ('X-EDL-Size', str(edl_size)),
-        ('ETag', etag),
-    ])
+    if argToBoolean(params.get('stream_response') or False):
+        demisto.debug(f'Streaming edl, created: [{created}], max age: [{max_age}]')
+        resp = create_edl_stream_response(request_args, params, created)
+    else:
+        if on_demand:
+            edl = get_edl_on_demand(argToBoolean(params.get('on_demand_incremental') or False))
+        else:
+            edl = create_new_edl(request_args)
+        etag = f'"{hashlib.sha1(edl.encode()).hexdigest()}"'    # nosec
+        query_time = (datetime.now(timezone.utc) - created).total_seconds()
+        edl_size = 0
+        if edl.strip():
+            edl_size = edl.count('\n') + 1  # add 1 as last line doesn't have a \n
+        if len(edl) == 0 and request_args.add_comment_if_empty or edl == ']' and request_args.add_comment_if_empty:
+            edl = '# Empty List'
+        # if the case there are strings to add to the EDL, add them if the output type is text
+        else:
+            prepend_str, append_str = get_prepend_and_append_strings(request_args, params)
+            if append_str:
+                edl = f"{edl}{append_str}"
+            if prepend_str:
+                edl = f"{prepend_str}\n{edl}"
+        mimetype = get_outbound_mimetype(request_args)
+        demisto.debug(f'Returning edl of size: [{edl_size}], created: [{created}], query time seconds: [{query_time}],'
+                      f' max age: [{max_age}], etag: [{etag}]')
+        resp = Response(edl, status=200, mimetype=mimetype, headers=[
+            ('X-EDL-Created', created.isoformat()),
+            ('X-EDL-Query-Time-Secs', "{:.3f}".format(query_time)),
+            ('X-EDL-Size', str(edl_size)),
+            ('ETag', etag),
+        ])
     resp.cache_control.max_age = max_age
     resp.cache_control[
         'stale-if-error'] = '600'  # number of seconds we are willing to serve stale content when there is an error
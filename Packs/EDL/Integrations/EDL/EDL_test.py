@@ -1,13 +1,11 @@
 """Imports"""
-import io
 import json
-import tempfile
 
 import pytest
 import os
 from tempfile import mkdtemp
 import demistomock as demisto
-from EDL import DONT_COLLAPSE, initialize_edl_context, get_indicators_to_format
+from EDL import DONT_COLLAPSE, initialize_edl_context, get_out_format_writer
 
 IOC_RES_LEN = 38
 
@@ -120,12 +118,87 @@ class TestHelperFunctions:
         tmp_dir = mkdtemp()
         edl.EDL_ON_DEMAND_CACHE_PATH = os.path.join(tmp_dir, 'cache')
         mocker.patch.object(edl, 'get_integration_context', return_value=ctx)
-        mocker.patch.object(edl, 'create_new_edl', return_value=expected_edl)
+        mocker.patch.object(edl, 'create_edl_stream', return_value=iter([expected_edl]))
         actual_edl = edl.get_edl_on_demand()
         with open(edl.EDL_ON_DEMAND_CACHE_PATH, 'r') as f:
             cached_edl = f.read()
             assert actual_edl == expected_edl == cached_edl
 
+    def test_get_edl_on_demand__incremental(self, mocker):
+        """
+        Test get_edl_on_demand only applies the indicators modified since the last build when incremental
+        Given:
+            - refresh signal in context
+            - a state of a previous build with the same request arguments
+            - an indicator which was modified and still matches the query, and one which no longer matches it
+        When:
+            - calling get_edl_on_demand with incremental
+        Then:
+            - the new and updated indicators are added to the list and the no longer matching indicator is removed
+            - only modified indicators are searched, since the watermark of the previous build
+            - the state is saved with a new watermark
+        """
+        import EDL as edl
+        from datetime import datetime, timezone
+        tmp_dir = mkdtemp()
+        edl.EDL_ON_DEMAND_CACHE_PATH = os.path.join(tmp_dir, 'cache')
+        request_args = edl.RequestArguments(query='type:IP', limit=10)
+        ctx = request_args.to_context_json()
+        ctx[edl.EDL_ON_DEMAND_KEY] = True
+        metadata = {'request_args': request_args.to_context_json(), 'modified': '2022-01-01T00:00:00Z',
+                    'full_build': datetime.now(timezone.utc).isoformat()}
+        edl.save_edl_on_demand_state(metadata, {'1.1.1.1': {'value': '1.1.1.1', 'indicator_type': 'IP'},
+                                                '2.2.2.2': {'value': '2.2.2.2', 'indicator_type': 'IP'}})
+        mocker.patch.object(edl, 'get_integration_context', return_value=ctx)
+        mocker.patch.object(edl, 'set_integration_context')
+        search_modified_indicators = mocker.patch.object(edl, 'search_modified_indicators', side_effect=[
+            [{'value': '3.3.3.3', 'indicator_type': 'IP'}],
+            [{'value': '2.2.2.2'}, {'value': '3.3.3.3'}],
+        ])
+        full_search = mocker.patch.object(edl, 'IndicatorsSearcher')
+
+        actual_edl = edl.get_edl_on_demand(incremental=True)
+
+        assert actual_edl == '1.1.1.1\n3.3.3.3'
+        assert not full_search.called
+        assert search_modified_indicators.call_args_list[0][0][0] == 'type:IP'
+        assert search_modified_indicators.call_args_list[0][0][2] == '2022-01-01T00:00:00Z'
+        new_metadata, iocs = edl.load_edl_on_demand_state(request_args)
+        assert new_metadata['modified'] == search_modified_indicators.call_args_list[0][0][3]
+        assert list(iocs) == ['1.1.1.1', '3.3.3.3']
+
+    def test_get_edl_on_demand__incremental_full_build(self, mocker):
+        """
+        Test get_edl_on_demand builds the list from scratch when the request arguments changed since the last build
+        Given:
+            - refresh signal in context
+            - a state of a previous build with different request arguments
+        When:
+            - calling get_edl_on_demand with incremental
+        Then:
+            - all the indicators are searched and the state is replaced
+        """
+        import EDL as edl
+        tmp_dir = mkdtemp()
+        edl.EDL_ON_DEMAND_CACHE_PATH = os.path.join(tmp_dir, 'cache')
+        request_args = edl.RequestArguments(query='type:IP', limit=10)
+        ctx = request_args.to_context_json()
+        ctx[edl.EDL_ON_DEMAND_KEY] = True
+        edl.save_edl_on_demand_state({'request_args': edl.RequestArguments(query='*').to_context_json(),
+                                      'modified': '2022-01-01T00:00:00Z', 'full_build': '2022-01-01T00:00:00Z'},
+                                     {'1.1.1.1': {'value': '1.1.1.1', 'indicator_type': 'IP'}})
+        mocker.patch.object(edl, 'get_integration_context', return_value=ctx)
+        mocker.patch.object(edl, 'set_integration_context')
+        search_modified_indicators = mocker.patch.object(edl, 'search_modified_indicators')
+        mocker.patch.object(edl, 'IndicatorsSearcher', return_value=IndicatorsSearcher(4))
+
+        actual_edl = edl.get_edl_on_demand(incremental=True)
+
+        assert actual_edl == 'https://google.com\ndemisto.com:7000\ndemisto.com/qwertqwer\ndemisto.com'
+        assert not search_modified_indicators.called
+        _, iocs = edl.load_edl_on_demand_state(request_args)
+        assert len(iocs) == 4
+
     def test_iterable_to_str_1(self):
         """Test invalid"""
         from EDL import iterable_to_str, DemistoException
@@ -164,43 +237,24 @@ class TestHelperFunctions:
     def test_create_new_edl(self, mocker):
         """Sanity"""
         import EDL as edl
-        f = tempfile.TemporaryFile(mode='w+t')
-        f.write('{"value": "https://google.com", "indicator_type": "URL"}\n'
-                '{"value": "demisto.com:7000", "indicator_type": "URL"}\n'
-                '{"value": "demisto.com/qwertqwertyuioplkjhgfdsazxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyu'
-                'iopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopyuioplkjhgfdsa'
-                'zxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwert'
-                'yuiopqwertyuiopqwertyuiopqwertyuiop", "indicator_type": "URL"}\n'
-                '{"value": "demisto.com", "indicator_type": "URL"}')
-
-        mocker.patch.object(edl, 'get_indicators_to_format', return_value=f)
+        long_url = 'demisto.com/' + 'qwertyuiop' * 30
+        iocs = [{"value": "https://google.com", "indicator_type": "URL"},
+                {"value": "demisto.com:7000", "indicator_type": "URL"},
+                {"value": long_url, "indicator_type": "URL"},
+                {"value": "demisto.com", "indicator_type": "URL"}]
+
+        mocker.patch.object(edl, 'iter_indicators', return_value=iter(iocs))
         request_args = edl.RequestArguments(query='', limit=3, url_port_stripping=True, url_protocol_stripping=True,
                                             url_truncate=True)
         edl_vals = edl.create_new_edl(request_args)
+        assert edl_vals == f'google.com\ndemisto.com\n{long_url[:254]}\n'
 
-        assert edl_vals == 'google.com\ndemisto.com\ndemisto.com/qwertqwertyuioplkjhgfdsazxqwertyuiopqwertyuiopq' \
-                           'wertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwert' \
-                           'yuiopqwertyuiopqwertyuiopyuioplkjhgfdsazxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwe' \
-                           'rtyuiopqwertyuiopqwertyuiop\n'
-        f = tempfile.TemporaryFile(mode='w+t')
-        f.write('{"value": "https://google.com", "indicator_type": "URL"}\n'
-                '{"value": "demisto.com:7000", "indicator_type": "URL"}\n'
-                '{"value": "demisto.com/qwertqwertyuioplkjhgfdsazxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyu'
-                'iopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopyuioplkjhgfdsa'
-                'zxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwert'
-                'yuiopqwertyuiopqwertyuiopqwertyuiop", "indicator_type": "URL"}\n'
-                '{"value": "demisto.com", "indicator_type": "URL"}')
-        mocker.patch.object(edl, 'get_indicators_to_format', return_value=f)
+        mocker.patch.object(edl, 'iter_indicators', return_value=iter(iocs))
         request_args = edl.RequestArguments(out_format='CSV', query='', limit=3, url_port_stripping=True,
-                                            url_protocol_stripping=True, url_truncate=True, fields_to_present='name,value')
+                                            url_protocol_stripping=True, url_truncate=True, fields_to_present='name,type')
         edl_v = edl.create_new_edl(request_args)
-        assert edl_v == '{"value": "https://google.com", "indicator_type": "URL"}\n' \
-                        '{"value": "demisto.com:7000", "indicator_type": "URL"}\n' \
-                        '{"value": "demisto.com/qwertqwertyuioplkjhgfdsazxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyu' \
-                        'iopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopyuioplkjhgfdsa' \
-                        'zxqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwertyuiopqwert' \
-                        'yuiopqwertyuiopqwertyuiopqwertyuiop", "indicator_type": "URL"}\n' \
-                        '{"value": "demisto.com", "indicator_type": "URL"}'
+        assert edl_v == f'name,type\n"google.com","URL"\n"demisto.com","URL"\n"{long_url[:254]}","URL"\n' \
+                        '"demisto.com","URL"'
 
     def test_create_new_edl_edge_cases(self, mocker, requests_mock):
         """
@@ -223,9 +277,8 @@ class TestHelperFunctions:
                       {"value": "*.co.uk", "indicator_type": "Domain"},  # tld
                       {"value": "*.google.com", "indicator_type": "Domain"},  # no tld
                       {"value": "aא.com", "indicator_type": "URL"}]  # no ascii
-        f = '\n'.join((json.dumps(indicator) for indicator in indicators))
         request_args = edl.RequestArguments(collapse_ips=DONT_COLLAPSE, maximum_cidr_size=2)
-        mocker.patch.object(edl, 'get_indicators_to_format', return_value=io.StringIO(f))
+        mocker.patch.object(edl, 'iter_indicators', return_value=iter(indicators))
         edl_v = edl.create_new_edl(request_args)
         expected_values = set()
         for indicator in indicators:
@@ -236,13 +289,13 @@ class TestHelperFunctions:
         assert set(edl_v.split('\n')) == expected_values
 
         request_args = edl.RequestArguments(collapse_ips=DONT_COLLAPSE, maximum_cidr_size=8)
-        mocker.patch.object(edl, 'get_indicators_to_format', return_value=io.StringIO(f))
+        mocker.patch.object(edl, 'iter_indicators', return_value=iter(indicators))
         edl_v = edl.create_new_edl(request_args)
         assert set(edl_v.split('\n')) == {"1.1.1.1/12", "*.com", "com", "*.co.uk",
                                           "co.uk", "*.google.com", "google.com", "aא.com"}
 
         request_args = edl.RequestArguments(collapse_ips=DONT_COLLAPSE, no_wildcard_tld=True, maximum_cidr_size=13)
-        mocker.patch.object(edl, 'get_indicators_to_format', return_value=io.StringIO(f))
+        mocker.patch.object(edl, 'iter_indicators', return_value=iter(indicators))
         edl_v = edl.create_new_edl(request_args)
         assert set(edl_v.split('\n')) == {"*.google.com", "google.com", "aא.com"}
 
@@ -338,7 +391,7 @@ class TestHelperFunctions:
           - assert files_by_category as 3 keys
           - assert the result
         """
-        from EDL import create_proxysg_out_format, RequestArguments, create_proxysg_all_category_out_format
+        from EDL import create_proxysg_out_format, RequestArguments, iter_proxysg_all_category_out_format
         files_by_category = {}
         with open('test_data/demisto_url_iocs.json', 'r') as iocs_json_f:
             iocs_json = json.loads(iocs_json_f.read())
@@ -349,12 +402,10 @@ class TestHelperFunctions:
             files_by_category = create_proxysg_out_format(ioc, files_by_category, request_args)
 
         assert len(files_by_category) == 3
-        result_file = tempfile.TemporaryFile(mode='w+t')
-        result_file = create_proxysg_all_category_out_format(result_file, files_by_category)
-        result_file.seek(0)
-        assert result_file.read() == 'define category category1\n1.2.3.4/wget\nend\ndefine category category2\n' \
-                                     'www.demisto.com/cool\nend\ndefine category bc_category\nwww.demisto.com/*cool\n' \
-                                     'end'
+        result = ''.join(iter_proxysg_all_category_out_format(files_by_category))
+        assert result == 'define category category1\n1.2.3.4/wget\nend\ndefine category category2\n' \
+                         'www.demisto.com/cool\nend\ndefine category bc_category\nwww.demisto.com/*cool\n' \
+                         'end'
 
     def test_validate_basic_authentication(self):
         """Test Authentication"""
@@ -433,6 +484,68 @@ class TestHelperFunctions:
         assert "1.1.1.1" in ip_range_list
         assert "doesntwork/oh" in ip_range_list
 
+    @pytest.mark.parametrize('collapse_ips', ['To Ranges', 'To CIDRS'])
+    @pytest.mark.parametrize('ip_list', [
+        ["1.1.1.1", "25.24.23.22", "22.21.20.19", "1.1.1.2", "1.2.3.4", "1.1.1.3", "2.2.2.2", "1.2.3.5",
+         "3.3.3.0/30", '3.3.3.1'],
+        ["1.1.1.1", "1.1.1.2", "1.1.1.3", "1.2.3.4", "1.2.3.5", "doesntwork/oh", "01.1.1.1", "1.1.1.1/33"],
+        ["10.75.81.174/25", "10.75.81.1", "10.75.82.174/25", "10.75.82.200/25", "10.75.83.174/25", "10.75.83.130"],
+        ["0.0.0.0", "255.255.255.255", "0.0.0.0/1", "128.0.0.0/1"],
+        ["2001:db8::1", "2001:db8::2", "2001:db8::3/127", "2001:db8:1::1/96", "::ffff:1.2.3.4", "::ffff:1.2.3.5",
+         "::", "ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff", "2001:db8::zz"],
+    ])
+    def test_collapse_ips_to_ranges(self, ip_list, collapse_ips):
+        """
+        Given:
+          - IPs, CIDRs (some with host bits) and invalid values, of both IP versions
+        When:
+          - collapsing them with collapse_ips_to_ranges
+        Then:
+          - assert the result is the same as the netaddr based ips_to_ranges
+        """
+        from EDL import ips_to_ranges, collapse_ips_to_ranges
+        assert collapse_ips_to_ranges(ip_list, collapse_ips) == ips_to_ranges(ip_list, collapse_ips)
+
+    def test_collapse_ips_to_ranges_large_ipv6_network(self):
+        """
+        Given:
+          - An IPv6 CIDR with more addresses than sys.maxsize, which netaddr can not collapse to a range
+        When:
+          - collapsing it with collapse_ips_to_ranges
+        Then:
+          - assert it is collapsed
+        """
+        from EDL import collapse_ips_to_ranges, COLLAPSE_TO_CIDR, COLLAPSE_TO_RANGES
+        ip_list = ['2001:db8:1::1/64', '2001:db8:1:0:1::1']
+        assert collapse_ips_to_ranges(ip_list, COLLAPSE_TO_CIDR) == {'2001:db8:1::/64'}
+        assert collapse_ips_to_ranges(ip_list, COLLAPSE_TO_RANGES) == {'2001:db8:1::-2001:db8:1:0:ffff:ffff:ffff:ffff'}
+
+    @pytest.mark.parametrize('collapse_ips', ['To Ranges', 'To CIDRS'])
+    def test_collapse_ips_to_ranges_random(self, collapse_ips):
+        """
+        Given:
+          - Thousands of random IPs and CIDRs, many of them adjacent or overlapping
+        When:
+          - collapsing them with collapse_ips_to_ranges
+        Then:
+          - assert the result is the same as the netaddr based ips_to_ranges
+        """
+        import random
+        from EDL import ips_to_ranges, collapse_ips_to_ranges
+        rand = random.Random(7)
+        ip_list = set()
+        for _ in range(5000):
+            octets = [rand.choice([10, 192]), rand.randint(0, 3), rand.randint(0, 255), rand.randint(0, 255)]
+            ip = '.'.join(map(str, octets))
+            kind = rand.random()
+            if kind < 0.8:
+                ip_list.add(ip)
+            elif kind < 0.9:
+                ip_list.add(f'{ip}/{rand.randint(20, 32)}')
+            else:
+                ip_list.add(f'2001:db8::{rand.randint(0, 0xfff):x}/{rand.randint(116, 128)}')
+        assert collapse_ips_to_ranges(ip_list, collapse_ips) == ips_to_ranges(ip_list, collapse_ips)
+
     def test_is_valid_ip_ipv4(self):
         from EDL import is_valid_ip
         ip = '1.1.1.1'
@@ -659,7 +772,7 @@ class IndicatorsSearcher:
         return self._limit
 
 
-def test_get_indicators_to_format_csv():
+def test_out_format_writer_csv():
     """
     Given:
       - IndicatorsSearcher with indicators
@@ -673,14 +786,12 @@ def test_get_indicators_to_format_csv():
     indicator_searcher = IndicatorsSearcher(4)
     request_args = edl.RequestArguments(out_format='CSV', query='', limit=3, url_port_stripping=True,
                                         url_protocol_stripping=True, url_truncate=True, fields_to_present='name,type')
-    f = get_indicators_to_format(indicator_searcher, request_args)
-    f.seek(0)
-    indicators = f.read()
+    indicators = ''.join(get_out_format_writer(request_args).format(edl.iter_indicators(indicator_searcher)))
     assert indicators == 'name,type\n"google.com","URL"\n"demisto.com","URL"\n"demisto.com/qwertqwer","URL"\n' \
                          '"demisto.com","URL"'
 
 
-def test_get_indicators_to_format_json():
+def test_out_format_writer_json():
     """
     Given:
       - IndicatorsSearcher with indicators
@@ -694,16 +805,14 @@ def test_get_indicators_to_format_json():
     indicator_searcher = IndicatorsSearcher(4)
     request_args = edl.RequestArguments(out_format='JSON', query='', limit=3, url_port_stripping=True,
                                         url_protocol_stripping=True, url_truncate=True, fields_to_present='name,type')
-    f = get_indicators_to_format(indicator_searcher, request_args)
-    f.seek(0)
-    indicators = f.read()
+    indicators = ''.join(get_out_format_writer(request_args).format(edl.iter_indicators(indicator_searcher)))
     assert indicators == '[{"value": "google.com", "indicator_type": "URL"},' \
                          ' {"value": "demisto.com", "indicator_type": "URL"},' \
                          ' {"value": "demisto.com/qwertqwer", "indicator_type": "URL"},' \
                          ' {"value": "demisto.com", "indicator_type": "URL"}]'
 
 
-def test_get_indicators_to_format_mwg():
+def test_out_format_writer_mwg():
     """
     Given:
       - IndicatorsSearcher with indicators
@@ -717,14 +826,12 @@ def test_get_indicators_to_format_mwg():
     indicator_searcher = IndicatorsSearcher(4)
     request_args = edl.RequestArguments(out_format='McAfee Web Gateway', query='', limit=3, url_port_stripping=True,
                                         url_protocol_stripping=True, url_truncate=True)
-    f = get_indicators_to_format(indicator_searcher, request_args)
-    f.seek(0)
-    indicators = f.read()
+    indicators = ''.join(get_out_format_writer(request_args).format(edl.iter_indicators(indicator_searcher)))
     assert indicators == 'type=string\n"google.com" "from CORTEX XSOAR"\n"demisto.com" "from CORTEX XSOAR"\n' \
                          '"demisto.com/qwertqwer" "from CORTEX XSOAR"\n"demisto.com" "from CORTEX XSOAR"'
 
 
-def test_get_indicators_to_format_symantec():
+def test_out_format_writer_symantec():
     """
     Given:
       - IndicatorsSearcher with indicators
@@ -738,13 +845,11 @@ def test_get_indicators_to_format_symantec():
     indicator_searcher = IndicatorsSearcher(4)
     request_args = edl.RequestArguments(out_format='Symantec ProxySG', query='', limit=3, url_port_stripping=True,
                                         url_protocol_stripping=True, url_truncate=True)
-    f = get_indicators_to_format(indicator_searcher, request_args)
-    f.seek(0)
-    indicators = f.read()
+    indicators = ''.join(get_out_format_writer(request_args).format(edl.iter_indicators(indicator_searcher)))
     assert indicators == 'define category bc_category\ngoogle.com\ndemisto.com\ndemisto.com/qwertqwer\ndemisto.com\nend'
 
 
-def test_get_indicators_to_format_text():
+def test_out_format_writer_text():
     """
     Given:
       - IndicatorsSearcher with indicators
@@ -758,9 +863,153 @@ def test_get_indicators_to_format_text():
     indicator_searcher = IndicatorsSearcher(4)
     request_args = edl.RequestArguments(out_format='PAN-OS (text)', query='', limit=3, url_port_stripping=True,
                                         url_protocol_stripping=True, url_truncate=True)
-    f = get_indicators_to_format(indicator_searcher, request_args)
-    f = edl.create_text_out_format(f, request_args)
+    indicators = ''.join(get_out_format_writer(request_args).format(edl.iter_indicators(indicator_searcher)))
+    assert indicators == 'google.com\ndemisto.com\ndemisto.com/qwertqwer\n'
+
 
-    f.seek(0)
-    indicators = f.read()
-    assert indicators == 'google.com\ndemisto.com\ndemisto.com/qwertqwer\ndemisto.com'
+@pytest.mark.parametrize('out_format, expected_edl', [
+    ('CSV', 'name,type\n"google.com","URL"\n"demisto.com","URL"\n"demisto.com/qwertqwer","URL"\n"demisto.com","URL"'),
+    ('JSON', '[{"value": "google.com", "indicator_type": "URL"}, {"value": "demisto.com", "indicator_type": "URL"},'
+             ' {"value": "demisto.com/qwertqwer", "indicator_type": "URL"}, {"value": "demisto.com", "indicator_type": "URL"}]'),
+    ('PAN-OS (text)', 'google.com\ndemisto.com\ndemisto.com/qwertqwer\n'),
+])
+def test_create_edl_stream(mocker, out_format, expected_edl):
+    """
+    Given:
+      - IndicatorsSearcher with 4 indicators, a page each
+      - request_args with a limit of 3
+    When:
+      - streaming the list with create_edl_stream
+    Then:
+      - assert the list is yielded in chunks which add up to the list in the requested format
+    """
+    import EDL as edl
+    mocker.patch.object(edl, 'IndicatorsSearcher', return_value=IndicatorsSearcher(4))
+    request_args = edl.RequestArguments(out_format=out_format, query='', limit=3, url_port_stripping=True,
+                                        url_protocol_stripping=True, url_truncate=True, fields_to_present='name,type')
+    chunks = list(edl.create_edl_stream(request_args))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == expected_edl
+
+
+@pytest.mark.parametrize('chunks, out_format, add_comment_if_empty, expected_body', [
+    ([], 'PAN-OS (text)', True, '# Empty List'),
+    ([']'], 'JSON', True, '# Empty List'),
+    ([], 'PAN-OS (text)', False, 'prepend\n1.1.1.1\n\nappend'),
+    (['2.2.2.2', '\n3.3.3.3'], 'PAN-OS (text)', True, 'prepend\n1.1.1.1\n2.2.2.2\n3.3.3.3\nappend'),
+    (['[{"value": "2.2.2.2"}', ']'], 'JSON', True, '[{"value": "2.2.2.2"}]'),
+])
+def test_stream_edl_response_body(chunks, out_format, add_comment_if_empty, expected_body):
+    """
+    Given:
+      - Chunks of a formatted list
+      - prepend and append strings
+    When:
+      - building the body of a streamed response
+    Then:
+      - assert empty lists are replaced with a comment
+      - assert the prepend and append strings are only added to text lists
+    """
+    import EDL as edl
+    from datetime import datetime, timezone
+    params = {'prepend_string': 'prepend\\n1.1.1.1', 'append_string': '\\nappend'}
+    request_args = edl.RequestArguments(out_format=out_format, add_comment_if_empty=add_comment_if_empty)
+    body = edl.stream_edl_response_body(chunks, request_args, params, edl.EDLStreamStats(), datetime.now(timezone.utc))
+    assert ''.join(body) == expected_body
+
+
+def test_edl_stream_stats():
+    """
+    Given:
+      - A list split to chunks
+    When:
+      - computing the list stats chunk by chunk
+    Then:
+      - assert the ETag and size are the same as the ones computed for the whole list
+    """
+    import hashlib
+    import EDL as edl
+    edl_str = '1.1.1.1\n2.2.2.2\naא.com'
+    stats = edl.EDLStreamStats()
+    assert stats.size == 0
+    for chunk in ('1.1.1', '.1\n2.2.2.2', '\n', 'aא.com'):
+        stats.update(chunk)
+    assert stats.etag == f'"{hashlib.sha1(edl_str.encode()).hexdigest()}"'
+    assert stats.size == 3
+
+
+def test_route_edl_stream_on_demand(mocker):
+    """
+    Given:
+      - An instance with stream_response and on_demand enabled
+      - A refresh signal in context
+    When:
+      - requesting the list
+    Then:
+      - assert the cache file is rebuilt and the list is streamed from it with its ETag and size
+      - assert the cache file is opened once, for both the ETag and size and the streamed list
+    """
+    import hashlib
+    import EDL as edl
+    tmp_dir = mkdtemp()
+    edl.EDL_ON_DEMAND_CACHE_PATH = os.path.join(tmp_dir, 'cache')
+    ctx = {edl.EDL_ON_DEMAND_KEY: True, edl.RequestArguments.CTX_QUERY_KEY: "*"}
+    mocker.patch.object(demisto, 'params', return_value={'stream_response': True, 'on_demand': True,
+                                                         'cache_refresh_rate': '5 minutes',
+                                                         'no_wildcard_tld': False})
+    mocker.patch.object(edl, 'get_integration_context', return_value=ctx)
+    set_integration_context = mocker.patch.object(edl, 'set_integration_context')
+    mocker.patch.object(edl, 'create_edl_stream', return_value=iter(['1.1.1.1', '\n2.2.2.2']))
+    open_mock = mocker.patch.object(edl, 'open', side_effect=open, create=True)
+    with edl.APP.test_client() as client:
+        response = client.get('/')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == '1.1.1.1\n2.2.2.2'
+    assert [call[0][0] for call in open_mock.call_args_list].count(edl.EDL_ON_DEMAND_CACHE_PATH) == 1
+    expected_etag = hashlib.sha1('1.1.1.1\n2.2.2.2'.encode()).hexdigest()
+    assert response.headers['ETag'] == f'"{expected_etag}"'
+    assert response.headers['X-EDL-Size'] == '2'
+    assert edl.EDL_ON_DEMAND_KEY not in set_integration_context.call_args[0][0]
+    with open(edl.EDL_ON_DEMAND_CACHE_PATH) as f:
+        assert f.read() == '1.1.1.1\n2.2.2.2'
+
+
+@pytest.mark.parametrize('out_format, writer_class', [
+    ('PAN-OS (text)', 'TextWriter'),
+    ('CSV', 'CSVWriter'),
+    ('JSON', 'JSONWriter'),
+    ('McAfee Web Gateway', 'MWGWriter'),
+    ('Symantec ProxySG', 'ProxySGWriter'),
+])
+def test_get_out_format_writer(out_format, writer_class):
+    """
+    Given:
+      - request_args with an outbound format
+    When:
+      - resolving the writer of the request
+    Then:
+      - assert the writer of the format is returned
+    """
+    import EDL as edl
+    request_args = edl.RequestArguments(out_format=out_format)
+    assert type(get_out_format_writer(request_args)).__name__ == writer_class
+
+
+def test_text_writer_collapse_ips():
+    """
+    Given:
+      - Indicators of different types, some of them IPs which can be collapsed
+    When:
+      - formatting them with the text writer
+    Then:
+      - assert the other indicators are written as they arrive and the collapsed IPs are written last
+    """
+    import EDL as edl
+    iocs = [{'value': '1.1.1.1', 'indicator_type': 'IP'},
+            {'value': 'demisto.com', 'indicator_type': 'Domain'},
+            {'value': '1.1.1.2/31', 'indicator_type': 'CIDR'},
+            {'value': '*.google.com', 'indicator_type': 'DomainGlob'},
+            {'value': '1.1.1.0', 'indicator_type': 'IP'}]
+    request_args = edl.RequestArguments(collapse_ips=edl.COLLAPSE_TO_RANGES)
+    chunks = list(get_out_format_writer(request_args).format(iocs))
+    assert chunks == ['demisto.com', '\ngoogle.com', '\n*.google.com', '\n1.1.1.0-1.1.1.3']
@@ -1,4 +1,5 @@
 import functools
+import time
 import uuid
 from typing import Callable
 from flask import Flask, request, make_response, jsonify, Response
@@ -38,6 +39,8 @@ TAXII_V21_CONTENT_LEN = 104857600
 TAXII_REQUIRED_FILTER_FIELDS = {'name', 'type', 'modified', 'createdTime', 'description',
                                 'accounttype', 'userid', 'mitreid', 'stixid'}
 PAGE_SIZE = 2000
+SNAPSHOT_TTL = 300  # seconds a snapshot of a collection request and its next tokens are kept since created
+MAX_SNAPSHOTS = 20
 
 XSOAR_TYPES_TO_STIX_SCO = {
     FeedIndicatorType.CIDR: 'ipv4-addr',
@@ -130,6 +133,8 @@ class TAXII2Server:
         self.namespace_uuid = uuid.uuid5(PAWN_UUID, demisto.getLicenseID())
         self.create_collections(collections)
         self.types_for_indicator_sdo = types_for_indicator_sdo if types_for_indicator_sdo else []
+        self._snapshots: dict = {}
+        self._next_tokens: dict = {}
 
     @property
     def taxii_collections_media_type(self):
@@ -270,20 +275,12 @@ class TAXII2Server:
         Returns:
             The objects from given collection ID.
         """
-        found_collection = self.collections_by_id.get(collection_id, {})
-        query = found_collection.get('query')
-        iocs, _, total = find_indicators(
-            query=query,
-            types=types,
-            added_after=added_after,
-            limit=limit,
-            offset=offset,
-            is_manifest=True)
+        snapshot = self.get_snapshot(collection_id, types, added_after, is_manifest=True, is_continuation=offset > 0)
+        objects, _, total = snapshot.get_slice(offset, limit)
 
         first_added = None
         last_added = None
-        objects = iocs[offset:offset + limit]
-        if iocs and not objects:
+        if snapshot.iocs and not objects:
             raise RequestedRangeNotSatisfiable
 
         if objects:
@@ -297,7 +294,7 @@ class TAXII2Server:
         if self.version == TAXII_VER_2_1:
             if total > offset + limit:
                 response['more'] = True
-                response['next'] = str(limit + offset)
+                response['next'] = self.create_next_token(limit + offset)
 
         content_range = f'items {offset}-{len(objects)}/{total}'
         return response, first_added, last_added, content_range
@@ -309,28 +306,18 @@ class TAXII2Server:
         Returns:
             The objects from given collection ID.
         """
-        found_collection = self.collections_by_id.get(collection_id, {})
-        query = found_collection.get('query')
-
-        iocs, extensions, total = find_indicators(
-            query=query,
-            types=types,
-            added_after=added_after,
-            limit=limit,
-            offset=offset)
+        snapshot = self.get_snapshot(collection_id, types, added_after, is_continuation=offset > 0)
+        limited_iocs, limited_extensions, total = snapshot.get_slice(offset, limit)
 
         first_added = None
         last_added = None
-        limited_extensions = None
 
-        limited_iocs = iocs[offset:offset + limit]
-        if iocs and not limited_iocs:
+        if snapshot.iocs and not limited_iocs:
             raise RequestedRangeNotSatisfiable
 
         objects = limited_iocs
 
         if SERVER.has_extension:
-            limited_extensions = extensions[offset:offset + limit]
             objects = [val for pair in zip(limited_iocs, limited_extensions) for val in pair]
 
         if limited_iocs:
@@ -350,12 +337,55 @@ class TAXII2Server:
             }
             if total > offset + limit:
                 response['more'] = True
-                response['next'] = str(limit + offset)
+                response['next'] = self.create_next_token(limit + offset)
 
         content_range = f'items {offset}-{len(limited_iocs)}/{total}'
 
         return response, first_added, last_added, content_range
 
+    def get_snapshot(self, collection_id: str, types: list, added_after, is_manifest: bool = False,
+                     is_continuation: bool = False) -> 'IndicatorsSnapshot':
+        """
+        Returns the snapshot of the indicators of a collection request, so the next pages of the same request are
+        sliced from it instead of searching the collection from its start.
+        A first page request always gets a new snapshot, so new indicators are returned to clients polling the
+        collection. A continuation request reuses the snapshot of the request until it expires.
+        """
+        for key in [key for key, snapshot in self._snapshots.items() if snapshot.is_expired()]:
+            del self._snapshots[key]
+
+        key = (collection_id, tuple(types), added_after, is_manifest)
+        snapshot = self._snapshots.get(key) if is_continuation else None
+        if not snapshot:
+            self._snapshots.pop(key, None)
+            if len(self._snapshots) >= MAX_SNAPSHOTS:
+                del self._snapshots[min(self._snapshots, key=lambda k: self._snapshots[k].created)]
+            query = self.collections_by_id.get(collection_id, {}).get('query')
+            snapshot = IndicatorsSnapshot(query, types, added_after, is_manifest)
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def create_next_token(self, offset: int) -> str:
+        """
+        Returns an opaque next token of a TAXII 2.1 response, stored with the offset it continues from.
+        """
+        now = time.time()
+        self._next_tokens = {token: (token_offset, created) for token, (token_offset, created)
+                             in self._next_tokens.items() if now - created <= SNAPSHOT_TTL}
+        next_token = str(uuid.uuid4())
+        self._next_tokens[next_token] = (offset, now)
+        return next_token
+
+    def get_next_token_offset(self, next_token: str) -> int:
+        """
+        Returns the offset of a next token. Numeric tokens are offsets given by older versions of the integration.
+        """
+        if next_token in self._next_tokens:
+            return self._next_tokens[next_token][0]
+        if next_token.isdigit():
+            return int(next_token)
+        raise ValueError(f'The next token {next_token} is invalid or has expired.')
+
 
 SERVER: TAXII2Server = None  # type: ignore[assignment]
 
@@ -517,62 +547,86 @@ def create_query(query: str, types: list) -> str:
         return query
 
 
-def find_indicators(query: str, types: list, added_after, limit: int, offset: int, is_manifest: bool = False) -> tuple:
+class IndicatorsSnapshot:
     """
-    Args:
-        query: search indicators query
-        types: types to query by
-        added_after: search indicators after this date
-        limit: response items limit
-        offset: response offset
-        is_manifest: whether this call is for manifest or indicators
-
-    Returns: Created indicators and its extensions.
+    A short-lived snapshot of the STIX objects converted from the indicators of a collection request.
+    The indicators are searched and converted only as far as the requested pages reach, and the searcher keeps its
+    searchAfter position between the requests, so each page costs only its own slice.
     """
-    new_query = create_query(query, types)
-    new_limit = offset + limit
-    iocs = []
-    extensions = []
-    if is_manifest:
-        field_filters: Optional[str] = ','.join(TAXII_REQUIRED_FILTER_FIELDS)
-    elif SERVER.fields_to_present:
-        field_filters = ','.join(
-            set.union(SERVER.fields_to_present, TAXII_REQUIRED_FILTER_FIELDS))  # type: ignore[arg-type]
-    else:
-        field_filters = None
 
-    demisto.debug(f'filter fields: {field_filters}')
+    def __init__(self, query: str, types: list, added_after, is_manifest: bool = False):
+        """
+        Args:
+            query: search indicators query
+            types: types to query by
+            added_after: search indicators after this date
+            is_manifest: whether this snapshot is for manifest or indicators
+        """
+        self.is_manifest = is_manifest
+        self.iocs: list = []
+        self.extensions: list = []
+        self.total = 0
+        self.created = time.time()
+        self._is_search_done = False
+
+        if is_manifest:
+            field_filters: Optional[str] = ','.join(TAXII_REQUIRED_FILTER_FIELDS)
+        elif SERVER.fields_to_present:
+            field_filters = ','.join(
+                set.union(SERVER.fields_to_present, TAXII_REQUIRED_FILTER_FIELDS))  # type: ignore[arg-type]
+        else:
+            field_filters = None
+
+        demisto.debug(f'filter fields: {field_filters}')
 
-    indicator_searcher = IndicatorsSearcher(
-        filter_fields=field_filters,
-        query=new_query,
-        limit=new_limit,
-        size=PAGE_SIZE,
-        from_date=added_after
-    )
+        self._indicator_searcher = IndicatorsSearcher(
+            filter_fields=field_filters,
+            query=create_query(query, types),
+            size=PAGE_SIZE,
+            from_date=added_after
+        )
 
-    total = 0
+    def is_expired(self) -> bool:
+        return time.time() - self.created > SNAPSHOT_TTL
 
-    for ioc in indicator_searcher:
-        found_indicators = ioc.get('iocs') or []
-        total = ioc.get('total')
-        for xsoar_indicator in found_indicators:
+    def get_slice(self, offset: int, limit: int) -> tuple:
+        """
+        Args:
+            offset: response offset
+            limit: response items limit
+
+        Returns: The created indicators and their extensions in the given range, and the total of the search.
+        """
+        while not self._is_search_done and len(self.iocs) < offset + limit:
+            self._add_next_page()
+        return self.iocs[offset:offset + limit], self.extensions[offset:offset + limit], self.total
+
+    def _add_next_page(self):
+        """
+        Searches the next page of indicators and adds them to the snapshot.
+        """
+        try:
+            ioc = next(self._indicator_searcher)
+        except StopIteration:
+            self._is_search_done = True
+            return
+
+        self.total = ioc.get('total')
+        for xsoar_indicator in ioc.get('iocs') or []:
             xsoar_type = xsoar_indicator.get('indicator_type')
-            if is_manifest:
+            if self.is_manifest:
                 manifest_entry = create_manifest_entry(xsoar_indicator, xsoar_type)
                 if manifest_entry:
-                    iocs.append(manifest_entry)
+                    self.iocs.append(manifest_entry)
             else:
                 stix_ioc, extension_definition = create_stix_object(xsoar_indicator, xsoar_type)
                 if XSOAR_TYPES_TO_STIX_SCO.get(xsoar_type) in SERVER.types_for_indicator_sdo:
                     stix_ioc = convert_sco_to_indicator_sdo(stix_ioc, xsoar_indicator)
                 if SERVER.has_extension and stix_ioc:
-                    iocs.append(stix_ioc)
-                    extensions.append(extension_definition)
+                    self.iocs.append(stix_ioc)
+                    self.extensions.append(extension_definition)
                 elif stix_ioc:
-                    iocs.append(stix_ioc)
-
-    return iocs, extensions, total
+                    self.iocs.append(stix_ioc)
 
 
 def create_sco_stix_uuid(xsoar_indicator: dict, stix_type: str) -> str:
@@ -847,7 +901,7 @@ def parse_manifest_and_object_args() -> tuple:
         next = request.args.get('next')
         limit_arg = request.args.get('limit')
 
-        offset = int(next) if next else 0
+        offset = SERVER.get_next_token_offset(next) if next else 0
         limit = int(limit_arg) if limit_arg else limit
 
     if limit > res_size:
@@ -3,7 +3,7 @@ import io
 import json
 import pytest
 from requests.auth import _basic_auth_str
-from TAXII2Server import TAXII2Server, APP, uuid, create_fields_list
+from TAXII2Server import TAXII2Server, APP, uuid, create_fields_list, SNAPSHOT_TTL
 import demistomock as demisto
 
 HEADERS = {
@@ -322,6 +322,7 @@ def test_taxii21_manifest(mocker, taxii2_server_v21):
     manifest = util_load_json('test_files/manifest21.json')
     mocker.patch.object(demisto, 'params', return_value={'res_size': '100'})
     mocker.patch('TAXII2Server.SERVER', taxii2_server_v21)
+    mocker.patch.object(uuid, 'uuid4', return_value='1ffe4bee-95e7-4e36-9a17-f56dbab3c777')
     mocker.patch.object(demisto, 'searchIndicators', return_value=iocs)
     with APP.test_client() as test_client:
         response = test_client.get('/threatintel/collections/4c649e16-2bb7-50f5-8826-2a2d0a0b9631/manifest/?limit=4',
@@ -486,3 +487,105 @@ def test_taxii21_objects_filtered_params(mocker, taxii2_server_v21, res_file, fi
         assert response.status_code == 200
         assert response.content_type == 'application/taxii+json;version=2.1'
         assert response.json == objects
+
+
+def test_taxii21_objects_next_token(mocker, taxii2_server_v21):
+    """
+        Given
+            TAXII Server v2.1, collection_id, limit
+        When
+            Paging through the objects of the collection by the next token of each response
+        Then
+            Validate that the pages are sliced from the collection snapshot, searching each page of indicators once.
+    """
+    iocs = util_load_json('test_files/ip_iocs.json')
+    iocs['total'] = 10
+    pages = [iocs, dict(iocs, searchAfter=None), {'iocs': [], 'total': 10}]
+    mocker.patch('TAXII2Server.SERVER', taxii2_server_v21)
+    mocker.patch('CommonServerPython.get_demisto_version', return_value={'version': '6.5.0', 'buildNumber': '12345'})
+    search_indicators = mocker.patch.object(demisto, 'searchIndicators', side_effect=pages)
+    mocker.patch.object(demisto, 'params', return_value={'res_size': '100'})
+    objects = []
+    with APP.test_client() as test_client:
+        url = '/threatintel/collections/4c649e16-2bb7-50f5-8826-2a2d0a0b9631/objects/?limit=4'
+        response = test_client.get(url, headers=HEADERS)
+        while True:
+            assert response.status_code == 200
+            objects.extend(response.json['objects'])
+            if not response.json.get('more'):
+                break
+            assert not response.json['next'].isdigit()
+            response = test_client.get(f'{url}&next={response.json["next"]}', headers=HEADERS)
+
+    assert len(objects) == 20  # 10 indicators and their extensions
+    assert search_indicators.call_count == 2
+    assert search_indicators.call_args_list[1].kwargs['searchAfter'] == iocs['searchAfter']
+
+
+def test_taxii21_objects_invalid_next_token(mocker, taxii2_server_v21):
+    """
+        Given
+            TAXII Server v2.1, collection_id, a next token that was not given by the server
+        When
+            Calling get objects api request for given collection
+        Then
+            Validate that a bad request error is returned.
+    """
+    mocker.patch('TAXII2Server.SERVER', taxii2_server_v21)
+    mocker.patch.object(demisto, 'error')
+    mocker.patch.object(demisto, 'updateModuleHealth')
+    mocker.patch.object(demisto, 'params', return_value={'res_size': '100'})
+    with APP.test_client() as test_client:
+        response = test_client.get('/threatintel/collections/4c649e16-2bb7-50f5-8826-2a2d0a0b9631/objects/'
+                                   '?next=unknown', headers=HEADERS)
+        assert response.status_code == 400
+        assert 'invalid or has expired' in response.json.get('description')
+
+
+def test_snapshot_expiration(mocker, taxii2_server_v21):
+    """
+        Given
+            TAXII Server v2.1 with a snapshot of a collection request
+        When
+            Getting the snapshot of the same request for next pages, before and after it expired, while it is in use
+        Then
+            Validate that the snapshot is reused only until it expires since it was created.
+    """
+    mocker.patch('TAXII2Server.SERVER', taxii2_server_v21)
+    collection_id = '4c649e16-2bb7-50f5-8826-2a2d0a0b9631'
+    snapshot = taxii2_server_v21.get_snapshot(collection_id, [], None)
+    assert taxii2_server_v21.get_snapshot(collection_id, [], None, is_continuation=True) is snapshot
+    assert taxii2_server_v21.get_snapshot(collection_id, [], None, is_manifest=True,
+                                          is_continuation=True) is not snapshot
+
+    snapshot.created -= SNAPSHOT_TTL - 1
+    assert taxii2_server_v21.get_snapshot(collection_id, [], None, is_continuation=True) is snapshot
+    snapshot.created -= 2
+    assert taxii2_server_v21.get_snapshot(collection_id, [], None, is_continuation=True) is not snapshot
+
+
+def test_snapshot_not_reused_for_first_page(mocker, taxii2_server_v21):
+    """
+        Given
+            TAXII Server v2.1, and a client polling the first page of a collection
+        When
+            An indicator was added to the collection between the polls
+        Then
+            Validate that each poll searches the collection again, and returns the new indicator.
+    """
+    iocs = util_load_json('test_files/ip_iocs.json')
+    first_iocs = dict(iocs, iocs=iocs['iocs'][:1], total=1)
+    second_iocs = dict(iocs, iocs=iocs['iocs'][:2], total=2)
+    mocker.patch('TAXII2Server.SERVER', taxii2_server_v21)
+    mocker.patch('CommonServerPython.get_demisto_version', return_value={'version': '6.5.0', 'buildNumber': '12345'})
+    search_indicators = mocker.patch.object(demisto, 'searchIndicators', side_effect=[
+        first_iocs, {'iocs': [], 'total': 1}, second_iocs, {'iocs': [], 'total': 2}])
+    mocker.patch.object(demisto, 'params', return_value={'res_size': '100'})
+    with APP.test_client() as test_client:
+        url = '/threatintel/collections/4c649e16-2bb7-50f5-8826-2a2d0a0b9631/objects/?limit=4'
+        first_response = test_client.get(url, headers=HEADERS)
+        second_response = test_client.get(url, headers=HEADERS)
+
+    assert search_indicators.call_count == 4
+    assert len(first_response.json['objects']) == 2  # an indicator and its extension
+    assert len(second_response.json['objects']) == 4
@@ -14,6 +14,7 @@ from packaging.version import Version
 from freezegun import freeze_time
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Any
+from zipfile import ZipFile
 
 # pylint: disable=no-member
 
@@ -21,7 +22,7 @@ from typing import List, Dict, Optional, Tuple, Any
 from Tests.Marketplace.marketplace_services import Pack, input_to_list, get_valid_bool, convert_price, \
     get_updated_server_version, load_json, \
     store_successful_and_failed_packs_in_ci_artifacts, is_ignored_pack_file, \
-    is_the_only_rn_in_block
+    is_the_only_rn_in_block, PackArtifactsCache
 from Tests.Marketplace.marketplace_constants import PackStatus, PackFolders, Metadata, GCPConfig, BucketUploadFlow, \
     PACKS_FOLDER, PackTags, BASE_PACK_DEPENDENCY_DICT
 
@@ -2401,6 +2402,146 @@ class TestImageClassification:
         assert dummy_pack.is_author_image(file_path) is result
 
 
+class TestPackArtifactsCache:
+    """ Test class for the packs artifacts cache.
+    """
+
+    @staticmethod
+    def create_pack(tmp_path, pack_name='TestPack'):
+        pack_path = os.path.join(tmp_path, pack_name)
+        os.makedirs(os.path.join(pack_path, 'Integrations'))
+        with open(os.path.join(pack_path, 'metadata.json'), 'w') as metadata_file:
+            metadata_file.write('{"name": "TestPack"}')
+        with open(os.path.join(pack_path, 'Integrations', 'integration.yml'), 'w') as integration_file:
+            integration_file.write('commonfields: {}')
+        return Pack(pack_name, pack_path)
+
+    def test_calculate_key(self, tmp_path):
+        """
+           Given:
+               - A pack folder.
+           When:
+               - Calculating the cache key of the pack after a file was changed, after a file was renamed and with
+                 other build parameters.
+           Then:
+               - Validate that the key is the same only for the same pack content and build parameters.
+        """
+        pack = self.create_pack(tmp_path)
+        key = PackArtifactsCache.calculate_key(pack.path, {'signature_key': 'key'})
+        assert key == PackArtifactsCache.calculate_key(pack.path, {'signature_key': 'key'})
+        assert key != PackArtifactsCache.calculate_key(pack.path, {'signature_key': 'other_key'})
+
+        integrations_path = os.path.join(pack.path, 'Integrations')
+        os.rename(os.path.join(integrations_path, 'integration.yml'), os.path.join(integrations_path, 'other.yml'))
+        renamed_key = PackArtifactsCache.calculate_key(pack.path, {'signature_key': 'key'})
+        assert renamed_key != key
+
+        with open(os.path.join(integrations_path, 'other.yml'), 'a') as integration_file:
+            integration_file.write('\nname: changed')
+        assert PackArtifactsCache.calculate_key(pack.path, {'signature_key': 'key'}) not in (key, renamed_key)
+
+    def test_load_and_cache_artifacts(self, tmp_path):
+        """
+           Given:
+               - A pack that was zipped and cached.
+           When:
+               - Loading the pack artifacts from the cache, before and after the pack was changed.
+           Then:
+               - Validate that the cached zip is restored to the pack zip path only when the pack was not changed.
+               - Validate that only the latest entry of the pack is kept in the cache.
+        """
+        artifacts_cache = PackArtifactsCache(os.path.join(tmp_path, 'cache'))
+        pack = self.create_pack(tmp_path)
+        is_cached, cache_key = pack.load_cached_artifacts(artifacts_cache, {'signature_key': ''})
+        assert not is_cached
+        task_status, zip_path = pack.zip_pack()
+        assert task_status
+        pack.cache_artifacts(artifacts_cache, cache_key)
+
+        os.remove(zip_path)
+        pack.zip_path = None
+        is_cached, _ = pack.load_cached_artifacts(artifacts_cache, {'signature_key': ''})
+        assert is_cached
+        assert pack.zip_path == zip_path
+        assert os.path.isfile(zip_path)
+
+        with open(os.path.join(pack.path, 'metadata.json'), 'w') as metadata_file:
+            metadata_file.write('{"name": "TestPack", "currentVersion": "1.0.1"}')
+        is_cached, new_cache_key = pack.load_cached_artifacts(artifacts_cache, {'signature_key': ''})
+        assert not is_cached
+        pack.zip_pack()
+        pack.cache_artifacts(artifacts_cache, new_cache_key)
+        assert os.listdir(os.path.join(tmp_path, 'cache', 'TestPack')) == [new_cache_key]
+
+    @freeze_time("2022-01-01 00:00:00")
+    def test_load_artifacts_after_format_metadata(self, tmp_path, dummy_pack_metadata):
+        """
+           Given:
+               - A pack whose zip was cached after its metadata was formatted in a build.
+           When:
+               - Formatting the pack metadata again in the same build, and in the next build.
+           Then:
+               - Validate that the cached zip is restored in the same build, with the metadata of the build.
+               - Validate that the cached zip is not restored in the next build, as its metadata is of another build.
+        """
+        artifacts_cache = PackArtifactsCache(os.path.join(tmp_path, 'cache'))
+        pack = self.create_pack(tmp_path)
+        pack._user_metadata = dummy_pack_metadata
+        pack._displayed_integration_images = []
+        index_folder_path = os.path.join(tmp_path, 'index')
+
+        def format_metadata_and_load_cached_artifacts(build_number, commit_hash):
+            task_status, _ = pack.format_metadata(index_folder_path=index_folder_path, packs_dependencies_mapping={},
+                                                  build_number=build_number, commit_hash=commit_hash,
+                                                  statistics_handler=None)
+            assert task_status
+            return pack.load_cached_artifacts(artifacts_cache, {'signature_key': ''})
+
+        _, cache_key = format_metadata_and_load_cached_artifacts('1000', 'first_commit')
+        _, zip_path = pack.zip_pack()
+        pack.cache_artifacts(artifacts_cache, cache_key)
+        os.remove(zip_path)
+
+        is_cached, _ = format_metadata_and_load_cached_artifacts('1000', 'first_commit')
+        assert is_cached
+        with ZipFile(zip_path) as pack_zip:
+            metadata = json.loads(pack_zip.read('metadata.json'))
+        assert metadata['versionInfo'] == '1000'
+        assert metadata['commit'] == 'first_commit'
+        os.remove(zip_path)
+
+        is_cached, _ = format_metadata_and_load_cached_artifacts('1001', 'second_commit')
+        assert not is_cached
+        assert not os.path.isfile(zip_path)
+
+    def test_load_encrypted_artifacts(self, tmp_path, monkeypatch):
+        """
+           Given:
+               - A pack whose encrypted zips were cached.
+           When:
+               - Loading the pack artifacts from the cache.
+           Then:
+               - Validate that all the pack zips are restored and copied to the private artifacts directory.
+        """
+        monkeypatch.chdir(tmp_path)
+        artifacts_cache = PackArtifactsCache(os.path.join(tmp_path, 'cache'))
+        pack = self.create_pack(tmp_path)
+        _, cache_key = pack.load_cached_artifacts(artifacts_cache, {'encryption_key': 'key'}, 'key')
+        for artifact_path in pack.get_artifacts_paths('key'):
+            with open(artifact_path, 'w') as artifact_file:
+                artifact_file.write(os.path.basename(artifact_path))
+        pack.cache_artifacts(artifacts_cache, cache_key, 'key')
+        for artifact_path in pack.get_artifacts_paths('key'):
+            os.remove(artifact_path)
+
+        is_cached, _ = pack.load_cached_artifacts(artifacts_cache, {'encryption_key': 'key'}, 'key', 'private')
+        assert is_cached
+        assert pack.zip_path == f'{pack.path}_not_encrypted.zip'
+        assert all(os.path.isfile(artifact_path) for artifact_path in pack.get_artifacts_paths('key'))
+        assert sorted(os.listdir(os.path.join(tmp_path, 'private'))) == \
+            ['TestPack.enc2.zip', 'TestPack.zip', 'TestPack_not_encrypted.zip']
+
+
 def create_rn_config_file(rn_dir: str, version: str, data: Dict):
     with open(f'{rn_dir}/{version}.json', 'w') as f:
         f.write(json.dumps(data))
@@ -340,3 +340,117 @@ def test_is_pack_hidden(tmp_path, pack_metadata_content, expected):
     pack_metadata_file = tmp_path / PACKS_PACK_META_FILE_NAME
     pack_metadata_file.write_text(json.dumps(pack_metadata_content))
     assert script.is_pack_hidden(str(tmp_path)) == expected
+
+
+class MockMarketplaceServer:
+    """
+    Mocks the marketplace requests of the server, for packs with the given required dependencies.
+    """
+
+    def __init__(self, packs_dependencies, unknown_packs=(), failed_installations=()):
+        self.packs_dependencies = packs_dependencies
+        self.unknown_packs = unknown_packs
+        self.failed_installations = failed_installations
+        self.dependencies_requests = []
+        self.installation_requests = []
+
+    def get_dependencies(self, pack_id):
+        dependencies = []
+        for dependency_id in self.packs_dependencies.get(pack_id, []):
+            dependencies.append(dependency_id)
+            dependencies.extend(self.get_dependencies(dependency_id))
+        return dependencies
+
+    def generic_request_func(self, client, path: str, method, body=None, accept=None, _request_timeout=None):
+        if path == '/contentpacks/marketplace/search/dependencies':
+            packs_ids = [pack['id'] for pack in body]
+            self.dependencies_requests.append(packs_ids)
+            if any(pack_id in self.unknown_packs for pack_id in packs_ids):
+                return '{}', 400, None
+            dependencies = {}
+            for pack_id in packs_ids:
+                for dependency_id in self.get_dependencies(pack_id):
+                    dependencies.setdefault(dependency_id, {
+                        'id': dependency_id,
+                        'dependants': {},
+                        'extras': {'pack': {'currentVersion': '1.0.0'}}
+                    })
+            for dependency_id, dependency in dependencies.items():
+                for dependant_id in [pack_id for pack_id in list(dependencies) + packs_ids
+                                     if dependency_id in self.packs_dependencies.get(pack_id, [])]:
+                    dependency['dependants'][dependant_id] = {'level': 'required'}
+            return json.dumps({'dependencies': list(dependencies.values())}), 200, None
+        if path == '/contentpacks/marketplace/install':
+            packs_ids = [pack['id'] for pack in body['packs']]
+            self.installation_requests.append(packs_ids)
+            if any(pack_id in self.failed_installations for pack_id in packs_ids):
+                return '{"message": "failed"}', 500, None
+            return json.dumps(body['packs']), 200, None
+        pack_id = path.split('/')[-1]
+        return json.dumps({'id': pack_id, 'currentVersion': '1.0.0'}), 200, None
+
+
+def test_search_and_install_packs_in_dependencies_waves(mocker):
+    """
+    Given
+    - Packs that share a dependency, and a pack whose dependency has its own dependency.
+    When
+    - Searching and installing the packs and their dependencies.
+    Then
+    - Ensure the dependencies of all the packs are queried in a single request.
+    - Ensure each pack is installed once, after its dependencies.
+    """
+    server = MockMarketplaceServer({'A': ['B'], 'B': ['C'], 'D': ['C']})
+    mocker.patch.object(demisto_client, 'generic_request_func', side_effect=server.generic_request_func)
+    mocker.patch.object(script, 'get_pack_display_name', side_effect=lambda pack_id: pack_id)
+    mocker.patch.object(script, 'is_pack_deprecated', return_value=False)
+    mocker.patch.object(script, 'SUCCESS_FLAG', True)
+
+    installed_packs, success = script.search_and_install_packs_and_their_dependencies(['A', 'D', 'E'], MockClient())
+
+    assert success is True
+    assert sorted(installed_packs) == ['A', 'B', 'C', 'D', 'E']
+    assert server.dependencies_requests == [['A', 'D', 'E']]
+    assert server.installation_requests == [['C', 'E'], ['B', 'D'], ['A']]
+
+
+def test_packs_dependencies_graph_unknown_pack(mocker):
+    """
+    Given
+    - A batch of packs, one of them unknown to the server.
+    When
+    - Querying the dependencies of the packs.
+    Then
+    - Ensure the dependencies of each pack are queried separately, and the known packs are resolved.
+    - Ensure the queried dependencies are not queried again.
+    """
+    server = MockMarketplaceServer({'A': ['B']}, unknown_packs=['Unknown'])
+    mocker.patch.object(demisto_client, 'generic_request_func', side_effect=server.generic_request_func)
+    mocker.patch.object(script, 'get_pack_display_name', side_effect=lambda pack_id: pack_id)
+    mocker.patch.object(script, 'is_pack_deprecated', return_value=False)
+
+    graph = script.PacksDependenciesGraph(MockClient(), max_workers=2)
+    graph.add_packs(['A', 'Unknown'])
+    graph.add_packs(['A'])
+
+    assert server.dependencies_requests == [['A', 'Unknown'], ['A'], ['Unknown']]
+    assert list(graph.packs_data) == ['A', 'B', 'Unknown']
+    assert graph.get_installation_waves() == [[{'id': 'B', 'version': '1.0.0'}, {'id': 'Unknown', 'version': '1.0.0'}],
+                                              [{'id': 'A', 'version': '1.0.0'}]]
+
+
+def test_install_packs_in_waves_with_failure(mocker):
+    """
+    Given
+    - Waves of packs to install, where the installation of the first wave fails.
+    When
+    - Installing the waves.
+    Then
+    - Ensure the next waves are not installed.
+    """
+    server = MockMarketplaceServer({}, failed_installations=['B'])
+    mocker.patch.object(demisto_client, 'generic_request_func', side_effect=server.generic_request_func)
+
+    waves = [[{'id': 'B', 'version': '1.0.0'}], [{'id': 'A', 'version': '1.0.0'}]]
+    assert script.install_packs_in_waves(MockClient(), 'my_host', waves) is False
+    assert server.installation_requests == [['B']]
@@ -3,10 +3,16 @@
 import copy
 import json
 import os
+import shutil
+from zipfile import ZipFile
 
 import pytest
 from unittest.mock import patch
-from Tests.Marketplace.upload_packs import get_packs_names, get_updated_private_packs, is_private_packs_updated
+from Tests.Marketplace import upload_packs
+from Tests.Marketplace.upload_packs import get_packs_names, get_updated_private_packs, is_private_packs_updated, \
+    PacksUploadPipeline
+from Tests.Marketplace.marketplace_services import Pack
+from Tests.Marketplace.marketplace_constants import PackStatus
 
 
 # disable-secrets-detection-start
@@ -607,3 +613,95 @@ class TestUpdatedPrivatePacks:
         private_index_json.get("packs").append({"id": "new_private_pack", "contentCommitHash": "111"})
         mocker.patch('Tests.Marketplace.upload_packs.load_json', return_value=private_index_json)
         assert is_private_packs_updated(public_index_json, index_file_path)
+
+
+class LocalBlob:
+    """ A stand-in for a google cloud storage blob, kept as a file in a local folder. """
+
+    def __init__(self, bucket_path, name):
+        self.name = name
+        self.path = os.path.join(bucket_path, name)
+        self.public_url = f'file://{self.path}'
+        self.cache_control = None
+
+    def upload_from_file(self, file_obj):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'wb') as blob_file:
+            shutil.copyfileobj(file_obj, blob_file)
+
+
+class LocalBucket:
+    """ A stand-in for a google cloud storage bucket, kept in a local folder. """
+
+    def __init__(self, bucket_path):
+        self.name = 'local-bucket'
+        self.bucket_path = bucket_path
+
+    def blob(self, name):
+        return LocalBlob(self.bucket_path, name)
+
+    def list_blobs(self, prefix=''):
+        blobs = []
+        for root, _, files in os.walk(self.bucket_path):
+            for file_name in files:
+                name = os.path.relpath(os.path.join(root, file_name), self.bucket_path)
+                if name.startswith(prefix):
+                    blobs.append(LocalBlob(self.bucket_path, name))
+        return blobs
+
+
+class TestPacksUploadPipeline:
+    @staticmethod
+    def create_pack(packs_path, pack_name):
+        pack_path = os.path.join(packs_path, pack_name)
+        os.makedirs(os.path.join(pack_path, 'Integrations'))
+        with open(os.path.join(pack_path, 'metadata.json'), 'w') as metadata_file:
+            json.dump({'name': pack_name}, metadata_file)
+        with open(os.path.join(pack_path, 'Integrations', 'integration.yml'), 'w') as integration_file:
+            integration_file.write('name: integration')
+        pack = Pack(pack_name, pack_path)
+        pack.latest_version = '1.0.0'
+        return pack
+
+    def test_run(self, mocker, tmp_path):
+        """
+        Given
+         - Three packs, where the build is not updated for the second pack.
+        When
+         - Running the packs upload stages with a local folder as the storage bucket.
+        Then
+         - Ensure the packs are zipped, uploaded to the bucket and updated in the index.
+         - Ensure the pack that is not updated is skipped.
+         - Ensure the index is updated in the order of the packs.
+        """
+        packs = [self.create_pack(str(tmp_path / 'packs'), pack_name) for pack_name in ['PackA', 'PackB', 'PackC']]
+        index_folder_path = str(tmp_path / 'index')
+        os.makedirs(index_folder_path)
+        bucket_path = str(tmp_path / 'bucket')
+        mocker.patch.object(Pack, 'collect_content_items', return_value=True)
+        mocker.patch.object(Pack, 'upload_integration_images', return_value=True)
+        mocker.patch.object(Pack, 'upload_author_image', return_value=True)
+        mocker.patch.object(Pack, 'detect_modified', return_value=(True, []))
+        mocker.patch.object(Pack, 'format_metadata', return_value=(True, False))
+        mocker.patch.object(Pack, 'prepare_release_notes', autospec=True,
+                            side_effect=lambda pack, *args: (True, pack.name == 'PackB'))
+        update_index_folder = mocker.patch('Tests.Marketplace.upload_packs.update_index_folder',
+                                           wraps=upload_packs.update_index_folder)
+
+        pipeline = PacksUploadPipeline(2, LocalBucket(bucket_path), 'content/packs', [], None, index_folder_path,
+                                       'current_commit', 'previous_commit', {}, '1', None,
+                                       {pack.name: pack for pack in packs}, 'xsoar', None, True, False)
+        pipeline.run(packs)
+
+        assert [pack.status for pack in packs] == [PackStatus.SUCCESS.name,
+                                                   PackStatus.PACK_IS_NOT_UPDATED_IN_RUNNING_BUILD.name,
+                                                   PackStatus.SUCCESS.name]
+        assert [call.kwargs['pack_name'] for call in update_index_folder.call_args_list] == ['PackA', 'PackC']
+        for pack_name in ['PackA', 'PackC']:
+            with ZipFile(os.path.join(bucket_path, 'content/packs', pack_name, '1.0.0', f'{pack_name}.zip')) as zip_file:
+                assert set(zip_file.namelist()) == {'metadata.json', 'Integrations/integration.yml'}
+            assert set(os.listdir(os.path.join(index_folder_path, pack_name))) == {'metadata.json',
+                                                                                   'metadata-1.0.0.json'}
+        assert not os.path.exists(os.path.join(bucket_path, 'content/packs', 'PackB'))
+        assert len(pipeline.stages_durations['zip']) == 2
+        assert len(pipeline.stages_durations['index']) == 2
@@ -1,6 +1,7 @@
 import base64
 import fnmatch
 import glob
+import hashlib
 import json
 import os
 import re
@@ -350,6 +351,18 @@ class Pack(object):
     def zip_path(self):
         return self._zip_path
 
+    @zip_path.setter
+    def zip_path(self, zip_path):
+        """ setter of zip_path, for a pack that was zipped by a copy of it in another process.
+        """
+        self._zip_path = zip_path
+
+    @property
+    def remove_files_list(self):
+        """ list: temporary files to delete from the pack folder before zipping it.
+        """
+        return self._remove_files_list
+
     @property
     def is_modified(self):
         return self._is_modified
@@ -797,11 +810,14 @@ class Pack(object):
 
         try:
             if signature_string:
-                with open("keyfile", "wb") as keyfile:
+                # a key file per pack, as packs may be signed concurrently
+                keyfile_path = f"{self._pack_name}_keyfile"
+                with open(keyfile_path, "wb") as keyfile:
                     keyfile.write(signature_string.encode())
-                arg = f'./signDirectory {self._pack_path} keyfile base64'
+                arg = f'./signDirectory {self._pack_path} {keyfile_path} base64'
                 signing_process = subprocess.Popen(arg, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
                 output, err = signing_process.communicate()
+                os.remove(keyfile_path)
 
                 if err:
                     logging.error(f"Failed to sign pack for {self._pack_name} - {str(err)}")
@@ -872,17 +888,31 @@ class Pack(object):
                                                      f' "{secondary_encryption_key}"'
             subprocess.call(full_command_with_secondary_encryption, shell=True)
 
-            new_artefacts = os.path.join(current_working_dir, private_artifacts_dir)
-            if os.path.exists(new_artefacts):
-                shutil.rmtree(new_artefacts)
-            os.mkdir(path=new_artefacts)
-            shutil.copy(zip_pack_path, os.path.join(new_artefacts, f'{pack_name}_not_encrypted.zip'))
-            shutil.copy(output_file, os.path.join(new_artefacts, f'{pack_name}.zip'))
-            shutil.copy(secondary_encryption_key_output_file, os.path.join(new_artefacts, f'{pack_name}.enc2.zip'))
+            Pack.copy_to_private_artifacts(zip_pack_path, output_file, secondary_encryption_key_output_file, pack_name,
+                                           os.path.join(current_working_dir, private_artifacts_dir))
             os.chdir(current_working_dir)
         except (subprocess.CalledProcessError, shutil.Error) as error:
             print(f"Error while trying to encrypt pack. {error}")
 
+    @staticmethod
+    def copy_to_private_artifacts(zip_pack_path, encrypted_zip_pack_path, secondary_encrypted_zip_pack_path, pack_name,
+                                  private_artifacts_path):
+        """ Copies the pack zip and its encrypted zips to the private artifacts directory.
+
+        Args:
+            zip_pack_path (str): The path to the not encrypted zip pack.
+            encrypted_zip_pack_path (str): The path to the zip pack encrypted with the encryption key.
+            secondary_encrypted_zip_pack_path (str): The path to the zip pack encrypted with the secondary key.
+            pack_name (str): The name of the pack.
+            private_artifacts_path (str): The full path of the private artifacts directory.
+        """
+        if os.path.exists(private_artifacts_path):
+            shutil.rmtree(private_artifacts_path)
+        os.mkdir(path=private_artifacts_path)
+        shutil.copy(zip_pack_path, os.path.join(private_artifacts_path, f'{pack_name}_not_encrypted.zip'))
+        shutil.copy(encrypted_zip_pack_path, os.path.join(private_artifacts_path, f'{pack_name}.zip'))
+        shutil.copy(secondary_encrypted_zip_pack_path, os.path.join(private_artifacts_path, f'{pack_name}.enc2.zip'))
+
     def decrypt_pack(self, encrypted_zip_pack_path, decryption_key):
         """ decrypt the pack in order to see that the pack was encrypted in the first place.
 
@@ -958,6 +988,68 @@ class Pack(object):
         final_path_to_zipped_pack = f"{source_path}.zip"
         return task_status, final_path_to_zipped_pack
 
+    def get_artifacts_paths(self, encryption_key=""):
+        """ Returns the full paths of the zip artifacts that zip_pack creates, the first is the pack zip_path.
+
+        Args:
+            encryption_key (str): The key the pack is encrypted with, if the pack should be encrypted.
+
+        Returns:
+            list: full paths of the pack zip artifacts.
+        """
+        if not encryption_key:
+            return [f"{self._pack_path}.zip"]
+        return [f"{self._pack_path}_not_encrypted.zip", f"{self._pack_path}.zip", f"{self._pack_path}.enc2.zip"]
+
+    def load_cached_artifacts(self, artifacts_cache, build_parameters, encryption_key="",
+                              private_artifacts_dir='private_artifacts'):
+        """ Restores the zip artifacts of the pack from the cache, if the pack folder and the build parameters were not
+        changed since they were cached. Should be called after removing the unwanted files and before signing the pack.
+
+        Args:
+            artifacts_cache (PackArtifactsCache): The cache of the packs artifacts.
+            build_parameters (dict): The parameters the artifacts are built with, e.g. the signature key.
+            encryption_key (str): The key the pack is encrypted with, if the pack should be encrypted.
+            private_artifacts_dir (str): The chosen name for the private artifacts directory.
+
+        Returns:
+            bool: whether the artifacts were restored from the cache.
+            str: the cache key of the pack, to cache the artifacts with once they are built.
+        """
+        try:
+            cache_key = PackArtifactsCache.calculate_key(self._pack_path, build_parameters)
+        except OSError:
+            logging.exception(f"Failed to calculate the artifacts cache key of {self._pack_name} pack")
+            return False, None
+
+        artifacts_paths = self.get_artifacts_paths(encryption_key)
+        if not artifacts_cache.get(self._pack_name, cache_key, artifacts_paths):
+            return False, cache_key
+
+        if encryption_key:
+            try:
+                zip_pack_path, encrypted_zip_pack_path, secondary_encrypted_zip_pack_path = artifacts_paths
+                Pack.copy_to_private_artifacts(zip_pack_path, encrypted_zip_pack_path,
+                                               secondary_encrypted_zip_pack_path, self._pack_name,
+                                               os.path.join(os.getcwd(), private_artifacts_dir))
+            except (OSError, shutil.Error):
+                logging.exception(f"Failed to copy the cached artifacts of {self._pack_name} pack to private artifacts")
+                return False, cache_key
+
+        self._zip_path = artifacts_paths[0]
+        return True, cache_key
+
+    def cache_artifacts(self, artifacts_cache, cache_key, encryption_key=""):
+        """ Stores the zip artifacts of the pack in the cache.
+
+        Args:
+            artifacts_cache (PackArtifactsCache): The cache of the packs artifacts.
+            cache_key (str): The cache key of the pack, as returned by load_cached_artifacts.
+            encryption_key (str): The key the pack is encrypted with, if the pack should be encrypted.
+        """
+        if cache_key:
+            artifacts_cache.put(self._pack_name, cache_key, self.get_artifacts_paths(encryption_key))
+
     def detect_modified(self, content_repo, index_folder_path, current_commit_hash, previous_commit_hash):
         """ Detects pack modified files.
 
@@ -2847,6 +2939,103 @@ class Pack(object):
                 predecessor_version < bc_ver <= rn_version}
 
 
+class PackArtifactsCache(object):
+    """ Content addressed cache of the packs zip artifacts, so that a pack that was not changed since a previous build
+    is not signed, zipped and encrypted again.
+
+    An entry is keyed by a hash of the pack folder and of the build parameters that affect the artifacts, and is stored
+    at <cache_path>/<pack_name>/<key>/. Only the latest entry of each pack is kept.
+    The pack folder is hashed after its metadata and changelog are formatted, so the key also covers the build number,
+    commit hash and statistics written to them, as they are signed and zipped with the pack. A cached zip is restored
+    only when the pack is built again in the same build, e.g. when the upload is rerun.
+
+    Args:
+        cache_path (str): Full path to the cache folder, which should be kept between builds.
+
+    Attributes:
+        CACHE_VERSION (str): version of the cache entries, should be bumped when the artifacts are built differently.
+
+    """
+    CACHE_VERSION = "1"
+
+    def __init__(self, cache_path):
+        self._cache_path = cache_path
+
+    @staticmethod
+    def calculate_key(pack_path, build_parameters):
+        """ Calculates the cache key of a pack, from the relative paths and contents of the files in the pack folder
+        and the build parameters.
+
+        Args:
+            pack_path (str): Full path to pack folder.
+            build_parameters (dict): the parameters the artifacts are built with, e.g. the signature key.
+
+        Returns:
+            str: the cache key of the pack.
+        """
+        pack_hash = hashlib.sha256()
+        pack_hash.update(json.dumps({'cache_version': PackArtifactsCache.CACHE_VERSION, **build_parameters},
+                                    sort_keys=True).encode())
+        for root, dirs, files in os.walk(pack_path, topdown=True):
+            dirs.sort()
+            for file_name in sorted(files):
+                full_file_path = os.path.join(root, file_name)
+                pack_hash.update(os.path.relpath(full_file_path, pack_path).encode() + b'\0')
+                with open(full_file_path, 'rb') as pack_file:
+                    for chunk in iter(lambda: pack_file.read(1024 * 1024), b''):
+                        pack_hash.update(chunk)
+                pack_hash.update(b'\0')
+        return pack_hash.hexdigest()
+
+    def get(self, pack_name, key, artifacts_paths):
+        """ Copies the cached artifacts of the pack to their paths.
+
+        Args:
+            pack_name (str): the name of the pack.
+            key (str): the cache key of the pack.
+            artifacts_paths (list): full paths of the artifacts to restore.
+
+        Returns:
+            bool: whether all the artifacts were found in the cache and restored.
+        """
+        entry_path = os.path.join(self._cache_path, pack_name, key)
+        cached_artifacts = [os.path.join(entry_path, os.path.basename(path)) for path in artifacts_paths]
+        if not all(os.path.isfile(cached_artifact) for cached_artifact in cached_artifacts):
+            return False
+        try:
+            for cached_artifact, artifact_path in zip(cached_artifacts, artifacts_paths):
+                shutil.copy(cached_artifact, artifact_path)
+        except OSError:
+            logging.exception(f"Failed to restore the cached artifacts of {pack_name} pack")
+            return False
+        logging.info(f"Restored the cached artifacts of {pack_name} pack")
+        return True
+
+    def put(self, pack_name, key, artifacts_paths):
+        """ Stores the artifacts of the pack in the cache, instead of its previous entry. Failing to store the artifacts
+        does not fail the build.
+
+        Args:
+            pack_name (str): the name of the pack.
+            key (str): the cache key of the pack.
+            artifacts_paths (list): full paths of the artifacts to store.
+        """
+        pack_cache_path = os.path.join(self._cache_path, pack_name)
+        temp_entry_path = os.path.join(pack_cache_path, f'.{key}.{os.getpid()}')
+        try:
+            os.makedirs(temp_entry_path, exist_ok=True)
+            for artifact_path in artifacts_paths:
+                shutil.copy(artifact_path, os.path.join(temp_entry_path, os.path.basename(artifact_path)))
+            for entry in os.listdir(pack_cache_path):
+                if entry != os.path.basename(temp_entry_path):
+                    shutil.rmtree(os.path.join(pack_cache_path, entry), ignore_errors=True)
+            # the entry is completed under a temporary name, so a partial entry is never restored
+            os.rename(temp_entry_path, os.path.join(pack_cache_path, key))
+        except OSError:
+            logging.exception(f"Failed to cache the artifacts of {pack_name} pack")
+            shutil.rmtree(temp_entry_path, ignore_errors=True)
+
+
 # HELPER FUNCTIONS
 
 
@@ -7,11 +7,11 @@ import glob
 import re
 import sys
 import demisto_client
-from threading import Thread, Lock
-from demisto_sdk.commands.common.tools import run_threads_list
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from google.cloud.storage import Bucket
 from packaging.version import Version
-from typing import List
+from typing import Dict, List, Optional, Set
 
 from Tests.Marketplace.marketplace_services import init_storage_client, Pack, load_json
 from Tests.Marketplace.upload_packs import download_and_extract_index
@@ -23,6 +23,9 @@ PACK_METADATA_FILE = 'pack_metadata.json'
 PACK_PATH_VERSION_REGEX = re.compile(fr'^{GCPConfig.PRODUCTION_STORAGE_BASE_PATH}/[A-Za-z0-9-_.]+/(\d+\.\d+\.\d+)/[A-Za-z0-9-_.]'
                                      r'+\.zip$')
 SUCCESS_FLAG = True
+# The number of packs to query the dependencies of in a single request, and the number of concurrent requests.
+DEPENDENCIES_BATCH_SIZE = 20
+MAX_WORKERS = 4
 
 
 def get_pack_display_name(pack_id: str) -> str:
@@ -57,13 +60,13 @@ def is_pack_hidden(pack_id: str) -> bool:
     return False
 
 
-def create_dependencies_data_structure(response_data: dict, dependants_ids: list, dependencies_data: list,
+def create_dependencies_data_structure(response_data: list, dependants_ids: list, dependencies_data: list,
                                        checked_packs: list):
     """ Recursively creates the packs' dependencies data structure for the installation requests
     (only required and uninstalled).
 
     Args:
-        response_data (dict): The GET /search/dependencies response data.
+        response_data (list): The POST /search/dependencies response dependencies.
         dependants_ids (list): A list of the dependant packs IDs.
         dependencies_data (list): The dependencies data structure to be created.
         checked_packs (list): Required dependants that were already found.
@@ -87,51 +90,33 @@ def create_dependencies_data_structure(response_data: dict, dependants_ids: list
         create_dependencies_data_structure(response_data, next_call_dependants_ids, dependencies_data, checked_packs)
 
 
-def get_pack_dependencies(client: demisto_client, pack_data: dict, lock: Lock):
-    """ Get the pack's required dependencies.
+def search_packs_dependencies(client: demisto_client, packs_data: list) -> Optional[list]:
+    """ Makes a single dependencies search request for the packs.
 
     Args:
         client (demisto_client): The configured client to use.
-        pack_data (dict): Contains the pack ID and version.
-        lock (Lock): A lock object.
+        packs_data (list): Contains the packs IDs and versions.
     Returns:
-        (list) The pack's dependencies.
+        (list) The dependencies of the packs as returned by the server, or None if the server could not find the
+        dependencies of the packs.
     """
-    pack_id = pack_data['id']
-    logging.debug(f'Getting dependencies for pack {pack_id}')
-    try:
-        response_data, status_code, _ = demisto_client.generic_request_func(
-            client,
-            path='/contentpacks/marketplace/search/dependencies',
-            method='POST',
-            body=[pack_data],
-            accept='application/json',
-            _request_timeout=None
-        )
-
-        if 200 <= status_code < 300:
-            dependencies_data: list = []
-            dependants_ids = [pack_id]
-            reseponse_data = ast.literal_eval(response_data).get('dependencies', [])
-            create_dependencies_data_structure(reseponse_data, dependants_ids, dependencies_data, dependants_ids)
-            dependencies_str = ', '.join([dep['id'] for dep in dependencies_data])
-            if dependencies_data:
-                logging.debug(f'Found the following dependencies for pack {pack_id}: {dependencies_str}')
-            return dependencies_data
-        if status_code == 400:
-            logging.error(f'Unable to find dependencies for {pack_id}.')
-            return []
-        else:
-            result_object = ast.literal_eval(response_data)
-            msg = result_object.get('message', '')
-            raise Exception(f'Failed to get pack {pack_id} dependencies - with status code {status_code}\n{msg}\n')
-    except Exception:
-        logging.exception(f'The request to get pack {pack_id} dependencies has failed.')
-
-        lock.acquire()
-        global SUCCESS_FLAG
-        SUCCESS_FLAG = False
-        lock.release()
+    response_data, status_code, _ = demisto_client.generic_request_func(
+        client,
+        path='/contentpacks/marketplace/search/dependencies',
+        method='POST',
+        body=packs_data,
+        accept='application/json',
+        _request_timeout=None
+    )
+
+    if 200 <= status_code < 300:
+        return ast.literal_eval(response_data).get('dependencies', [])
+    if status_code == 400:
+        return None
+    result_object = ast.literal_eval(response_data)
+    msg = result_object.get('message', '')
+    packs_ids_str = ', '.join([pack['id'] for pack in packs_data])
+    raise Exception(f'Failed to get pack {packs_ids_str} dependencies - with status code {status_code}\n{msg}\n')
 
 
 def search_pack(client: demisto_client,
@@ -328,6 +313,26 @@ def install_packs(client: demisto_client,
     if is_nightly:
         install_nightly_packs(client, host, packs_to_install)
         return
+    if not send_install_packs_request(client, host, packs_to_install, request_timeout):
+        global SUCCESS_FLAG
+        SUCCESS_FLAG = False
+    return SUCCESS_FLAG
+
+
+def send_install_packs_request(client: demisto_client,
+                               host: str,
+                               packs_to_install: list,
+                               request_timeout: int = 999999) -> bool:
+    """ Make a packs installation request.
+
+    Args:
+        client (demisto_client): The configured client to use.
+        host (str): The server URL.
+        packs_to_install (list): A list of the packs to install.
+        request_timeout (int): Timeout settings for the installation request.
+    Returns:
+        (bool): Whether the packs were installed.
+    """
     request_data = {
         'packs': packs_to_install,
         'ignoreWarnings': True
@@ -356,63 +361,190 @@ def install_packs(client: demisto_client,
             result_object = ast.literal_eval(response_data)
             message = result_object.get('message', '')
             raise Exception(f'Failed to install packs - with status code {status_code}\n{message}')
+        return True
     except Exception as e:
         logging.exception(f'The request to install packs has failed. Additional info: {str(e)}')
-        global SUCCESS_FLAG
-        SUCCESS_FLAG = False
+        return False
 
-    finally:
-        return SUCCESS_FLAG
 
+class PacksDependenciesGraph:
+    """ Resolves the packs to install with their required dependencies, and orders their installation.
 
-def search_pack_and_its_dependencies(client: demisto_client,
-                                     pack_id: str,
-                                     packs_to_install: list,
-                                     installation_request_body: list,
-                                     lock: Lock):
-    """ Searches for the pack of the specified file path, as well as its dependencies,
-        and updates the list of packs to be installed accordingly.
+    The packs are searched and their dependencies are queried concurrently, with up to max_workers requests at a time,
+    and the dependencies of up to batch_size packs are queried in a single request. The responses are kept per pack,
+    so a dependency shared by several packs is resolved once.
+    The packs are installed in waves, where each wave holds the packs whose dependencies were installed in the
+    previous waves.
 
     Args:
         client (demisto_client): The configured client to use.
-        pack_id (str): The id of the pack to be installed.
-        packs_to_install (list) A list of the packs to be installed in this iteration.
-        installation_request_body (list): A list of packs to be installed, in the request format.
-        lock (Lock): A lock object.
+        max_workers (int): The maximal number of concurrent requests to the server.
+        batch_size (int): The maximal number of packs to query the dependencies of in a single request.
     """
-    pack_data = {}
-    if pack_id not in packs_to_install:
+
+    def __init__(self, client: demisto_client, max_workers: int = MAX_WORKERS,
+                 batch_size: int = DEPENDENCIES_BATCH_SIZE):
+        self.client = client
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        # the packs to install in the request format, by their ID, in the order they were found
+        self.packs_data: Dict[str, dict] = {}
+        # the IDs of the required dependencies of each pack
+        self.dependencies: Dict[str, Set[str]] = {}
+        self._searched_packs: Dict[str, dict] = {}
+        self._dependencies_responses: Dict[str, list] = {}
+        self._lock = Lock()
+
+    def _search_pack(self, pack_id: str) -> dict:
         pack_display_name = get_pack_display_name(pack_id)
-        if pack_display_name:
-            pack_data = search_pack(client, pack_display_name, pack_id, lock)
-        if pack_data is None:
-            pack_data = {
-                'id': pack_id,
-                'version': '1.0.0'
-            }
+        if not pack_display_name:
+            return {}
+        return search_pack(self.client, pack_display_name, pack_id, self._lock)
 
-    if pack_data:
-        dependencies = get_pack_dependencies(client, pack_data, lock)
+    def search_packs(self, pack_ids: list) -> List[dict]:
+        """ Searches the packs that were not searched yet.
 
-        current_packs_to_install = [pack_data]
-        if dependencies:
+        Args:
+            pack_ids (list): The IDs of the packs to search.
+        Returns:
+            (list): The data of the found packs, in the request format.
+        """
+        new_pack_ids = list(dict.fromkeys(pack_id for pack_id in pack_ids if pack_id not in self._searched_packs))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for pack_id, pack_data in zip(new_pack_ids, executor.map(self._search_pack, new_pack_ids)):
+                self._searched_packs[pack_id] = pack_data
+        return [self._searched_packs[pack_id] for pack_id in pack_ids if self._searched_packs.get(pack_id)]
+
+    def _query_dependencies(self, packs_data: list) -> Dict[str, Optional[list]]:
+        """ Queries the dependencies of the packs in a single request. If the server could not find the dependencies of
+        one of the packs, the dependencies of each of the packs are queried separately.
+
+        Returns:
+            (dict): The dependencies response of each pack, or None if the request failed.
+        """
+        packs_ids = [pack_data['id'] for pack_data in packs_data]
+        logging.debug(f'Getting dependencies for packs {", ".join(packs_ids)}')
+        try:
+            response_data = search_packs_dependencies(self.client, packs_data)
+        except Exception:
+            logging.exception(f'The request to get packs {", ".join(packs_ids)} dependencies has failed.')
+            return dict.fromkeys(packs_ids)
+
+        if response_data is None:
+            if len(packs_data) > 1:
+                responses: Dict[str, Optional[list]] = {}
+                for pack_data in packs_data:
+                    responses.update(self._query_dependencies([pack_data]))
+                return responses
+            logging.error(f'Unable to find dependencies for {packs_ids[0]}.')
+            response_data = []
+        return dict.fromkeys(packs_ids, response_data)
+
+    def query_dependencies(self, packs_data: list):
+        """ Queries the dependencies of the packs that were not queried yet, and adds the packs with their required
+        dependencies to the graph.
+
+        Args:
+            packs_data (list): The packs IDs and versions.
+        """
+        global SUCCESS_FLAG
+        new_packs_data = [pack_data for pack_data in packs_data
+                          if pack_data['id'] not in self._dependencies_responses]
+        batches = [new_packs_data[i:i + self.batch_size] for i in range(0, len(new_packs_data), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for responses in executor.map(self._query_dependencies, batches):
+                for pack_id, response_data in responses.items():
+                    if response_data is None:
+                        SUCCESS_FLAG = False
+                        response_data = []
+                    self._dependencies_responses[pack_id] = response_data
+
+        for pack_data in packs_data:
+            self.add_pack(pack_data, self._dependencies_responses[pack_data['id']])
+
+    def add_pack(self, pack_data: dict, response_data: list):
+        """ Adds the pack and its required dependencies to the graph.
+
+        Args:
+            pack_data (dict): The pack ID and version.
+            response_data (list): The dependencies of the pack as returned by the server.
+        """
+        global SUCCESS_FLAG
+        pack_id = pack_data['id']
+        dependencies_data: list = []
+        create_dependencies_data_structure(response_data, [pack_id], dependencies_data, [pack_id])
+        if dependencies_data:
+            logging.debug(f'Found the following dependencies for pack {pack_id}: '
+                          f'{", ".join([dep["id"] for dep in dependencies_data])}')
+
+        self.packs_data.setdefault(pack_id, pack_data)
+        for dependency_data in dependencies_data:
+            dependency_id = dependency_data['id']
             # Check that the dependencies don't include a deprecated pack:
-            for dependency in dependencies:
-                pack_path = os.path.join(PACKS_FOLDER, dependency.get('id'))
-                if is_pack_deprecated(pack_path):
-                    logging.critical(f'Pack {pack_id} depends on pack {dependency.get("id")} which is a deprecated '
-                                     f'pack.')
-                    global SUCCESS_FLAG
-                    SUCCESS_FLAG = False
-                else:
-                    current_packs_to_install.extend(dependencies)
+            if is_pack_deprecated(os.path.join(PACKS_FOLDER, dependency_id)):
+                logging.critical(f'Pack {pack_id} depends on pack {dependency_id} which is a deprecated pack.')
+                SUCCESS_FLAG = False
+                continue
+            self.packs_data.setdefault(dependency_id, dependency_data)
 
-        lock.acquire()
-        for pack in current_packs_to_install:
-            if pack['id'] not in packs_to_install:
-                packs_to_install.append(pack['id'])
-                installation_request_body.append(pack)
-        lock.release()
+        for dependency in response_data:
+            for dependant, dependant_data in dependency.get('dependants', {}).items():
+                if dependant_data.get('level', '') == 'required':
+                    self.dependencies.setdefault(dependant, set()).add(dependency.get('id'))
+
+    def add_packs(self, pack_ids: list):
+        """ Searches the packs and adds them with their required dependencies to the graph.
+
+        Args:
+            pack_ids (list): The IDs of the packs to add.
+        """
+        self.query_dependencies(self.search_packs(pack_ids))
+
+    def get_installation_waves(self) -> List[List[dict]]:
+        """ Orders the packs by their dependencies, so each pack is installed after its required dependencies.
+
+        Returns:
+            (list): The waves of packs to install, each holds the packs in the request format.
+        """
+        remaining_packs = list(self.packs_data)
+        packs_to_install = set(remaining_packs)
+        installed_packs: Set[str] = set()
+        waves = []
+        while remaining_packs:
+            wave = [pack_id for pack_id in remaining_packs
+                    if (self.dependencies.get(pack_id, set()) & packs_to_install) <= installed_packs]
+            if not wave:
+                logging.warning(f'Found circular dependencies between the packs {", ".join(remaining_packs)}, '
+                                f'installing them together.')
+                wave = remaining_packs
+            waves.append([self.packs_data[pack_id] for pack_id in wave])
+            installed_packs.update(wave)
+            remaining_packs = [pack_id for pack_id in remaining_packs if pack_id not in installed_packs]
+        return waves
+
+
+def install_packs_in_waves(client: demisto_client, host: str, waves: List[List[dict]],
+                           request_timeout: int = 999999) -> bool:
+    """ Installs the waves of packs one after the other. If a wave fails to install, the next waves, which may depend on
+    its packs, are not installed.
+
+    Args:
+        client (demisto_client): The configured client to use.
+        host (str): The server URL.
+        waves (list): The waves of packs to install, each holds the packs in the request format.
+        request_timeout (int): Timeout settings for each installation request.
+    Returns:
+        (bool): Whether all the packs were installed.
+    """
+    for wave_number, wave in enumerate(waves, start=1):
+        logging.info(f'Installing wave {wave_number} of {len(waves)} with {len(wave)} packs on server {host}')
+        if not send_install_packs_request(client, host, wave, request_timeout):
+            skipped_packs = [pack['id'] for next_wave in waves[wave_number:] for pack in next_wave]
+            if skipped_packs:
+                logging.error(f'Not installing the following packs, as a previous installation wave has failed: '
+                              f'{", ".join(skipped_packs)}')
+            return False
+    return True
 
 
 def get_latest_version_from_bucket(pack_id: str, production_bucket: Bucket) -> str:
@@ -594,13 +726,15 @@ def search_and_install_packs_and_their_dependencies_private(test_pack_path: str,
 
 
 def search_and_install_packs_and_their_dependencies(pack_ids: list,
-                                                    client: demisto_client, hostname: str = ''):
+                                                    client: demisto_client, hostname: str = '',
+                                                    max_workers: int = MAX_WORKERS):
     """ Searches for the packs from the specified list, searches their dependencies, and then
-    installs them.
+    installs them, the dependencies before the packs depending on them.
     Args:
         pack_ids (list): A list of the pack ids to search and install.
         client (demisto_client): The client to connect to.
         hostname (str): Hostname of instance. Using for logs.
+        max_workers (int): The maximal number of concurrent requests to the server.
 
     Returns (list, bool):
         A list of the installed packs' ids, or an empty list if is_nightly == True.
@@ -610,22 +744,16 @@ def search_and_install_packs_and_their_dependencies(pack_ids: list,
 
     logging.info(f'Starting to search and install packs in server: {host}')
 
-    packs_to_install: list = []  # we save all the packs we want to install, to avoid duplications
-    installation_request_body: list = []  # the packs to install, in the request format
+    packs_dependencies_graph = PacksDependenciesGraph(client, max_workers)
+    packs_dependencies_graph.add_packs(pack_ids)
+    packs_to_install = list(packs_dependencies_graph.packs_data)
 
-    threads_list = []
-    lock = Lock()
-
-    for pack_id in pack_ids:
-        thread = Thread(target=search_pack_and_its_dependencies,
-                        kwargs={'client': client,
-                                'pack_id': pack_id,
-                                'packs_to_install': packs_to_install,
-                                'installation_request_body': installation_request_body,
-                                'lock': lock})
-        threads_list.append(thread)
-    run_threads_list(threads_list)
-
-    install_packs(client, host, installation_request_body)
+    if packs_to_install:
+        waves = packs_dependencies_graph.get_installation_waves()
+        if not install_packs_in_waves(client, host, waves):
+            global SUCCESS_FLAG
+            SUCCESS_FLAG = False
+    else:
+        logging.warning(f'No packs to install on server {host}')
 
     return packs_to_install, SUCCESS_FLAG
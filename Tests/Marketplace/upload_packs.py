@@ -6,17 +6,19 @@ import shutil
 import uuid
 import prettytable
 import glob
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
 from google.cloud.storage import Bucket
 from pathlib import Path
 
 from zipfile import ZipFile
-from typing import Any, Tuple, Union, Optional
+from typing import Any, Tuple, Union, Optional, Callable, Dict, List
 
 from requests import Response
 
-from Tests.Marketplace.marketplace_services import init_storage_client, Pack, \
+from Tests.Marketplace.marketplace_services import init_storage_client, Pack, PackArtifactsCache, \
     load_json, get_content_git_client, get_recent_commits_data, store_successful_and_failed_packs_in_ci_artifacts, \
     json_write
 from Tests.Marketplace.marketplace_statistics import StatisticsHandler
@@ -887,13 +889,14 @@ def get_images_data(packs_list: list):
     return images_data
 
 
-def sign_and_zip_pack(pack, signature_key, delete_test_playbooks=False):
+def sign_and_zip_pack(pack, signature_key, delete_test_playbooks=False, artifacts_cache=None):
     """
     Prepares the pack before zip, and then zips it.
     Args:
         pack (Pack): Pack to be zipped.
         signature_key (str): Base64 encoded string used to sign the pack.
         delete_test_playbooks (bool): Whether to delete test playbooks folder.
+        artifacts_cache (PackArtifactsCache): The cache to reuse the zip of a pack that was not changed from.
     Returns:
         (bool): Whether the zip was successful
     """
@@ -903,6 +906,11 @@ def sign_and_zip_pack(pack, signature_key, delete_test_playbooks=False):
         pack.status = PackStatus.FAILED_REMOVING_PACK_SKIPPED_FOLDERS
         pack.cleanup()
         return False
+    cache_key = None
+    if artifacts_cache:
+        is_cached, cache_key = pack.load_cached_artifacts(artifacts_cache, {'signature_key': signature_key})
+        if is_cached:
+            return True
     task_status = pack.sign_pack(signature_key)
     if not task_status:
         pack.status = PackStatus.FAILED_SIGNING_PACKS.name
@@ -913,6 +921,8 @@ def sign_and_zip_pack(pack, signature_key, delete_test_playbooks=False):
         pack.status = PackStatus.FAILED_ZIPPING_PACK_ARTIFACTS.name
         pack.cleanup()
         return False
+    if artifacts_cache:
+        pack.cache_artifacts(artifacts_cache, cache_key)
     return task_status
 
 
@@ -982,6 +992,231 @@ def upload_packs_with_dependencies_zip(storage_bucket, storage_base_path, signat
             logging.error(f"Failed uploading packs with dependencies: {e}")
 
 
+def sign_and_zip_pack_in_process(pack_name: str, pack_path: str, remove_files_list: list, signature_key: str,
+                                 delete_test_playbooks: bool, artifacts_cache_path: Optional[str] = None
+                                 ) -> Tuple[bool, Optional[str], Optional[str], float]:
+    """
+    Signs and zips a pack in a worker process. The pack object is not sent to the process, as it holds the
+    marketplace statistics, so the pack is zipped by a copy of it with only what the zip needs.
+    Args:
+        pack_name (str): The name of the pack.
+        pack_path (str): The path of the pack folder.
+        remove_files_list (list): Temporary files to delete from the pack folder before zipping it.
+        signature_key (str): Base64 encoded string used to sign the pack.
+        delete_test_playbooks (bool): Whether to delete test playbooks folder.
+        artifacts_cache_path (str): The path of the packs artifacts cache, if the zips should be cached.
+    Returns:
+        (bool): Whether the zip was successful.
+        (str): The path of the pack zip.
+        (str): The status of the pack, if the zip failed.
+        (float): The duration of the sign and zip in seconds.
+    """
+    start_time = time.time()
+    pack = Pack(pack_name, pack_path)
+    pack.remove_files_list.extend(remove_files_list)
+    artifacts_cache = PackArtifactsCache(artifacts_cache_path) if artifacts_cache_path else None
+    task_status = sign_and_zip_pack(pack, signature_key, delete_test_playbooks, artifacts_cache)
+    return task_status, pack.zip_path, pack.status, time.time() - start_time
+
+
+class PacksUploadPipeline:
+    """
+    Runs the upload stages of the packs of the current marketplace, concurrently where the stages of a pack do not
+    depend on the other packs:
+    1. content - collects the content items and uploads the integration and author images, in threads.
+    2. metadata - detects the modified files, formats the metadata and prepares the release notes. Runs serially, as
+       it uses the content git repo.
+    3. zip - signs and zips the packs, in processes.
+    4. upload - uploads the zips to storage and prepares the packs folders for the index, in threads. A pack is
+       uploaded as soon as it is zipped.
+    5. index - updates the index folder, serially and in the order of the packs.
+    As the index folder is updated only after the metadata of all packs was formatted, a pack that depends on a new
+    pack is marked as missing dependencies, to be formatted again after the index is updated.
+    """
+
+    STAGES = ['content', 'metadata', 'zip', 'upload', 'index']
+
+    def __init__(self, workers: int, storage_bucket: Any, storage_base_path: str, diff_files_list: Any,
+                 content_repo: Any, index_folder_path: str, current_commit_hash: str, previous_commit_hash: str,
+                 packs_dependencies_mapping: dict, build_number: str, statistics_handler: Any,
+                 packs_for_current_marketplace_dict: dict, marketplace: str, signature_key: str,
+                 remove_test_playbooks: bool, override_all_packs: bool, artifacts_cache_path: Optional[str] = None):
+        self.workers = workers
+        self.storage_bucket = storage_bucket
+        self.storage_base_path = storage_base_path
+        self.diff_files_list = diff_files_list
+        self.content_repo = content_repo
+        self.index_folder_path = index_folder_path
+        self.current_commit_hash = current_commit_hash
+        self.previous_commit_hash = previous_commit_hash
+        self.packs_dependencies_mapping = packs_dependencies_mapping
+        self.build_number = build_number
+        self.statistics_handler = statistics_handler
+        self.packs_for_current_marketplace_dict = packs_for_current_marketplace_dict
+        self.marketplace = marketplace
+        self.signature_key = signature_key
+        self.remove_test_playbooks = remove_test_playbooks
+        self.override_all_packs = override_all_packs
+        self.artifacts_cache_path = artifacts_cache_path
+        self.packs_with_missing_dependencies: List[Pack] = []
+        self.stages_durations: Dict[str, List[float]] = {stage: [] for stage in self.STAGES}
+        self._skipped_upload: Dict[str, bool] = {}
+        self._exists_in_index: Dict[str, bool] = {}
+
+    @staticmethod
+    def _fail(pack: Pack, status: str) -> bool:
+        pack.status = status
+        pack.cleanup()
+        return False
+
+    def _timed(self, stage: str, stage_func: Callable[[Pack], bool], pack: Pack) -> bool:
+        start_time = time.time()
+        try:
+            return stage_func(pack)
+        finally:
+            self.stages_durations[stage].append(time.time() - start_time)
+
+    def collect_pack_content(self, pack: Pack) -> bool:
+        task_status = pack.collect_content_items()
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_COLLECT_ITEMS.name)
+
+        task_status = pack.upload_integration_images(self.storage_bucket, self.storage_base_path,
+                                                     self.diff_files_list, True)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_IMAGES_UPLOAD.name)
+
+        task_status = pack.upload_author_image(self.storage_bucket, self.storage_base_path, self.diff_files_list, True)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_AUTHOR_IMAGE_UPLOAD.name)
+        return True
+
+    def prepare_pack_metadata(self, pack: Pack) -> bool:
+        # detect if the pack is modified and return modified RN files
+        task_status, modified_rn_files_paths = pack.detect_modified(self.content_repo, self.index_folder_path,
+                                                                    self.current_commit_hash,
+                                                                    self.previous_commit_hash)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_DETECTING_MODIFIED_FILES.name)
+
+        task_status, is_missing_dependencies = pack.format_metadata(self.index_folder_path,
+                                                                    self.packs_dependencies_mapping,
+                                                                    self.build_number, self.current_commit_hash,
+                                                                    self.statistics_handler,
+                                                                    self.packs_for_current_marketplace_dict,
+                                                                    self.marketplace)
+        if is_missing_dependencies:
+            # If the pack is dependent on a new pack, therefore it is not yet in the index.zip, we will note that it
+            # is missing dependencies, and after updating the index.zip with all new packs - we will go over the pack
+            # again to add what was missing. See issue #37290.
+            self.packs_with_missing_dependencies.append(pack)
+
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_METADATA_PARSING.name)
+
+        task_status, not_updated_build = pack.prepare_release_notes(self.index_folder_path, self.build_number,
+                                                                    modified_rn_files_paths)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_RELEASE_NOTES.name)
+
+        if not_updated_build:
+            return self._fail(pack, PackStatus.PACK_IS_NOT_UPDATED_IN_RUNNING_BUILD.name)
+        return True
+
+    def upload_pack(self, pack: Pack) -> bool:
+        task_status, skipped_upload, _ = pack.upload_to_storage(pack.zip_path, pack.latest_version,
+                                                                self.storage_bucket,
+                                                                self.override_all_packs or pack.is_modified,
+                                                                self.storage_base_path)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_UPLOADING_PACK.name)
+        self._skipped_upload[pack.name] = skipped_upload
+
+        task_status, exists_in_index = pack.check_if_exists_in_index(self.index_folder_path)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_SEARCHING_PACK_IN_INDEX.name)
+        self._exists_in_index[pack.name] = exists_in_index
+
+        task_status = pack.prepare_for_index_upload()
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_PREPARING_INDEX_FOLDER.name)
+        return True
+
+    def update_pack_index(self, pack: Pack) -> bool:
+        task_status = update_index_folder(index_folder_path=self.index_folder_path, pack_name=pack.name,
+                                          pack_path=pack.path, pack_version=pack.latest_version,
+                                          hidden_pack=pack.hidden)
+        if not task_status:
+            return self._fail(pack, PackStatus.FAILED_UPDATING_INDEX_FOLDER.name)
+
+        # in case that pack already exist at cloud storage path and in index, don't show that the pack was changed
+        if self._skipped_upload[pack.name] and self._exists_in_index[pack.name] \
+                and pack not in self.packs_with_missing_dependencies:
+            return self._fail(pack, PackStatus.PACK_ALREADY_EXISTS.name)
+
+        pack.status = PackStatus.SUCCESS.name
+        return True
+
+    def _run_in_threads(self, stage: str, stage_func: Callable[[Pack], bool], packs: list) -> list:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(lambda pack: self._timed(stage, stage_func, pack), packs))
+        return [pack for pack, task_status in zip(packs, results) if task_status]
+
+    def _zip_and_upload(self, packs: list) -> list:
+        uploaded_packs_names = set()
+        with ProcessPoolExecutor(max_workers=self.workers) as zip_executor, \
+                ThreadPoolExecutor(max_workers=self.workers) as upload_executor:
+            zip_futures = {zip_executor.submit(sign_and_zip_pack_in_process, pack.name, pack.path,
+                                               pack.remove_files_list, self.signature_key,
+                                               self.remove_test_playbooks, self.artifacts_cache_path): pack
+                           for pack in packs}
+            upload_futures = {}
+            for zip_future in as_completed(zip_futures):
+                pack = zip_futures[zip_future]
+                task_status, zip_path, status, duration = zip_future.result()
+                self.stages_durations['zip'].append(duration)
+                if not task_status:
+                    # the pack folder was already cleaned up by the worker process
+                    pack.status = status
+                    continue
+                pack.zip_path = zip_path
+                upload_future = upload_executor.submit(self._timed, 'upload', self.upload_pack, pack)
+                upload_futures[upload_future] = pack
+            for upload_future in as_completed(upload_futures):
+                if upload_future.result():
+                    uploaded_packs_names.add(upload_futures[upload_future].name)
+        return [pack for pack in packs if pack.name in uploaded_packs_names]
+
+    def run(self, packs: list):
+        """
+        Runs the upload stages of the packs, and logs the timing of each stage.
+        Args:
+            packs (list): The packs of the current marketplace to upload, in the order to update the index.
+        """
+        start_time = time.time()
+        packs = self._run_in_threads('content', self.collect_pack_content, packs)
+        packs = [pack for pack in packs if self._timed('metadata', self.prepare_pack_metadata, pack)]
+        packs = self._zip_and_upload(packs)
+        for pack in packs:
+            self._timed('index', self.update_pack_index, pack)
+        logging.info(f"Finished the packs upload stages in {time.time() - start_time:.2f} seconds, "
+                     f"with {self.workers} workers:\n{self.build_stages_timing_table()}")
+
+    def build_stages_timing_table(self) -> Any:
+        """Build a table of the number of packs and the total and max duration of each stage
+
+        Returns:
+            PrettyTable: table with the timing of the stages.
+
+        """
+        table = prettytable.PrettyTable()
+        table.field_names = ["Stage", "Packs", "Total Duration (seconds)", "Max Duration (seconds)"]
+        for stage in self.STAGES:
+            durations = self.stages_durations[stage]
+            table.add_row([stage, len(durations), f"{sum(durations):.2f}", f"{max(durations, default=0):.2f}"])
+        return table
+
+
 def option_handler():
     """Validates and parses script arguments.
 
@@ -1026,6 +1261,10 @@ def option_handler():
     parser.add_argument('-dz', '--create_dependencies_zip', type=str2bool, help="Upload packs with dependencies zip",
                         required=False)
     parser.add_argument('-mp', '--marketplace', help="marketplace version", default='xsoar')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help="The number of packs to process concurrently in each of the upload stages.")
+    parser.add_argument('-ac', '--artifacts_cache_path', required=False,
+                        help="Full path of a folder kept between builds, to reuse the zips of unchanged packs from.")
     # disable-secrets-detection-end
     return parser.parse_args()
 
@@ -1051,6 +1290,8 @@ def main():
     force_upload = option.force_upload
     marketplace = option.marketplace
     is_create_dependencies_zip = option.create_dependencies_zip
+    workers = option.workers
+    artifacts_cache_path = option.artifacts_cache_path
 
     # google cloud storage client initialized
     storage_client = init_storage_client(service_account)
@@ -1092,9 +1333,6 @@ def main():
     # clean index and gcs from non existing or invalid packs
     clean_non_existing_packs(index_folder_path, private_packs, storage_bucket, storage_base_path, id_set, marketplace)
 
-    # packs that depends on new packs that are not in the previous index.zip
-    packs_with_missing_dependencies = []
-
     # pack relevant for the current marketplace this upload is done for
     packs_for_current_marketplace_dict = {}
 
@@ -1121,101 +1359,15 @@ def main():
     # 1. we might need the info about this pack if a modified pack is dependent on it.
     # 2. even if the pack is not updated, we still keep some fields in it's metadata updated, such as download count,
     # changelog, etc.
-    for pack in list(packs_for_current_marketplace_dict.values()):
-        task_status = pack.collect_content_items()
-        if not task_status:
-            pack.status = PackStatus.FAILED_COLLECT_ITEMS.name
-            pack.cleanup()
-            continue
-
-        task_status = pack.upload_integration_images(storage_bucket, storage_base_path, diff_files_list, True)
-        if not task_status:
-            pack.status = PackStatus.FAILED_IMAGES_UPLOAD.name
-            pack.cleanup()
-            continue
-
-        task_status = pack.upload_author_image(storage_bucket, storage_base_path, diff_files_list, True)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_AUTHOR_IMAGE_UPLOAD.name
-            pack.cleanup()
-            continue
-
-        # detect if the pack is modified and return modified RN files
-        task_status, modified_rn_files_paths = pack.detect_modified(content_repo, index_folder_path,
-                                                                    current_commit_hash, previous_commit_hash)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_DETECTING_MODIFIED_FILES.name
-            pack.cleanup()
-            continue
-
-        task_status, is_missing_dependencies = pack.format_metadata(index_folder_path,
-                                                                    packs_dependencies_mapping, build_number,
-                                                                    current_commit_hash,
-                                                                    statistics_handler,
-                                                                    packs_for_current_marketplace_dict, marketplace)
-
-        if is_missing_dependencies:
-            # If the pack is dependent on a new pack, therefore it is not yet in the index.zip as it might not have
-            # been iterated yet, we will note that it is missing dependencies, and after updating the index.zip with
-            # all new packs - we will go over the pack again to add what was missing. See issue #37290.
-            packs_with_missing_dependencies.append(pack)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_METADATA_PARSING.name
-            pack.cleanup()
-            continue
-
-        task_status, not_updated_build = pack.prepare_release_notes(index_folder_path, build_number,
-                                                                    modified_rn_files_paths)
-        if not task_status:
-            pack.status = PackStatus.FAILED_RELEASE_NOTES.name
-            pack.cleanup()
-            continue
-
-        if not_updated_build:
-            pack.status = PackStatus.PACK_IS_NOT_UPDATED_IN_RUNNING_BUILD.name
-            pack.cleanup()
-            continue
-
-        sign_and_zip_pack(pack, signature_key, remove_test_playbooks)
-
-        task_status, skipped_upload, _ = pack.upload_to_storage(pack.zip_path, pack.latest_version, storage_bucket,
-                                                                override_all_packs or pack.is_modified,
-                                                                storage_base_path)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_UPLOADING_PACK.name
-            pack.cleanup()
-            continue
-
-        task_status, exists_in_index = pack.check_if_exists_in_index(index_folder_path)
-        if not task_status:
-            pack.status = PackStatus.FAILED_SEARCHING_PACK_IN_INDEX.name
-            pack.cleanup()
-            continue
-
-        task_status = pack.prepare_for_index_upload()
-        if not task_status:
-            pack.status = PackStatus.FAILED_PREPARING_INDEX_FOLDER.name
-            pack.cleanup()
-            continue
+    upload_pipeline = PacksUploadPipeline(workers, storage_bucket, storage_base_path, diff_files_list, content_repo,
+                                          index_folder_path, current_commit_hash, previous_commit_hash,
+                                          packs_dependencies_mapping, build_number, statistics_handler,
+                                          packs_for_current_marketplace_dict, marketplace, signature_key,
+                                          remove_test_playbooks, override_all_packs, artifacts_cache_path)
+    upload_pipeline.run(list(packs_for_current_marketplace_dict.values()))
 
-        task_status = update_index_folder(index_folder_path=index_folder_path, pack_name=pack.name, pack_path=pack.path,
-                                          pack_version=pack.latest_version, hidden_pack=pack.hidden)
-        if not task_status:
-            pack.status = PackStatus.FAILED_UPDATING_INDEX_FOLDER.name
-            pack.cleanup()
-            continue
-
-        # in case that pack already exist at cloud storage path and in index, don't show that the pack was changed
-        if skipped_upload and exists_in_index and pack not in packs_with_missing_dependencies:
-            pack.status = PackStatus.PACK_ALREADY_EXISTS.name
-            pack.cleanup()
-            continue
-
-        pack.status = PackStatus.SUCCESS.name
+    # packs that depends on new packs that are not in the previous index.zip
+    packs_with_missing_dependencies = upload_pipeline.packs_with_missing_dependencies
 
     logging.info(f"packs_with_missing_dependencies: {packs_with_missing_dependencies}")
 
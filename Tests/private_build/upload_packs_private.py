@@ -6,7 +6,7 @@ import uuid
 import glob
 import logging
 from typing import Any, Tuple, Union
-from Tests.Marketplace.marketplace_services import init_storage_client, Pack, load_json, \
+from Tests.Marketplace.marketplace_services import init_storage_client, Pack, PackArtifactsCache, load_json, \
     get_content_git_client, get_recent_commits_data
 from Tests.Marketplace.marketplace_statistics import StatisticsHandler
 from Tests.Marketplace.upload_packs import get_packs_names, extract_packs_artifacts, download_and_extract_index, \
@@ -272,6 +272,8 @@ def create_and_upload_marketplace_pack(upload_config: Any, pack: Any, storage_bu
     private_artifacts_dir = upload_config.private_artifacts
     is_infra_run = upload_config.is_infra_run
     secondary_enc_key = upload_config.secondary_encryption_key
+    artifacts_cache = PackArtifactsCache(upload_config.artifacts_cache_path) \
+        if upload_config.artifacts_cache_path else None
 
     pack_was_modified = not is_infra_run
 
@@ -326,18 +328,28 @@ def create_and_upload_marketplace_pack(upload_config: Any, pack: Any, storage_bu
         pack.cleanup()
         return
 
-    task_status = pack.sign_pack(signature_key)
-    if not task_status:
-        pack.status = PackStatus.FAILED_SIGNING_PACKS.name
-        pack.cleanup()
-        return
+    is_cached, cache_key = False, None
+    if artifacts_cache:
+        build_parameters = {'signature_key': signature_key, 'encryption_key': enc_key,
+                            'secondary_encryption_key': secondary_enc_key}
+        is_cached, cache_key = pack.load_cached_artifacts(artifacts_cache, build_parameters, enc_key,
+                                                          private_artifacts_dir)
 
-    task_status, zip_pack_path = pack.zip_pack(extract_destination_path, enc_key,
-                                               private_artifacts_dir, secondary_enc_key)
-    if not task_status:
-        pack.status = PackStatus.FAILED_ZIPPING_PACK_ARTIFACTS.name
-        pack.cleanup()
-        return
+    if is_cached:
+        zip_pack_path = f"{pack.path}.zip"
+    else:
+        task_status = pack.sign_pack(signature_key)
+        if not task_status:
+            pack.status = PackStatus.FAILED_SIGNING_PACKS.name
+            pack.cleanup()
+            return
+
+        task_status, zip_pack_path = pack.zip_pack(extract_destination_path, enc_key,
+                                                   private_artifacts_dir, secondary_enc_key)
+        if not task_status:
+            pack.status = PackStatus.FAILED_ZIPPING_PACK_ARTIFACTS.name
+            pack.cleanup()
+            return
 
     task_status = pack.is_pack_encrypted(zip_pack_path, enc_key)
     if not task_status:
@@ -345,6 +357,9 @@ def create_and_upload_marketplace_pack(upload_config: Any, pack: Any, storage_bu
         pack.cleanup()
         return
 
+    if artifacts_cache and not is_cached:
+        pack.cache_artifacts(artifacts_cache, cache_key, enc_key)
+
     bucket_for_uploading = private_storage_bucket if private_storage_bucket else storage_bucket
     (task_status, skipped_pack_uploading, full_pack_path) = \
         pack.upload_to_storage(zip_pack_path, pack.latest_version,
@@ -441,6 +456,8 @@ def option_handler():
                         default='private_artifacts')
     parser.add_argument('-nek', '--secondary_encryption_key', type=str,
                         help='A second encryption key for the pack, if it should be encrypted.', default='')
+    parser.add_argument('-ac', '--artifacts_cache_path', required=False,
+                        help="Full path of a folder kept between builds, to reuse the zips of unchanged packs from.")
     # disable-secrets-detection-end
     return parser.parse_args()
 
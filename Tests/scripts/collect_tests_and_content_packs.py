@@ -19,6 +19,7 @@ from Tests.scripts.utils import collect_helpers
 from Tests.scripts.utils.collect_helpers import LANDING_PAGE_SECTIONS_JSON_PATH
 from Tests.scripts.utils.content_packs_util import should_test_content_pack, should_install_content_pack, \
     is_pack_xsoar_supported
+from Tests.scripts.utils.id_set_index import get_id_set_index
 from Tests.scripts.utils.get_modified_files_for_testing import get_modified_files_for_testing, \
     filter_modified_files_for_specific_marketplace_version
 from Tests.scripts.utils.log_util import install_logging
@@ -194,8 +195,8 @@ def collect_tests_and_content_packs(
         catched_scripts,
         catched_playbooks,
         tests_set,
-        id_set=deepcopy(ID_SET),
-        conf=deepcopy(CONF)
+        id_set=None,
+        conf=None
 ):
     """Collect tests for the affected script_ids,playbook_ids,integration_ids.
 
@@ -205,11 +206,14 @@ def collect_tests_and_content_packs(
     :param catched_scripts: The names of the scripts we already identified a test for.
     :param catched_playbooks: The names of the scripts we already v a test for.
     :param tests_set: The names of the tests we alredy identified.
-    :param id_set: The id_set json.
-    :param conf: The conf json.
+    :param id_set: The id_set json, defaults to the id_set of the build.
+    :param conf: The conf json, defaults to the conf of the build.
 
     :return: (test_ids, missing_ids) - All the names of possible tests, the ids we didn't match a test for.
     """
+    id_set = ID_SET if id_set is None else id_set
+    conf = CONF if conf is None else conf
+    id_set_index = get_id_set_index(id_set)
     caught_missing_test = False
     catched_intergrations = set([])
 
@@ -217,14 +221,20 @@ def collect_tests_and_content_packs(
     skipped_tests = conf.get_skipped_tests()
     skipped_integrations = conf.get_skipped_integrations()
 
-    integration_set = id_set['integrations']
-    test_playbooks_set = id_set['TestPlaybooks']
-    integration_to_command, _ = get_integration_commands(integration_ids, integration_set)
-
-    for test_playbook in test_playbooks_set:
+    integration_to_command, _ = get_integration_commands(integration_ids, id_set['integrations'])
+    command_to_integrations: Dict[str, set] = {}
+    for integration_id, integration_commands in integration_to_command.items():
+        for command in integration_commands:
+            command_to_integrations.setdefault(command, set()).add(integration_id)
+
+    # only the test playbooks using one of the affected entities may detect a usage
+    test_playbooks = id_set_index.get_users_by_fields('TestPlaybooks', {
+        'implementing_scripts': script_ids,
+        'implementing_playbooks': playbook_ids,
+        'command_to_integration': command_to_integrations.keys(),
+    })
+    for test_playbook_id, test_playbook_data in test_playbooks:
         detected_usage = False
-        test_playbook_id = list(test_playbook.keys())[0]
-        test_playbook_data = list(test_playbook.values())[0]
         test_playbook_name = test_playbook_data.get('name')
 
         for script in test_playbook_data.get('implementing_scripts', []):
@@ -239,16 +249,13 @@ def collect_tests_and_content_packs(
                 tests_set.add(test_playbook_id)
                 catched_playbooks.add(playbook)
 
-        if integration_to_command:
-            command_to_integration = test_playbook_data.get('command_to_integration', {})
-            for command in test_playbook_data.get('command_to_integration', {}).keys():
-                for integration_id, integration_commands in integration_to_command.items():
-                    if command in integration_commands:
-                        if not command_to_integration.get(command) or \
-                                command_to_integration.get(command) == integration_id:
-                            detected_usage = True
-                            tests_set.add(test_playbook_id)
-                            catched_intergrations.add(integration_id)
+        command_to_integration = test_playbook_data.get('command_to_integration', {})
+        for command, command_integration_id in command_to_integration.items():
+            for integration_id in command_to_integrations.get(command, []):
+                if not command_integration_id or command_integration_id == integration_id:
+                    detected_usage = True
+                    tests_set.add(test_playbook_id)
+                    catched_intergrations.add(integration_id)
 
         if detected_usage and test_playbook_id not in test_ids and test_playbook_id not in skipped_tests:
             caught_missing_test = check_if_test_should_not_be_missed(test_playbook_data.get('file_path', ''),
@@ -260,11 +267,8 @@ def collect_tests_and_content_packs(
     # remove skipped integrations from the list
     ids_with_no_tests = ids_with_no_tests - set(skipped_integrations)
     packs_to_install = set()
-    id_set_test_playbooks = id_set.get('TestPlaybooks', [])
-    for test_playbook in id_set_test_playbooks:
-        test_playbook_id = list(test_playbook.keys())[0]
-        test_playbook_object = test_playbook[test_playbook_id]
-        if test_playbook_id in tests_set:
+    for test_playbook_id in tests_set:
+        for test_playbook_object in id_set_index.get_by_id('TestPlaybooks', test_playbook_id):
             test_playbook_pack = test_playbook_object.get('pack')
             if test_playbook_pack:
                 logging.info(
@@ -341,17 +345,13 @@ def is_integration_fetching_incidents(integration_yml_path):
 
 
 def id_set__get_test_playbook(id_set, test_playbook_id):
-    for test_playbook in id_set.get('TestPlaybooks', []):
-        if test_playbook_id in test_playbook.keys():
-            return test_playbook[test_playbook_id]
-
-    return None
+    return get_id_set_index(id_set).get_first_by_id('TestPlaybooks', test_playbook_id)
 
 
 def id_set__get_integration_file_path(id_set, integration_id):
-    for integration in id_set.get('integrations', []):
-        if integration_id in integration.keys():
-            return integration[integration_id]['file_path']
+    integration = get_id_set_index(id_set).get_first_by_id('integrations', integration_id)
+    if integration is not None:
+        return integration['file_path']
 
     logging.critical(f'Could not find integration "{integration_id}" in the id_set')
     return None
@@ -384,7 +384,9 @@ def check_if_fetch_incidents_is_tested(missing_ids, integration_ids, id_set, con
     return missing_ids, tests_set
 
 
-def find_tests_and_content_packs_for_modified_files(modified_files, conf=deepcopy(CONF), id_set=deepcopy(ID_SET)):
+def find_tests_and_content_packs_for_modified_files(modified_files, conf=None, id_set=None):
+    conf = CONF if conf is None else conf
+    id_set = ID_SET if id_set is None else id_set
     script_names: set = set([])
     playbook_names: set = set([])
     integration_ids: set = set([])
@@ -507,7 +509,8 @@ def get_api_module_integrations(changed_api_modules, integration_set):
     return integration_ids_to_test, integration_to_version
 
 
-def collect_changed_ids(integration_ids, playbook_names, script_names, modified_files, id_set=deepcopy(ID_SET)):
+def collect_changed_ids(integration_ids, playbook_names, script_names, modified_files, id_set=None):
+    id_set = ID_SET if id_set is None else id_set
     tests_set: set = set([])
     updated_script_names: set = set([])
     updated_playbook_names: set = set([])
@@ -557,19 +560,20 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
                                                   playbook_set, playbook_names,
                                                   integration_set, integration_ids)
 
+    id_set_index = get_id_set_index(id_set)
     for script_id in script_names:
-        enrich_for_script_id(script_id, script_to_version[script_id], script_names, script_set, playbook_set,
+        enrich_for_script_id(script_id, script_to_version[script_id], script_names, id_set_index,
                              playbook_names, updated_script_names, updated_playbook_names, catched_scripts,
                              catched_playbooks, tests_set)
 
     integration_to_command, deprecated_commands_message = get_integration_commands(integration_ids, integration_set)
     for integration_id, integration_commands in integration_to_command.items():
         enrich_for_integration_id(integration_id, integration_to_version[integration_id], integration_commands,
-                                  script_set, playbook_set, playbook_names, script_names, updated_script_names,
+                                  id_set_index, playbook_names, script_names, updated_script_names,
                                   updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
 
     for playbook_id in playbook_names:
-        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, script_set, playbook_set,
+        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, id_set_index,
                                updated_playbook_names, catched_playbooks, tests_set)
 
     for new_script in updated_script_names:
@@ -654,7 +658,7 @@ def exclude_deprecated_entities(script_set, script_names,
     return deprecated_messages_dict
 
 
-def enrich_for_integration_id(integration_id, given_version, integration_commands, script_set, playbook_set,
+def enrich_for_integration_id(integration_id, given_version, integration_commands, id_set_index,
                               playbook_names, script_names, updated_script_names, updated_playbook_names,
                               catched_scripts, catched_playbooks, tests_set):
     """Enrich the list of affected scripts/playbooks by your change set.
@@ -662,8 +666,7 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
     :param integration_id: The name of the integration we changed.
     :param given_version: the version of the integration we changed.
     :param integration_commands: The commands of the changed integation
-    :param script_set: The set of existing scripts within Content repo.
-    :param playbook_set: The set of existing playbooks within Content repo.
+    :param id_set_index: The index of the id_set of the existing entities within Content repo.
     :param playbook_names: The names of the playbooks affected by your changes.
     :param script_names: The names of the scripts affected by your changes.
     :param updated_script_names: The names of scripts we identify as affected to your change set.
@@ -672,8 +675,7 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
     :param catched_playbooks: The names of playbooks we found tests for.
     :param tests_set: The names of the caught tests.
     """
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
+    for _, playbook_data in id_set_index.get_users('playbooks', 'command_to_integration', integration_commands):
         if playbook_data.get('deprecated', False):
             continue
         playbook_name = playbook_data.get('name')
@@ -694,11 +696,10 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
 
                         updated_playbook_names.add(playbook_name)
                         new_versions = (playbook_fromversion, playbook_toversion)
-                        enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
+                        enrich_for_playbook_id(playbook_name, new_versions, playbook_names, id_set_index,
                                                updated_playbook_names, catched_playbooks, tests_set)
 
-    for script in script_set:
-        script_data = list(script.values())[0]
+    for _, script_data in id_set_index.get_users('scripts', 'depends_on', integration_commands):
         if script_data.get('deprecated', False):
             continue
         script_name = script_data.get('name')
@@ -725,15 +726,14 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
 
                         updated_script_names.add(script_name)
                         new_versions = (script_fromversion, script_toversion)
-                        enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set,
+                        enrich_for_script_id(script_name, new_versions, script_names, id_set_index,
                                              playbook_names, updated_script_names, updated_playbook_names,
                                              catched_scripts, catched_playbooks, tests_set)
 
 
-def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, script_set, playbook_set,
+def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, id_set_index,
                            updated_playbook_names, catched_playbooks, tests_set):
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
+    for _, playbook_data in id_set_index.get_users('playbooks', 'implementing_playbooks', [given_playbook_id]):
         if playbook_data.get('deprecated', False):
             continue
         playbook_name = playbook_data.get('name')
@@ -750,14 +750,13 @@ def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, scr
 
                 updated_playbook_names.add(playbook_name)
                 new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
+                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, id_set_index,
                                        updated_playbook_names, catched_playbooks, tests_set)
 
 
-def enrich_for_script_id(given_script_id, given_version, script_names, script_set, playbook_set, playbook_names,
+def enrich_for_script_id(given_script_id, given_version, script_names, id_set_index, playbook_names,
                          updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks, tests_set):
-    for script in script_set:
-        script_data = list(script.values())[0]
+    for _, script_data in id_set_index.get_users('scripts', 'script_executions', [given_script_id]):
         if script_data.get('deprecated', False):
             continue
         script_name = script_data.get('name')
@@ -778,12 +777,11 @@ def enrich_for_script_id(given_script_id, given_version, script_names, script_se
 
                 updated_script_names.add(script_name)
                 new_versions = (script_fromversion, script_toversion)
-                enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set, playbook_names,
+                enrich_for_script_id(script_name, new_versions, script_names, id_set_index, playbook_names,
                                      updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks,
                                      tests_set)
 
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
+    for _, playbook_data in id_set_index.get_users('playbooks', 'implementing_scripts', [given_script_id]):
         if playbook_data.get('deprecated', False):
             continue
         playbook_name = playbook_data.get('name')
@@ -798,7 +796,7 @@ def enrich_for_script_id(given_script_id, given_version, script_names, script_se
 
                 updated_playbook_names.add(playbook_name)
                 new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
+                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, id_set_index,
                                        updated_playbook_names, catched_playbooks, tests_set)
 
 
@@ -807,8 +805,9 @@ def update_test_set(tests, tests_set):
         tests_set.add(test)
 
 
-def get_test_conf_from_conf(test_id, server_version, conf=deepcopy(CONF)):
+def get_test_conf_from_conf(test_id, server_version, conf=None):
     """Gets first occurrence of test conf with matching playbookID value to test_id with a valid from/to version"""
+    conf = CONF if conf is None else conf
     test_conf_lst = conf.get_tests()
     # return None if nothing is found
     test_conf = next((test_conf for test_conf in test_conf_lst if
@@ -864,7 +863,8 @@ def get_packs_from_landing_page(branch_name: str) -> set:
     return changed_packs
 
 
-def get_test_from_conf(branch_name, conf=deepcopy(CONF)):
+def get_test_from_conf(branch_name, conf=None):
+    conf = CONF if conf is None else conf
     tests = set([])
     changed = set([])
     change_string = tools.run_command("git diff origin/master...{} Tests/conf.json".format(branch_name))
@@ -923,8 +923,7 @@ def is_test_runnable(test_id, id_set, conf, server_version):
         return False
     conf_fromversion = test_conf.get('fromversion', '0.0')
     conf_toversion = test_conf.get('toversion', '99.99.99')
-    test_playbooks_set = id_set.get('TestPlaybooks', [])
-    test_playbook_obj = extract_matching_object_from_id_set(test_id, test_playbooks_set, server_version)
+    test_playbook_obj = get_id_set_index(id_set).get_matching_object('TestPlaybooks', test_id, server_version)
 
     # check whether the test is runnable in id_set
     if not test_playbook_obj:
@@ -955,16 +954,17 @@ def is_test_integrations_available(server_version, test_conf, conf, id_set):
         if not is_test_uses_active_integration(test_integration_ids, conf):
             return False
         # check if all integration from/toversion is valid with server_version
-        integrations_set = id_set.get('integrations', [])
-        if any(extract_matching_object_from_id_set(integration_id, integrations_set, server_version) is None for
+        id_set_index = get_id_set_index(id_set)
+        if any(id_set_index.get_matching_object('integrations', integration_id, server_version) is None for
                integration_id in
                test_integration_ids):
             return False
     return True
 
 
-def is_test_uses_active_integration(integration_ids, conf=deepcopy(CONF)):
+def is_test_uses_active_integration(integration_ids, conf=None):
     """Checks whether there's an an integration in test_integration_ids that's not skipped"""
+    conf = CONF if conf is None else conf
     skipped_integrations = conf.get_skipped_integrations()
     # check if all integrations are skipped
     if all(integration_id in skipped_integrations for integration_id in integration_ids):
@@ -992,16 +992,12 @@ def get_content_pack_name_of_test(tests: set, id_set: Optional[Dict] = None) ->
     """
     content_packs = set()
     if id_set is not None:
-        for test_playbook_object in id_set.get('TestPlaybooks', []):
-            test_playbook_name = list(test_playbook_object.keys())[0]
-            test_playbook_data = list(test_playbook_object.values())[0]
-            if test_playbook_name in tests:
+        id_set_index = get_id_set_index(id_set)
+        for test_playbook_name in tests:
+            for test_playbook_data in id_set_index.get_by_id('TestPlaybooks', test_playbook_name):
                 pack_name = test_playbook_data.get('pack')
                 if pack_name:
                     content_packs.add(pack_name)
-                    if len(tests) == len(content_packs):
-                        # we found all content packs for all tests we were looking for
-                        break
 
     return content_packs
 
@@ -1207,9 +1203,11 @@ def is_documentation_changes_only(files_string: str) -> bool:
 def get_test_list_and_content_packs_to_install(files_string,
                                                branch_name,
                                                marketplace_version,
-                                               conf=deepcopy(CONF),
-                                               id_set=deepcopy(ID_SET)):
+                                               conf=None,
+                                               id_set=None):
     """Create a test list that should run"""
+    conf = CONF if conf is None else conf
+    id_set = ID_SET if id_set is None else id_set
     if marketplace_version == 'marketplacev2':
         files_string = filter_modified_files_for_specific_marketplace_version(files_string, id_set, marketplace_version)
         logging.debug(f'Files string after filter: {files_string}')
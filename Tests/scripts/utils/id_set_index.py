@@ -0,0 +1,190 @@
+"""
+Lookup tables over the id_set for collect_tests.
+The id_set holds, per entity type, a list of single key dicts of {entity_id: entity_data}. Searching it is a linear scan
+over all the entities of the type, so the index is built once in a single pass, and shared by all the lookups of the
+test collection.
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import demisto_sdk.commands.common.tools as tools
+
+# The fields of the entities data that are indexed in reverse, from each of their values to the entities holding it.
+# A field of a dict value is indexed by its keys.
+REVERSE_INDEXED_FIELDS = {
+    'TestPlaybooks': ['implementing_scripts', 'implementing_playbooks', 'command_to_integration'],
+    'playbooks': ['implementing_scripts', 'implementing_playbooks', 'command_to_integration'],
+    'scripts': ['script_executions', 'depends_on'],
+}
+
+_ID_SET_INDEXES: Dict[int, 'IdSetIndex'] = {}
+
+
+def get_field_values(entity_data: dict, field: str) -> Iterable[str]:
+    value = entity_data.get(field) or []
+    if isinstance(value, str):
+        return [value]
+    return value
+
+
+class IdSetIndex:
+    """
+    Indexes the entities of an id_set by their id and name, and by the values of the REVERSE_INDEXED_FIELDS.
+    All lookups return the entities in their id_set order, as the test collection depends on it.
+    The index holds the entities data of the id_set, so it should not be used after the id_set was modified.
+    """
+
+    def __init__(self, id_set: dict):
+        self.id_set = id_set
+        self.sizes = self.get_id_set_sizes(id_set)
+        # entity type -> id or name -> [(position, entity_id, entity_data)]
+        self._by_id_or_name: Dict[str, Dict[str, List[Tuple[int, str, dict]]]] = {}
+        # entity type -> id -> [(position, entity_id, entity_data)]
+        self._by_id: Dict[str, Dict[str, List[Tuple[int, str, dict]]]] = {}
+        # entity type -> field -> field value -> [(position, entity_id, entity_data)]
+        self._reverse: Dict[str, Dict[str, Dict[str, List[Tuple[int, str, dict]]]]] = {}
+
+        for entity_type, entities in id_set.items():
+            # Ignore the Packs dict in the ID set
+            if not isinstance(entities, list):
+                continue
+            by_id_or_name: Dict[str, List[Tuple[int, str, dict]]] = defaultdict(list)
+            by_id: Dict[str, List[Tuple[int, str, dict]]] = defaultdict(list)
+            reverse: Dict[str, Dict[str, List[Tuple[int, str, dict]]]] = {
+                field: defaultdict(list) for field in REVERSE_INDEXED_FIELDS.get(entity_type, [])}
+            for position, entity in enumerate(entities):
+                if not entity:
+                    continue
+                for entity_id, entity_data in entity.items():
+                    by_id[entity_id].append((position, entity_id, entity_data))
+                    by_id_or_name[entity_id].append((position, entity_id, entity_data))
+                entity_id, entity_data = next(iter(entity.items()))
+                entity_name = entity_data.get('name')
+                if entity_name is not None and entity_name not in entity:
+                    by_id_or_name[entity_name].append((position, entity_id, entity_data))
+                for field, field_index in reverse.items():
+                    for value in get_field_values(entity_data, field):
+                        field_index[value].append((position, entity_id, entity_data))
+            self._by_id_or_name[entity_type] = by_id_or_name
+            self._by_id[entity_type] = by_id
+            self._reverse[entity_type] = reverse
+
+    @staticmethod
+    def get_id_set_sizes(id_set: dict) -> tuple:
+        return tuple((entity_type, len(entities)) for entity_type, entities in id_set.items())
+
+    def get_by_id(self, entity_type: str, entity_id: str) -> List[dict]:
+        """Returns the data of all the entities of the type with the id"""
+        return [entity_data for _, _, entity_data in self._by_id.get(entity_type, {}).get(entity_id, [])]
+
+    def get_first_by_id(self, entity_type: str, entity_id: str) -> Optional[dict]:
+        """Returns the data of the first entity of the type with the id, or None if there is no such entity"""
+        entities = self._by_id.get(entity_type, {}).get(entity_id)
+        return entities[0][2] if entities else None
+
+    def get_matching_object(self, entity_type: str, obj_id: str, server_version: str = '0') -> Optional[dict]:
+        """
+        Gets the first entity of the type with matching id/name, that is runnable in the server version by its
+        from/to version.
+        """
+        for _, _, entity_data in self._by_id_or_name.get(entity_type, {}).get(obj_id, []):
+            fromversion = entity_data.get('fromversion', '0.0')
+            toversion = entity_data.get('toversion', '99.99.99')
+            if tools.server_version_compare(fromversion, server_version) <= 0 and \
+                    tools.server_version_compare(server_version, toversion) <= 0:
+                return entity_data
+        return None
+
+    def get_users(self, entity_type: str, field: str, values: Iterable[str]) -> List[Tuple[str, dict]]:
+        """
+        Returns the (id, data) of the entities of the type whose field holds any of the values, each entity once.
+        e.g. get_users('TestPlaybooks', 'implementing_scripts', ['script_a']) returns the test playbooks using
+        script_a.
+        """
+        return self.get_users_by_fields(entity_type, {field: values})
+
+    def get_users_by_fields(self, entity_type: str, field_to_values: Dict[str, Iterable[str]]) -> List[Tuple[str, dict]]:
+        """
+        Returns the (id, data) of the entities of the type whose fields hold any of their values, each entity once.
+        """
+        users: Dict[int, Tuple[str, dict]] = {}
+        for field, values in field_to_values.items():
+            field_index = self._reverse.get(entity_type, {}).get(field, {})
+            for value in values:
+                for position, entity_id, entity_data in field_index.get(value, []):
+                    users[position] = (entity_id, entity_data)
+        return [users[position] for position in sorted(users)]
+
+
+def get_id_set_index(id_set: dict) -> IdSetIndex:
+    """
+    Returns the index of the id_set. The index is built on the first call for the id_set object, and shared by the next
+    calls, unless entities were added or removed from the id_set since.
+    """
+    index = _ID_SET_INDEXES.get(id(id_set))
+    if index is None or index.id_set is not id_set or index.sizes != IdSetIndex.get_id_set_sizes(id_set):
+        index = IdSetIndex(id_set)
+        _ID_SET_INDEXES[id(id_set)] = index
+    return index
+
+
+def benchmark(id_set_path: str, lookups: int):
+    """Compares the linear id_set lookups of collect_tests to the lookups of the index, on the given id_set"""
+    from Tests.scripts.collect_tests_and_content_packs import extract_matching_object_from_id_set
+
+    with open(id_set_path, 'r') as id_set_file:
+        id_set = json.load(id_set_file)
+
+    start_time = time.time()
+    index = IdSetIndex(id_set)
+    print(f'Built the index in {time.time() - start_time:.3f} seconds')
+
+    for entity_type in ['integrations', 'scripts', 'playbooks', 'TestPlaybooks']:
+        entities = id_set.get(entity_type, [])
+        if not entities:
+            continue
+        entity_ids = [next(iter(entity)) for entity in random.choices(entities, k=lookups)]
+
+        start_time = time.time()
+        linear_results = [extract_matching_object_from_id_set(entity_id, entities, '6.5.0') for entity_id in entity_ids]
+        linear_duration = time.time() - start_time
+
+        start_time = time.time()
+        index_results = [index.get_matching_object(entity_type, entity_id, '6.5.0') for entity_id in entity_ids]
+        index_duration = time.time() - start_time
+
+        assert linear_results == index_results
+        print(f'{lookups} {entity_type} lookups: linear scan {linear_duration:.3f} seconds, '
+              f'index {index_duration:.3f} seconds')
+
+    commands = [command for integration in id_set.get('integrations', [])
+                for command in next(iter(integration.values())).get('commands', [])]
+    commands = random.sample(commands, min(lookups, len(commands)))
+    start_time = time.time()
+    linear_users = [
+        [test_playbook_id for test_playbook in id_set.get('TestPlaybooks', [])
+         for test_playbook_id, test_playbook_data in test_playbook.items()
+         if command in test_playbook_data.get('command_to_integration', {})]
+        for command in commands
+    ]
+    linear_duration = time.time() - start_time
+    start_time = time.time()
+    index_users = [[test_playbook_id for test_playbook_id, _ in
+                    index.get_users('TestPlaybooks', 'command_to_integration', [command])]
+                   for command in commands]
+    index_duration = time.time() - start_time
+    assert linear_users == index_users
+    print(f'{len(commands)} test playbooks by command lookups: linear scan {linear_duration:.3f} seconds, '
+          f'index {index_duration:.3f} seconds')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the id_set index lookups against linear scans.')
+    parser.add_argument('-i', '--id_set_path', help='The path of the id_set.json', required=True)
+    parser.add_argument('-n', '--lookups', type=int, default=1000, help='The number of lookups of each type')
+    options = parser.parse_args()
+    benchmark(options.id_set_path, options.lookups)
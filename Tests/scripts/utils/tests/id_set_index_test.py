@@ -0,0 +1,126 @@
+import json
+import random
+
+import pytest
+
+from Tests.scripts.collect_tests_and_content_packs import extract_matching_object_from_id_set
+from Tests.scripts.utils.id_set_index import IdSetIndex, get_id_set_index
+
+with open('Tests/scripts/infrastructure_tests/tests_data/mock_id_set.json', 'r') as mock_id_set_f:
+    MOCK_ID_SET = json.load(mock_id_set_f)
+
+ID_SET = {
+    'integrations': [
+        {'integration_a': {'name': 'Integration A', 'commands': ['a-cmd'], 'toversion': '5.9.9'}},
+        {'integration_a': {'name': 'Integration A', 'commands': ['a-cmd'], 'fromversion': '6.0.0'}},
+    ],
+    'scripts': [
+        {'script_a': {'name': 'ScriptA', 'script_executions': ['ScriptB'], 'depends_on': ['a-cmd']}},
+        {'script_b': {'name': 'ScriptB'}},
+    ],
+    'playbooks': [],
+    'TestPlaybooks': [
+        {'test_a': {'name': 'Test A', 'implementing_scripts': ['ScriptA'], 'command_to_integration': {'a-cmd': ''}}},
+        {'test_b': {'name': 'Test B', 'implementing_scripts': ['ScriptB', 'ScriptA']}},
+        {'test_c': {'name': 'test_a', 'implementing_playbooks': ['PlaybookA']}},
+    ],
+    'Packs': {'PackA': {}},
+}
+
+
+@pytest.mark.parametrize('entity_type, obj_id, server_version, expected_index', [
+    ('integrations', 'integration_a', '5.5.0', 0),
+    ('integrations', 'integration_a', '6.5.0', 1),
+    ('integrations', 'Integration A', '6.5.0', 1),
+    ('integrations', 'integration_b', '6.5.0', None),
+    ('TestPlaybooks', 'test_a', '6.5.0', 0),
+    ('TestPlaybooks', 'Test B', '6.5.0', 1),
+])
+def test_get_matching_object(entity_type, obj_id, server_version, expected_index):
+    """
+    Given:
+        - An entity id or name, and a server version
+    When:
+        - Getting the matching object from the index
+    Then:
+        - The first entity by the id_set order with the id or name, that is runnable in the server version is returned,
+          the same as the linear scan returns
+    """
+    entities = ID_SET[entity_type]
+    expected = None if expected_index is None else list(entities[expected_index].values())[0]
+    assert IdSetIndex(ID_SET).get_matching_object(entity_type, obj_id, server_version) is expected
+    assert extract_matching_object_from_id_set(obj_id, entities, server_version) is expected
+
+
+def test_get_matching_object_same_as_linear_scan():
+    """
+    Given:
+        - The mock id_set
+    When:
+        - Getting the matching objects of random ids and names of its entities
+    Then:
+        - The index returns the same objects as the linear scan
+    """
+    index = IdSetIndex(MOCK_ID_SET)
+    for entity_type in ['integrations', 'scripts', 'playbooks', 'TestPlaybooks']:
+        entities = MOCK_ID_SET[entity_type]
+        for entity in random.sample(entities, min(50, len(entities))):
+            entity_id, entity_data = list(entity.items())[0]
+            for obj_id in [entity_id, entity_data.get('name')]:
+                for server_version in ['0', '5.0.0', '6.5.0']:
+                    assert index.get_matching_object(entity_type, obj_id, server_version) is \
+                        extract_matching_object_from_id_set(obj_id, entities, server_version)
+
+
+def test_get_users():
+    """
+    Given:
+        - Scripts used by test playbooks
+    When:
+        - Getting the test playbooks using the scripts
+    Then:
+        - Each test playbook using any of the scripts is returned once, by the id_set order
+    """
+    index = IdSetIndex(ID_SET)
+    users = index.get_users('TestPlaybooks', 'implementing_scripts', ['ScriptA', 'ScriptB'])
+    assert [test_playbook_id for test_playbook_id, _ in users] == ['test_a', 'test_b']
+    assert index.get_users('TestPlaybooks', 'command_to_integration', ['a-cmd'])[0][0] == 'test_a'
+    assert index.get_users('scripts', 'script_executions', ['ScriptB'])[0][0] == 'script_a'
+    assert index.get_users('TestPlaybooks', 'implementing_scripts', ['ScriptC']) == []
+    assert index.get_users_by_fields('TestPlaybooks', {'implementing_playbooks': ['PlaybookA'],
+                                                       'command_to_integration': ['a-cmd']}) == \
+        [('test_a', ID_SET['TestPlaybooks'][0]['test_a']), ('test_c', ID_SET['TestPlaybooks'][2]['test_c'])]
+
+
+def test_get_by_id():
+    """
+    Given:
+        - A test playbook whose name is the id of another test playbook
+    When:
+        - Getting the test playbook by id
+    Then:
+        - Only the test playbook with the id is returned
+    """
+    index = IdSetIndex(ID_SET)
+    assert index.get_by_id('TestPlaybooks', 'test_a') == [ID_SET['TestPlaybooks'][0]['test_a']]
+    assert index.get_first_by_id('integrations', 'integration_a') is ID_SET['integrations'][0]['integration_a']
+    assert index.get_first_by_id('integrations', 'Integration A') is None
+
+
+def test_get_id_set_index():
+    """
+    Given:
+        - An id_set
+    When:
+        - Getting its index twice, and again after an entity was added to it
+    Then:
+        - The index is shared until the id_set entities changed
+    """
+    id_set = json.loads(json.dumps(ID_SET))
+    index = get_id_set_index(id_set)
+    assert get_id_set_index(id_set) is index
+    id_set['scripts'].append({'script_c': {'name': 'ScriptC', 'script_executions': ['ScriptB']}})
+    new_index = get_id_set_index(id_set)
+    assert new_index is not index
+    assert [script_id for script_id, _ in new_index.get_users('scripts', 'script_executions', ['ScriptB'])] == \
+        ['script_a', 'script_c']